@@ -13,8 +13,19 @@ import json
 from analyze_duplicates import DuplicateAnalyzer
 from vcard_validator import VCardStandardsValidator
 from vcard_soft_compliance import SoftComplianceChecker
+from merge_accumulator import MergeAccumulator
 import re
 
+# Accumulator property -> merge_stats['data_preserved'] counter
+PRESERVED_STATS = {
+    'email': 'emails',
+    'tel': 'phones',
+    'adr': 'addresses',
+    'url': 'urls',
+    'note': 'notes',
+    'org': 'organizations'
+}
+
 class AdvancedDeduplicator:
     """Advanced deduplication with intelligent merging"""
     
@@ -93,9 +104,11 @@ class AdvancedDeduplicator:
         # Use most complete vCard as base
         base_vcard = scored_vcards[0][1]
         
-        # Merge data from other vCards
-        for score, vcard in scored_vcards[1:]:
-            self._merge_into_base(base_vcard, vcard)
+        # Merge data from other vCards (base merge keys computed once)
+        accumulator = self._accumulator(base_vcard)
+        accumulator.absorb_all(vcard for score, vcard in scored_vcards[1:])
+        self._record_preserved(accumulator)
+        base_vcard = accumulator.result()
         
         self.merge_stats['groups_processed'] += 1
         self.merge_stats['contacts_merged'] += len(vcard_group) - 1
@@ -105,125 +118,21 @@ class AdvancedDeduplicator:
     
     def _merge_into_base(self, base, source):
         """Merge source vCard data into base vCard"""
-        
-        # Merge names (improve if base is incomplete)
-        if hasattr(source, 'n') and source.n.value:
-            if not hasattr(base, 'n') or not base.n.value:
-                base.add('n')
-                base.n.value = source.n.value
-            else:
-                # Merge name components
-                base_n = base.n.value
-                source_n = source.n.value
-                if not base_n.given and source_n.given:
-                    base_n.given = source_n.given
-                if not base_n.family and source_n.family:
-                    base_n.family = source_n.family
-                if not base_n.additional and source_n.additional:
-                    base_n.additional = source_n.additional
-        
-        # Merge emails (unique)
-        if hasattr(source, 'email_list'):
-            existing_emails = set()
-            if hasattr(base, 'email_list'):
-                existing_emails = {self.analyzer.normalize_email(e.value) for e in base.email_list}
-            
-            for email in source.email_list:
-                normalized = self.analyzer.normalize_email(email.value)
-                if normalized not in existing_emails:
-                    new_email = base.add('email')
-                    new_email.value = email.value
-                    if hasattr(email, 'type_param'):
-                        new_email.type_param = email.type_param
-                    existing_emails.add(normalized)
-                    self.merge_stats['data_preserved']['emails'] += 1
-        
-        # Merge phones (unique)
-        if hasattr(source, 'tel_list'):
-            existing_phones = set()
-            if hasattr(base, 'tel_list'):
-                existing_phones = {self.analyzer.normalize_phone(t.value) for t in base.tel_list}
-            
-            for tel in source.tel_list:
-                normalized = self.analyzer.normalize_phone(tel.value)
-                if normalized and normalized not in existing_phones:
-                    new_tel = base.add('tel')
-                    new_tel.value = tel.value
-                    if hasattr(tel, 'type_param'):
-                        new_tel.type_param = tel.type_param
-                    existing_phones.add(normalized)
-                    self.merge_stats['data_preserved']['phones'] += 1
-        
-        # Merge addresses
-        if hasattr(source, 'adr_list'):
-            existing_addrs = set()
-            if hasattr(base, 'adr_list'):
-                for adr in base.adr_list:
-                    if adr.value:
-                        addr_str = str(adr.value).lower()
-                        existing_addrs.add(addr_str)
-            
-            for adr in source.adr_list:
-                if adr.value:
-                    addr_str = str(adr.value).lower()
-                    if addr_str not in existing_addrs:
-                        new_adr = base.add('adr')
-                        new_adr.value = adr.value
-                        if hasattr(adr, 'type_param'):
-                            new_adr.type_param = adr.type_param
-                        existing_addrs.add(addr_str)
-                        self.merge_stats['data_preserved']['addresses'] += 1
-        
-        # Merge organization (if base doesn't have one)
-        if hasattr(source, 'org') and source.org.value:
-            if not hasattr(base, 'org') or not base.org.value:
-                base.add('org')
-                base.org.value = source.org.value
-                self.merge_stats['data_preserved']['organizations'] += 1
-        
-        # Merge title (if base doesn't have one)
-        if hasattr(source, 'title') and source.title.value:
-            if not hasattr(base, 'title') or not base.title.value:
-                base.add('title')
-                base.title.value = source.title.value
-        
-        # Merge URLs (unique)
-        if hasattr(source, 'url_list'):
-            existing_urls = set()
-            if hasattr(base, 'url_list'):
-                existing_urls = {u.value.lower() for u in base.url_list}
-            
-            for url in source.url_list:
-                if url.value.lower() not in existing_urls:
-                    new_url = base.add('url')
-                    new_url.value = url.value
-                    existing_urls.add(url.value.lower())
-                    self.merge_stats['data_preserved']['urls'] += 1
-        
-        # Merge notes (append unique content)
-        if hasattr(source, 'note') and source.note.value:
-            source_note = source.note.value.strip()
-            if source_note:
-                if hasattr(base, 'note') and base.note.value:
-                    if source_note not in base.note.value:
-                        base.note.value += f"\n{source_note}"
-                        self.merge_stats['data_preserved']['notes'] += 1
-                else:
-                    base.add('note')
-                    base.note.value = source_note
-                    self.merge_stats['data_preserved']['notes'] += 1
-        
-        # Keep photo from source if base doesn't have one
-        if hasattr(source, 'photo') and not hasattr(base, 'photo'):
-            base.add('photo')
-            base.photo.value = source.photo.value
-            if hasattr(source.photo, 'encoding_param'):
-                base.photo.encoding_param = source.photo.encoding_param
-            if hasattr(source.photo, 'type_param'):
-                base.photo.type_param = source.photo.type_param
+        accumulator = self._accumulator(base)
+        accumulator.absorb(source)
+        self._record_preserved(accumulator)
+    
+    def _accumulator(self, base):
+        """Accumulator with this deduplicator's merge rules (names, addresses, photo)"""
+        return MergeAccumulator(base, merge_names=True, merge_photo=True)
     
-    def deduplicate_file(self, input_path, output_path):
-        """Deduplicate a vCard file"""
+    def _record_preserved(self, accumulator):
+        preserved = self.merge_stats['data_preserved']
+        for name, stat in PRESERVED_STATS.items():
+            preserved[stat] += accumulator.added[name]
+    
+    def deduplicate_file(self, input_path, output_path, workers=1):
+        """Deduplicate a vCard file (workers > 1 scores fuzzy candidates in parallel)"""
         print("\nAdvanced vCard Deduplication")
         print("=" * 80)
         
@@ -242,7 +151,7 @@ class AdvancedDeduplicator:
         
         # Find duplicates
         print("\n2. Finding duplicates...")
-        duplicate_groups = self.analyzer.find_duplicates(all_vcards)
+        duplicate_groups = self.analyzer.find_duplicates(all_vcards, workers=workers)
         print(f"   Found {len(duplicate_groups)} duplicate groups")
         
         # Create mapping of vCards to process
@@ -340,9 +249,17 @@ class AdvancedDeduplicator:
 
 def main():
     """Run advanced deduplication on merged database"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Deduplicate a merged vCard database")
+    parser.add_argument("input_file", nargs="?", default="data/MERGED_All_Contacts_20250606_123737.vcf",
+                        help="vCard file to deduplicate (default: most recent merged file)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Score candidate blocks on this many processes (default: 1, sequential)")
+    args = parser.parse_args()
     
     # Input and output paths
-    input_file = "data/MERGED_All_Contacts_20250606_123737.vcf"
+    input_file = args.input_file
     date_str = datetime.now().strftime('%Y%m%d_%H%M%S')
     output_file = f"data/FINAL_Deduplicated_Contacts_{date_str}.vcf"
     
@@ -352,7 +269,7 @@ def main():
     
     # Run deduplication
     deduplicator = AdvancedDeduplicator()
-    final_count = deduplicator.deduplicate_file(input_file, output_file)
+    final_count = deduplicator.deduplicate_file(input_file, output_file, workers=args.workers)
     
     print(f"\n🎉 Deduplication complete!")
     print(f"   Your cleaned contact database has {final_count:,} unique contacts")
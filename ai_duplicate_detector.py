@@ -13,8 +13,10 @@ from datetime import datetime
 from typing import Dict, List, Any, Tuple, Optional
 from dataclasses import dataclass
 import vobject
-from difflib import SequenceMatcher
 from contact_intelligence import ContactIntelligenceEngine
+from name_phonetics import PhoneticIndex, name_phonetic_keys, name_phonetic_signature
+from match_rules import compile_match_rules, match_profile
+from user_preferences import UserPreferences
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -49,12 +51,16 @@ class CrossDatabaseDuplicateDetector:
     
     Uses multiple strategies:
     1. Exact matching (same name + email/phone)
-    2. Fuzzy matching (similar names + overlapping info)
+    2. Fuzzy matching (similar or same-sounding names + overlapping info)
     3. AI analysis for complex cases
+    
+    Only pairs sharing a phonetic name key, email or phone are compared;
+    pairs are scored with the shared match rules (see match_rules.py).
     """
     
-    def __init__(self, use_ai: bool = True):
+    def __init__(self, use_ai: bool = True, preferences: UserPreferences = None):
         self.use_ai = use_ai
+        self.match_engine = compile_match_rules(preferences)
         self.ai_engine = ContactIntelligenceEngine(use_openai=use_ai) if use_ai else None
         self.contacts_by_database = {}
         self.all_contacts = []
@@ -169,6 +175,10 @@ class CrossDatabaseDuplicateDetector:
             'note': ''
         }
         
+        # Phonetic name keys (blocking) and signature (scoring)
+        data['phonetic_keys'] = name_phonetic_keys(data['name'])
+        data['phonetic_signature'] = name_phonetic_signature(data['name'])
+        
         # Extract emails
         if hasattr(vcard, 'email_list'):
             data['emails'] = [email.value.lower() for email in vcard.email_list]
@@ -189,6 +199,10 @@ class CrossDatabaseDuplicateDetector:
         if hasattr(vcard, 'note'):
             data['note'] = vcard.note.value
         
+        # Normalized matching data for the match rules
+        data['profile'] = match_profile(data['name'], data['emails'], data['phones'],
+                                        ' '.join(data['organizations']))
+        
         return data
     
     def _find_potential_duplicates(self) -> List[DuplicateMatch]:
@@ -197,86 +211,59 @@ class CrossDatabaseDuplicateDetector:
         
         potential_duplicates = []
         
-        # Compare each contact with all others
-        for i, contact1 in enumerate(self.all_contacts):
-            for j, contact2 in enumerate(self.all_contacts[i+1:], i+1):
-                # Skip same database comparisons for now (focus on cross-database)
-                if contact1['source_database'] == contact2['source_database']:
-                    continue
-                
-                match = self._compare_contacts(contact1, contact2)
-                if match:
-                    potential_duplicates.append(match)
+        # Block on phonetic name keys plus exact email/phone values; every
+        # match rule needs a similar name or shared contact info
+        block_index = PhoneticIndex()
+        for i, contact in enumerate(self.all_contacts):
+            data = contact['data']
+            keys = set(data['phonetic_keys'])
+            keys.update(f"EMAIL:{email}" for email in data['emails'])
+            keys.update(f"TEL:{phone}" for phone in data['phones'])
+            block_index.add(i, keys=keys)
+        
+        candidate_pairs = sorted(block_index.candidate_pairs())
+        for i, j in candidate_pairs:
+            contact1 = self.all_contacts[i]
+            contact2 = self.all_contacts[j]
+            
+            # Skip same database comparisons for now (focus on cross-database)
+            if contact1['source_database'] == contact2['source_database']:
+                continue
+            
+            match = self._compare_contacts(contact1, contact2)
+            if match:
+                potential_duplicates.append(match)
         
-        logger.info(f"Found {len(potential_duplicates)} potential duplicate pairs")
+        logger.info(f"Compared {len(candidate_pairs)} candidate pairs, "
+                    f"found {len(potential_duplicates)} potential duplicate pairs")
         return potential_duplicates
     
     def _compare_contacts(self, contact1: Dict, contact2: Dict) -> Optional[DuplicateMatch]:
         """Compare two contacts for potential duplication"""
         
-        data1 = contact1['data']
-        data2 = contact2['data']
-        
-        matching_fields = []
-        conflicting_fields = []
-        
-        # Check name similarity
-        name_similarity = SequenceMatcher(None, data1['name'].lower(), data2['name'].lower()).ratio()
-        
-        # Check email overlap
-        email_overlap = set(data1['emails']) & set(data2['emails'])
-        
-        # Check phone overlap
-        phone_overlap = set(data1['phones']) & set(data2['phones'])
-        
-        # Determine match type and confidence
-        if email_overlap and name_similarity > 0.8:
-            # Strong match - same email and similar name
-            match_type = 'exact'
-            confidence = 0.95
-            matching_fields = ['email', 'name']
-        elif phone_overlap and name_similarity > 0.8:
-            # Strong match - same phone and similar name
-            match_type = 'exact'
-            confidence = 0.90
-            matching_fields = ['phone', 'name']
-        elif name_similarity > 0.9 and (email_overlap or phone_overlap):
-            # Very similar names with some contact overlap
-            match_type = 'fuzzy'
-            confidence = 0.85
-            matching_fields = ['name']
-            if email_overlap:
-                matching_fields.append('email')
-            if phone_overlap:
-                matching_fields.append('phone')
-        elif name_similarity > 0.95:
-            # Very similar names but no contact overlap - potential conflict
-            match_type = 'conflict'
-            confidence = 0.75
-            matching_fields = ['name']
-            conflicting_fields = ['contact_info']
-        else:
+        match = self.match_engine.score(contact1['data']['profile'], contact2['data']['profile'])
+        if match is None:
             # No significant match
             return None
         
-        # Determine recommended action
-        if match_type == 'exact':
-            recommended_action = 'auto_merge'
-        elif match_type == 'fuzzy':
-            recommended_action = 'review_merge'
-        else:
-            recommended_action = 'manual_review'
+        recommended_action = self.match_engine.action(match)
+        if recommended_action == 'keep_separate':
+            return None
         
-        reasoning = f"Name similarity: {name_similarity:.2f}, Email overlap: {len(email_overlap)}, Phone overlap: {len(phone_overlap)}"
+        features = match.features
+        conflicting_fields = ['contact_info'] if match.match_type == 'conflict' else []
+        reasoning = (f"Rule: {match.rule}, Name similarity: {features['name_similarity']:.2f}, "
+                     f"Sounds alike: {features['sounds_alike']}, "
+                     f"Email overlap: {features['email_overlap']}, Phone overlap: {features['phone_overlap']}")
         
         return DuplicateMatch(
             contact1_id=contact1['id'],
             contact2_id=contact2['id'],
             contact1_source=contact1['source_database'],
             contact2_source=contact2['source_database'],
-            match_type=match_type,
-            confidence=confidence,
-            matching_fields=matching_fields,
+            match_type=match.match_type,
+            confidence=match.confidence,
+            matching_fields=match.fields,
             conflicting_fields=conflicting_fields,
             recommended_action=recommended_action,
             reasoning=reasoning
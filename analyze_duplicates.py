@@ -4,18 +4,50 @@ Analyze the merged database for potential duplicates using various matching stra
 """
 
 import os
-import re
 from collections import defaultdict
 import vobject
-import phonenumbers
 from difflib import SequenceMatcher
 import json
 from datetime import datetime
+from functools import partial
+import contact_normalization
+from name_phonetics import PhoneticIndex, name_phonetic_keys, name_phonetic_signature
+from match_rules import compile_match_rules, match_profile
+from parallel_dedup import build_blocks, score_blocks_parallel
+from vcard_tokenizer import iter_cards
+
+DEFAULT_MATCH_ENGINE = compile_match_rules()
+
+
+def compact_contact(index, features):
+    """Picklable (index, MatchProfile) tuple for process pool workers"""
+    return (index, features['profile'])
+
+
+def score_fuzzy_pair(a, b, engine=None):
+    """
+    Score two compact contacts with the fuzzy stage of find_duplicates().
+    
+    Returns 'fuzzy' (similar names), 'phonetic' (names that sound alike but
+    are not similar) or None. Rules that do not use the name (shared email
+    or phone alone) are left to the email and phone stages. Module level so
+    process pool workers can use it.
+    """
+    profile1, profile2 = a[1], b[1]
+    engine = engine or DEFAULT_MATCH_ENGINE
+    match = engine.score(profile1, profile2)
+    if match is None or engine.action(match) == 'keep_separate' or 'name' not in match.fields:
+        return None
+    if match.features.name_similarity_exceeds(engine.thresholds['fuzzy_name']):
+        return 'fuzzy'
+    return 'phonetic' if match.features['sounds_alike'] else 'fuzzy'
+
 
 class DuplicateAnalyzer:
     """Analyze vCard database for potential duplicates"""
     
-    def __init__(self):
+    def __init__(self, preferences=None):
+        self.match_engine = compile_match_rules(preferences) if preferences else DEFAULT_MATCH_ENGINE
         self.potential_duplicates = defaultdict(list)
         self.stats = {
             'total_contacts': 0,
@@ -24,35 +56,23 @@ class DuplicateAnalyzer:
             'email_matches': 0,
             'phone_matches': 0,
             'organization_matches': 0,
-            'fuzzy_matches': 0
+            'fuzzy_matches': 0,
+            'phonetic_matches': 0,
+            'fuzzy_pairs_compared': 0,
+            'pairs_compared': 0
         }
     
     def normalize_name(self, name):
-        """Normalize name for comparison"""
-        if not name:
-            return ""
-        # Remove extra spaces, convert to lowercase
-        name = re.sub(r'\s+', ' ', name.lower().strip())
-        # Remove common titles
-        titles = ['dr', 'mr', 'mrs', 'ms', 'prof', 'phd', 'md', 'esq', 'jr', 'sr', 'ii', 'iii']
-        for title in titles:
-            name = re.sub(rf'\b{title}\b\.?', '', name)
-        return name.strip()
+        """Normalize name for comparison (titles removed, umlauts folded)"""
+        return contact_normalization.normalize_name(name)
     
     def normalize_phone(self, phone_str):
-        """Normalize phone number for comparison"""
-        try:
-            parsed = phonenumbers.parse(phone_str, 'US')
-            if phonenumbers.is_valid_number(parsed):
-                return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
-        except:
-            pass
-        # Fallback: just keep digits
-        return re.sub(r'\D', '', phone_str)
+        """Normalize phone number for comparison (E.164 or digits)"""
+        return contact_normalization.normalize_phone(phone_str)
     
     def normalize_email(self, email):
-        """Normalize email for comparison"""
-        return email.lower().strip()
+        """Normalize email for comparison (Gmail dots/tags removed)"""
+        return contact_normalization.normalize_email(email)
     
     def name_similarity(self, name1, name2):
         """Calculate name similarity (0-1)"""
@@ -68,12 +88,16 @@ class DuplicateAnalyzer:
             'emails': [],
             'phones': [],
             'org': '',
-            'urls': []
+            'urls': [],
+            'phonetic_keys': frozenset(),
+            'phonetic_signature': ()
         }
         
-        # Full name
+        # Full name (phonetic keys computed once here, reused for blocking and scoring)
         if hasattr(vcard, 'fn') and vcard.fn.value:
             features['fn'] = self.normalize_name(vcard.fn.value)
+            features['phonetic_keys'] = name_phonetic_keys(vcard.fn.value)
+            features['phonetic_signature'] = name_phonetic_signature(vcard.fn.value)
         
         # Name parts
         if hasattr(vcard, 'n') and vcard.n.value:
@@ -112,11 +136,28 @@ class DuplicateAnalyzer:
                 if url.value:
                     features['urls'].append(url.value.lower())
         
+        # Normalized matching data for the shared match rules
+        features['profile'] = match_profile(
+            vcard.fn.value if hasattr(vcard, 'fn') else '',
+            [email.value for email in getattr(vcard, 'email_list', []) if email.value],
+            [tel.value for tel in getattr(vcard, 'tel_list', []) if tel.value],
+            features['org']
+        )
+        
         return features
     
-    def find_duplicates(self, vcards):
-        """Find potential duplicates in a list of vCards"""
-        print(f"Analyzing {len(vcards)} contacts for duplicates...")
+    def find_duplicates(self, vcards, workers=1):
+        """
+        Find potential duplicates in a list of vCards.
+        
+        Each group is a contact plus the later contacts sharing its email,
+        phone or exact name - or, if there are none, the ones matching its
+        name fuzzily. With workers > 1 the fuzzy pairs are scored up front
+        on a process pool (see _score_fuzzy_pairs); the groups are the same
+        for any number of workers.
+        """
+        suffix = f" ({workers} workers)" if workers > 1 else ""
+        print(f"Analyzing {len(vcards)} contacts for duplicates{suffix}...")
         self.stats['total_contacts'] = len(vcards)
         
         # Extract features for all contacts
@@ -134,10 +175,15 @@ class DuplicateAnalyzer:
         phone_index = defaultdict(list)
         name_index = defaultdict(list)
         org_index = defaultdict(list)
+        phonetic_index = PhoneticIndex()
         
         for contact in contacts:
             features = contact['features']
             
+            # Index by phonetic name keys (blocking for fuzzy matching)
+            if features['fn']:
+                phonetic_index.add(contact['index'], keys=features['phonetic_keys'])
+            
             # Index by email
             for email in features['emails']:
                 email_index[email].append(contact)
@@ -154,6 +200,9 @@ class DuplicateAnalyzer:
             if features['org']:
                 org_index[features['org']].append(contact)
         
+        # Fuzzy pairs scored in parallel, looked up in contact order below
+        fuzzy_reasons = self._score_fuzzy_pairs(contacts, workers) if workers > 1 else None
+        
         # Find duplicates
         duplicate_groups = []
         processed = set()
@@ -192,62 +241,72 @@ class DuplicateAnalyzer:
                         processed.add(match['index'])
                         self.stats['exact_name_matches'] += 1
             
-            # Fuzzy name matching for remaining contacts
+            # Fuzzy name matching for remaining contacts, only within phonetic blocks
             if len(duplicate_group) == 1 and features['fn']:
-                for j, other in enumerate(contacts):
+                for j in sorted(phonetic_index.candidates(i)):
                     if j <= i or j in processed:
                         continue
                     
+                    other = contacts[j]
                     other_features = other['features']
+                    self.stats['fuzzy_pairs_compared'] += 1
                     
-                    # Check name similarity
+                    # Shared match rules: similar or same-sounding name plus supporting data
                     if other_features['fn']:
-                        similarity = self.name_similarity(features['fn'], other_features['fn'])
-                        if similarity > 0.85:  # High similarity threshold
-                            # Additional checks
-                            has_common_data = False
-                            
-                            # Check if they share any email domain
-                            if features['emails'] and other_features['emails']:
-                                domains1 = {e.split('@')[1] for e in features['emails'] if '@' in e}
-                                domains2 = {e.split('@')[1] for e in other_features['emails'] if '@' in e}
-                                if domains1 & domains2:
-                                    has_common_data = True
-                            
-                            # Check if they share organization
-                            if features['org'] and other_features['org']:
-                                if self.name_similarity(features['org'], other_features['org']) > 0.8:
-                                    has_common_data = True
-                            
-                            # Check if phone numbers are similar (last 7 digits)
-                            if features['phones'] and other_features['phones']:
-                                for p1 in features['phones']:
-                                    for p2 in other_features['phones']:
-                                        if len(p1) >= 7 and len(p2) >= 7:
-                                            if p1[-7:] == p2[-7:]:
-                                                has_common_data = True
-                            
-                            if has_common_data or similarity > 0.95:
-                                duplicate_group.append(other)
-                                processed.add(j)
-                                self.stats['fuzzy_matches'] += 1
+                        if fuzzy_reasons is None:
+                            self.stats['pairs_compared'] += 1
+                            reason = score_fuzzy_pair(compact_contact(i, features),
+                                                      compact_contact(j, other_features), self.match_engine)
+                        else:
+                            reason = fuzzy_reasons.get((i, j))
+                        if reason:
+                            duplicate_group.append(other)
+                            processed.add(j)
+                            self.stats['fuzzy_matches'] += 1
+                            if reason == 'phonetic':
+                                self.stats['phonetic_matches'] += 1
             
             if len(duplicate_group) > 1:
                 duplicate_groups.append(duplicate_group)
         
         return duplicate_groups
     
-    def analyze_file(self, filepath):
-        """Analyze a vCard file for duplicates"""
+    def _score_fuzzy_pairs(self, contacts, workers):
+        """
+        Fuzzy reason of every named pair sharing a phonetic name key, scored
+        on a process pool: {(i, j): 'fuzzy' | 'phonetic'} with i < j.
+        
+        Workers receive compact tuples (see compact_contact). This scores
+        the pairs find_duplicates() would skip as well, so it only pays off
+        with several workers.
+        """
+        compact = [compact_contact(contact['index'], contact['features']) for contact in contacts]
+        keys_by_contact = [
+            contact['features']['phonetic_keys'] if contact['features']['fn'] else ()
+            for contact in contacts
+        ]
+        edges, compared = score_blocks_parallel(
+            build_blocks(compact, keys_by_contact),
+            partial(score_fuzzy_pair, engine=self.match_engine),
+            workers=workers
+        )
+        self.stats['pairs_compared'] += compared
+        return {(i, j): reason for i, j, reason in edges}
+    
+    def analyze_file(self, filepath, workers=1, tokenizer=False):
+        """Analyze a vCard file for duplicates (tokenizer=True reads with vcard_tokenizer)"""
         print(f"\nDuplicate Analysis for: {filepath}")
         print("=" * 80)
         
         # Load vCards
-        with open(filepath, 'r', encoding='utf-8') as f:
-            vcards = list(vobject.readComponents(f.read()))
+        if tokenizer:
+            vcards = list(iter_cards(filepath))
+        else:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                vcards = list(vobject.readComponents(f.read()))
         
         # Find duplicates
-        duplicate_groups = self.find_duplicates(vcards)
+        duplicate_groups = self.find_duplicates(vcards, workers=workers)
         
         # Generate report
         print(f"\n📊 ANALYSIS RESULTS")
@@ -260,6 +319,10 @@ class DuplicateAnalyzer:
         print(f"  Email matches: {self.stats['email_matches']}")
         print(f"  Phone matches: {self.stats['phone_matches']}")
         print(f"  Fuzzy name matches: {self.stats['fuzzy_matches']}")
+        print(f"    of which phonetic only: {self.stats['phonetic_matches']}")
+        print(f"  Fuzzy pairs compared: {self.stats['fuzzy_pairs_compared']}")
+        if self.stats['pairs_compared']:
+            print(f"  Pairs scored by match rules: {self.stats['pairs_compared']}")
         
         # Show sample duplicates
         if duplicate_groups:
@@ -314,16 +377,25 @@ class DuplicateAnalyzer:
 
 def main():
     """Analyze the merged database for duplicates"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Analyze a vCard file for potential duplicates")
+    parser.add_argument("input_file", nargs="?", default="data/MERGED_All_Contacts_20250606_123737.vcf",
+                        help="vCard file to analyze (default: most recent merged file)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Score candidate blocks on this many processes (default: 1, sequential)")
+    parser.add_argument("--tokenizer", action="store_true",
+                        help="Read cards with the lightweight vcard_tokenizer instead of vobject")
+    args = parser.parse_args()
     
-    # Use the most recent merged file
-    merged_file = "data/MERGED_All_Contacts_20250606_123737.vcf"
+    merged_file = args.input_file
     
     if not os.path.exists(merged_file):
         print(f"Error: Merged file not found: {merged_file}")
         return
     
     analyzer = DuplicateAnalyzer()
-    duplicate_groups = analyzer.analyze_file(merged_file)
+    duplicate_groups = analyzer.analyze_file(merged_file, workers=args.workers, tokenizer=args.tokenizer)
     
     if duplicate_groups:
         print(f"\n⚠️  Found {len(duplicate_groups)} groups of potential duplicates")
@@ -9,9 +9,10 @@ import vobject
 from collections import defaultdict
 import json
 from datetime import datetime
+from vcard_tokenizer import iter_cards
 
-def analyze_email_distribution(filepath):
-    """Analyze email address distribution in a vCard file"""
+def analyze_email_distribution(filepath, tokenizer=False):
+    """Analyze email address distribution in a vCard file (tokenizer=True reads with vcard_tokenizer)"""
     
     print(f"\nAnalyzing: {os.path.basename(filepath)}")
     print("-" * 60)
@@ -22,8 +23,11 @@ def analyze_email_distribution(filepath):
     total_emails = 0
     
     # Load vCards
-    with open(filepath, 'r', encoding='utf-8') as f:
-        vcards = list(vobject.readComponents(f.read()))
+    if tokenizer:
+        vcards = iter_cards(filepath)
+    else:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            vcards = list(vobject.readComponents(f.read()))
     
     # Analyze each vCard
     for vcard in vcards:
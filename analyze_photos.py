@@ -4,9 +4,9 @@ Analyze photos in the master phonebook
 """
 
 import vobject
-import base64
 import os
 from collections import Counter
+from photo_probe import probe_photo
 
 def analyze_photos():
     """Analyze photos in the phonebook"""
@@ -37,6 +37,7 @@ def analyze_photos():
         'without_photos': 0,
         'photo_sizes': [],
         'photo_formats': Counter(),
+        'photo_dimensions': [],
         'contacts_with_photos': []
     }
     
@@ -48,51 +49,22 @@ def analyze_photos():
         if hasattr(contact, 'photo'):
             has_photo = True
             try:
-                photo_data = contact.photo.value
-                
-                # Try to determine format and size
-                if isinstance(photo_data, str):
-                    # Base64 encoded
-                    try:
-                        decoded = base64.b64decode(photo_data)
-                        size = len(decoded)
-                        photo_stats['photo_sizes'].append(size)
-                        
-                        # Try to detect format from data
-                        if decoded.startswith(b'\xff\xd8\xff'):
-                            photo_stats['photo_formats']['JPEG'] += 1
-                        elif decoded.startswith(b'\x89PNG'):
-                            photo_stats['photo_formats']['PNG'] += 1
-                        elif decoded.startswith(b'GIF'):
-                            photo_stats['photo_formats']['GIF'] += 1
-                        else:
-                            photo_stats['photo_formats']['Unknown'] += 1
-                            
-                    except Exception as e:
-                        photo_stats['photo_formats']['Invalid Base64'] += 1
-                        size = len(photo_data)
-                        photo_stats['photo_sizes'].append(size)
-                        
-                elif isinstance(photo_data, bytes):
-                    # Raw bytes
-                    size = len(photo_data)
-                    photo_stats['photo_sizes'].append(size)
-                    
-                    if photo_data.startswith(b'\xff\xd8\xff'):
-                        photo_stats['photo_formats']['JPEG'] += 1
-                    elif photo_data.startswith(b'\x89PNG'):
-                        photo_stats['photo_formats']['PNG'] += 1
-                    else:
-                        photo_stats['photo_formats']['Unknown'] += 1
+                # Format, dimensions and size from the photo header, without decoding it
+                info = probe_photo(contact.photo.value)
+                if info:
+                    size = info.size
+                    photo_stats['photo_formats'][info.format] += 1
+                    photo_stats['photo_dimensions'].append((info.width, info.height))
                 else:
-                    photo_stats['photo_formats']['Other'] += 1
-                    size = 0
-                    photo_stats['photo_sizes'].append(size)
+                    size = len(contact.photo.value or '')
+                    photo_stats['photo_formats']['Unknown'] += 1
+                photo_stats['photo_sizes'].append(size)
                 
                 photo_stats['contacts_with_photos'].append({
                     'name': contact_name,
                     'size_bytes': size,
-                    'size_kb': round(size / 1024, 1) if size > 0 else 0
+                    'size_kb': round(size / 1024, 1) if size > 0 else 0,
+                    'dimensions': f"{info.width}x{info.height}" if info else None
                 })
                     
             except Exception as e:
@@ -138,6 +110,11 @@ def analyze_photos():
         print(f"Average Photo Size: {photo_stats['avg_photo_size_kb']} KB")
         print(f"Largest Photo: {photo_stats['max_photo_size_kb']} KB")
         print(f"Smallest Photo: {photo_stats['min_photo_size_kb']} KB")
+        if photo_stats['photo_dimensions']:
+            small = sum(1 for w, h in photo_stats['photo_dimensions'] if min(w, h) < 200)
+            largest = max(photo_stats['photo_dimensions'], key=lambda d: d[0] * d[1])
+            print(f"Largest Dimensions: {largest[0]}x{largest[1]}")
+            print(f"Below 200px: {small}")
         
         print(f"\n🎨 PHOTO FORMATS")
         for format_type, count in photo_stats['photo_formats'].most_common():
@@ -150,7 +127,8 @@ def analyze_photos():
         
         for contact in sorted_photos[:10]:
             if contact.get('size_kb', 0) > 0:
-                print(f"  {contact['name']}: {contact['size_kb']} KB")
+                dimensions = f" ({contact['dimensions']})" if contact.get('dimensions') else ""
+                print(f"  {contact['name']}: {contact['size_kb']} KB{dimensions}")
             else:
                 print(f"  {contact['name']}: Photo present (size unknown)")
     
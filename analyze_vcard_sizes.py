@@ -3,6 +3,8 @@
 
 import re
 
+from vcard_stream import iter_vcard_blocks
+
 def analyze_vcard_sizes(filename):
     """Check each vCard size against iCloud limits"""
     
@@ -10,17 +12,16 @@ def analyze_vcard_sizes(filename):
     print(f"iCloud limits: Max 256KB per vCard, max 224KB per photo")
     print("="*60)
     
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Find all vCards
-    vcards = re.findall(r'BEGIN:VCARD.*?END:VCARD', content, re.DOTALL)
-    
     oversized_contacts = []
     photo_issues = []
     total_size = 0
+    count = 0
     
-    for i, vcard in enumerate(vcards):
+    # Stream the vCards, one card in memory at a time
+    for i, block in enumerate(iter_vcard_blocks(filename)):
+        vcard = block.text()
+        count += 1
+        
         # Calculate size in bytes
         vcard_size = len(vcard.encode('utf-8'))
         total_size += vcard_size
@@ -54,9 +55,9 @@ def analyze_vcard_sizes(filename):
                     })
     
     # Print results
-    print(f"\nTotal vCards: {len(vcards)}")
+    print(f"\nTotal vCards: {count}")
     print(f"Total file size: {total_size / 1024 / 1024:.1f} MB")
-    print(f"Average vCard size: {total_size / len(vcards) / 1024:.1f} KB")
+    print(f"Average vCard size: {total_size / max(count, 1) / 1024:.1f} KB")
     
     if oversized_contacts:
         print(f"\n❌ Found {len(oversized_contacts)} vCards exceeding 256KB limit:")
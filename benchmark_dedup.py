@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Dedup Benchmark - Throughput and quality of the duplicate detectors
+
+Generates N synthetic contacts with a known ground truth: a share of the
+people get one or two duplicate records with controlled damage
+
+- typos in the name
+- swapped name order (Huber Anna)
+- reformatted phone numbers (0664/123 45 67, 0043 664 ...)
+- Gmail dots and casing in emails
+- missing email, phone or organization
+
+and runs every detector on the same data:
+
+- DuplicateAnalyzer (analyze_duplicates.py)
+- IntelligentContactMerger (intelligent_merge.py)
+- CrossDatabaseDuplicateDetector (ai_duplicate_detector.py)
+
+For each detector and size it reports pairs compared, wall time, peak
+memory (tracemalloc), precision and recall over duplicate pairs.
+
+Originals are tagged with source 'sara', duplicates with 'iphone_contacts'
+or 'iphone_suggested'. The cross-database detector never compares records
+of the same source, so its recall is measured on cross-source pairs only.
+
+Usage:
+    python benchmark_dedup.py                      # 1k, 10k, 100k
+    python benchmark_dedup.py --sizes 1000 --detectors analyzer merger
+    python benchmark_dedup.py --json data/dedup_benchmark.json
+"""
+
+import io
+import json
+import logging
+import random
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from itertools import combinations
+
+import vobject
+
+GIVEN_NAMES = [
+    'Anna', 'Andreas', 'Barbara', 'Bernhard', 'Christian', 'Christina', 'Claudia', 'Daniel',
+    'David', 'Elisabeth', 'Eva', 'Florian', 'Franz', 'Georg', 'Gerhard', 'Hannah', 'Helmut',
+    'Johanna', 'Josef', 'Julia', 'Jürgen', 'Karin', 'Katharina', 'Klaus', 'Laura', 'Lena',
+    'Lukas', 'Manuel', 'Maria', 'Markus', 'Martin', 'Matthias', 'Michael', 'Monika', 'Nina',
+    'Patrick', 'Peter', 'Petra', 'Philipp', 'Raphael', 'Sabine', 'Sandra', 'Sarah', 'Sebastian',
+    'Simon', 'Sophie', 'Stefan', 'Susanne', 'Theresa', 'Thomas', 'Tobias', 'Ursula', 'Valentina',
+    'Verena', 'Wolfgang'
+]
+
+# Family names are composed from parts to get a realistic number of distinct names
+FAMILY_PREFIXES = [
+    'Aich', 'Bach', 'Berg', 'Brand', 'Brunn', 'Eben', 'Eder', 'Fisch', 'Gasser', 'Gruber',
+    'Hain', 'Hof', 'Holz', 'Kirch', 'Klein', 'Koll', 'Lang', 'Leit', 'Mair', 'Moos', 'Neu',
+    'Ober', 'Pich', 'Rein', 'Ried', 'Schwarz', 'Stein', 'Strass', 'Unter', 'Wald', 'Weiß',
+    'Wies', 'Winkl', 'Zell'
+]
+FAMILY_SUFFIXES = [
+    'er', 'ner', 'bauer', 'berger', 'huber', 'hofer', 'leitner', 'mann', 'mayr', 'meier',
+    'moser', 'müller', 'reiter', 'schmid', 'steiner', 'thaler', 'wagner', 'wieser', 'egger'
+]
+
+EMAIL_DOMAINS = ['gmail.com', 'gmx.at', 'a1.net', 'outlook.com', 'chello.at', 'icloud.com']
+ORGANIZATIONS = [
+    'Anyline', 'Tyrolit', 'signd.id', 'Raiffeisen', 'Erste Bank', 'Swarovski', 'voestalpine',
+    'OMV', 'Red Bull', 'Post AG', 'ÖBB', 'Magenta', 'Uniqa', 'Spar', 'Verbund'
+]
+DUPLICATE_SOURCES = ['iphone_contacts', 'iphone_suggested']
+
+DETECTORS = ['analyzer', 'merger', 'cross_db']
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+# ------------------------------------------------------------------
+# Synthetic data
+# ------------------------------------------------------------------
+
+def _ascii_local(text):
+    """Email-safe lowercase version of a name part"""
+    return (text.lower().replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue')
+            .replace('ß', 'ss').replace(' ', ''))
+
+
+def _typo(rng, name):
+    """Delete, double or swap one letter of the longest name part"""
+    parts = name.split()
+    idx = max(range(len(parts)), key=lambda k: len(parts[k]))
+    word = parts[idx]
+    pos = rng.randrange(1, len(word) - 1)
+    kind = rng.choice(('delete', 'double', 'swap'))
+    if kind == 'delete':
+        word = word[:pos] + word[pos + 1:]
+    elif kind == 'double':
+        word = word[:pos] + word[pos] + word[pos:]
+    else:
+        word = word[:pos] + word[pos + 1] + word[pos] + word[pos + 2:]
+    parts[idx] = word
+    return ' '.join(parts)
+
+
+def _reformat_phone(rng, e164):
+    """Same Austrian mobile number in another common notation"""
+    prefix, number = e164[3:6], e164[6:]
+    return rng.choice((
+        f"0{prefix} {number}",
+        f"0{prefix}/{number[:3]} {number[3:5]} {number[5:]}",
+        f"0043 {prefix} {number}",
+        f"+43 ({prefix}) {number[:3]}-{number[3:]}",
+    ))
+
+
+def _vary_email(rng, email):
+    """Gmail dot/case variant, or plain case change for other domains"""
+    local, domain = email.split('@')
+    if domain == 'gmail.com' and len(local) > 3:
+        pos = rng.randrange(1, len(local) - 1)
+        local = (local[:pos] + '.' + local[pos:]).replace('..', '.')
+        return f"{local.capitalize()}@{rng.choice(('gmail.com', 'GoogleMail.com'))}"
+    return email.upper() if rng.random() < 0.5 else email.capitalize()
+
+
+def _make_duplicate(rng, person):
+    """Damaged copy of a person record"""
+    record = dict(person)
+    mutations = rng.sample(('typo', 'swap', 'phone', 'email', 'missing'), k=rng.randint(1, 3))
+    if 'typo' in mutations:
+        record['fn'] = _typo(rng, record['fn'])
+    if 'swap' in mutations:
+        record['fn'] = ' '.join(reversed(record['fn'].split()))
+    if 'phone' in mutations and record['phone']:
+        record['phone'] = _reformat_phone(rng, record['phone'])
+    if 'email' in mutations and record['email']:
+        record['email'] = _vary_email(rng, record['email'])
+    if 'missing' in mutations:
+        field = rng.choice(('email', 'phone', 'org'))
+        # Keep at least one way to reach the contact
+        if field == 'org' or (record['email'] and record['phone']):
+            record[field] = None
+    return record
+
+
+def generate_records(count, duplicate_rate=0.3, seed=42):
+    """
+    Create `count` contact records with injected duplicates.
+
+    Returns a list of dicts (fn, email, phone, org, source, entity) where
+    records with the same entity are the same person.
+    """
+    rng = random.Random(seed)
+    records = []
+    entity = 0
+    used_phones = set()
+    while len(records) < count:
+        given = rng.choice(GIVEN_NAMES)
+        family = rng.choice(FAMILY_PREFIXES) + rng.choice(FAMILY_SUFFIXES)
+        while True:
+            phone = f"+436{rng.choice(('50', '60', '64', '76', '99'))}{rng.randrange(10**6, 10**7)}"
+            if phone not in used_phones:
+                used_phones.add(phone)
+                break
+        person = {
+            'fn': f"{given} {family}",
+            'email': f"{_ascii_local(given)}.{_ascii_local(family)}{rng.randrange(100)}@{rng.choice(EMAIL_DOMAINS)}"
+                     if rng.random() < 0.85 else None,
+            'phone': phone if rng.random() < 0.8 else None,
+            'org': rng.choice(ORGANIZATIONS) if rng.random() < 0.4 else None,
+            'source': 'sara',
+            'entity': entity
+        }
+        if not person['email'] and not person['phone']:
+            person['phone'] = phone
+        records.append(person)
+
+        if rng.random() < duplicate_rate:
+            copies = 2 if rng.random() < 0.2 else 1
+            for copy in range(copies):
+                duplicate = _make_duplicate(rng, person)
+                duplicate['source'] = DUPLICATE_SOURCES[copy]
+                records.append(duplicate)
+        entity += 1
+
+    records = records[:count]
+    rng.shuffle(records)
+    return records
+
+
+def records_to_vcards(records):
+    """Build vobject vCards for the detectors"""
+    vcards = []
+    for record in records:
+        vcard = vobject.vCard()
+        vcard.add('fn').value = record['fn']
+        parts = record['fn'].split()
+        vcard.add('n').value = vobject.vcard.Name(family=parts[-1], given=' '.join(parts[:-1]))
+        if record['email']:
+            vcard.add('email').value = record['email']
+        if record['phone']:
+            vcard.add('tel').value = record['phone']
+        if record['org']:
+            vcard.add('org').value = [record['org']]
+        vcards.append(vcard)
+    return vcards
+
+
+def true_pairs(records, cross_source_only=False):
+    """All index pairs (i < j) that belong to the same person"""
+    by_entity = {}
+    for idx, record in enumerate(records):
+        by_entity.setdefault(record['entity'], []).append(idx)
+    pairs = set()
+    for members in by_entity.values():
+        for a, b in combinations(sorted(members), 2):
+            if cross_source_only and records[a]['source'] == records[b]['source']:
+                continue
+            pairs.add((a, b))
+    return pairs
+
+
+def group_pairs(groups):
+    """All index pairs (i < j) inside the predicted groups"""
+    pairs = set()
+    for group in groups:
+        pairs.update(combinations(sorted(set(group)), 2))
+    return pairs
+
+
+# ------------------------------------------------------------------
+# Detector runners: each returns (predicted pairs, pairs compared)
+# ------------------------------------------------------------------
+
+def run_analyzer(records, vcards, workers=1):
+    """DuplicateAnalyzer: fuzzy pairs scored block-parallel when workers > 1"""
+    from analyze_duplicates import DuplicateAnalyzer
+
+    analyzer = DuplicateAnalyzer()
+    groups = analyzer.find_duplicates(vcards, workers=workers)
+    compared = analyzer.stats['pairs_compared']
+    return group_pairs([contact['index'] for contact in group] for group in groups), compared
+
+
+def run_merger(records, vcards, workers=1):
+    """IntelligentContactMerger: index matching, scored once per group"""
+    from intelligent_merge import IntelligentContactMerger
+
+    merger = IntelligentContactMerger()
+    groups = merger.find_matches([(record['source'], vcard) for record, vcard in zip(records, vcards)])
+    return group_pairs([idx for idx, _, _ in group['contacts']] for group in groups), merger.stats['pairs_compared']
+
+
+def run_cross_db(records, vcards, workers=1):
+    """CrossDatabaseDuplicateDetector without the AI engine, fed in memory"""
+    from ai_duplicate_detector import CrossDatabaseDuplicateDetector
+
+    detector = CrossDatabaseDuplicateDetector(use_ai=False)
+    detector.all_contacts = []
+    for idx, (record, vcard) in enumerate(zip(records, vcards)):
+        detector.all_contacts.append({
+            'id': str(idx),
+            'source_database': record['source'],
+            'vcard': vcard,
+            'data': detector._extract_contact_data(vcard)
+        })
+
+    scored = [0]
+    compare = detector._compare_contacts
+
+    def counting_compare(contact1, contact2):
+        scored[0] += 1
+        return compare(contact1, contact2)
+
+    detector._compare_contacts = counting_compare
+    matches = detector._find_potential_duplicates()
+    pairs = {tuple(sorted((int(m.contact1_id), int(m.contact2_id)))) for m in matches}
+    return pairs, scored[0]
+
+
+RUNNERS = {
+    'analyzer': run_analyzer,
+    'merger': run_merger,
+    'cross_db': run_cross_db
+}
+
+
+# ------------------------------------------------------------------
+# Benchmark
+# ------------------------------------------------------------------
+
+def measure(detector, records, vcards, truth, workers=1, track_memory=True):
+    """Run one detector and compute cost and quality metrics"""
+    result = {'detector': detector, 'contacts': len(records)}
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        # Detectors print progress; keep the tables readable
+        with redirect_stdout(io.StringIO()):
+            predicted, compared = RUNNERS[detector](records, vcards, workers=workers)
+    finally:
+        elapsed = time.perf_counter() - start
+        if track_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    correct = len(predicted & truth)
+    result.update({
+        'pairs_compared': compared,
+        'seconds': round(elapsed, 3),
+        'peak_memory_mb': round(peak / 1024 / 1024, 1) if track_memory else None,
+        'predicted_pairs': len(predicted),
+        'true_pairs': len(truth),
+        'precision': correct / len(predicted) if predicted else 0.0,
+        'recall': correct / len(truth) if truth else 0.0
+    })
+    return result
+
+
+def run_benchmark(sizes, detectors, duplicate_rate=0.3, seed=42, workers=1, track_memory=True):
+    """Benchmark all detectors on every size, printing one table per size"""
+    results = []
+    for size in sizes:
+        print(f"\n📊 {size:,} contacts (duplicate rate {duplicate_rate:.0%}, seed {seed})")
+        records = generate_records(size, duplicate_rate, seed)
+        vcards = records_to_vcards(records)
+        truth = true_pairs(records)
+        cross_truth = true_pairs(records, cross_source_only=True)
+        print(f"   {len(truth):,} true duplicate pairs ({len(cross_truth):,} across sources)")
+        print(f"   {'Detector':<10} {'Compared':>12} {'Seconds':>9} {'Peak MB':>8} "
+              f"{'Precision':>10} {'Recall':>8}")
+
+        for detector in detectors:
+            truth_for_detector = cross_truth if detector == 'cross_db' else truth
+            result = measure(detector, records, vcards, truth_for_detector, workers, track_memory)
+            results.append(result)
+            memory = f"{result['peak_memory_mb']:>8.1f}" if track_memory else f"{'-':>8}"
+            print(f"   {detector:<10} {result['pairs_compared']:>12,} {result['seconds']:>9.2f} {memory} "
+                  f"{result['precision']:>10.1%} {result['recall']:>8.1%}")
+    return results
+
+
+def main():
+    """Run the dedup benchmark from the command line"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark duplicate detectors on synthetic contacts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Contact counts to benchmark (default: 1000 10000 100000)")
+    parser.add_argument("--detectors", nargs="+", choices=DETECTORS, default=DETECTORS,
+                        help="Detectors to run (default: all)")
+    parser.add_argument("--duplicate-rate", type=float, default=0.3,
+                        help="Share of people that get duplicate records (default: 0.3)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Workers for DuplicateAnalyzer (default: 1, sequential)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip tracemalloc (faster, no peak memory column)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    print("Dedup Benchmark")
+    print("=" * 80)
+    results = run_benchmark(args.sizes, args.detectors, args.duplicate_rate, args.seed,
+                            args.workers, not args.no_memory)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'timestamp': datetime.now().isoformat(),
+                'settings': vars(args),
+                'results': results
+            }, f, indent=2)
+        print(f"\n✅ Results saved to {args.json}")
+
+    print("\nNote: peak memory is measured with tracemalloc, which also slows the run;")
+    print("use --no-memory for wall times closer to production.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Record Memory Benchmark - compact ContactRecord against the old dataclasses
+
+Loads the contacts of a metadata.json twice and measures (tracemalloc)
+what the loaded records keep alive:
+
+- dataclass: the previous ContactRecord/SourceInfo dataclasses, every
+  record with its own SourceInfo and ISO timestamp strings
+- compact: vcard_database.ContactRecord (__slots__, interned source
+  descriptors, integer timestamps)
+
+vCard text is left out (it costs the same in both), so the numbers are the
+per-record overhead. Without --database a synthetic import is generated.
+
+Usage:
+    python benchmark_record_memory.py                        # 10,000 synthetic records
+    python benchmark_record_memory.py --count 50000
+    python benchmark_record_memory.py --database data/master_database
+    python benchmark_record_memory.py --json data/record_memory.json
+"""
+
+import json
+import os
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from vcard_database import ContactRecord, SourceInfo
+
+
+@dataclass
+class DataclassSourceInfo:
+    """SourceInfo before the compact representation"""
+    database_name: str
+    source_file: str
+    original_index: int
+    import_timestamp: str
+    import_session_id: str
+
+
+@dataclass
+class DataclassContactRecord:
+    """ContactRecord before the compact representation"""
+    contact_id: str
+    vcard_data: str
+    source_info: DataclassSourceInfo
+    created_at: str
+    updated_at: str
+    version: int
+    is_active: bool
+
+
+def synthetic_metadata(count, sources=3):
+    """metadata.json text shaped like `sources` imports of count records in total"""
+    start = datetime(2025, 1, 1, 9, 30)
+    contacts = {}
+    for n in range(count):
+        database_name = f"source_{n % sources}"
+        moment = (start + timedelta(microseconds=n * 1337)).isoformat()
+        contact_id = f"{database_name}_{n:06d}"
+        contacts[contact_id] = {
+            'contact_id': contact_id,
+            'vcard_data': '',
+            'source_info': {
+                'database_name': database_name,
+                'source_file': f"Imports/{database_name}.vcf",
+                'original_index': n,
+                'import_timestamp': moment,
+                'import_session_id': f"import_{database_name}_20250101_093000",
+            },
+            'created_at': moment,
+            'updated_at': moment,
+            'version': 1,
+            'is_active': True,
+        }
+    return json.dumps({'contacts': contacts})
+
+
+def database_metadata(database_path):
+    """metadata.json of a database with the vCard text removed"""
+    with open(os.path.join(database_path, 'metadata.json')) as f:
+        metadata = json.load(f)
+    contacts = {}
+    for cid, record in metadata.get('contacts', {}).items():
+        if 'source_info' in record:
+            record['vcard_data'] = ''
+            record.pop('vcard_offset', None)
+            record.pop('vcard_length', None)
+            contacts[cid] = record
+    return json.dumps({'contacts': contacts})
+
+
+def load_dataclass(text):
+    records = {}
+    for cid, data in json.loads(text)['contacts'].items():
+        data['source_info'] = DataclassSourceInfo(**data['source_info'])
+        records[cid] = DataclassContactRecord(**data)
+    return records
+
+
+def load_compact(text):
+    records = {}
+    for cid, data in json.loads(text)['contacts'].items():
+        data['source_info'] = SourceInfo(**data['source_info'])
+        records[cid] = ContactRecord(**data)
+    return records
+
+
+def retained_bytes(loader, text):
+    """Bytes still allocated while the loaded records are alive"""
+    tracemalloc.start()
+    try:
+        records = loader(text)
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return records, retained
+
+
+def benchmark(text):
+    """Per-record memory of both representations for one metadata.json text"""
+    old_records, old_bytes = retained_bytes(load_dataclass, text)
+    new_records, new_bytes = retained_bytes(load_compact, text)
+    count = len(new_records)
+    mismatches = sum(1 for cid, record in new_records.items()
+                     if record.to_dict() != {**old_records[cid].__dict__,
+                                             'source_info': old_records[cid].source_info.__dict__})
+    per_old = old_bytes / max(count, 1)
+    per_new = new_bytes / max(count, 1)
+    return {
+        'records': count,
+        'dataclass_bytes_per_record': round(per_old),
+        'compact_bytes_per_record': round(per_new),
+        'saved_bytes_per_record': round(per_old - per_new),
+        'saved_percent': round(100 * (1 - per_new / per_old), 1) if per_old else 0.0,
+        'mismatches': mismatches,
+    }
+
+
+def main():
+    """Run the record memory benchmark from the command line"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure per-record memory of ContactRecord")
+    parser.add_argument("--database", help="Database directory to load (default: synthetic records)")
+    parser.add_argument("--count", type=int, default=10000, help="Synthetic records to generate")
+    parser.add_argument("--json", help="Also write the result to this JSON file")
+    args = parser.parse_args()
+
+    if args.database:
+        if not os.path.exists(os.path.join(args.database, 'metadata.json')):
+            print(f"❌ No metadata.json in {args.database}")
+            return
+        text = database_metadata(args.database)
+        source = args.database
+    else:
+        text = synthetic_metadata(args.count)
+        source = f"{args.count:,} synthetic records"
+
+    result = benchmark(text)
+    result['source'] = source
+
+    print("Record Memory Benchmark")
+    print("=" * 60)
+    print(f"Source:            {source}")
+    print(f"Records:           {result['records']:,}")
+    print(f"Dataclass records: {result['dataclass_bytes_per_record']:>6,} bytes/record")
+    print(f"Compact records:   {result['compact_bytes_per_record']:>6,} bytes/record")
+    print(f"Saved:             {result['saved_bytes_per_record']:>6,} bytes/record ({result['saved_percent']}%)")
+    if result['mismatches']:
+        print(f"⚠️  {result['mismatches']} records convert back differently")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'timestamp': datetime.now().isoformat(),
+                'settings': vars(args),
+                'result': result
+            }, f, indent=2)
+        print(f"\n✅ Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
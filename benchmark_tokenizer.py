@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tokenizer Benchmark - vcard_tokenizer against vobject on real exports
+
+For every file it reads all cards twice and extracts what most tools need
+(FN, emails, phones, organization):
+
+- vobject: vobject.readComponents over the whole file
+- tokenizer: vcard_tokenizer.iter_cards, streaming the file
+
+and reports wall time, cards per second, peak memory (tracemalloc) and how
+many cards disagree on the extracted fields (should be 0). Cards that
+needed the vobject fallback are counted separately.
+
+Usage:
+    python benchmark_tokenizer.py                          # exports in Imports/ and data/
+    python benchmark_tokenizer.py my_export.vcf --repeat 3
+    python benchmark_tokenizer.py --json data/tokenizer_benchmark.json
+"""
+
+import glob
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+import vobject
+
+import config
+from vcard_tokenizer import iter_cards
+
+
+def default_files():
+    """Exports shipped with the repo plus the configured source file"""
+    files = sorted(glob.glob(os.path.join(config.IMPORTS_DIR, '*.vcf')) +
+                   glob.glob(os.path.join(config.DATA_DIR, '*.vcf')))
+    if os.path.exists(config.SARA_VCARD_FILE) and config.SARA_VCARD_FILE not in files:
+        files.append(config.SARA_VCARD_FILE)
+    return files
+
+
+def card_fields(card):
+    """(fn, emails, phones, org) - works for vobject components and tokenizer records"""
+    fn = card.fn.value if hasattr(card, 'fn') else ''
+    emails = [e.value for e in card.contents.get('email', [])]
+    phones = [t.value for t in card.contents.get('tel', [])]
+    org = card.org.value if hasattr(card, 'org') else None
+    return fn, emails, phones, org
+
+
+def read_vobject(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [card_fields(card) for card in vobject.readComponents(f.read())]
+
+
+def read_tokenizer(path, stats):
+    fields = []
+    for card in iter_cards(path):
+        stats['fallback'] += card.fallback
+        fields.append(card_fields(card))
+    return fields
+
+
+def measure(reader, track_memory=True):
+    """Run reader() once, returning (result, seconds, peak MB)"""
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = reader()
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = None
+        if track_memory:
+            peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmark_file(path, repeat=1, track_memory=True):
+    """Benchmark both readers on one file (best of repeat runs)"""
+    result = {'file': os.path.basename(path), 'bytes': os.path.getsize(path)}
+    try:
+        runs = [measure(lambda: read_vobject(path), track_memory) for _ in range(repeat)]
+    except Exception as e:
+        # vobject gives up on the whole file at the first card it cannot parse
+        runs = None
+        result['vobject_error'] = f"{type(e).__name__}: {e}"
+    stats = {'fallback': 0}
+    tokenized = [measure(lambda: read_tokenizer(path, stats), track_memory) for _ in range(repeat)]
+
+    fields = tokenized[0][0]
+    result.update({
+        'cards': len(fields),
+        'fallback_cards': stats['fallback'] // repeat,
+        'tokenizer_seconds': round(min(r[1] for r in tokenized), 3),
+        'tokenizer_peak_mb': round(tokenized[0][2], 1) if track_memory else None,
+    })
+    if runs:
+        expected = runs[0][0]
+        result.update({
+            'vobject_seconds': round(min(r[1] for r in runs), 3),
+            'vobject_peak_mb': round(runs[0][2], 1) if track_memory else None,
+            'mismatches': sum(1 for a, b in zip(expected, fields) if a != b) + abs(len(expected) - len(fields)),
+        })
+        result['speedup'] = round(result['vobject_seconds'] / max(result['tokenizer_seconds'], 1e-9), 1)
+    return result
+
+
+def main():
+    """Run the tokenizer benchmark from the command line"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark vcard_tokenizer against vobject")
+    parser.add_argument("files", nargs="*", help="vCard files (default: exports in Imports/ and data/)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per reader, best time is reported")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip tracemalloc (faster, no peak memory column)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    files = args.files or default_files()
+    if not files:
+        print("❌ No vCard files found - pass one or more files")
+        return
+
+    print("Tokenizer Benchmark")
+    print("=" * 100)
+    print(f"{'File':<40} {'Cards':>7} {'vobject s':>10} {'token s':>9} {'Speedup':>8} "
+          f"{'vobj MB':>8} {'tok MB':>7} {'Diff':>5}")
+    results = []
+    for path in files:
+        result = benchmark_file(path, args.repeat, not args.no_memory)
+        results.append(result)
+        name = result['file'][:40]
+        tok_mb = f"{result['tokenizer_peak_mb']:>7.1f}" if not args.no_memory else f"{'-':>7}"
+        if 'vobject_error' in result:
+            print(f"{name:<40} {result['cards']:>7,} {'error':>10} {result['tokenizer_seconds']:>9.2f} "
+                  f"{'-':>8} {'-':>8} {tok_mb} {'-':>5}")
+            print(f"   ⚠️  vobject: {result['vobject_error']}")
+            continue
+        vobj_mb = f"{result['vobject_peak_mb']:>8.1f}" if not args.no_memory else f"{'-':>8}"
+        print(f"{name:<40} {result['cards']:>7,} {result['vobject_seconds']:>10.2f} "
+              f"{result['tokenizer_seconds']:>9.2f} {result['speedup']:>7.1f}x {vobj_mb} {tok_mb} "
+              f"{result['mismatches']:>5}")
+        if result['fallback_cards']:
+            print(f"   ({result['fallback_cards']} cards read with the vobject fallback)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'timestamp': datetime.now().isoformat(),
+                'settings': vars(args),
+                'results': results
+            }, f, indent=2)
+        print(f"\n✅ Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,52 @@
 Database connector wrapper for FastAPI integration
 """
 import os
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 import vobject
 
 from .vcard_database import VCardConnector as BaseConnector, ContactRecord
+from .merge_preview import MergePreviewService
+from .vcard_tokenizer import read_cards
+from .photo_thumbnails import ThumbnailCache
+from .export_profiles import get_profile, iter_export
+from .export_cache import ExportCache
 from models.schemas import Contact, SourceInfo
 
 
 class APIConnector:
     """API-friendly wrapper for VCardConnector"""
     
-    def __init__(self, database_path: str = None):
+    def __init__(self, database_path: str = None, tokenizer: bool = None, mmap_mode: bool = None,
+                 external_photos: bool = None, export_workers: int = None):
         if database_path is None:
             database_path = os.environ.get('DATABASE_PATH', 'data/master_database')
-        self.connector = BaseConnector(database_path)
+        if tokenizer is None:
+            tokenizer = os.environ.get('VCARD_TOKENIZER', '').lower() in ('1', 'true', 'yes')
+        if mmap_mode is None:
+            mmap_mode = os.environ.get('DATABASE_MMAP', '').lower() in ('1', 'true', 'yes')
+        if external_photos is None:
+            external_photos = os.environ.get('PHOTO_STORE', '').lower() in ('1', 'true', 'yes')
+        if export_workers is None:
+            export_workers = int(os.environ.get('EXPORT_WORKERS', '1'))
+        self.connector = BaseConnector(database_path, mmap_mode=mmap_mode, external_photos=external_photos)
+        self.thumbnails = ThumbnailCache(os.path.join(database_path, 'thumbnails'))
+        self.exports = ExportCache(os.path.join(database_path, 'exports'))
+        self.merge_previews = MergePreviewService(self.connector)
+        self.tokenizer = tokenizer
+        self.export_workers = export_workers
+    
+    def _read_vcard(self, vcard_data: str):
+        """First card of vcard_data for reading (lightweight records with VCARD_TOKENIZER=1)"""
+        if self.tokenizer:
+            return read_cards(vcard_data)[0]
+        return list(vobject.readComponents(vcard_data))[0]
     
     def _record_to_model(self, record: ContactRecord) -> Contact:
         """Convert internal ContactRecord to API Contact model"""
         # Parse vCard data to extract fields
         try:
-            vcard = list(vobject.readComponents(record.vcard_data))[0]
+            vcard = self._read_vcard(record.vcard_data)
             
             # Extract emails
             emails = []
@@ -119,7 +144,7 @@ class APIConnector:
         
         for record in all_records:
             try:
-                vcard = list(vobject.readComponents(record.vcard_data))[0]
+                vcard = self._read_vcard(record.vcard_data)
                 
                 # Check each search field
                 match = False
@@ -167,14 +192,27 @@ class APIConnector:
         }
     
     def update_contact(self, contact_id: str, update_data: dict) -> bool:
-        """Update a contact with new data"""
+        """
+        Update a contact with new data.
+        
+        With a 'version' in update_data the edit is applied to that version and
+        three-way merged with any changes saved since (MergeConflictError if
+        both touched the same property).
+        """
         # Get existing contact
         record = self.connector.get_contact(contact_id)
         if not record:
             return False
         
-        # Parse existing vCard
-        vcard = list(vobject.readComponents(record.vcard_data))[0]
+        base_version = update_data.pop('version', None)
+        vcard_data = record.vcard_data
+        if base_version is not None and base_version != record.version:
+            vcard_data = self.connector.database.get_version_data(contact_id, base_version)
+            if vcard_data is None:
+                raise ValueError(f"Unknown version {base_version} for contact {contact_id}")
+        
+        # Parse the vCard the edit is based on
+        vcard = list(vobject.readComponents(vcard_data))[0]
         
         # Update fields
         if 'fn' in update_data and update_data['fn']:
@@ -217,29 +255,94 @@ class APIConnector:
                 vcard.add('note').value = update_data['notes']
         
         # Update in database
-        return self.connector.update_contact(contact_id, vcard.serialize())
+        updated = self.connector.update_contact(contact_id, vcard.serialize(), base_version=base_version)
+        if updated:
+            self.exports.invalidate()
+        return updated
+    
+    def get_contact_photo(self, contact_id: str) -> Optional[Tuple[bytes, str, str]]:
+        """(image bytes, media type, sha256) of a contact's photo, None without one"""
+        return self.connector.database.get_photo(contact_id)
+    
+    def get_contact_thumbnail(self, contact_id: str, size: int,
+                              fmt: str = 'jpeg') -> Optional[Tuple[bytes, str, str]]:
+        """(thumbnail bytes, media type, sha256 of the photo), cached on disk per photo"""
+        photo = self.get_contact_photo(contact_id)
+        if not photo:
+            return None
+        data, _, digest = photo
+        thumbnail, media_type = self.thumbnails.get(digest, data, size, fmt)
+        return thumbnail, media_type, digest
     
     def delete_contact(self, contact_id: str) -> bool:
         """Delete (soft delete) a contact"""
-        return self.connector.delete_contact(contact_id)
+        deleted = self.connector.delete_contact(contact_id)
+        if deleted:
+            self.exports.invalidate()
+        return deleted
     
     def import_database(self, source_file: str, database_name: str) -> Dict[str, Any]:
         """Import a vCard database"""
-        return self.connector.import_database(source_file, database_name)
+        result = self.connector.import_database(source_file, database_name)
+        self.exports.invalidate()
+        return result
     
     def get_database_stats(self) -> Dict[str, Any]:
         """Get database statistics"""
         return self.connector.get_database_stats()
     
+    def get_merge_groups(self, page: int = 1, page_size: int = 50) -> Dict[str, Any]:
+        """Get paginated merge groups (rescanned only after database changes)"""
+        groups = self.merge_previews.list_groups()
+        total = len(groups)
+        start = (page - 1) * page_size
+        
+        return {
+            "groups": groups[start:start + page_size],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": (total + page_size - 1) // page_size
+        }
+    
+    def get_merge_preview(self, group_id: str) -> Optional[Dict[str, Any]]:
+        """Get the field-level diff of one merge group (computed on first request)"""
+        return self.merge_previews.preview(group_id)
+    
     def export_database(self, active_only: bool = True) -> str:
         """Export database as vCard file"""
-        contacts = self.connector.get_all_contacts(active_only=active_only)
-        
-        # Combine all vCards
-        vcf_content = ""
-        for contact in contacts:
-            vcf_content += contact.vcard_data
-            if not contact.vcard_data.endswith('\n'):
-                vcf_content += '\n'
+        return ''.join(self.iter_export(active_only=active_only))
+    
+    def iter_export(self, active_only: bool = True, profile: Optional[str] = None):
+        """
+        Yield the exported vCards one at a time.
         
-        return vcf_content
\ No newline at end of file
+        With a profile (see export_profiles.PROFILES) every card goes through
+        its transforms, in EXPORT_WORKERS processes. Raises ValueError for
+        unknown profiles before the first card.
+        """
+        profile = get_profile(profile) if profile is not None else None
+        contacts = self.connector.get_all_contacts(active_only=active_only)
+        cards = (self.connector.database.export_vcard_data(contact.vcard_data) for contact in contacts)
+        if profile is not None:
+            return iter_export(cards, profile, workers=self.export_workers)
+        return (card if card.endswith('\n') else card + '\n' for card in cards)
+    
+    def export_sequence(self) -> str:
+        """Id of the last database operation - changes with every import, update, delete or restore"""
+        audit_log = self.connector.database.audit_log
+        return audit_log[-1].operation_id if audit_log else 'op_none'
+    
+    def export_file(self, active_only: bool = True, profile: Optional[str] = None,
+                    compressed: bool = False) -> Tuple[str, str]:
+        """
+        (path, sequence) of the rendered export, cached on disk until the
+        database changes. compressed gives the gzipped file. Raises
+        ValueError for unknown profiles.
+        """
+        profile = get_profile(profile).name if profile is not None else None
+        sequence = self.export_sequence()
+        path = self.exports.get(sequence, profile, active_only,
+                                lambda: self.iter_export(active_only=active_only, profile=profile),
+                                compressed=compressed)
+        return path, sequence
\ No newline at end of file
@@ -501,13 +501,14 @@ Provide specific, actionable insights that would improve contact quality."""
             suggested = re.sub(r'\s+', ' ', suggested)  # Clean up extra spaces
             
             if suggested != name:
+                digits = re.findall(r'\d+', name)
                 return IntelligenceInsight(
                     issue_type="numbers_in_name",
                     current_value=name,
                     suggested_value=suggested,
                     confidence=0.90,
                     reasoning="Names rarely contain numbers - likely from username/email",
-                    evidence=[f"Found digits: {re.findall(r'\\d+', name)}"],
+                    evidence=[f"Found digits: {digits}"],
                     auto_apply_safe=True
                 )
         
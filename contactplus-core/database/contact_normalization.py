@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Contact Normalization - Shared matching keys for phones, emails and names
+
+Every duplicate detector, merger and verification script compares contacts
+by normalized phone, email and name keys. This module is the single place
+those keys are computed so that all tools agree on what "the same number"
+or "the same email" means.
+
+- Phones: E.164 via phonenumbers (Austrian default region, US fallback)
+- Emails: lowercase, Gmail-style canonicalization (dots and +tags)
+- Names: casefolded, umlauts folded (ü -> ue, ß -> ss), titles removed
+
+All single-value functions are LRU-memoized, so the same raw value is only
+parsed once per process. The batch functions accept any iterable and reuse
+the same caches.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import phonenumbers
+
+# Most contacts are Austrian; numbers without a country code are tried
+# against these regions in order.
+DEFAULT_REGION = 'AT'
+FALLBACK_REGIONS = ('US',)
+
+CACHE_SIZE = 65536
+
+# Providers that ignore dots in the local part and support +tag addressing
+GMAIL_DOMAINS = {'gmail.com', 'googlemail.com'}
+
+# Academic / honorific titles stripped from names before comparison
+NAME_TITLES = {
+    'dr', 'mr', 'mrs', 'ms', 'prof', 'phd', 'md', 'esq', 'jr', 'sr', 'ii', 'iii',
+    'mag', 'ing', 'dipl', 'dkfm', 'mba', 'msc', 'bsc', 'llm',
+    'herr', 'frau', 'med', 'univ', 'rer', 'nat', 'techn', 'habil'
+}
+
+UMLAUT_MAP = str.maketrans({
+    'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss',
+    'Ä': 'ae', 'Ö': 'oe', 'Ü': 'ue', 'ẞ': 'ss'
+})
+
+_NON_DIGIT = re.compile(r'\D')
+_NAME_PUNCT = re.compile(r"[^\w\s]")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def phone_to_e164(phone: str, region: str = DEFAULT_REGION) -> Optional[str]:
+    """
+    Parse a phone number and return its E.164 form, or None if invalid.
+
+    Only the given region is tried; use normalize_phone() for matching keys.
+    """
+    if not phone:
+        return None
+    try:
+        parsed = phonenumbers.parse(phone, region)
+    except phonenumbers.NumberParseException:
+        return None
+    if not phonenumbers.is_valid_number(parsed):
+        return None
+    return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_phone(phone: str, region: str = DEFAULT_REGION) -> str:
+    """
+    Normalize a phone number into a matching key.
+
+    Returns E.164 when the number is valid in the given region or one of the
+    fallback regions, otherwise the bare digits (with '+' kept for numbers
+    that carried an international prefix). Returns '' for empty input.
+    """
+    if not phone:
+        return ''
+    phone = phone.strip()
+
+    for candidate_region in (region,) + tuple(r for r in FALLBACK_REGIONS if r != region):
+        formatted = phone_to_e164(phone, candidate_region)
+        if formatted:
+            return formatted
+
+    digits = _NON_DIGIT.sub('', phone)
+    if phone.startswith('+'):
+        return '+' + digits
+    if digits.startswith('00'):
+        return '+' + digits[2:]
+    return digits
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_email(email: str) -> str:
+    """
+    Normalize an email address into a matching key.
+
+    Lowercases and strips the address. For Gmail addresses the dots and any
+    +tag in the local part are removed and googlemail.com maps to gmail.com.
+    """
+    if not email:
+        return ''
+    email = email.strip().lower()
+    if email.startswith('mailto:'):
+        email = email[len('mailto:'):]
+    if '@' not in email:
+        return email
+
+    local, _, domain = email.rpartition('@')
+    if domain in GMAIL_DOMAINS:
+        local = local.split('+', 1)[0].replace('.', '')
+        domain = 'gmail.com'
+    return f"{local}@{domain}"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def fold_name(name: str) -> str:
+    """Casefold a name and fold umlauts and other diacritics to ASCII"""
+    if not name:
+        return ''
+    folded = name.translate(UMLAUT_MAP).casefold()
+    decomposed = unicodedata.normalize('NFKD', folded)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_name(name: str) -> str:
+    """
+    Normalize a person or organization name into a matching key.
+
+    Folds umlauts and diacritics, removes punctuation and academic or
+    honorific titles (Dr., Mag., Dipl.-Ing., PhD, ...) and collapses spaces.
+    """
+    if not name:
+        return ''
+    folded = _NAME_PUNCT.sub(' ', fold_name(name))
+    words = [w for w in folded.split() if w not in NAME_TITLES]
+    return ' '.join(words)
+
+
+def normalize_phones(phones: Iterable[str], region: str = DEFAULT_REGION) -> List[str]:
+    """Batch version of normalize_phone(), preserving input order"""
+    return [normalize_phone(p, region) for p in phones]
+
+
+def normalize_emails(emails: Iterable[str]) -> List[str]:
+    """Batch version of normalize_email(), preserving input order"""
+    return [normalize_email(e) for e in emails]
+
+
+def normalize_names(names: Iterable[str]) -> List[str]:
+    """Batch version of normalize_name(), preserving input order"""
+    return [normalize_name(n) for n in names]
+
+
+def phone_key_set(phones: Iterable[str], region: str = DEFAULT_REGION,
+                  min_length: int = 7) -> set:
+    """Distinct phone keys with at least min_length characters"""
+    return {key for key in normalize_phones(phones, region) if len(key) >= min_length}
+
+
+def email_key_set(emails: Iterable[str]) -> set:
+    """Distinct non-empty email keys"""
+    return {key for key in normalize_emails(emails) if key}
+
+
+def cache_info() -> Dict[str, Tuple[int, int, int, int]]:
+    """LRU cache statistics (hits, misses, maxsize, currsize) per normalizer"""
+    return {
+        'phone_to_e164': tuple(phone_to_e164.cache_info()),
+        'normalize_phone': tuple(normalize_phone.cache_info()),
+        'normalize_email': tuple(normalize_email.cache_info()),
+        'fold_name': tuple(fold_name.cache_info()),
+        'normalize_name': tuple(normalize_name.cache_info()),
+    }
+
+
+def clear_caches():
+    """Drop all memoized normalization results"""
+    for func in (phone_to_e164, normalize_phone, normalize_email, fold_name, normalize_name):
+        func.cache_clear()
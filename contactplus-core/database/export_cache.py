@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Export Cache - Rendered vCard exports on disk, keyed by database state
+
+A full export reads every record, inlines stored photos and (with a
+profile) parses and transforms every card, even when nothing changed
+since the last download. ExportCache keeps the rendered file instead, one
+per database state, profile, active_only flag and compression:
+
+    exports/<sequence>.<profile or 'full'>.<active|all>.vcf[.gz]
+
+The sequence is the id of the database's last audit log operation, so
+every import, update, delete or restore moves exports to new names: an
+artifact of an older state is never served. Artifacts of older states
+are removed when the first export of the new state is rendered.
+
+Files are complete when they appear (written to a temp file and renamed),
+so they can be handed to a file response and sent with sendfile.
+"""
+
+import gzip
+import os
+import shutil
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+EXPORT_SUFFIXES = ('.vcf', '.vcf.gz')
+# gzip level for compressed artifacts: written once, sent many times
+GZIP_LEVEL = 9
+
+
+def export_etag(sequence: str, profile: Optional[str], active_only: bool, compressed: bool = False) -> str:
+    """HTTP ETag of an export artifact; the gzip and plain files have different bytes, so different tags"""
+    scope = 'active' if active_only else 'all'
+    encoding = '-gz' if compressed else ''
+    return f'"{sequence}-{profile or "full"}-{scope}{encoding}"'
+
+
+class ExportCache:
+    """Rendered export files on disk, by database sequence, profile, scope and compression"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {'renders': 0, 'hits': 0, 'invalidated': 0}
+
+    def path(self, sequence: str, profile: Optional[str], active_only: bool, compressed: bool = False) -> str:
+        name = f"{sequence}.{profile or 'full'}.{'active' if active_only else 'all'}.vcf"
+        return os.path.join(self.directory, name + ('.gz' if compressed else ''))
+
+    def get(self, sequence: str, profile: Optional[str], active_only: bool,
+            render: Callable[[], Iterable[str]], compressed: bool = False) -> str:
+        """
+        Path of the export for this database sequence.
+
+        render() yields the cards and is only called when the artifact is
+        not on disk yet; a compressed artifact is gzipped from the
+        uncompressed one (rendered first if needed).
+        """
+        path = self.path(sequence, profile, active_only, compressed)
+        if os.path.exists(path):
+            self.stats['hits'] += 1
+            return path
+        # One render per artifact, even when several requests miss at once
+        with self._lock:
+            if os.path.exists(path):
+                self.stats['hits'] += 1
+                return path
+            self.invalidate(keep=sequence)
+            plain_path = self.path(sequence, profile, active_only)
+            if not os.path.exists(plain_path):
+                self._write(plain_path, render())
+                self.stats['renders'] += 1
+            if compressed:
+                with open(plain_path, 'rb') as f:
+                    self._write_gzip(path, f)
+        return path
+
+    def invalidate(self, keep: Optional[str] = None) -> int:
+        """Remove artifacts of every sequence but keep; returns the number of files removed"""
+        if not os.path.isdir(self.directory):
+            return 0
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(EXPORT_SUFFIXES) or (keep is not None and name.startswith(keep + '.')):
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        self.stats['invalidated'] += removed
+        return removed
+
+    def _temp_path(self, path: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def _write(self, path: str, cards: Iterable[str]):
+        temp_path = self._temp_path(path)
+        try:
+            with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+                for card in cards:
+                    f.write(card)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _write_gzip(self, path: str, source):
+        temp_path = self._temp_path(path)
+        try:
+            # mtime=0: the same export always compresses to the same bytes
+            with open(temp_path, 'wb') as raw, gzip.GzipFile('', 'wb', fileobj=raw,
+                                                             compresslevel=GZIP_LEVEL, mtime=0) as f:
+                shutil.copyfileobj(source, f, 1024 * 1024)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Export Profiles - Named chains of per-card transforms for exports
+
+Every target (iCloud.com, iCloud app, Google, ...) needs its own small
+changes to the master file. An export profile is a named list of card
+transforms, applied one card at a time:
+
+1. export_card() parses a card with vobject, runs the profile's
+   transforms in order and serializes the result
+2. iter_export() does that for a stream of cards, serially or in a
+   process pool (chunks of cards, a bounded number in flight, output in
+   input order)
+3. export_file() streams a vCard file through a profile into a new file
+
+A transform takes the card and a Counter for statistics and returns the
+card (changed in place or a new one) or None to leave the card out of the
+export. Cards that cannot be parsed or transformed are exported unchanged
+and counted as 'errors': an export never loses a contact by accident.
+Transforms are looked up by name, so profiles can be sent to worker
+processes.
+"""
+
+import logging
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import vobject
+
+from .photo_optimizer import fit_vcard_photos
+from .vcard_stream import iter_vcard_blocks
+
+logger = logging.getLogger(__name__)
+
+Transform = Callable[[vobject.base.Component, Counter], Optional[vobject.base.Component]]
+
+# Cards per work unit in parallel mode
+DEFAULT_CHUNK_SIZE = 100
+APPLE_PRODID = '-//Apple Inc.//macOS 15.5//EN'
+ICLOUD_WEB_FIELDS = {'version', 'prodid', 'fn', 'n', 'org', 'title', 'tel', 'email', 'adr',
+                     'note', 'bday', 'photo', 'url'}
+MINIMAL_FIELDS = {'version', 'fn', 'n', 'email', 'tel', 'org', 'title'}
+MAX_URLS = 3
+
+TRANSFORMS: Dict[str, Transform] = {}
+
+
+def transform(name: str):
+    """Register a card transform under a name"""
+    def register(func: Transform) -> Transform:
+        TRANSFORMS[name] = func
+        return func
+    return register
+
+
+@transform('require_fn')
+def require_fn(card, stats):
+    """Leave cards without a formatted name out"""
+    if hasattr(card, 'fn') and card.fn.value:
+        return card
+    stats['missing_fn_dropped'] += 1
+    return None
+
+
+@transform('ensure_fn')
+def ensure_fn(card, stats):
+    """Add FN from N, ORG, EMAIL or TEL when it is missing"""
+    if hasattr(card, 'fn') and card.fn.value:
+        return card
+    name = ''
+    if hasattr(card, 'n'):
+        n = card.n.value
+        name = ' '.join(part for part in (n.given, n.additional, n.family) if part)
+    if not name and hasattr(card, 'org') and card.org.value:
+        name = str(card.org.value[0])
+    for field in ('email', 'tel'):
+        if not name and hasattr(card, field):
+            name = getattr(card, field).value
+    if not hasattr(card, 'fn'):
+        card.add('fn')
+    card.fn.value = name or 'Unknown Contact'
+    stats['missing_fn'] += 1
+    return card
+
+
+@transform('strip_item_prefixes')
+def strip_item_prefixes(card, stats):
+    """Remove itemN. groups (iCloud.com rejects them)"""
+    for child in card.getChildren():
+        if child.group:
+            child.group = None
+            stats['item_prefixes_removed'] += 1
+    return card
+
+
+@transform('drop_x_fields')
+def drop_x_fields(card, stats):
+    """Remove all X- extension properties"""
+    for child in list(card.getChildren()):
+        if child.name.upper().startswith('X-'):
+            card.remove(child)
+            stats['x_fields_removed'] += 1
+    return card
+
+
+def _keep_fields(card, fields, stats):
+    urls = 0
+    for child in list(card.getChildren()):
+        name = child.name.lower()
+        if name == 'url':
+            urls += 1
+        if name not in fields or (name == 'url' and urls > MAX_URLS):
+            card.remove(child)
+            stats['fields_removed'] += 1
+    return card
+
+
+@transform('keep_icloud_web_fields')
+def keep_icloud_web_fields(card, stats):
+    """Keep only the properties iCloud.com imports reliably (at most 3 URLs)"""
+    return _keep_fields(card, ICLOUD_WEB_FIELDS, stats)
+
+
+@transform('keep_minimal_fields')
+def keep_minimal_fields(card, stats):
+    """Keep only names, emails, phones, organization and title"""
+    return _keep_fields(card, MINIMAL_FIELDS, stats)
+
+
+@transform('internet_email_type')
+def internet_email_type(card, stats):
+    """TYPE=INTERNET on every email"""
+    for email in card.contents.get('email', []):
+        email.type_param = 'INTERNET'
+    return card
+
+
+@transform('apple_header')
+def apple_header(card, stats):
+    """VERSION:3.0 and the PRODID of Apple Contacts"""
+    if not hasattr(card, 'version'):
+        card.add('version')
+    card.version.value = '3.0'
+    if not hasattr(card, 'prodid'):
+        card.add('prodid')
+    card.prodid.value = APPLE_PRODID
+    return card
+
+
+@transform('fix_empty_n')
+def fix_empty_n(card, stats):
+    """Derive a missing or empty N from FN (last word = family name)"""
+    n = card.n.value if hasattr(card, 'n') else None
+    if n is not None and not isinstance(n, str) and any([n.family, n.given, n.additional]):
+        return card
+    parts = card.fn.value.strip().split() if hasattr(card, 'fn') and card.fn.value else []
+    if len(parts) >= 2:
+        name = vobject.vcard.Name(family=parts[-1], given=' '.join(parts[:-1]))
+    else:
+        name = vobject.vcard.Name(given=parts[0] if parts else '')
+    if not hasattr(card, 'n'):
+        card.add('n')
+    card.n.value = name
+    stats['empty_n_fixed'] += 1
+    return card
+
+
+@transform('resize_photo')
+def resize_photo(card, stats):
+    """Shrink the photo of a card over the iCloud card limit (photo_optimizer)"""
+    resized = fit_vcard_photos([card])[0]
+    if resized is True:
+        stats['photos_resized'] += 1
+    elif resized is False:
+        stats['photos_removed'] += 1
+    return card
+
+
+@dataclass(frozen=True)
+class ExportProfile:
+    """A named chain of transforms"""
+    name: str
+    description: str
+    transforms: Tuple[str, ...]
+
+    def apply(self, card: vobject.base.Component, stats: Counter) -> Optional[vobject.base.Component]:
+        """Run every transform in order (None: card is left out)"""
+        for name in self.transforms:
+            card = TRANSFORMS[name](card, stats)
+            if card is None:
+                return None
+        return card
+
+
+PROFILES: Dict[str, ExportProfile] = {profile.name: profile for profile in [
+    ExportProfile('icloud_web', "iCloud.com web import: plain properties, no groups or X- fields",
+                  ('ensure_fn', 'drop_x_fields', 'strip_item_prefixes', 'keep_icloud_web_fields',
+                   'apple_header', 'fix_empty_n', 'resize_photo')),
+    ExportProfile('icloud', "iCloud / Apple Contacts: every card named and within 256 KB",
+                  ('ensure_fn', 'fix_empty_n', 'resize_photo')),
+    ExportProfile('google', "Google Contacts: no Apple groups or X- fields",
+                  ('ensure_fn', 'drop_x_fields', 'strip_item_prefixes', 'fix_empty_n')),
+    ExportProfile('minimal', "Names, emails, phones, organization and title only",
+                  ('require_fn', 'keep_minimal_fields', 'internet_email_type', 'fix_empty_n')),
+    ExportProfile('generic', "Cards as stored, with a formatted name",
+                  ('ensure_fn',)),
+]}
+
+
+def get_profile(profile) -> ExportProfile:
+    """Profile by name (ValueError for unknown names); profiles are passed through"""
+    if isinstance(profile, ExportProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown export profile {profile!r}, use one of {sorted(PROFILES)}")
+    return PROFILES[profile]
+
+
+def export_card(vcard_data: str, profile, stats: Counter) -> Optional[str]:
+    """One card through the profile: serialized card, or None if the profile leaves it out"""
+    profile = get_profile(profile)
+    try:
+        card = profile.apply(vobject.readOne(vcard_data), stats)
+        return card.serialize() if card is not None else None
+    except Exception as e:
+        logger.warning(f"Export profile {profile.name}: card exported unchanged ({e})")
+        stats['errors'] += 1
+        return vcard_data if vcard_data.endswith('\n') else vcard_data + '\r\n'
+
+
+def _export_chunk(args: Tuple[ExportProfile, List[str]]) -> Tuple[List[str], Counter]:
+    """Worker: export a list of cards (module level so it can be pickled)"""
+    profile, cards = args
+    stats: Counter = Counter()
+    exported = [export_card(card, profile, stats) for card in cards]
+    return [card for card in exported if card is not None], stats
+
+
+def _chunks(cards: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    chunk = []
+    for card in cards:
+        chunk.append(card)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_export(cards: Iterable[str], profile, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                stats: Optional[Counter] = None) -> Iterator[str]:
+    """
+    Yield the exported cards in input order.
+
+    cards is consumed lazily. With workers > 1 chunks of chunk_size cards
+    are exported in a process pool, at most 2 * workers chunks at a time.
+    Transform statistics and 'cards_in' / 'cards_out' are added to stats.
+    """
+    profile = get_profile(profile)
+    stats = stats if stats is not None else Counter()
+
+    def counted(exported: List[str], chunk_stats: Counter, cards_in: int) -> List[str]:
+        stats.update(chunk_stats)
+        stats['cards_in'] += cards_in
+        stats['cards_out'] += len(exported)
+        return exported
+
+    if workers <= 1:
+        for chunk in _chunks(cards, chunk_size):
+            yield from counted(*_export_chunk((profile, chunk)), len(chunk))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in _chunks(cards, chunk_size):
+            pending.append((pool.submit(_export_chunk, (profile, chunk)), len(chunk)))
+            if len(pending) >= 2 * workers:
+                future, size = pending.popleft()
+                yield from counted(*future.result(), size)
+        while pending:
+            future, size = pending.popleft()
+            yield from counted(*future.result(), size)
+
+
+def export_file(input_path: str, output_path: str, profile, workers: int = 1,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Counter:
+    """Stream a vCard file through a profile into output_path; returns the statistics"""
+    stats: Counter = Counter()
+    cards = (block.raw for block in iter_vcard_blocks(input_path))
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        for card in iter_export(cards, profile, workers, chunk_size, stats):
+            f.write(card)
+    return stats
+
+
+def main():
+    """Export a vCard file with a profile from the command line"""
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Export a vCard file for a target (iCloud.com, Google, ...)")
+    parser.add_argument("input", nargs='?', help="vCard file to export")
+    parser.add_argument("output", nargs='?', help="Output file (default: <input>_<profile>.vcf)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default='generic', help="Export profile")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--list", action="store_true", help="List the profiles and their transforms")
+    args = parser.parse_args()
+
+    if args.list or not args.input:
+        for profile in PROFILES.values():
+            print(f"{profile.name:12} {profile.description}")
+            print(f"{'':12} {' → '.join(profile.transforms)}")
+        return
+    if not os.path.exists(args.input):
+        print(f"❌ File not found: {args.input}")
+        return
+    output = args.output or f"{os.path.splitext(args.input)[0]}_{args.profile}.vcf"
+
+    stats = export_file(args.input, output, args.profile, workers=args.workers)
+    print(f"Export profile: {args.profile}")
+    print("=" * 60)
+    print(f"Cards read:     {stats.pop('cards_in', 0):,}")
+    print(f"Cards exported: {stats.pop('cards_out', 0):,}")
+    for key, count in sorted(stats.items()):
+        print(f"  {key.replace('_', ' ')}: {count:,}")
+    if stats.get('errors'):
+        print(f"⚠️  {stats['errors']} cards could not be transformed and were exported unchanged")
+    print(f"\n✅ Saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
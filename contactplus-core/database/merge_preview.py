@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Merge Preview - On-demand merge groups and field-level diffs
+
+The review tools (generate_enhanced_review_html, IntelligentContactMerger.
+generate_review_file) render every duplicate group into one static HTML file
+up front. This service backs the merge API instead:
+
+1. list_groups(): cheap key-based duplicate groups (shared email, phone or
+   normalized name), recomputed only when the database changes
+2. preview(): field-by-field diff and proposed merge for ONE group, computed
+   when a reviewer opens it and cached until one of its contacts changes
+
+Group ids are derived from the member contact ids, so they stay stable
+across rescans as long as the group itself does not change.
+"""
+
+import copy
+import hashlib
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+
+import vobject
+
+from . import contact_normalization
+from .merge_accumulator import MergeAccumulator
+
+# vCard property -> label shown in the preview, in display order
+PREVIEW_FIELDS = OrderedDict([
+    ('fn', 'Name'),
+    ('n', 'Structured name'),
+    ('email', 'Emails'),
+    ('tel', 'Phones'),
+    ('adr', 'Addresses'),
+    ('org', 'Organization'),
+    ('title', 'Title'),
+    ('url', 'URLs'),
+    ('bday', 'Birthday'),
+    ('note', 'Notes'),
+    ('photo', 'Photo')
+])
+
+
+def group_id_for(contact_ids: List[str]) -> str:
+    """Stable id of a group of contacts"""
+    return hashlib.sha1('|'.join(sorted(contact_ids)).encode('utf-8')).hexdigest()[:12]
+
+
+def match_keys(vcard) -> List[str]:
+    """Keys that put contacts into the same merge group"""
+    keys = []
+    if hasattr(vcard, 'fn') and vcard.fn.value:
+        name = contact_normalization.normalize_name(vcard.fn.value)
+        if name:
+            keys.append(f"name:{name}")
+    for email in vcard.contents.get('email', []):
+        key = contact_normalization.normalize_email(email.value)
+        if key:
+            keys.append(f"email:{key}")
+    for tel in vcard.contents.get('tel', []):
+        key = contact_normalization.normalize_phone(tel.value)
+        if len(key) >= 7:
+            keys.append(f"phone:{key}")
+    return keys
+
+
+def display_value(name: str, value) -> str:
+    """Human readable value of one property"""
+    if name == 'photo':
+        data = value if isinstance(value, bytes) else str(value).encode('utf-8')
+        return f"photo sha256:{hashlib.sha256(data).hexdigest()[:12]} ({len(data):,} bytes)"
+    if name == 'org' and isinstance(value, list):
+        return ';'.join(part for part in value if part)
+    return ' '.join(str(value).split())
+
+
+def comparison_key(name: str, value) -> str:
+    """Normalized value used to decide whether two contacts agree"""
+    if name == 'email':
+        return contact_normalization.normalize_email(value)
+    if name == 'tel':
+        return contact_normalization.normalize_phone(value)
+    if name in ('fn', 'n', 'org'):
+        return contact_normalization.normalize_name(display_value(name, value))
+    if name == 'photo':
+        return display_value(name, value)
+    return display_value(name, value).lower()
+
+
+def field_diff(vcards: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Compare every preview field across contacts.
+
+    Status per field:
+    - identical: all contacts have the same (normalized) values
+    - missing: contacts agree, but some do not have the field
+    - different: contacts hold different values
+    """
+    diffs = []
+    for name, label in PREVIEW_FIELDS.items():
+        values = {}
+        keys = {}
+        for contact_id, vcard in vcards.items():
+            fields = [f for f in vcard.contents.get(name, []) if f.value]
+            if fields:
+                values[contact_id] = [display_value(name, f.value) for f in fields]
+                keys[contact_id] = frozenset(comparison_key(name, f.value) for f in fields)
+        if not values:
+            continue
+        if len(set(keys.values())) > 1:
+            status = 'different'
+        elif len(values) < len(vcards):
+            status = 'missing'
+        else:
+            status = 'identical'
+        diffs.append({'field': name, 'label': label, 'status': status, 'values': values})
+    return diffs
+
+
+def completeness(vcard) -> int:
+    """Number of filled properties (most complete contact becomes the merge base)"""
+    return sum(1 for fields in vcard.contents.values() for f in fields if f.value)
+
+
+class MergePreviewService:
+    """Lazily computed merge groups and cached per-group previews"""
+
+    def __init__(self, connector, max_cached_previews: int = 256):
+        self.connector = connector
+        self.max_cached_previews = max_cached_previews
+        self._groups: Optional[List[Dict[str, Any]]] = None
+        self._groups_by_id: Dict[str, Dict[str, Any]] = {}
+        self._groups_version = None
+        self._previews = OrderedDict()  # group_id -> (member versions, preview)
+        self.stats = {'group_scans': 0, 'previews_computed': 0, 'preview_cache_hits': 0}
+
+    def database_version(self) -> int:
+        """Changes whenever a contact is imported, updated, deleted or restored"""
+        return len(self.connector.database.audit_log)
+
+    def list_groups(self) -> List[Dict[str, Any]]:
+        """All merge groups, largest first"""
+        version = self.database_version()
+        if self._groups is None or version != self._groups_version:
+            self._groups = self._scan_groups()
+            self._groups_by_id = {group['group_id']: group for group in self._groups}
+            self._groups_version = version
+        return self._groups
+
+    def get_group(self, group_id: str) -> Optional[Dict[str, Any]]:
+        self.list_groups()
+        return self._groups_by_id.get(group_id)
+
+    def preview(self, group_id: str) -> Optional[Dict[str, Any]]:
+        """Field-level diff and proposed merge for one group (None if unknown)"""
+        group = self.get_group(group_id)
+        if group is None:
+            return None
+        records = [self.connector.get_contact(cid) for cid in group['contact_ids']]
+        versions = tuple(record.version for record in records)
+
+        cached = self._previews.get(group_id)
+        if cached is not None and cached[0] == versions:
+            self._previews.move_to_end(group_id)
+            self.stats['preview_cache_hits'] += 1
+            return cached[1]
+
+        preview = self._build_preview(group, records)
+        self.stats['previews_computed'] += 1
+        self._previews[group_id] = (versions, preview)
+        self._previews.move_to_end(group_id)
+        while len(self._previews) > self.max_cached_previews:
+            self._previews.popitem(last=False)
+        return preview
+
+    def _scan_groups(self) -> List[Dict[str, Any]]:
+        self.stats['group_scans'] += 1
+        records = self.connector.get_all_contacts(active_only=True)
+        parent = list(range(len(records)))
+        names = []
+        record_keys = []
+        key_owner = {}
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for index, record in enumerate(records):
+            try:
+                vcard = vobject.readOne(record.vcard_data)
+            except Exception:
+                names.append('')
+                record_keys.append([])
+                continue
+            names.append(vcard.fn.value if hasattr(vcard, 'fn') else '')
+            keys = match_keys(vcard)
+            record_keys.append(keys)
+            for key in keys:
+                owner = key_owner.setdefault(key, index)
+                root_a, root_b = find(owner), find(index)
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        members = OrderedDict()
+        for index in range(len(records)):
+            members.setdefault(find(index), []).append(index)
+
+        groups = []
+        for indexes in members.values():
+            if len(indexes) < 2:
+                continue
+            key_counts = Counter(key for index in indexes for key in set(record_keys[index]))
+            shared = sorted({key.split(':', 1)[0] for key, count in key_counts.items() if count > 1})
+            contact_ids = [records[index].contact_id for index in indexes]
+            groups.append({
+                'group_id': group_id_for(contact_ids),
+                'size': len(indexes),
+                'contact_ids': contact_ids,
+                'names': [names[index] for index in indexes],
+                'match_on': shared
+            })
+        groups.sort(key=lambda g: (-g['size'], g['group_id']))
+        return groups
+
+    def _build_preview(self, group, records) -> Dict[str, Any]:
+        vcards = OrderedDict((record.contact_id, vobject.readOne(record.vcard_data)) for record in records)
+        base_id = max(vcards, key=lambda cid: completeness(vcards[cid]))
+
+        accumulator = MergeAccumulator(copy.deepcopy(vcards[base_id]), merge_names=True, merge_photo=True)
+        accumulator.absorb_all(vcard for cid, vcard in vcards.items() if cid != base_id)
+        merged = accumulator.result()
+
+        return {
+            'group_id': group['group_id'],
+            'match_on': group['match_on'],
+            'base_contact_id': base_id,
+            'contacts': [{
+                'contact_id': record.contact_id,
+                'fn': vcards[record.contact_id].fn.value if hasattr(vcards[record.contact_id], 'fn') else '',
+                'source': record.source_info.database_name,
+                'version': record.version
+            } for record in records],
+            'fields': field_diff(vcards),
+            'merged': {
+                name: [display_value(name, f.value) for f in merged.contents.get(name, []) if f.value]
+                for name in PREVIEW_FIELDS if merged.contents.get(name)
+            }
+        }
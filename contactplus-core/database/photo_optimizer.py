@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Photo Optimizer - Shrink contact photos to fit iCloud size limits
+
+iCloud rejects cards over 256 KB and photos over 224 KB. Instead of
+re-encoding at quality 95, 90, 85, ... and then shrinking step by step
+(25+ encodes per photo), optimize_photo() decodes the photo once and
+
+1. binary-searches the highest JPEG quality (MIN_QUALITY..MAX_QUALITY)
+   that fits the byte budget at full size
+2. if even MIN_QUALITY is too large, binary-searches the largest scale
+   (MIN_SCALE..99 %) that fits at SCALED_QUALITY
+
+which takes about log2 of the range, i.e. 7-15 encodes. PhotoOptimizer
+caches results by (SHA-256 of the photo, budget), so a photo shared by
+several cards is optimized once, and optimize_many() spreads the photos
+over a process pool. fit_vcard_photos() applies all of this to vobject
+cards, with the budget taken from what the rest of the card leaves free.
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+ICLOUD_CARD_LIMIT = 256 * 1024
+ICLOUD_PHOTO_LIMIT = 224 * 1024
+
+MIN_QUALITY = 30
+MAX_QUALITY = 95
+SCALED_QUALITY = 75
+MIN_SCALE = 10  # percent
+CACHE_SIZE = 256
+
+# Folded base64 lines: 74 characters of payload per 77 bytes (CRLF + space)
+FOLD_PAYLOAD = 74
+FOLD_LINE = 77
+
+
+@dataclass(frozen=True)
+class OptimizedPhoto:
+    """A photo that fits its byte budget"""
+    data: bytes
+    quality: Optional[int]  # None: the original already fit and is unchanged
+    scale: float
+    encodes: int
+    original_size: int
+
+
+def encoded_size(photo_bytes: int, folded: bool = True) -> int:
+    """Bytes a photo of this size takes in a card as base64 (folded or on one line)"""
+    chars = 4 * ((photo_bytes + 2) // 3)
+    if not folded:
+        return chars
+    return chars + (FOLD_LINE - FOLD_PAYLOAD) * (chars // FOLD_PAYLOAD)
+
+
+def photo_budget(card_bytes: int, photo_bytes: int) -> int:
+    """
+    Largest photo (bytes) that keeps this card within the iCloud limits.
+
+    card_bytes is the serialized card including its current photo of
+    photo_bytes bytes. Writers differ in whether they fold base64, so the
+    current photo counts unfolded and the new one folded: the budget errs
+    on the small side. 0 if the rest of the card alone is too large.
+    """
+    room = ICLOUD_CARD_LIMIT - (card_bytes - encoded_size(photo_bytes, folded=False))
+    if room <= 0:
+        return 0
+    return min(ICLOUD_PHOTO_LIMIT, room * FOLD_PAYLOAD // FOLD_LINE // 4 * 3)
+
+
+def _decode(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image = ImageOps.exif_transpose(image)
+    image.load()
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB') if image.mode != 'RGB' else image
+
+
+def _largest_fitting(encode: Callable[[int], bytes], low: int, high: int,
+                     max_bytes: int) -> Optional[Tuple[int, bytes]]:
+    """Largest value in low..high whose encoding fits (encoded size grows with the value)"""
+    best = None
+    while low <= high:
+        middle = (low + high) // 2
+        data = encode(middle)
+        if len(data) <= max_bytes:
+            best = (middle, data)
+            low = middle + 1
+        else:
+            high = middle - 1
+    return best
+
+
+def optimize_photo(data: bytes, max_bytes: int = ICLOUD_PHOTO_LIMIT) -> Optional[OptimizedPhoto]:
+    """
+    JPEG of the photo that fits max_bytes, with the highest quality and scale.
+
+    Photos that already fit are returned unchanged. None if the photo cannot
+    be decoded or does not fit even at MIN_SCALE.
+    """
+    if data and len(data) <= max_bytes:
+        return OptimizedPhoto(data, None, 1.0, 0, len(data))
+    try:
+        image = _decode(data)
+    except Exception as e:
+        logger.warning(f"Cannot decode photo: {e}")
+        return None
+
+    encodes = 0
+
+    def encode(img: Image.Image, quality: int) -> bytes:
+        nonlocal encodes
+        encodes += 1
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=quality, optimize=True)
+        return buffer.getvalue()
+
+    lowest = encode(image, MIN_QUALITY)
+    if len(lowest) <= max_bytes:
+        quality, jpeg = _largest_fitting(lambda q: encode(image, q), MIN_QUALITY + 1, MAX_QUALITY,
+                                         max_bytes) or (MIN_QUALITY, lowest)
+        return OptimizedPhoto(jpeg, quality, 1.0, encodes, len(data))
+
+    def encode_scaled(percent: int) -> bytes:
+        size = (max(1, image.width * percent // 100), max(1, image.height * percent // 100))
+        return encode(image.resize(size, Image.Resampling.LANCZOS), SCALED_QUALITY)
+
+    best = _largest_fitting(encode_scaled, MIN_SCALE, 99, max_bytes)
+    if best is None:
+        return None
+    percent, jpeg = best
+    return OptimizedPhoto(jpeg, SCALED_QUALITY, percent / 100, encodes, len(data))
+
+
+def _optimize_job(job: Tuple[bytes, int]) -> Optional[OptimizedPhoto]:
+    """Worker entry point (module level so it can be pickled)"""
+    return optimize_photo(*job)
+
+
+class PhotoOptimizer:
+    """
+    Optimized photos keyed by (photo digest, byte budget) (LRU, max_entries).
+
+    Photos that cannot be optimized are cached as None so they are not retried.
+    """
+
+    def __init__(self, max_entries: int = CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int], Optional[OptimizedPhoto]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: Tuple[str, int]) -> Tuple[bool, Optional[OptimizedPhoto]]:
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return True, self._entries[key]
+        return False, None
+
+    def _store(self, key: Tuple[str, int], result: Optional[OptimizedPhoto]):
+        self.misses += 1
+        self._entries[key] = result
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def optimize(self, data: bytes, max_bytes: int = ICLOUD_PHOTO_LIMIT) -> Optional[OptimizedPhoto]:
+        """optimize_photo() through the cache"""
+        key = (hashlib.sha256(data).hexdigest(), max_bytes)
+        found, result = self._lookup(key)
+        if not found:
+            result = optimize_photo(data, max_bytes)
+            self._store(key, result)
+        return result
+
+    def optimize_many(self, jobs: Sequence[Tuple[bytes, int]],
+                      workers: int = 1) -> List[Optional[OptimizedPhoto]]:
+        """
+        optimize() for a list of (photo bytes, max_bytes), results in job order.
+
+        Photos not in the cache are optimized once each, in a process pool
+        of this many workers when there is more than one of them.
+        """
+        keys = [(hashlib.sha256(data).hexdigest(), max_bytes) for data, max_bytes in jobs]
+        results: Dict[Tuple[str, int], Optional[OptimizedPhoto]] = {}
+        pending: Dict[Tuple[str, int], Tuple[bytes, int]] = {}
+        for key, job in zip(keys, jobs):
+            if key in results or key in pending:
+                continue
+            found, result = self._lookup(key)
+            if found:
+                results[key] = result
+            else:
+                pending[key] = job
+
+        if workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+                computed = list(pool.map(_optimize_job, pending.values()))
+        else:
+            computed = [_optimize_job(job) for job in pending.values()]
+        for key, result in zip(pending, computed):
+            self._store(key, result)
+            results[key] = result
+        return [results[key] for key in keys]
+
+    def info(self) -> Dict[str, int]:
+        """Cache statistics"""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def clear(self):
+        """Drop all cached results"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared by all callers in the process
+default_optimizer = PhotoOptimizer()
+
+
+def optimize_base64(base64_data: str, max_bytes: int = ICLOUD_PHOTO_LIMIT) -> Optional[str]:
+    """Base64 photo that fits max_bytes (decoded size), None if it cannot be made to fit"""
+    try:
+        data = base64.b64decode(base64_data)
+    except (binascii.Error, ValueError):
+        return None
+    result = default_optimizer.optimize(data, max_bytes)
+    return base64.b64encode(result.data).decode('ascii') if result else None
+
+
+def fit_vcard_photos(vcards: Sequence, workers: int = 1,
+                     optimizer: Optional[PhotoOptimizer] = None) -> List[Optional[bool]]:
+    """
+    Shrink the PHOTO of every vobject card that is over the iCloud card limit.
+
+    Per card: None if it was left alone (no photo or within the limit), True
+    if the photo was re-encoded, False if the photo was removed because it
+    cannot be decoded or made small enough.
+    """
+    optimizer = optimizer or default_optimizer
+    outcome: List[Optional[bool]] = [None] * len(vcards)
+    jobs, targets = [], []
+    for index, vcard in enumerate(vcards):
+        if not hasattr(vcard, 'photo'):
+            continue
+        card_bytes = len(vcard.serialize().encode('utf-8'))
+        if card_bytes <= ICLOUD_CARD_LIMIT:
+            continue
+        data = vcard.photo.value
+        if isinstance(data, str):
+            try:
+                data = base64.b64decode(data)
+            except (binascii.Error, ValueError):
+                data = b''
+        jobs.append((data, photo_budget(card_bytes, len(data))))
+        targets.append(index)
+
+    for index, result in zip(targets, optimizer.optimize_many(jobs, workers)):
+        vcard = vcards[index]
+        if result is None:
+            del vcard.photo
+            outcome[index] = False
+            continue
+        vcard.photo.value = result.data
+        vcard.photo.encoding_param = 'b'
+        if result.quality is not None:
+            vcard.photo.type_param = 'JPEG'
+        outcome[index] = True
+    return outcome
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Photo Store - Content-addressed storage for contact photos
+
+Inline PHOTO data is base64 inside vcard_data, so every metadata save,
+audit rollback copy and backup carries it, and the same picture imported
+from two sources is stored twice. With the photo store
+
+1. externalize_photos() writes each inline photo to
+   photos/<first two hex digits>/<sha256> and replaces the property by a
+   reference: PHOTO;VALUE=uri;TYPE=JPEG:urn:sha256:<hex>
+2. inline_photos() puts the base64 data back (exports)
+3. read_photo() returns the image bytes of a card, inline or stored
+
+Identical photos share one file. vCard 4.0 data: URIs keep their media
+type in a MEDIATYPE parameter and are restored as data: URIs. Photos given
+by URL and vCard 2.1 style properties (PHOTO;JPEG;ENCODING=BASE64) are
+left as they are.
+"""
+
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .vcard_tokenizer import FallbackRequired, tokenize_line
+
+logger = logging.getLogger(__name__)
+
+PHOTO_URI_PREFIX = 'urn:sha256:'
+LINE_LENGTH = 75
+
+_PHOTO_LINE = re.compile(r'(?:[\w-]+\.)?PHOTO[;:]', re.IGNORECASE)
+_INLINE = r'^(?:[\w-]+\.)?PHOTO(?:;[^:\r\n]*ENCODING="?(?:b|base64)\b|(?:;[^:\r\n]*)?:data:)'
+# Cheap check for cards (or a whole mapped contacts.vcf) with inline photos
+INLINE_PHOTO = re.compile(_INLINE, re.IGNORECASE | re.MULTILINE)
+INLINE_PHOTO_BYTES = re.compile(_INLINE.encode('ascii'), re.IGNORECASE | re.MULTILINE)
+
+_DIGEST = re.compile(r'[0-9a-f]{64}')
+_PHYSICAL_LINE = re.compile(r'[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+$')
+
+MEDIA_TYPES = {
+    'JPEG': 'image/jpeg', 'JPG': 'image/jpeg', 'PNG': 'image/png', 'GIF': 'image/gif',
+    'BMP': 'image/bmp', 'WEBP': 'image/webp', 'HEIC': 'image/heic', 'TIFF': 'image/tiff',
+}
+SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF8', 'image/gif'),
+    (b'BM', 'image/bmp'),
+]
+
+
+def media_type(data: bytes, type_param: Optional[str] = None) -> str:
+    """Media type from the TYPE/MEDIATYPE parameter, else from the file signature"""
+    if type_param:
+        if '/' in type_param:
+            return type_param.lower()
+        if type_param.upper() in MEDIA_TYPES:
+            return MEDIA_TYPES[type_param.upper()]
+    for signature, mtype in SIGNATURES:
+        if data.startswith(signature):
+            return mtype
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+
+class PhotoStore:
+    """Photo files named by the SHA-256 of their bytes"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, digest: str) -> str:
+        if not _DIGEST.fullmatch(digest):
+            raise KeyError(digest)
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, data: bytes) -> str:
+        """Store the photo (once) and return its digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """Photo bytes (KeyError if the store has no such photo)"""
+        try:
+            with open(self.path(digest), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+
+    def __contains__(self, digest: str) -> bool:
+        try:
+            return os.path.exists(self.path(digest))
+        except KeyError:
+            return False
+
+
+def _content_lines(vcard_data: str) -> List[List[str]]:
+    """Physical lines (with their line endings) grouped per content line"""
+    groups = []
+    for line in _PHYSICAL_LINE.findall(vcard_data):
+        if line[:1] in (' ', '\t') and groups:
+            groups[-1].append(line)
+        else:
+            groups.append([line])
+    return groups
+
+
+def _unfold(lines: List[str]) -> str:
+    return lines[0].rstrip('\r\n') + ''.join(line[1:].rstrip('\r\n') for line in lines[1:])
+
+
+def _line_ending(lines: List[str]) -> str:
+    last = lines[-1]
+    return last[len(last.rstrip('\r\n')):]
+
+
+def _format_line(group: Optional[str], name: str, params: Dict[str, List[str]], value: str) -> str:
+    head = f"{group}.{name}" if group else name
+    for key, values in params.items():
+        quoted = [f'"{v}"' if any(c in v for c in ':;,') else v for v in values]
+        head += f";{key}={','.join(quoted)}"
+    return f"{head}:{value}"
+
+
+def _fold(line: str, ending: str) -> str:
+    if len(line) <= LINE_LENGTH:
+        return line + ending
+    parts = [line[:LINE_LENGTH]]
+    parts += [' ' + line[i:i + LINE_LENGTH - 1] for i in range(LINE_LENGTH, len(line), LINE_LENGTH - 1)]
+    return (ending or '\r\n').join(parts) + ending
+
+
+def _decode_inline(params: Dict[str, List[str]], value: str) -> Optional[Tuple[bytes, Optional[str]]]:
+    """(bytes, data: URI media type) of an inline photo value, None for URLs and references"""
+    encoding = params.get('ENCODING', [''])[0].upper()
+    value = value.strip()
+    try:
+        if encoding in ('B', 'BASE64'):
+            return base64.b64decode(''.join(value.split())), None
+        if value[:5].lower() == 'data:':
+            header, _, payload = value.partition(',')
+            if header.lower().endswith(';base64'):
+                data = base64.b64decode(''.join(payload.split()))
+                return data, header[5:].split(';')[0] or media_type(data)
+    except (binascii.Error, ValueError):
+        pass
+    return None
+
+
+def _parse_photo(line: str):
+    """(group, name, params, value) of a PHOTO content line, None if it is not one"""
+    if not _PHOTO_LINE.match(line):
+        return None
+    try:
+        group, name, params, value = tokenize_line(line)
+    except FallbackRequired:
+        # vCard 2.1 style parameters - left as they are
+        return None
+    return (group, name, params, value) if name == 'PHOTO' else None
+
+
+def externalize_photos(vcard_data: str, store: PhotoStore) -> str:
+    """vcard_data with every inline photo moved to the store"""
+    if not INLINE_PHOTO.search(vcard_data):
+        return vcard_data
+    output = []
+    for lines in _content_lines(vcard_data):
+        photo = _parse_photo(_unfold(lines))
+        decoded = _decode_inline(photo[2], photo[3]) if photo else None
+        if decoded is None:
+            output.extend(lines)
+            continue
+        group, name, params, _ = photo
+        data, data_uri_type = decoded
+        params = {key: values for key, values in params.items() if key not in ('ENCODING', 'VALUE')}
+        if data_uri_type:
+            params['MEDIATYPE'] = [data_uri_type]
+        params = {'VALUE': ['uri'], **params}
+        line = _format_line(group, name, params, PHOTO_URI_PREFIX + store.put(data))
+        output.append(_fold(line, _line_ending(lines)))
+    return ''.join(output)
+
+
+def inline_photos(vcard_data: str, store: PhotoStore) -> str:
+    """vcard_data with photo references replaced by the base64 data (for exports)"""
+    if PHOTO_URI_PREFIX not in vcard_data:
+        return vcard_data
+    output = []
+    for lines in _content_lines(vcard_data):
+        photo = _parse_photo(_unfold(lines))
+        if photo is None or not photo[3].startswith(PHOTO_URI_PREFIX):
+            output.extend(lines)
+            continue
+        group, name, params, value = photo
+        try:
+            data = store.get(value[len(PHOTO_URI_PREFIX):].strip())
+        except KeyError:
+            logger.warning(f"Photo {value} is missing from the photo store")
+            output.extend(lines)
+            continue
+        payload = base64.b64encode(data).decode('ascii')
+        params = {key: values for key, values in params.items() if key != 'VALUE'}
+        data_uri_type = params.pop('MEDIATYPE', [None])[0]
+        if data_uri_type:
+            line = _format_line(group, name, params, f"data:{data_uri_type};base64,{payload}")
+        else:
+            line = _format_line(group, name, {'ENCODING': ['b'], **params}, payload)
+        output.append(_fold(line, _line_ending(lines)))
+    return ''.join(output)
+
+
+def read_photo(vcard_data: str, store: PhotoStore) -> Optional[Tuple[bytes, str, str]]:
+    """(image bytes, media type, sha256) of the first photo held inline or in the store"""
+    for lines in _content_lines(vcard_data):
+        photo = _parse_photo(_unfold(lines))
+        if photo is None:
+            continue
+        _, _, params, value = photo
+        type_param = (params.get('MEDIATYPE') or params.get('TYPE') or [None])[0]
+        if value.startswith(PHOTO_URI_PREFIX):
+            digest = value[len(PHOTO_URI_PREFIX):].strip()
+            try:
+                data = store.get(digest)
+            except KeyError:
+                logger.warning(f"Photo {value} is missing from the photo store")
+                continue
+        else:
+            decoded = _decode_inline(params, value)
+            if decoded is None:
+                continue
+            data, data_uri_type = decoded
+            type_param = data_uri_type or type_param
+            digest = hashlib.sha256(data).hexdigest()
+        return data, media_type(data, type_param), digest
+    return None
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Photo Thumbnails - Small avatar renditions of contact photos
+
+Clients that only show an avatar should not download a full-size photo.
+ThumbnailCache renders a photo into every size and format from one Pillow
+decode (JPEG photos are decoded at reduced scale right away), and keeps
+the renditions on disk keyed by the photo's SHA-256, the size and the
+format:
+
+    thumbnails/<first two hex digits>/<sha256>_<size>.<jpg|webp>
+
+A photo is therefore decoded once no matter how many contacts share it or
+how often it is requested. Thumbnails keep the aspect ratio
+(longest side = size) and are never upscaled.
+"""
+
+import io
+import os
+from typing import Dict, Tuple
+
+from PIL import Image, ImageOps
+
+THUMBNAIL_SIZES = (64, 128, 256)
+# format name -> (Pillow format, file extension, media type)
+THUMBNAIL_FORMATS: Dict[str, Tuple[str, str, str]] = {
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+    'webp': ('WEBP', 'webp', 'image/webp'),
+}
+DEFAULT_QUALITY = 85
+
+
+class ThumbnailCache:
+    """Resized photo renditions on disk, by photo digest, size and format"""
+
+    def __init__(self, directory: str, quality: int = DEFAULT_QUALITY):
+        self.directory = directory
+        self.quality = quality
+
+    def path(self, digest: str, size: int, fmt: str) -> str:
+        extension = THUMBNAIL_FORMATS[fmt][1]
+        return os.path.join(self.directory, digest[:2], f"{digest}_{size}.{extension}")
+
+    def get(self, digest: str, data: bytes, size: int, fmt: str = 'jpeg') -> Tuple[bytes, str]:
+        """
+        (thumbnail bytes, media type) of the photo with this digest.
+
+        data is the full photo, only decoded when the rendition is not cached
+        yet. Raises ValueError for sizes/formats that are not offered or data
+        Pillow cannot decode.
+        """
+        if size not in THUMBNAIL_SIZES:
+            raise ValueError(f"Unsupported thumbnail size {size}, use one of {THUMBNAIL_SIZES}")
+        if fmt not in THUMBNAIL_FORMATS:
+            raise ValueError(f"Unsupported thumbnail format {fmt!r}, use one of {sorted(THUMBNAIL_FORMATS)}")
+        media_type = THUMBNAIL_FORMATS[fmt][2]
+
+        path = self.path(digest, size, fmt)
+        if not os.path.exists(path):
+            self._render(digest, data)
+        with open(path, 'rb') as f:
+            return f.read(), media_type
+
+    def _render(self, digest: str, data: bytes):
+        """Decode once and write every size in every format"""
+        try:
+            image = Image.open(io.BytesIO(data))
+            # JPEG: let the decoder scale down by up to 8x instead of decoding full size
+            image.draft('RGB', (max(THUMBNAIL_SIZES), max(THUMBNAIL_SIZES)))
+            image = ImageOps.exif_transpose(image)
+            image.load()
+        except Exception as e:
+            raise ValueError(f"Cannot decode photo {digest}: {e}") from e
+
+        os.makedirs(os.path.join(self.directory, digest[:2]), exist_ok=True)
+        for fmt, (pillow_format, _, _) in THUMBNAIL_FORMATS.items():
+            rendition = _normalize_mode(image, fmt)
+            # Largest first, so every smaller size is resized from an already small image
+            for size in sorted(THUMBNAIL_SIZES, reverse=True):
+                rendition = rendition.copy()
+                rendition.thumbnail((size, size), Image.LANCZOS)
+                buffer = io.BytesIO()
+                rendition.save(buffer, pillow_format, quality=self.quality)
+                path = self.path(digest, size, fmt)
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(buffer.getvalue())
+                os.replace(temp_path, path)
+
+
+def _normalize_mode(image: Image.Image, fmt: str) -> Image.Image:
+    """RGB for JPEG (transparency on white), RGB/RGBA for WebP"""
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if not has_alpha:
+        return image.convert('RGB') if image.mode != 'RGB' else image
+    image = image.convert('RGBA')
+    if fmt == 'webp':
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
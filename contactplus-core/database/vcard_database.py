@@ -11,6 +11,12 @@ Features:
 - Source tracking for all contacts
 - Rollback capabilities
 - CRUD operations with validation
+- Compact in-memory records (__slots__, shared source descriptors,
+  integer timestamps)
+- Optional memory-mapped mode: records keep only the offset and length of
+  their card in contacts.vcf and decode the text on access
+- Optional photo store: inline photos are kept once per image under
+  photos/ and cards reference them by SHA-256 (see photo_store)
 
 Architecture:
 - VCardDatabase: Main database class
@@ -21,36 +27,305 @@ Architecture:
 import os
 import json
 import logging
+import mmap
 import shutil
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 import vcard  # For validation only
 import vobject  # For manipulation only
 from .vcard_validator import VCardStandardsValidator
+from .vcard_stream import iter_vcard_blocks
+from .photo_store import PhotoStore, externalize_photos, inline_photos, read_photo, INLINE_PHOTO, INLINE_PHOTO_BYTES
+from .three_way_merge import three_way_merge
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
-class SourceInfo:
-    """Metadata about contact source"""
+
+def _has_content(path: str) -> bool:
+    """True if the file holds anything besides whitespace"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return any(line.strip() for line in f)
+
+
+class MergeConflictError(Exception):
+    """Concurrent edits changed the same properties of a contact"""
+    
+    def __init__(self, contact_id: str, conflicts: list):
+        self.contact_id = contact_id
+        self.conflicts = conflicts
+        names = ', '.join(c.name for c in conflicts)
+        super().__init__(f"Contact {contact_id} was changed concurrently: conflicting properties {names}")
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def pack_timestamp(value):
+    """
+    ISO timestamp -> integer microseconds since 1970 (on the same local clock).
+    Values that would not unpack to the identical string are kept as they are.
+    """
+    if not isinstance(value, str):
+        return value
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if moment.tzinfo is not None:
+        return value
+    packed = (moment - _EPOCH) // _MICROSECOND
+    return packed if unpack_timestamp(packed) == value else value
+
+def unpack_timestamp(value):
+    """Inverse of pack_timestamp"""
+    if isinstance(value, int):
+        return (_EPOCH + value * _MICROSECOND).isoformat()
+    return value
+
+@dataclass(frozen=True, slots=True)
+class SourceDescriptor:
+    """What all contacts of one import share"""
     database_name: str
     source_file: str
-    original_index: int
-    import_timestamp: str
     import_session_id: str
 
-@dataclass
+_sources: List[SourceDescriptor] = []
+_source_ids: Dict[SourceDescriptor, int] = {}
+_sources_lock = threading.Lock()
+
+def intern_source(database_name: str, source_file: str, import_session_id: str) -> int:
+    """Id of the shared SourceDescriptor for these values"""
+    descriptor = SourceDescriptor(database_name, source_file, import_session_id)
+    source_id = _source_ids.get(descriptor)
+    if source_id is None:
+        with _sources_lock:
+            source_id = _source_ids.get(descriptor)
+            if source_id is None:
+                source_id = len(_sources)
+                _sources.append(descriptor)
+                _source_ids[descriptor] = source_id
+    return source_id
+
+class SourceInfo:
+    """
+    Metadata about contact source.
+    
+    The import descriptor (database, file, session) is interned and
+    referenced by id, the import timestamp is packed (pack_timestamp).
+    Attributes read as before and to_dict() gives the metadata.json shape.
+    """
+    
+    __slots__ = ('source_id', 'original_index', '_import_time')
+    FIELDS = ('database_name', 'source_file', 'original_index', 'import_timestamp', 'import_session_id')
+    
+    def __init__(self, database_name: str, source_file: str, original_index: int,
+                 import_timestamp: str, import_session_id: str):
+        self.source_id = intern_source(database_name, source_file, import_session_id)
+        self.original_index = original_index
+        self._import_time = pack_timestamp(import_timestamp)
+    
+    @classmethod
+    def from_parts(cls, source_id: int, original_index: int, import_time) -> 'SourceInfo':
+        info = cls.__new__(cls)
+        info.source_id = source_id
+        info.original_index = original_index
+        info._import_time = import_time
+        return info
+    
+    @property
+    def descriptor(self) -> SourceDescriptor:
+        return _sources[self.source_id]
+    
+    @property
+    def database_name(self) -> str:
+        return self.descriptor.database_name
+    
+    @property
+    def source_file(self) -> str:
+        return self.descriptor.source_file
+    
+    @property
+    def import_session_id(self) -> str:
+        return self.descriptor.import_session_id
+    
+    @property
+    def import_timestamp(self) -> str:
+        return unpack_timestamp(self._import_time)
+    
+    @import_timestamp.setter
+    def import_timestamp(self, value: str):
+        self._import_time = pack_timestamp(value)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+    
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.source_id, self.original_index, self._import_time) == \
+            (other.source_id, other.original_index, other._import_time)
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        values = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"SourceInfo({values})"
+
 class ContactRecord:
-    """Internal contact record with metadata"""
-    contact_id: str
-    vcard_data: str
-    source_info: SourceInfo
-    created_at: str
-    updated_at: str
-    version: int
-    is_active: bool
+    """
+    Internal contact record with metadata.
+    
+    Stored compactly (__slots__, source referenced by id, packed
+    timestamps); source_info, created_at and updated_at still read and
+    assign as SourceInfo and ISO strings.
+    """
+    
+    __slots__ = ('contact_id', 'vcard_data', '_source_id', '_original_index', '_import_time',
+                 '_created', '_updated', 'version', 'is_active')
+    FIELDS = ('contact_id', 'vcard_data', 'source_info', 'created_at', 'updated_at', 'version', 'is_active')
+    
+    def __init__(self, contact_id: str, vcard_data: str, source_info: SourceInfo,
+                 created_at: str, updated_at: str, version: int, is_active: bool):
+        self.contact_id = contact_id
+        self.vcard_data = vcard_data
+        self.source_info = source_info
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.version = version
+        self.is_active = is_active
+    
+    @property
+    def source_info(self) -> SourceInfo:
+        return SourceInfo.from_parts(self._source_id, self._original_index, self._import_time)
+    
+    @source_info.setter
+    def source_info(self, info: SourceInfo):
+        self._source_id = info.source_id
+        self._original_index = info.original_index
+        self._import_time = info._import_time
+    
+    @property
+    def created_at(self) -> str:
+        return unpack_timestamp(self._created)
+    
+    @created_at.setter
+    def created_at(self, value: str):
+        self._created = pack_timestamp(value)
+    
+    @property
+    def updated_at(self) -> str:
+        return unpack_timestamp(self._updated)
+    
+    @updated_at.setter
+    def updated_at(self, value: str):
+        self._updated = pack_timestamp(value)
+    
+    def to_dict(self, vcard_data: bool = True) -> Dict[str, Any]:
+        """metadata.json entry (what asdict() gave for the old dataclass)"""
+        data = {}
+        for name in self.FIELDS:
+            if name == 'source_info':
+                data[name] = self.source_info.to_dict()
+            elif name != 'vcard_data' or vcard_data:
+                data[name] = getattr(self, name)
+        return data
+    
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.FIELDS)
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        values = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"{self.__class__.__name__}({values})"
+
+class MappedVCardStore:
+    """Read-only memory map of contacts.vcf"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._map = None
+        self.remap()
+    
+    @property
+    def size(self) -> int:
+        return len(self._map) if self._map is not None else 0
+    
+    def search(self, pattern) -> bool:
+        """True if the bytes pattern occurs anywhere in contacts.vcf"""
+        return self._map is not None and pattern.search(self._map) is not None
+    
+    def read(self, offset: int, length: int) -> str:
+        """Decode length bytes of contacts.vcf starting at offset"""
+        if not length:
+            return ''
+        return self._map[offset:offset + length].decode('utf-8')
+    
+    def remap(self):
+        """Map the current contacts.vcf (after it was replaced)"""
+        self.close()
+        # mmap cannot map an empty file
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+class MappedContactRecord(ContactRecord):
+    """
+    ContactRecord whose vCard text stays in the memory-mapped contacts.vcf.
+    
+    Only the offset and length of the card are kept and vcard_data decodes
+    them on every access. Assigning vcard_data keeps the new text in memory
+    until the next rebuild writes it to contacts.vcf.
+    """
+    
+    __slots__ = ('_store', 'offset', 'length', '_data')
+    
+    def __init__(self, store: MappedVCardStore, offset: int = 0, length: int = 0,
+                 vcard_data: Optional[str] = None, **record_fields):
+        self._store = store
+        self.offset = offset
+        self.length = length
+        super().__init__(vcard_data=vcard_data, **record_fields)
+    
+    @property
+    def vcard_data(self) -> str:
+        if self._data is not None:
+            return self._data
+        return self._store.read(self.offset, self.length)
+    
+    @vcard_data.setter
+    def vcard_data(self, value: Optional[str]):
+        self._data = value
+    
+    @property
+    def is_mapped(self) -> bool:
+        """True if the text is read from contacts.vcf"""
+        return self._data is None
+    
+    def attach(self, offset: int, length: int):
+        """Point the record at its card in a rebuilt contacts.vcf"""
+        self.offset = offset
+        self.length = length
+        self._data = None
+    
+    def detach(self):
+        """Keep the text in memory (the card is about to leave contacts.vcf)"""
+        self._data = self.vcard_data
+    
+    @classmethod
+    def from_record(cls, record: ContactRecord, store: MappedVCardStore,
+                    offset: int, length: int) -> 'MappedContactRecord':
+        values = {name: getattr(record, name) for name in cls.FIELDS if name != 'vcard_data'}
+        return cls(store, offset, length, **values)
 
 @dataclass
 class DatabaseOperation:
@@ -73,18 +348,31 @@ class VCardDatabase:
     - Version control
     - Audit logging
     - Rollback capabilities
+    
+    With mmap_mode=True contacts.vcf is memory-mapped and active records only
+    hold the position of their card (see MappedContactRecord); metadata.json
+    then stores that position instead of a copy of the vCard text.
+    
+    With external_photos=True photos are moved to the photo store before
+    cards are stored, so contacts.vcf, metadata.json, backups and audit
+    rollback data only carry a short reference per photo.
     """
     
-    def __init__(self, database_path: str = "data/master_database"):
+    def __init__(self, database_path: str = "data/master_database", mmap_mode: bool = False,
+                 external_photos: bool = False):
         self.database_path = database_path
+        self.mmap_mode = mmap_mode
+        self.external_photos = external_photos
         self.contacts_file = os.path.join(database_path, "contacts.vcf")
         self.metadata_file = os.path.join(database_path, "metadata.json")
         self.audit_log_file = os.path.join(database_path, "audit_log.json")
         self.backup_dir = os.path.join(database_path, "backups")
+        self.photos = PhotoStore(os.path.join(database_path, "photos"))
         
         self.validator = VCardStandardsValidator()
         self.contacts = {}  # contact_id -> ContactRecord
         self.audit_log = []
+        self.store = None  # MappedVCardStore in mmap mode
         
         self._initialize_database()
     
@@ -109,13 +397,22 @@ class VCardDatabase:
             with open(self.metadata_file, 'r') as f:
                 metadata = json.load(f)
                 contacts_data = metadata.get('contacts', {})
+                if self.mmap_mode or 'contacts_file_size' in metadata:
+                    self._open_store(metadata.get('contacts_file_size'))
                 self.contacts = {}
                 for cid, record_data in contacts_data.items():
                     # Convert source_info dict back to SourceInfo object
                     source_info_data = record_data['source_info']
                     source_info = SourceInfo(**source_info_data)
                     record_data['source_info'] = source_info
-                    self.contacts[cid] = ContactRecord(**record_data)
+                    self.contacts[cid] = self._load_record(record_data)
+            
+            if not self.mmap_mode and self.store is not None:
+                # Saved in mmap mode, all text has been read
+                self.close()
+            elif self.mmap_mode and any(c.is_active and not c.is_mapped for c in self.contacts.values()):
+                logger.info("Moving vCard text from metadata.json to the mapped contacts.vcf...")
+                self.save()
         
         # Load existing audit log
         if os.path.exists(self.audit_log_file):
@@ -126,16 +423,111 @@ class VCardDatabase:
                     for op in log_data.get('operations', [])
                 ]
         
+        if self.external_photos:
+            self._move_inline_photos()
+        
         logger.info(f"Database initialized: {len(self.contacts)} contacts, {len(self.audit_log)} operations")
     
+    def _move_inline_photos(self):
+        """Move photos still inline in stored cards and rollback data to the photo store"""
+        # One scan of the mapped file skips decoding every card when nothing is left to move
+        mapped_inline = self.store is not None and self.store.search(INLINE_PHOTO_BYTES)
+        moved = 0
+        for contact in self.contacts.values():
+            if isinstance(contact, MappedContactRecord) and contact.is_mapped and not mapped_inline:
+                continue
+            vcard_data = contact.vcard_data
+            if INLINE_PHOTO.search(vcard_data):
+                contact.vcard_data = externalize_photos(vcard_data, self.photos)
+                moved += 1
+        
+        rollbacks = 0
+        for operation in self.audit_log:
+            if operation.rollback_data and INLINE_PHOTO.search(operation.rollback_data):
+                operation.rollback_data = externalize_photos(operation.rollback_data, self.photos)
+                rollbacks += 1
+        
+        if moved:
+            logger.info(f"Moved photos of {moved} contacts to the photo store")
+            self.save()
+        if rollbacks:
+            self._save_audit_log()
+    
+    def store_photos(self, vcard_data: str) -> str:
+        """vcard_data as it is stored: photos moved to the photo store if enabled"""
+        if not self.external_photos:
+            return vcard_data
+        return externalize_photos(vcard_data, self.photos)
+    
+    def export_vcard_data(self, vcard_data: str) -> str:
+        """vcard_data for export, with stored photos inlined again"""
+        return inline_photos(vcard_data, self.photos)
+    
+    def get_photo(self, contact_id: str) -> Optional[Tuple[bytes, str, str]]:
+        """(image bytes, media type, sha256) of a contact's photo"""
+        contact = self.contacts.get(contact_id)
+        if contact is None:
+            return None
+        return read_photo(contact.vcard_data, self.photos)
+    
+    def _open_store(self, expected_size: Optional[int] = None):
+        """Map contacts.vcf, checking it is the file metadata.json was saved with"""
+        self.store = MappedVCardStore(self.contacts_file)
+        if expected_size is not None and self.store.size != expected_size:
+            size = self.store.size
+            self.close()
+            raise ValueError(
+                f"{self.contacts_file} has {size} bytes but metadata.json expects {expected_size} - "
+                f"restore both files from {self.backup_dir}"
+            )
+    
+    def _load_record(self, record_data: Dict[str, Any]) -> ContactRecord:
+        """Record from its metadata.json entry (with vcard_data or a vcard_offset)"""
+        if 'vcard_offset' in record_data:
+            offset = record_data.pop('vcard_offset')
+            length = record_data.pop('vcard_length')
+            if not self.mmap_mode:
+                return ContactRecord(vcard_data=self.store.read(offset, length), **record_data)
+            return MappedContactRecord(self.store, offset, length, **record_data)
+        if self.mmap_mode:
+            return MappedContactRecord(self.store, **record_data)
+        return ContactRecord(**record_data)
+    
+    def _record_metadata(self, record: ContactRecord) -> Dict[str, Any]:
+        """metadata.json entry - mapped records store where their card is"""
+        if not isinstance(record, MappedContactRecord) or not record.is_mapped:
+            return record.to_dict()
+        data = record.to_dict(vcard_data=False)
+        data['vcard_offset'] = record.offset
+        data['vcard_length'] = record.length
+        return data
+    
+    def save(self):
+        """Write metadata.json and contacts.vcf after a change"""
+        if self.mmap_mode:
+            # Records get their new offsets from the rebuild
+            self._rebuild_contacts_file()
+            self._save_metadata()
+        else:
+            self._save_metadata()
+            self._rebuild_contacts_file()
+    
+    def close(self):
+        """Release the memory map (mmap mode)"""
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+    
     def _save_metadata(self):
         """Save metadata to disk"""
         metadata = {
-            'contacts': {cid: asdict(record) for cid, record in self.contacts.items()},
+            'contacts': {cid: self._record_metadata(record) for cid, record in self.contacts.items()},
             'last_updated': datetime.now().isoformat(),
             'total_contacts': len(self.contacts),
             'active_contacts': len([c for c in self.contacts.values() if c.is_active])
         }
+        if self.mmap_mode:
+            metadata['contacts_file_size'] = self.store.size
         
         with open(self.metadata_file, 'w') as f:
             json.dump(metadata, f, indent=2)
@@ -163,6 +555,10 @@ class VCardDatabase:
             shutil.copy2(self.contacts_file, backup_file)
             logger.info(f"Backup created: {backup_file}")
         
+        if self.mmap_mode:
+            self._rebuild_mapped_contacts_file()
+            return
+        
         # Write all active contacts
         with open(self.contacts_file, 'w', encoding='utf-8') as f:
             for contact in self.contacts.values():
@@ -173,6 +569,36 @@ class VCardDatabase:
         
         logger.info(f"Contacts file rebuilt with {len([c for c in self.contacts.values() if c.is_active])} contacts")
     
+    def _rebuild_mapped_contacts_file(self):
+        """Write active contacts to a new contacts.vcf and point the records at it"""
+        # Deleted contacts are not written, so their text moves to metadata.json
+        for contact in self.contacts.values():
+            if not contact.is_active and isinstance(contact, MappedContactRecord):
+                contact.detach()
+        
+        # Write a new file: truncating the mapped one would break the current map
+        positions = {}
+        temp_file = self.contacts_file + '.tmp'
+        with open(temp_file, 'wb') as f:
+            for cid, contact in self.contacts.items():
+                if contact.is_active:
+                    data = contact.vcard_data.encode('utf-8')
+                    positions[cid] = (f.tell(), len(data))
+                    f.write(data)
+                    if not data.endswith(b'\n'):
+                        f.write(b'\n')
+        os.replace(temp_file, self.contacts_file)
+        self.store.remap()
+        
+        for cid, (offset, length) in positions.items():
+            contact = self.contacts[cid]
+            if isinstance(contact, MappedContactRecord):
+                contact.attach(offset, length)
+            else:
+                self.contacts[cid] = MappedContactRecord.from_record(contact, self.store, offset, length)
+        
+        logger.info(f"Contacts file rebuilt with {len(positions)} contacts (memory-mapped)")
+    
     def _log_operation(self, operation_type: str, contact_id: str, changes: Dict[str, Any], 
                        user_session: str = "system", rollback_data: Optional[str] = None):
         """Log database operation for audit trail"""
@@ -191,6 +617,23 @@ class VCardDatabase:
         
         logger.info(f"Operation logged: {operation_type} on {contact_id}")
     
+    def get_version_data(self, contact_id: str, version: int) -> Optional[str]:
+        """
+        vCard data of a contact as it was at the given version.
+        
+        Every operation that replaces vcard_data stores the previous data as
+        rollback_data, so the data of version v is the rollback_data of the
+        first such operation after v (or the current data if there is none).
+        """
+        contact = self.contacts.get(contact_id)
+        if contact is None or version < 1 or version > contact.version:
+            return None
+        for operation in self.audit_log:
+            if (operation.contact_id == contact_id and operation.rollback_data is not None
+                    and operation.changes.get('version', 0) > version):
+                return operation.rollback_data
+        return contact.vcard_data
+    
     def validate_vcard_compliance(self, vcard_data: str) -> Tuple[bool, List[str], List[str]]:
         """
         Validate vCard for RFC compliance.
@@ -271,8 +714,9 @@ class VCardConnector:
     All ContactPlus operations must go through this connector.
     """
     
-    def __init__(self, database_path: str = "data/master_database"):
-        self.database = VCardDatabase(database_path)
+    def __init__(self, database_path: str = "data/master_database", mmap_mode: bool = False,
+                 external_photos: bool = False):
+        self.database = VCardDatabase(database_path, mmap_mode=mmap_mode, external_photos=external_photos)
         self.session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     
     def import_database(self, source_file: str, database_name: str) -> Dict[str, Any]:
@@ -287,40 +731,21 @@ class VCardConnector:
         
         import_session_id = f"import_{database_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-        # Read source file
-        with open(source_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Split into individual vCards
-        vcards = []
-        current_vcard = []
-        for line in content.split('\n'):
-            if line.strip() == 'BEGIN:VCARD':
-                current_vcard = [line]
-            elif line.strip() == 'END:VCARD':
-                current_vcard.append(line)
-                vcards.append('\n'.join(current_vcard))
-                current_vcard = []
-            elif current_vcard:
-                current_vcard.append(line)
-        
         import_results = {
             'database_name': database_name,
             'source_file': source_file,
             'import_session_id': import_session_id,
-            'total_contacts': len(vcards),
+            'total_contacts': 0,
             'imported_contacts': 0,
             'compliance_fixes': 0,
             'errors': [],
             'contact_ids': []
         }
         
-        # Handle malformed content - if no vCards found, treat as error
-        if not vcards and content.strip():
-            import_results['errors'].append(f"No valid vCard format found in file. Content appears to be malformed.")
-        
-        # Process each vCard
-        for index, vcard_data in enumerate(vcards):
+        # Process each vCard (streamed, one card in memory at a time)
+        for index, block in enumerate(iter_vcard_blocks(source_file)):
+            import_results['total_contacts'] += 1
+            vcard_data = block.text()
             try:
                 # Create source info
                 source_info = SourceInfo(
@@ -349,7 +774,7 @@ class VCardConnector:
                 # Create contact record
                 contact_record = ContactRecord(
                     contact_id=contact_id,
-                    vcard_data=compliant_vcard,
+                    vcard_data=self.database.store_photos(compliant_vcard),
                     source_info=source_info,
                     created_at=datetime.now().isoformat(),
                     updated_at=datetime.now().isoformat(),
@@ -376,9 +801,12 @@ class VCardConnector:
                 import_results['errors'].append(error_msg)
                 logger.error(error_msg)
         
+        # Handle malformed content - if no vCards found, treat as error
+        if not import_results['total_contacts'] and _has_content(source_file):
+            import_results['errors'].append(f"No valid vCard format found in file. Content appears to be malformed.")
+        
         # Save database state
-        self.database._save_metadata()
-        self.database._rebuild_contacts_file()
+        self.database.save()
         
         logger.info(f"Import complete: {import_results['imported_contacts']}/{import_results['total_contacts']} contacts imported")
         return import_results
@@ -393,15 +821,34 @@ class VCardConnector:
             return [c for c in self.database.contacts.values() if c.is_active]
         return list(self.database.contacts.values())
     
-    def update_contact(self, contact_id: str, updated_vcard_data: str) -> bool:
+    def update_contact(self, contact_id: str, updated_vcard_data: str,
+                       base_version: Optional[int] = None) -> bool:
         """
         Update an existing contact with new vCard data.
         Validates compliance and logs the operation.
+        
+        base_version is the version the edit was made from. If the contact
+        changed since then, the edit is three-way merged with the stored data
+        per property; MergeConflictError is raised when both sides changed
+        the same property.
         """
         if contact_id not in self.database.contacts:
             return False
         
         contact = self.database.contacts[contact_id]
+        changes = {'action': 'updated'}
+        updated_vcard_data = self.database.store_photos(updated_vcard_data)
+        
+        if base_version is not None and base_version != contact.version:
+            base_data = self.database.get_version_data(contact_id, base_version)
+            if base_data is None:
+                raise ValueError(f"Unknown base version {base_version} for contact {contact_id}")
+            merge = three_way_merge(base_data, updated_vcard_data, contact.vcard_data)
+            if merge.conflicts:
+                raise MergeConflictError(contact_id, merge.conflicts)
+            updated_vcard_data = merge.vcard_data
+            changes.update({'action': 'merged', 'base_version': base_version,
+                            'merged_properties': merge.merged_properties})
         
         # Validate new vCard data
         is_valid, errors, warnings = self.database.validate_vcard_compliance(updated_vcard_data)
@@ -420,14 +867,13 @@ class VCardConnector:
         self.database._log_operation(
             operation_type='UPDATE',
             contact_id=contact_id,
-            changes={'action': 'updated', 'version': contact.version},
+            changes=dict(changes, version=contact.version),
             user_session=self.session_id,
             rollback_data=old_vcard_data
         )
         
         # Save changes
-        self.database._save_metadata()
-        self.database._rebuild_contacts_file()
+        self.database.save()
         
         logger.info(f"Contact {contact_id} updated to version {contact.version}")
         return True
@@ -462,8 +908,7 @@ class VCardConnector:
         )
         
         # Save changes
-        self.database._save_metadata()
-        self.database._rebuild_contacts_file()
+        self.database.save()
         
         logger.info(f"Contact {contact_id} deleted (soft delete)")
         return True
@@ -493,8 +938,7 @@ class VCardConnector:
         )
         
         # Save changes
-        self.database._save_metadata()
-        self.database._rebuild_contacts_file()
+        self.database.save()
         
         logger.info(f"Contact {contact_id} restored")
         return True
@@ -10,7 +10,7 @@ import re
 import logging
 from typing import List, Dict, Tuple, Optional
 import vobject  # For manipulation ONLY
-from vcard_validator import VCardStandardsValidator  # For validation ONLY
+from vcard_validator import VCardStandardsValidator, card_fingerprint  # For validation ONLY
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,6 +37,7 @@ class VCardFixer:
             'item_properties_normalized': 0,
             'total_fixed': 0
         }
+        self.changed_cards = {}  # card index -> card_fingerprint after the last fix run
     
     def fix_file(self, input_filepath: str, output_filepath: str) -> Dict[str, any]:
         """
@@ -76,16 +77,8 @@ class VCardFixer:
             vcard_data = f.read()
         
         # Process each vCard
-        fixed_vcards = []
-        
-        for vcard in vobject.readComponents(vcard_data):
-            try:
-                fixed_vcard = self._fix_single_vcard(vcard)
-                fixed_vcards.append(fixed_vcard)
-            except Exception as e:
-                logger.error(f"Error fixing vCard: {e}")
-                # Keep original if fix fails
-                fixed_vcards.append(vcard)
+        fixed_vcards = self.fix_vcards(vobject.readComponents(vcard_data))
+        changed_cards = dict(self.changed_cards)
         
         # Step 3: Write fixed vCards
         logger.info(f"Step 3: Writing {len(fixed_vcards)} fixed vCards...")
@@ -110,12 +103,38 @@ class VCardFixer:
             'initial_report': initial_report,
             'final_report': final_report,
             'fixes_applied': self.fix_stats,
+            'changed_cards': changed_cards,
             'improvement': {
                 'errors_fixed': initial_report['initial_errors'] - final_report['final_errors'],
                 'warnings_reduced': initial_report['initial_warnings'] - final_report['final_warnings']
             }
         }
     
+    def fix_vcards(self, vcards) -> List[vobject.vCard]:
+        """
+        Fix parsed vCards in memory (originals kept where a fix fails).
+        
+        Cards whose content changed are recorded in self.changed_cards
+        (index -> fingerprint) so validation can re-check only those.
+        """
+        fixed_vcards = []
+        self.changed_cards = {}
+        
+        for index, vcard in enumerate(vcards):
+            before = card_fingerprint(vcard)
+            try:
+                fixed_vcard = self._fix_single_vcard(vcard)
+            except Exception as e:
+                logger.error(f"Error fixing vCard: {e}")
+                # Keep original if fix fails
+                fixed_vcard = vcard
+            after = card_fingerprint(fixed_vcard)
+            if after != before:
+                self.changed_cards[index] = after
+            fixed_vcards.append(fixed_vcard)
+        
+        return fixed_vcards
+    
     def _fix_single_vcard(self, vcard: vobject.vCard) -> vobject.vCard:
         """Fix a single vCard object"""
         
@@ -6,18 +6,29 @@ This module implements business logic rules for data quality that go beyond
 RFC compliance. These are "soft" rules that improve data consistency.
 
 RULE: Always use vcard library for validation, vobject for manipulation
+
+Large files can be processed in parallel: check_and_fix_file(workers=N)
+splits the cards into chunks of chunk_size records, fixes every chunk in a
+worker process and writes the results back in the original card order.
+Issue indexes, changed_cards and fix_stats are the same as a serial run.
 """
 
 import re
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Tuple, Optional, Set
 import vobject  # For manipulation ONLY
-import phonenumbers
+from contact_normalization import phone_to_e164
+from vcard_stream import iter_vcard_records
+from vcard_validator import card_fingerprint
 from email_validator import validate_email, EmailNotValidError
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cards per work unit in parallel mode
+DEFAULT_CHUNK_SIZE = 250
+
 
 class SoftComplianceChecker:
     """
@@ -47,13 +58,15 @@ class SoftComplianceChecker:
             'notes_cleaned': 0,
             'total_improved': 0
         }
+        self.changed_cards = {}  # card index -> card_fingerprint after the last run
         
         # Patterns for extraction
         self.email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
         self.phone_pattern = re.compile(r'[\+]?[(]?[0-9]{1,4}[)]?[-\s\.]?[(]?[0-9]{1,4}[)]?[-\s\.]?[0-9]{1,5}[-\s\.]?[0-9]{1,5}')
         
     def check_and_fix_file(self, input_filepath: str, output_filepath: str, 
-                          default_country: str = 'US') -> Dict[str, any]:
+                          default_country: str = 'US', workers: int = 1,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, any]:
         """
         Check and fix soft compliance issues in vCard file.
         
@@ -61,41 +74,97 @@ class SoftComplianceChecker:
             input_filepath: Input vCard file
             output_filepath: Output fixed vCard file
             default_country: Default country for phone number parsing
+            workers: Worker processes (1 = serial)
+            chunk_size: Cards per work unit when workers > 1
         """
         logger.info(f"Starting soft compliance check for: {input_filepath}")
         
-        # Parse with vobject for manipulation
-        with open(input_filepath, 'r', encoding='utf-8') as f:
-            vcard_data = f.read()
+        if workers > 1:
+            fixed_cards, issues_found = self._check_and_fix_parallel(
+                input_filepath, default_country, workers, chunk_size
+            )
+        else:
+            # Parse with vobject for manipulation
+            with open(input_filepath, 'r', encoding='utf-8') as f:
+                vcard_data = f.read()
+            
+            fixed_vcards, issues_found = self.check_and_fix_vcards(
+                vobject.readComponents(vcard_data), default_country
+            )
+            fixed_cards = [vcard.serialize() for vcard in fixed_vcards]
+        
+        # Write fixed vCards
+        with open(output_filepath, 'w', encoding='utf-8') as f:
+            for card in fixed_cards:
+                f.write(card)
         
+        return {
+            'total_vcards': len(fixed_cards),
+            'issues_found': len(issues_found),
+            'sample_issues': issues_found[:10],
+            'fixes_applied': self.fix_stats,
+            'changed_cards': dict(self.changed_cards),
+            'output_file': output_filepath
+        }
+    
+    def check_and_fix_vcards(self, vcards, default_country: str = 'US',
+                             start_index: int = 0) -> Tuple[List[vobject.vCard], List[str]]:
+        """
+        Check and fix parsed vCards in memory.
+        
+        Cards whose content changed are recorded in self.changed_cards
+        (index -> fingerprint) so validation can re-check only those.
+        Indexes start at start_index (position of the first card in the file).
+        
+        Returns:
+            Tuple of (fixed vCards, issues found)
+        """
         fixed_vcards = []
         issues_found = []
+        self.changed_cards = {}
         
-        for i, vcard in enumerate(vobject.readComponents(vcard_data)):
+        for i, vcard in enumerate(vcards, start_index):
+            before = card_fingerprint(vcard)
             try:
                 issues = self._check_single_vcard(vcard, i)
                 if issues:
                     issues_found.extend(issues)
                     
                 fixed_vcard = self._fix_single_vcard(vcard, default_country)
-                fixed_vcards.append(fixed_vcard)
                 
             except Exception as e:
                 logger.error(f"Error processing vCard {i}: {e}")
-                fixed_vcards.append(vcard)  # Keep original if error
+                fixed_vcard = vcard  # Keep original if error
+            
+            after = card_fingerprint(fixed_vcard)
+            if after != before:
+                self.changed_cards[i] = after
+            fixed_vcards.append(fixed_vcard)
         
-        # Write fixed vCards
-        with open(output_filepath, 'w', encoding='utf-8') as f:
-            for vcard in fixed_vcards:
-                f.write(vcard.serialize())
+        return fixed_vcards, issues_found
+    
+    def _check_and_fix_parallel(self, input_filepath: str, default_country: str,
+                                workers: int, chunk_size: int) -> Tuple[List[str], List[str]]:
+        """Fix chunks of cards in a process pool; returns serialized cards in file order"""
+        chunks = []
+        for index, (_, record) in enumerate(iter_vcard_records(input_filepath)):
+            if index % chunk_size == 0:
+                chunks.append((index, [], default_country))
+            chunks[-1][1].append(record)
+        logger.info(f"Soft compliance: {len(chunks)} chunks of up to {chunk_size} cards on {workers} workers")
         
-        return {
-            'total_vcards': len(fixed_vcards),
-            'issues_found': len(issues_found),
-            'sample_issues': issues_found[:10],
-            'fixes_applied': self.fix_stats,
-            'output_file': output_filepath
-        }
+        fixed_cards = []
+        issues_found = []
+        self.changed_cards = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() yields results in submission order, so card order is kept
+            for cards, issues, stats, changed in pool.map(_check_and_fix_chunk, chunks):
+                fixed_cards.extend(cards)
+                issues_found.extend(issues)
+                self.changed_cards.update(changed)
+                for key, count in stats.items():
+                    self.fix_stats[key] += count
+        return fixed_cards, issues_found
     
     def _check_single_vcard(self, vcard: vobject.vCard, index: int) -> List[str]:
         """Check a single vCard for soft compliance issues"""
@@ -170,27 +239,22 @@ class SoftComplianceChecker:
             # Extract phones
             phones_found = self.phone_pattern.findall(original_note)
             for phone in phones_found:
-                # Add to vCard
-                try:
-                    parsed = phonenumbers.parse(phone, default_country)
-                    if phonenumbers.is_valid_number(parsed):
-                        formatted = phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
-                        
-                        # Check if not already present
-                        existing_phones = []
-                        if hasattr(vcard, 'tel_list'):
-                            existing_phones = [t.value for t in vcard.tel_list]
-                        
-                        if formatted not in existing_phones:
-                            new_tel = vcard.add('tel')
-                            new_tel.value = formatted
-                            new_tel.type_param = 'VOICE'
-                            self.fix_stats['phones_extracted_from_notes'] += 1
-                        
-                        # Remove from note
-                        cleaned_note = cleaned_note.replace(phone, '')
-                except:
-                    pass  # Skip invalid phones
+                # Add to vCard (parse results are memoized per number/country)
+                formatted = phone_to_e164(phone, default_country)
+                if formatted:
+                    # Check if not already present
+                    existing_phones = []
+                    if hasattr(vcard, 'tel_list'):
+                        existing_phones = [t.value for t in vcard.tel_list]
+                    
+                    if formatted not in existing_phones:
+                        new_tel = vcard.add('tel')
+                        new_tel.value = formatted
+                        new_tel.type_param = 'VOICE'
+                        self.fix_stats['phones_extracted_from_notes'] += 1
+                    
+                    # Remove from note
+                    cleaned_note = cleaned_note.replace(phone, '')
             
             # Update note if changed
             cleaned_note = ' '.join(cleaned_note.split())  # Clean up whitespace
@@ -229,16 +293,11 @@ class SoftComplianceChecker:
         if hasattr(vcard, 'tel_list'):
             for tel in vcard.tel_list:
                 original = tel.value
-                try:
-                    # Parse and format to E.164
-                    parsed = phonenumbers.parse(original, default_country)
-                    if phonenumbers.is_valid_number(parsed):
-                        formatted = phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
-                        if formatted != original:
-                            tel.value = formatted
-                            self.fix_stats['phones_formatted'] += 1
-                except:
-                    pass  # Keep original if can't parse
+                # Parse and format to E.164, keep original if can't parse
+                formatted = phone_to_e164(original, default_country)
+                if formatted and formatted != original:
+                    tel.value = formatted
+                    self.fix_stats['phones_formatted'] += 1
         
         # Fix 4: Email normalization and validation
         if hasattr(vcard, 'email_list'):
@@ -340,6 +399,22 @@ class SoftComplianceChecker:
         return ' '.join(fixed_words)
 
 
+def _check_and_fix_chunk(chunk: Tuple[int, List[str], str]):
+    """
+    Worker: soft-fix one chunk of card records.
+    
+    Module level so it can be sent to worker processes. Takes and returns
+    plain strings; vobject components are only built inside the worker.
+    """
+    start_index, records, default_country = chunk
+    checker = SoftComplianceChecker()
+    fixed_vcards, issues = checker.check_and_fix_vcards(
+        vobject.readComponents(''.join(records)), default_country, start_index
+    )
+    return ([vcard.serialize() for vcard in fixed_vcards], issues,
+            checker.fix_stats, checker.changed_cards)
+
+
 # Additional suggestions for soft compliance
 class SoftComplianceSuggestions:
     """
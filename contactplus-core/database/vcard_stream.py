@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+vCard Stream - Record-at-a-time access to large vCard files
+
+Merging used to parse every source completely into vobject objects (photos
+included) before matching. For two-pass merges this module provides:
+
+1. iter_vcard_records(): stream BEGIN:VCARD ... END:VCARD blocks with their
+   byte offset and length, one record in memory at a time
+2. RecordRef: the compact (path, offset, length) handle kept in the index
+3. VCardRecordReader: seek back to a record in pass two and parse it
+
+Pass one keeps only RecordRefs and matching keys, so peak memory follows
+the size of the index rather than the parsed cards.
+
+iter_vcard_blocks() is the one splitter every reader uses (validator,
+database import, export/size tools). It reads a path, file object or mmap
+line by line and treats CRLF, LF and lone CR line endings alike. BEGIN and
+END markers match regardless of case and surrounding whitespace, and a
+BEGIN inside an unterminated card starts a new card. VCardBlock keeps the
+record as read (raw) and its lines, and can unfold them (RFC 2425 5.8.1).
+"""
+
+import mmap
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import vobject
+
+# One physical line including its ending (CRLF, LF or a lone CR)
+_LINE_PATTERNS = {
+    bytes: re.compile(rb'[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+'),
+    str: re.compile(r'[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+'),
+}
+
+
+@dataclass(frozen=True)
+class VCardBlock:
+    """One BEGIN:VCARD ... END:VCARD block as read from the source"""
+    offset: int  # bytes for binary sources, characters for text sources
+    length: int
+    raw: str  # exactly as in the source, line endings included
+    lines: Tuple[str, ...]  # physical lines without line endings
+
+    def text(self, newline: str = '\n') -> str:
+        """Card text with uniform line endings (no trailing newline)"""
+        return newline.join(self.lines)
+
+    def unfolded(self) -> List[str]:
+        """Logical lines: continuation lines (leading space/tab) joined"""
+        return unfold_lines(self.lines)
+
+
+def unfold_lines(lines: Iterable[str]) -> List[str]:
+    """Join folded continuation lines onto the line they continue"""
+    logical: List[str] = []
+    for line in lines:
+        if line[:1] in (' ', '\t') and logical:
+            logical[-1] += line[1:]
+        else:
+            logical.append(line)
+    return logical
+
+
+def _physical_lines(chunks: Iterable) -> Iterator:
+    """Split on lone CRs as well (file iteration only splits on LF)"""
+    for chunk in chunks:
+        cr, crlf = (b'\r', b'\r\n') if isinstance(chunk, bytes) else ('\r', '\r\n')
+        if cr in (chunk[:-2] if chunk.endswith(crlf) else chunk):
+            yield from _LINE_PATTERNS[type(chunk)].findall(chunk)
+        else:
+            yield chunk
+
+
+def iter_vcard_blocks(source, errors: str = 'replace') -> Iterator[VCardBlock]:
+    """
+    Yield every card of a source in order, one card in memory at a time.
+    
+    Args:
+        source: File path, binary or text file object, or mmap. Offsets are
+            counted from where reading starts
+        errors: UTF-8 decoding error handler for binary sources
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter_vcard_blocks(f, errors)
+        return
+    if isinstance(source, mmap.mmap):
+        source = iter(source.readline, b'')
+
+    offset = 0
+    start = None
+    raw: List[str] = []
+    lines: List[str] = []
+    for line in _physical_lines(source):
+        size = len(line)
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors=errors)
+        content = line.rstrip('\r\n')
+        marker = content.strip().upper()
+        if marker == 'BEGIN:VCARD':
+            start = offset
+            raw = [line]
+            lines = [content]
+        elif start is not None:
+            raw.append(line)
+            lines.append(content)
+            if marker == 'END:VCARD':
+                yield VCardBlock(start, offset + size - start, ''.join(raw), tuple(lines))
+                start = None
+        offset += size
+
+
+@dataclass(frozen=True)
+class RecordRef:
+    """Location of one vCard record inside a file"""
+    path: str
+    offset: int
+    length: int
+
+
+def iter_vcard_records(path: str) -> Iterator[Tuple[RecordRef, str]]:
+    """Yield (RecordRef, record text) for every vCard in the file, in order"""
+    for block in iter_vcard_blocks(path):
+        yield RecordRef(path, block.offset, block.length), block.raw
+
+
+def strip_properties(record: str, names: Iterable[str]) -> str:
+    """
+    Remove properties (and their folded continuation lines) from a record.
+
+    Used to drop PHOTO data before parsing when only matching keys are needed.
+    """
+    pattern = re.compile(r'^(?:[\w-]+\.)?(?:' + '|'.join(re.escape(n) for n in names) + r')[;:]', re.IGNORECASE)
+    kept = []
+    skipping = False
+    for line in record.splitlines(keepends=True):
+        if skipping and line[:1] in (' ', '\t'):
+            continue
+        skipping = bool(pattern.match(line))
+        if not skipping:
+            kept.append(line)
+    return ''.join(kept)
+
+
+class VCardRecordReader:
+    """Random access to records by RecordRef (keeps source files open)"""
+
+    def __init__(self):
+        self._files: Dict[str, object] = {}
+
+    def read(self, ref: RecordRef) -> str:
+        """Raw text of a record"""
+        f = self._files.get(ref.path)
+        if f is None:
+            f = self._files[ref.path] = open(ref.path, 'rb')
+        f.seek(ref.offset)
+        return f.read(ref.length).decode('utf-8', errors='replace')
+
+    def load(self, ref: RecordRef) -> vobject.base.Component:
+        """Parsed vCard of a record"""
+        return vobject.readOne(self.read(ref))
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -4,7 +4,7 @@ ContactPlus Core API - FastAPI Application
 import os
 import logging
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
 from fastapi import FastAPI, HTTPException, Query, Response, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
@@ -13,11 +13,15 @@ import uuid
 
 from logging_config import setup_logging, log_api_call, LoggerMixin
 from database.connector import APIConnector
+from database.vcard_database import MergeConflictError
+from database.photo_thumbnails import THUMBNAIL_SIZES
+from database.export_cache import export_etag
+from database.export_profiles import PROFILES
 from models.schemas import (
     Contact, ContactList, ContactCreate, ContactUpdate,
     ImportRequest, ImportResponse, DatabaseStats,
     HealthCheck, SearchRequest, OperationResponse,
-    ErrorResponse
+    MergeGroupList, MergePreview, ErrorResponse
 )
 
 # Setup logging
@@ -147,12 +151,47 @@ async def get_contact(contact_id: str):
     return contact
 
 
+# Photos change rarely and revalidating with the ETag is cheap
+PHOTO_CACHE_CONTROL = "public, max-age=86400, stale-while-revalidate=604800"
+
+
+@app.get("/api/v1/contacts/{contact_id}/photo")
+async def get_contact_photo(
+    request: Request,
+    contact_id: str,
+    size: Optional[int] = Query(None, description=f"Thumbnail size: {', '.join(map(str, THUMBNAIL_SIZES))}"),
+    format: Literal["jpeg", "webp"] = Query("jpeg", description="Thumbnail format")
+):
+    """The contact's photo as an image, or a cached thumbnail with ?size="""
+    if size is not None and size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {', '.join(map(str, THUMBNAIL_SIZES))}")
+    if not db.get_contact(contact_id):
+        raise HTTPException(status_code=404, detail="Contact not found")
+    
+    try:
+        if size is None:
+            photo = db.get_contact_photo(contact_id)
+        else:
+            photo = db.get_contact_thumbnail(contact_id, size, format)
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    if not photo:
+        raise HTTPException(status_code=404, detail="Contact has no photo")
+    
+    data, media_type, digest = photo
+    etag = f'"{digest}"' if size is None else f'"{digest}-{size}-{format}"'
+    headers = {"ETag": etag, "Cache-Control": PHOTO_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=media_type, headers=headers)
+
+
 @app.put("/api/v1/contacts/{contact_id}", response_model=OperationResponse)
 async def update_contact(contact_id: str, contact_update: ContactUpdate):
     """Update a contact"""
     try:
-        # Convert update model to dict, excluding None values
-        update_data = contact_update.model_dump(exclude_none=True, by_alias=True)
+        # Convert update model to dict, only the fields the client sent
+        update_data = contact_update.model_dump(exclude_unset=True, exclude_none=True, by_alias=True)
         
         success = db.update_contact(contact_id, update_data)
         if not success:
@@ -162,6 +201,14 @@ async def update_contact(contact_id: str, contact_update: ContactUpdate):
             success=True,
             message=f"Contact {contact_id} updated successfully"
         )
+    except MergeConflictError as e:
+        raise HTTPException(status_code=409, detail={
+            "message": str(e),
+            "conflicts": [
+                {"property": c.name, "base": c.base, "yours": c.ours, "current": c.theirs}
+                for c in e.conflicts
+            ]
+        })
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -237,27 +284,66 @@ async def get_import_status():
     }
 
 
+# Exports are cached per database state; clients revalidate with the ETag
+EXPORT_CACHE_CONTROL = "private, no-cache"
+
+
 @app.get("/api/v1/export/vcf")
-async def export_database(active_only: bool = Query(True, description="Export only active contacts")):
-    """Export the database as a vCard file"""
+async def export_database(
+    request: Request,
+    active_only: bool = Query(True, description="Export only active contacts"),
+    profile: Optional[str] = Query(None, description=f"Export profile: {', '.join(sorted(PROFILES))}")
+):
+    """
+    Export the database as a vCard file.
+    
+    The rendered file is cached on disk until the database changes and sent
+    as a file response (gzip-compressed for clients that accept it).
+    """
+    compressed = "gzip" in request.headers.get("accept-encoding", "").lower()
     try:
-        vcf_content = db.export_database(active_only=active_only)
-        
-        # Create response with vCard content
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"contactplus_export_{timestamp}.vcf"
-        
-        return Response(
-            content=vcf_content,
-            media_type="text/vcard",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}"
-            }
-        )
+        path, sequence = db.export_file(active_only=active_only, profile=profile, compressed=compressed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    etag = export_etag(sequence, profile, active_only, compressed)
+    headers = {"ETag": etag, "Cache-Control": EXPORT_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    name = f"contactplus_export_{profile}_{timestamp}" if profile else f"contactplus_export_{timestamp}"
+    headers["Content-Disposition"] = f"attachment; filename={name}.vcf"
+    if compressed:
+        headers["Content-Encoding"] = "gzip"
+    return FileResponse(path, media_type="text/vcard", headers=headers)
+
+
+# Merge Review
+
+@app.get("/api/v1/merge/groups", response_model=MergeGroupList)
+async def list_merge_groups(
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: int = Query(50, ge=1, le=200, description="Items per page")
+):
+    """List duplicate groups awaiting merge review"""
+    try:
+        return MergeGroupList(**db.get_merge_groups(page=page, page_size=page_size))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/v1/merge/groups/{group_id}/preview", response_model=MergePreview)
+async def get_merge_preview(group_id: str):
+    """Field-level diff and proposed merge for one group"""
+    preview = db.get_merge_preview(group_id)
+    if not preview:
+        raise HTTPException(status_code=404, detail="Merge group not found")
+    return preview
+
+
 # System Operations
 
 @app.get("/api/v1/stats", response_model=DatabaseStats)
@@ -33,6 +33,7 @@ class ContactCreate(ContactBase):
 class ContactUpdate(ContactBase):
     """Model for updating a contact"""
     formatted_name: Optional[str] = Field(None, alias="fn")
+    version: Optional[int] = Field(None, description="Contact version the edit is based on")
 
 
 class Contact(ContactBase):
@@ -115,6 +116,50 @@ class OperationResponse(BaseModel):
     data: Optional[Dict[str, Any]] = None
 
 
+class MergeGroupSummary(BaseModel):
+    """Duplicate group awaiting review"""
+    group_id: str
+    size: int
+    contact_ids: List[str]
+    names: List[str]
+    match_on: List[str]
+
+
+class MergeGroupList(BaseModel):
+    """Paginated merge group list response"""
+    groups: List[MergeGroupSummary]
+    total: int
+    page: int
+    page_size: int
+    total_pages: int
+
+
+class MergePreviewContact(BaseModel):
+    """Contact taking part in a merge"""
+    contact_id: str
+    fn: str
+    source: str
+    version: int
+
+
+class FieldDiff(BaseModel):
+    """Values of one vCard field across the contacts of a group"""
+    field: str
+    label: str
+    status: str  # 'identical', 'missing' or 'different'
+    values: Dict[str, List[str]]
+
+
+class MergePreview(BaseModel):
+    """Field-level diff and proposed result for a merge group"""
+    group_id: str
+    match_on: List[str]
+    base_contact_id: str
+    contacts: List[MergePreviewContact]
+    fields: List[FieldDiff]
+    merged: Dict[str, List[str]]
+
+
 class ErrorResponse(BaseModel):
     """Error response model"""
     error: str
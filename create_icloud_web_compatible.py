@@ -1,172 +1,44 @@
 #!/usr/bin/env python3
 """Create iCloud.com web-compatible vCard file using parser"""
-import vobject
-from PIL import Image
-from io import BytesIO
-import base64
+import os
+from collections import Counter
+from export_profiles import export_file, fix_empty_n, get_profile, resize_photo
 
 class ICloudWebProcessor:
-    def __init__(self):
-        self.stats = {
+    def __init__(self, workers=1):
+        self.workers = workers
+        self.profile = get_profile('icloud_web')
+        self.stats = Counter({
             'total': 0,
             'processed': 0,
             'item_prefixes_removed': 0,
             'x_fields_removed': 0,
             'empty_n_fixed': 0,
             'photos_resized': 0
-        }
+        })
     
     def fix_empty_n_field(self, vcard):
         """Fix empty N fields by deriving from FN"""
-        if hasattr(vcard, 'n'):
-            n_value = vcard.n.value
-            # Check if N field is essentially empty
-            if not any([n_value.family, n_value.given, n_value.additional]):
-                if hasattr(vcard, 'fn'):
-                    # Parse FN to create proper N field
-                    fn_parts = vcard.fn.value.strip().split()
-                    if len(fn_parts) >= 2:
-                        # Assume last part is family name
-                        n_value.family = fn_parts[-1]
-                        n_value.given = ' '.join(fn_parts[:-1])
-                    elif len(fn_parts) == 1:
-                        # Single word - use as given name
-                        n_value.given = fn_parts[0]
-                    self.stats['empty_n_fixed'] += 1
+        fix_empty_n(vcard, self.stats)
     
     def process_vcard_for_icloud_web(self, vcard):
-        """Process a single vCard for iCloud.com compatibility"""
-        # Create a new clean vCard
-        new_vcard = vobject.vCard()
-        
-        # Add VERSION first (required)
-        new_vcard.add('version')
-        new_vcard.version.value = '3.0'
-        
-        # Add PRODID
-        new_vcard.add('prodid')
-        new_vcard.prodid.value = '-//Apple Inc.//macOS 15.5//EN'
-        
-        # Copy essential fields without item prefixes
-        fields_to_copy = ['fn', 'n', 'org', 'title', 'tel', 'email', 'adr', 'note', 'bday', 'photo']
-        
-        for field_name in fields_to_copy:
-            # Get all instances of this field
-            for child in vcard.getChildren():
-                if child.name.lower() == field_name:
-                    # Skip if it has an item prefix
-                    if hasattr(child, 'group') and child.group:
-                        self.stats['item_prefixes_removed'] += 1
-                        # Still copy the field, just without the group
-                        new_child = new_vcard.add(field_name)
-                        new_child.value = child.value
-                        # Copy parameters except group
-                        for param in child.params:
-                            if param != 'GROUP':
-                                setattr(new_child, param.lower() + '_param', 
-                                       getattr(child, param.lower() + '_param'))
-                    else:
-                        # Direct copy
-                        new_child = new_vcard.add(field_name)
-                        new_child.value = child.value
-                        # Copy all parameters
-                        for param in child.params:
-                            setattr(new_child, param.lower() + '_param', 
-                                   getattr(child, param.lower() + '_param'))
-        
-        # URL fields need special handling (often have item prefixes)
-        url_count = 0
-        for child in vcard.getChildren():
-            if child.name == 'URL':
-                if url_count < 3:  # Limit URLs to avoid complexity
-                    new_url = new_vcard.add('url')
-                    new_url.value = child.value
-                    if hasattr(child, 'type_param'):
-                        new_url.type_param = child.type_param
-                    url_count += 1
-                    if hasattr(child, 'group') and child.group:
-                        self.stats['item_prefixes_removed'] += 1
-        
-        # Skip all X- fields for iCloud.com compatibility
-        x_field_count = 0
-        for child in vcard.getChildren():
-            if child.name.startswith('X-'):
-                x_field_count += 1
-        if x_field_count > 0:
-            self.stats['x_fields_removed'] += x_field_count
-        
-        # Fix empty N field
-        self.fix_empty_n_field(new_vcard)
-        
-        # Check photo size
-        if hasattr(new_vcard, 'photo'):
-            serialized = new_vcard.serialize()
-            if len(serialized.encode('utf-8')) > 256 * 1024:
-                self.resize_photo(new_vcard)
-        
-        return new_vcard
+        """Process a single vCard for iCloud.com compatibility (the icloud_web export profile)"""
+        return self.profile.apply(vcard, self.stats)
     
     def resize_photo(self, vcard):
         """Resize photo to fit within limits"""
-        try:
-            photo_data = vcard.photo.value
-            if isinstance(photo_data, str):
-                photo_bytes = base64.b64decode(photo_data)
-            else:
-                photo_bytes = photo_data
-            
-            img = Image.open(BytesIO(photo_bytes))
-            
-            # More aggressive resizing for iCloud.com
-            max_dimension = 600
-            quality = 75
-            
-            img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
-            
-            output = BytesIO()
-            img.save(output, format='JPEG', quality=quality, optimize=True)
-            
-            vcard.photo.value = output.getvalue()
-            vcard.photo.encoding_param = 'b'
-            vcard.photo.type_param = 'JPEG'
-            
-            self.stats['photos_resized'] += 1
-        except:
-            # If photo processing fails, remove it
-            del vcard.photo
+        resize_photo(vcard, self.stats)
     
     def process_file(self, input_path, output_path):
         """Process entire vCard file for iCloud.com web compatibility"""
         print("Creating iCloud.com web-compatible vCard file...")
         print("=" * 80)
         
-        with open(input_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        output_vcards = []
-        
-        for vcard in vobject.readComponents(content):
-            self.stats['total'] += 1
-            
-            try:
-                # Process for iCloud.com compatibility
-                new_vcard = self.process_vcard_for_icloud_web(vcard)
-                output_vcards.append(new_vcard)
-                self.stats['processed'] += 1
-                
-                if self.stats['processed'] % 100 == 0:
-                    print(f"Processed {self.stats['processed']} contacts...")
-                
-            except Exception as e:
-                print(f"Error processing vCard: {e}")
-                # Skip problematic vCards for now
-        
-        # Write output
-        print(f"\nWriting {len(output_vcards)} contacts to output file...")
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for vcard in output_vcards:
-                f.write(vcard.serialize())
-                f.write('\n')
+        # Streamed card by card, in parallel with more than one worker
+        stats = export_file(input_path, output_path, self.profile, workers=self.workers)
+        self.stats['total'] += stats.pop('cards_in', 0)
+        self.stats['processed'] += stats.pop('cards_out', 0)
+        self.stats.update(stats)
         
         # Print summary
         print("\n" + "=" * 80)
@@ -177,6 +49,8 @@ class ICloudWebProcessor:
         print(f"X- fields removed: {self.stats['x_fields_removed']}")
         print(f"Empty N fields fixed: {self.stats['empty_n_fixed']}")
         print(f"Photos resized: {self.stats['photos_resized']}")
+        if self.stats['errors']:
+            print(f"Exported unchanged (could not be processed): {self.stats['errors']}")
         
         # Quick validation
         self.validate_output(output_path)
@@ -210,7 +84,7 @@ class ICloudWebProcessor:
             print("\n⚠️  File may still have compatibility issues")
 
 def main():
-    processor = ICloudWebProcessor()
+    processor = ICloudWebProcessor(workers=os.cpu_count() or 1)
     
     input_file = "data/Sara_Export_iCloud_Ready.vcf"
     output_file = "data/Sara_Export_iCloud_Web.vcf"
@@ -4,33 +4,12 @@ Detect contacts with identical phone numbers
 """
 
 import vobject
-import re
 from collections import defaultdict
+import contact_normalization
 
 def normalize_phone(phone):
-    """Normalize phone number for comparison"""
-    if not phone:
-        return None
-    
-    # Remove all non-digits except +
-    cleaned = re.sub(r'[^\d+]', '', phone.strip())
-    
-    # Handle Austrian numbers specifically
-    if cleaned.startswith('0043'):
-        cleaned = '+43' + cleaned[4:]
-    elif cleaned.startswith('043'):
-        cleaned = '+43' + cleaned[3:]
-    elif cleaned.startswith('0') and len(cleaned) > 1:
-        # Austrian domestic format
-        cleaned = '+43' + cleaned[1:]
-    
-    # Ensure + prefix for international numbers
-    if cleaned.startswith('43') and not cleaned.startswith('+'):
-        cleaned = '+' + cleaned
-    elif cleaned.startswith('1') and len(cleaned) == 11:
-        cleaned = '+' + cleaned
-    
-    return cleaned
+    """Normalize phone number for comparison (Austrian default region)"""
+    return contact_normalization.normalize_phone(phone) or None
 
 def detect_phone_duplicates():
     """Find contacts sharing the same phone number"""
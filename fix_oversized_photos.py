@@ -1,53 +1,14 @@
 #!/usr/bin/env python3
 """Fix oversized vCards by compressing photos to meet iCloud limits"""
+import os
 import re
 import base64
-from io import BytesIO
-from PIL import Image
+from photo_optimizer import ICLOUD_CARD_LIMIT, default_optimizer, optimize_base64, photo_budget
 
 def compress_photo(base64_data, max_size_kb=200):
     """Compress a base64 photo to fit within size limit"""
     try:
-        # Decode base64 to image
-        img_data = base64.b64decode(base64_data)
-        img = Image.open(BytesIO(img_data))
-        
-        # Start with original quality
-        quality = 95
-        output = BytesIO()
-        
-        # Keep reducing quality until it fits
-        while quality > 10:
-            output.seek(0)
-            output.truncate()
-            img.save(output, format='JPEG', quality=quality, optimize=True)
-            
-            # Check size
-            size_kb = len(output.getvalue()) / 1024
-            if size_kb <= max_size_kb:
-                break
-            
-            # Reduce quality
-            quality -= 5
-        
-        # If still too large, resize image
-        if len(output.getvalue()) / 1024 > max_size_kb:
-            # Reduce dimensions
-            width, height = img.size
-            scale = 0.8
-            while len(output.getvalue()) / 1024 > max_size_kb and scale > 0.1:
-                new_width = int(width * scale)
-                new_height = int(height * scale)
-                resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                output.seek(0)
-                output.truncate()
-                resized.save(output, format='JPEG', quality=quality, optimize=True)
-                scale -= 0.1
-        
-        # Encode back to base64
-        return base64.b64encode(output.getvalue()).decode('ascii')
-        
+        return optimize_base64(base64_data, max_size_kb * 1024)
     except Exception as e:
         print(f"  Error processing photo: {e}")
         return None
@@ -62,42 +23,52 @@ def fix_oversized_vcards():
     # Find all vCards
     vcards = re.findall(r'BEGIN:VCARD.*?END:VCARD', content, re.DOTALL)
     
+    # Collect the photos of oversized cards first (256KB limit) ...
+    jobs = []
+    oversized = []
+    for i, vcard in enumerate(vcards):
+        vcard_size = len(vcard.encode('utf-8'))
+        photo_match = re.search(r'PHOTO;[^:]+:([A-Za-z0-9+/\r\n]+={0,2})', vcard)
+        if vcard_size > ICLOUD_CARD_LIMIT and photo_match:
+            old_photo = photo_match.group(1)
+            # Remove newlines from base64
+            clean_photo = old_photo.replace('\n', '').replace('\r', '')
+            try:
+                photo = base64.b64decode(clean_photo)
+            except ValueError:
+                photo = b''
+            budget = photo_budget(vcard_size, len(photo))
+            jobs.append((photo, budget))
+            oversized.append((i, old_photo))
+    
+    # ... so they can be compressed in parallel
+    results = default_optimizer.optimize_many(jobs, workers=os.cpu_count() or 1)
+    compressed = {i: (old_photo, result) for (i, old_photo), result in zip(oversized, results)}
+    
     fixed_vcards = []
     fixed_count = 0
     
     for i, vcard in enumerate(vcards):
-        vcard_size = len(vcard.encode('utf-8'))
-        
-        # Check if oversized (256KB limit)
-        if vcard_size > 256 * 1024:
+        if i in compressed:
             # Extract name for reporting
             name_match = re.search(r'FN:(.+)', vcard)
             name = name_match.group(1) if name_match else f"Contact #{i+1}"
             
-            print(f"\nFixing {name} ({vcard_size // 1024} KB)...")
-            
-            # Find photo data
-            photo_match = re.search(r'PHOTO;[^:]+:([A-Za-z0-9+/\r\n]+={0,2})', vcard)
+            print(f"\nFixing {name} ({len(vcard.encode('utf-8')) // 1024} KB)...")
             
-            if photo_match:
-                old_photo = photo_match.group(1)
-                # Remove newlines from base64
-                clean_photo = old_photo.replace('\n', '').replace('\r', '')
-                
-                # Compress photo
-                new_photo = compress_photo(clean_photo, max_size_kb=200)
-                
-                if new_photo:
-                    # Replace photo in vCard
-                    vcard = vcard.replace(old_photo, new_photo)
-                    new_size = len(vcard.encode('utf-8'))
-                    print(f"  Compressed to {new_size // 1024} KB")
-                    fixed_count += 1
-                else:
-                    print(f"  Failed to compress, removing photo")
-                    # Remove entire PHOTO line if compression failed
-                    vcard = re.sub(r'PHOTO;[^:]+:[A-Za-z0-9+/\r\n]+={0,2}\r?\n', '', vcard)
-                    fixed_count += 1
+            old_photo, result = compressed[i]
+            if result:
+                # Replace photo in vCard
+                new_photo = base64.b64encode(result.data).decode('ascii')
+                vcard = vcard.replace(old_photo, new_photo)
+                new_size = len(vcard.encode('utf-8'))
+                print(f"  Compressed to {new_size // 1024} KB")
+                fixed_count += 1
+            else:
+                print(f"  Failed to compress, removing photo")
+                # Remove entire PHOTO line if compression failed
+                vcard = re.sub(r'PHOTO;[^:]+:[A-Za-z0-9+/\r\n]+={0,2}\r?\n', '', vcard)
+                fixed_count += 1
         
         fixed_vcards.append(vcard)
     
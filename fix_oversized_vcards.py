@@ -2,51 +2,13 @@
 """Fix oversized vCards by resizing photos to meet iCloud limits"""
 
 import re
-import base64
-from io import BytesIO
-from PIL import Image
+from photo_optimizer import optimize_base64
 import config
 
 def resize_photo_data(base64_data, max_size_kb=200):
     """Resize a base64 encoded photo to fit within size limit"""
     try:
-        # Decode base64
-        img_data = base64.b64decode(base64_data)
-        img = Image.open(BytesIO(img_data))
-        
-        # Start with current size
-        quality = 95
-        scale = 1.0
-        
-        while True:
-            # Resize if needed
-            if scale < 1.0:
-                new_size = (int(img.width * scale), int(img.height * scale))
-                resized = img.resize(new_size, Image.Resampling.LANCZOS)
-            else:
-                resized = img
-            
-            # Save to buffer
-            buffer = BytesIO()
-            resized.save(buffer, format='JPEG', quality=quality, optimize=True)
-            
-            # Check size
-            size_kb = len(buffer.getvalue()) / 1024
-            if size_kb <= max_size_kb:
-                # Encode back to base64
-                return base64.b64encode(buffer.getvalue()).decode('ascii')
-            
-            # Reduce quality or scale
-            if quality > 60:
-                quality -= 10
-            else:
-                scale *= 0.9
-                quality = 85
-            
-            if scale < 0.3:
-                # Too small, give up
-                return None
-                
+        return optimize_base64(base64_data, max_size_kb * 1024)
     except Exception as e:
         print(f"Error resizing photo: {e}")
         return None
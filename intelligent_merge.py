@@ -12,16 +12,36 @@ from datetime import datetime
 from collections import defaultdict
 from difflib import SequenceMatcher
 import vobject
-import phonenumbers
-import re
-from PIL import Image
-import io
-import base64
+import contact_normalization
+from photo_hashing import photo_bytes, photo_digest, photo_fingerprint, photos_match
+from photo_probe import probe_photo
+from match_rules import compile_match_rules, match_profile
+from vcard_stream import VCardRecordReader, iter_vcard_records
+
+REVIEW_FOOTER = """
+    </div>
+    <script>
+        function markDecision(decision, groupId) {
+            const group = document.getElementById('group-' + groupId);
+            group.style.opacity = '0.5';
+            group.setAttribute('data-decision', decision);
+            
+            // In real implementation, would save to file
+            console.log('Group ' + groupId + ': ' + decision);
+        }
+    </script>
+</body>
+</html>
+"""
+
 
 class IntelligentContactMerger:
     """Advanced contact merger with photo handling"""
     
-    def __init__(self):
+    def __init__(self, preferences=None):
+        # Shared match rules and merge thresholds (see match_rules.py)
+        self.match_engine = compile_match_rules(preferences)
+        
         # Database priorities
         self.db_priorities = {
             'sara': 100,
@@ -42,28 +62,25 @@ class IntelligentContactMerger:
             'manual_review': 0,
             'kept_separate': 0,
             'photos_processed': 0,
-            'photos_optimized': 0
+            'photos_optimized': 0,
+            'photos_deduplicated': 0,
+            'pairs_compared': 0
         }
         
+        # Photos shared by more contacts than this are logos or default avatars
+        self.max_photo_bucket = 5
+        
         # Match groups
         self.match_groups = []
         self.review_needed = []
         
     def normalize_phone(self, phone_str):
-        """Normalize phone number for comparison"""
-        try:
-            parsed = phonenumbers.parse(phone_str, 'US')
-            if phonenumbers.is_valid_number(parsed):
-                return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
-        except:
-            pass
-        # Fallback: just digits
-        digits = re.sub(r'\D', '', phone_str)
-        return digits[-10:] if len(digits) >= 10 else digits
+        """Normalize phone number for comparison (E.164 or digits)"""
+        return contact_normalization.normalize_phone(phone_str)
     
     def normalize_email(self, email):
-        """Normalize email for comparison"""
-        return email.lower().strip()
+        """Normalize email for comparison (Gmail dots/tags removed)"""
+        return contact_normalization.normalize_email(email)
     
     def name_similarity(self, name1, name2):
         """Calculate name similarity score"""
@@ -81,96 +98,100 @@ class IntelligentContactMerger:
             return str(vcard.org.value).strip()
         return None
     
+    def contact_photo_fingerprint(self, vcard):
+        """Perceptual fingerprint of the contact photo (cached by byte digest)"""
+        if hasattr(vcard, 'photo') and vcard.photo.value:
+            return photo_fingerprint(vcard.photo.value)
+        return None
+    
     def check_known_duplicate(self, vcard):
         """Check if this is a known duplicate name"""
         if not hasattr(vcard, 'fn') or not vcard.fn.value:
             return False
-        
-        name = vcard.fn.value
-        org = self.extract_org_name(vcard)
-        
+        return self.is_known_duplicate_profile(self.contact_match_profile(vcard))
+    
+    def is_known_duplicate_profile(self, profile):
+        """Known duplicate name at one of its known organizations"""
         for dup_name, orgs in self.known_duplicates.items():
-            if dup_name in name:
+            if contact_normalization.normalize_name(dup_name) in profile.name:
                 # Check if org matches any known org
-                if org:
+                if profile.org:
                     for known_org in orgs:
-                        if known_org.lower() in org.lower():
+                        if contact_normalization.normalize_name(known_org) in profile.org:
                             return True
         return False
     
-    def calculate_match_confidence(self, vcard1, vcard2, match_type):
-        """Calculate confidence score for a potential match"""
-        
-        # Extract names
-        name1 = vcard1.fn.value if hasattr(vcard1, 'fn') else ""
-        name2 = vcard2.fn.value if hasattr(vcard2, 'fn') else ""
+    def contact_match_profile(self, vcard):
+        """Normalized matching data of a vCard for the match rules"""
+        return match_profile(
+            vcard.fn.value if hasattr(vcard, 'fn') else '',
+            [email.value for email in getattr(vcard, 'email_list', []) if email.value],
+            [tel.value for tel in getattr(vcard, 'tel_list', []) if tel.value],
+            self.extract_org_name(vcard),
+            self.contact_photo_fingerprint(vcard)
+        )
+    
+    def profile_confidence(self, profile1, profile2):
+        """Confidence score (0-100) of two match profiles"""
+        self.stats['pairs_compared'] += 1
         
         # Check for known duplicates
-        if self.check_known_duplicate(vcard1) and self.check_known_duplicate(vcard2):
+        if self.is_known_duplicate_profile(profile1) and self.is_known_duplicate_profile(profile2):
             # If both are known duplicates, check if they're the same person
-            org1 = self.extract_org_name(vcard1)
-            org2 = self.extract_org_name(vcard2)
-            if org1 and org2 and org1.lower() != org2.lower():
+            if profile1.org and profile2.org and profile1.org != profile2.org:
                 return 0  # Different people
         
-        # Email match
-        if match_type == 'email':
-            base_confidence = 95
-            # Reduce confidence if names are very different
-            if self.name_similarity(name1, name2) < 0.5:
-                base_confidence -= 10
-            return base_confidence
-        
-        # Phone match
-        elif match_type == 'phone':
-            base_confidence = 90
-            # Boost if names are similar
-            if self.name_similarity(name1, name2) > 0.8:
-                base_confidence += 5
-            return base_confidence
-        
-        # Name + Organization match
-        elif match_type == 'name_org':
-            if self.name_similarity(name1, name2) > 0.9:
-                return 85
-            return 75
-        
-        # Combined criteria
-        elif match_type == 'combined':
-            return 98
-        
-        return 50
+        match = self.match_engine.score(profile1, profile2)
+        if match is None:
+            return 0
+        return round(match.confidence * 100)
+    
+    def calculate_match_confidence(self, vcard1, vcard2, match_type):
+        """
+        Calculate confidence score (0-100) for a potential match.
+        
+        match_type names the index that paired the contacts; the confidence
+        itself comes from the shared match rules.
+        """
+        return self.profile_confidence(self.contact_match_profile(vcard1), self.contact_match_profile(vcard2))
     
-    def find_matches(self, vcards_with_source):
-        """Find potential matches across databases"""
+    def find_matches(self, vcards_with_source, profiles=None):
+        """
+        Find potential matches across databases.
+        
+        Matching only uses the contacts' match profiles. When profiles are
+        given, the second tuple element is passed through untouched, so it
+        can be a record reference instead of a parsed vCard (streaming merge).
+        """
+        if profiles is None:
+            profiles = [self.contact_match_profile(vcard) for _, vcard in vcards_with_source]
         
         # Build indices
         email_index = defaultdict(list)
         phone_index = defaultdict(list)
         name_org_index = defaultdict(list)
+        photo_index = defaultdict(list)
         
         for i, (source, vcard) in enumerate(vcards_with_source):
+            profile = profiles[i]
+            
             # Index by email
-            if hasattr(vcard, 'email_list'):
-                for email in vcard.email_list:
-                    if email.value:
-                        normalized = self.normalize_email(email.value)
-                        email_index[normalized].append((i, source, vcard))
+            for email in profile.emails:
+                email_index[email].append((i, source, vcard))
             
             # Index by phone
-            if hasattr(vcard, 'tel_list'):
-                for tel in vcard.tel_list:
-                    if tel.value:
-                        normalized = self.normalize_phone(tel.value)
-                        if normalized:
-                            phone_index[normalized].append((i, source, vcard))
+            for phone in profile.phones:
+                phone_index[phone].append((i, source, vcard))
             
-            # Index by name+org
-            if hasattr(vcard, 'fn') and vcard.fn.value:
-                org = self.extract_org_name(vcard)
-                if org:
-                    key = f"{vcard.fn.value.lower()}|{org.lower()}"
-                    name_org_index[key].append((i, source, vcard))
+            # Index by phonetic name + organization (Meier/Mayer at the same company)
+            if profile.org and profile.phonetic_signature:
+                key = f"{' '.join(profile.phonetic_signature)}|{profile.org}"
+                name_org_index[key].append((i, source, vcard))
+            
+            # Index by photo dHash bands: photos within 3 bits share at least one band
+            if profile.photo:
+                for band in range(4):
+                    photo_index[(band, (profile.photo.dhash >> (16 * band)) & 0xFFFF)].append((i, source, vcard))
         
         # Find matches
         processed = set()
@@ -186,9 +207,7 @@ class IntelligentContactMerger:
                         group.append((idx, source, vcard))
                 
                 if len(group) > 1:
-                    confidence = self.calculate_match_confidence(
-                        group[0][2], group[1][2], 'email'
-                    )
+                    confidence = self.profile_confidence(profiles[group[0][0]], profiles[group[1][0]])
                     match_groups.append({
                         'contacts': group,
                         'match_type': 'email',
@@ -204,9 +223,7 @@ class IntelligentContactMerger:
                     for idx, source, vcard in unprocessed:
                         processed.add(idx)
                     
-                    confidence = self.calculate_match_confidence(
-                        unprocessed[0][2], unprocessed[1][2], 'phone'
-                    )
+                    confidence = self.profile_confidence(profiles[unprocessed[0][0]], profiles[unprocessed[1][0]])
                     match_groups.append({
                         'contacts': unprocessed,
                         'match_type': 'phone',
@@ -214,63 +231,93 @@ class IntelligentContactMerger:
                         'confidence': confidence
                     })
         
+        # Process name + organization matches (never auto-merged, see match_rules.DEFAULT_RULES)
+        for key, contacts in name_org_index.items():
+            if len(contacts) > 1:
+                unprocessed = [(i, s, v) for i, s, v in contacts if i not in processed]
+                if len(unprocessed) > 1:
+                    for idx, source, vcard in unprocessed:
+                        processed.add(idx)
+                    
+                    confidence = self.profile_confidence(profiles[unprocessed[0][0]], profiles[unprocessed[1][0]])
+                    match_groups.append({
+                        'contacts': unprocessed,
+                        'match_type': 'name_org',
+                        'match_value': key,
+                        'confidence': confidence
+                    })
+        
+        # Process photo matches (same or re-encoded picture); large buckets are generic avatars
+        for key, contacts in photo_index.items():
+            if 1 < len(contacts) <= self.max_photo_bucket:
+                unprocessed = [(i, s, v) for i, s, v in contacts if i not in processed]
+                if len(unprocessed) > 1:
+                    anchor_photo = profiles[unprocessed[0][0]].photo
+                    group = [unprocessed[0]] + [
+                        (i, s, v) for i, s, v in unprocessed[1:]
+                        if photos_match(anchor_photo, profiles[i].photo)
+                    ]
+                    if len(group) < 2:
+                        continue
+                    for idx, source, vcard in group:
+                        processed.add(idx)
+                    
+                    confidence = self.profile_confidence(profiles[group[0][0]], profiles[group[1][0]])
+                    match_groups.append({
+                        'contacts': group,
+                        'match_type': 'photo',
+                        'match_value': anchor_photo.digest[:16],
+                        'confidence': confidence
+                    })
+        
         return match_groups
     
     def assess_photo_quality(self, photo_data):
-        """Assess quality of a contact photo"""
-        score = 0
-        
-        try:
-            # Decode photo if base64
-            if isinstance(photo_data, str):
-                photo_bytes = base64.b64decode(photo_data)
-            else:
-                photo_bytes = photo_data
-            
-            # Get image info
-            img = Image.open(io.BytesIO(photo_bytes))
-            width, height = img.size
-            file_size = len(photo_bytes)
-            
-            # Resolution score (40 points)
-            if width >= 500 and height >= 500:
-                score += 40
-            elif width >= 200 and height >= 200:
-                score += 20
-            else:
-                score += 5
-            
-            # File size score (30 points)
-            if file_size > 100_000:
-                score += 30
-            elif file_size > 20_000:
-                score += 15
-            else:
-                score += 5
-            
-            # Format score (20 points)
-            if img.format in ['PNG', 'JPEG']:
-                score += 20
-            else:
-                score += 10
-            
-            # Type score (10 points) - simplified
-            # Would need more sophisticated analysis for real implementation
-            score += 5
-            
-            return {
-                'score': score,
-                'width': width,
-                'height': height,
-                'size': file_size,
-                'format': img.format
-            }
-            
-        except Exception as e:
+        """Assess quality of a contact photo (from its header, without decoding it)"""
+        info = probe_photo(photo_data)
+        if info is None:
             return {
                 'score': 0,
-                'error': str(e)
+                'error': 'Photo could not be decoded'
             }
+        
+        score = 0
+        width, height = info.width, info.height
+        file_size = info.size
+        
+        # Resolution score (40 points)
+        if width >= 500 and height >= 500:
+            score += 40
+        elif width >= 200 and height >= 200:
+            score += 20
+        else:
+            score += 5
+        
+        # File size score (30 points)
+        if file_size > 100_000:
+            score += 30
+        elif file_size > 20_000:
+            score += 15
+        else:
+            score += 5
+        
+        # Format score (20 points)
+        if info.format in ['PNG', 'JPEG']:
+            score += 20
+        else:
+            score += 10
+        
+        # Type score (10 points) - simplified
+        # Would need more sophisticated analysis for real implementation
+        score += 5
+        
+        return {
+            'score': score,
+            'width': width,
+            'height': height,
+            'size': file_size,
+            'format': info.format
+        }
     
     def select_best_photo(self, photos_with_source):
         """Select the best photo from multiple options"""
@@ -278,7 +325,11 @@ class IntelligentContactMerger:
         best_score = 0
         best_source = None
         
-        for source, photo_data in photos_with_source:
+        candidates = list(photos_with_source)
+        if len(candidates) > 1:
+            candidates = self._distinct_photos(candidates)
+        
+        for source, photo_data in candidates:
             quality = self.assess_photo_quality(photo_data)
             
             # Apply source priority bonus
@@ -292,6 +343,22 @@ class IntelligentContactMerger:
         
         return best_photo, best_source, best_score
     
+    def _distinct_photos(self, photos_with_source):
+        """Drop byte-identical copies, keeping the one from the highest priority source"""
+        kept = {}
+        for position, (source, photo_data) in enumerate(photos_with_source):
+            try:
+                digest = photo_digest(photo_bytes(photo_data))
+            except (ValueError, TypeError):
+                # Damaged base64: never a duplicate
+                digest = position
+            if digest in kept:
+                self.stats['photos_deduplicated'] += 1
+                if self.db_priorities.get(source, 50) <= self.db_priorities.get(kept[digest][1][0], 50):
+                    continue
+            kept[digest] = (position, (source, photo_data))
+        return [photo for _, photo in sorted(kept.values(), key=lambda item: item[0])]
+    
     def merge_contact_group(self, group):
         """Merge a group of matched contacts"""
         
@@ -399,7 +466,12 @@ class IntelligentContactMerger:
         return merged
     
     def generate_review_file(self, review_groups, output_path):
-        """Generate HTML file for manual review"""
+        """
+        Generate HTML file for manual review.
+        
+        review_groups can be any iterable, e.g. a generator loading each
+        group's vCards on demand: groups are written one at a time.
+        """
         
         html = """<!DOCTYPE html>
 <html>
@@ -430,10 +502,17 @@ class IntelligentContactMerger:
         <p>Review these potential matches and decide whether to merge or keep separate.</p>
 """
         
-        for i, group in enumerate(review_groups):
-            conf_class = 'high-conf' if group['confidence'] >= 85 else 'med-conf' if group['confidence'] >= 70 else 'low-conf'
-            
-            html += f"""
+        with open(output_path, 'w') as f:
+            f.write(html)
+            for i, group in enumerate(review_groups):
+                f.write(self._review_group_html(i, group))
+            f.write(REVIEW_FOOTER)
+    
+    def _review_group_html(self, i, group):
+        """HTML section of one review group"""
+        conf_class = 'high-conf' if group['confidence'] >= 85 else 'med-conf' if group['confidence'] >= 70 else 'low-conf'
+        
+        html = f"""
         <div class="match-group" id="group-{i}">
             <div class="confidence {conf_class}">Confidence: {group['confidence']}%</div>
             <h3>Potential Match #{i+1}</h3>
@@ -443,33 +522,33 @@ class IntelligentContactMerger:
                 <strong>Match Value:</strong> {group['match_value']}
             </div>
 """
+        
+        for idx, source, vcard in group['contacts']:
+            name = vcard.fn.value if hasattr(vcard, 'fn') else "No name"
+            org = self.extract_org_name(vcard) or "No organization"
             
-            for idx, source, vcard in group['contacts']:
-                name = vcard.fn.value if hasattr(vcard, 'fn') else "No name"
-                org = self.extract_org_name(vcard) or "No organization"
-                
-                html += f"""
+            html += f"""
             <div class="contact">
                 <div class="source">Source: {source}</div>
                 <div class="field"><span class="field-label">Name:</span> {name}</div>
                 <div class="field"><span class="field-label">Organization:</span> {org}</div>
 """
-                
-                if hasattr(vcard, 'email_list'):
-                    emails = [e.value for e in vcard.email_list if e.value]
-                    if emails:
-                        html += f'<div class="field"><span class="field-label">Emails:</span> {", ".join(emails)}</div>'
-                
-                if hasattr(vcard, 'tel_list'):
-                    phones = [t.value for t in vcard.tel_list if t.value]
-                    if phones:
-                        html += f'<div class="field"><span class="field-label">Phones:</span> {", ".join(phones)}</div>'
-                
-                html += """
-            </div>
-"""
+            
+            if hasattr(vcard, 'email_list'):
+                emails = [e.value for e in vcard.email_list if e.value]
+                if emails:
+                    html += f'<div class="field"><span class="field-label">Emails:</span> {", ".join(emails)}</div>'
+            
+            if hasattr(vcard, 'tel_list'):
+                phones = [t.value for t in vcard.tel_list if t.value]
+                if phones:
+                    html += f'<div class="field"><span class="field-label">Phones:</span> {", ".join(phones)}</div>'
             
             html += """
+            </div>
+"""
+        
+        html += """
             <div class="actions">
                 <button class="merge-btn" onclick="markDecision('merge', """ + str(i) + """)">MERGE</button>
                 <button class="separate-btn" onclick="markDecision('separate', """ + str(i) + """)">KEEP SEPARATE</button>
@@ -477,104 +556,131 @@ class IntelligentContactMerger:
         </div>
 """
         
-        html += """
-    </div>
-    <script>
-        function markDecision(decision, groupId) {
-            const group = document.getElementById('group-' + groupId);
-            group.style.opacity = '0.5';
-            group.setAttribute('data-decision', decision);
+        return html
+    
+    def index_databases(self, database_paths):
+        """
+        Pass 1 of the streaming merge: stream every record once and keep only
+        (source, RecordRef) plus its match profile.
+        """
+        all_contacts = []
+        profiles = []
+        
+        for db_name, db_path in database_paths.items():
+            print(f"   Indexing {db_name}...")
+            count = 0
+            for ref, record in iter_vcard_records(db_path):
+                vcard = vobject.readOne(record)
+                all_contacts.append((db_name, ref))
+                profiles.append(self.contact_match_profile(vcard))
+                count += 1
             
-            // In real implementation, would save to file
-            console.log('Group ' + groupId + ': ' + decision);
-        }
-    </script>
-</body>
-</html>
-"""
+            print(f"   Indexed {count} contacts from {db_name}")
+            self.stats['total_input'] += count
         
-        with open(output_path, 'w') as f:
-            f.write(html)
+        return all_contacts, profiles
     
-    def merge_databases(self, database_paths, output_path):
-        """Main merge function"""
+    def load_group(self, group, load):
+        """Copy of a match group with its contacts loaded as vCards"""
+        return dict(group, contacts=[(idx, source, load(item)) for idx, source, item in group['contacts']])
+    
+    def merge_databases(self, database_paths, output_path, streaming=False):
+        """
+        Main merge function.
+        
+        streaming=True runs a two-pass merge: pass 1 indexes offsets and
+        match profiles only, pass 2 re-reads the records of each group from
+        disk, merges and writes them immediately. Unmatched records are
+        copied through unchanged, so peak memory follows the index size.
+        """
         
         print("Intelligent Contact Merge System")
         print("=" * 80)
         
         # Step 1: Load all contacts with source info
-        print("\n1. Loading databases...")
-        all_contacts = []
-        
-        for db_name, db_path in database_paths.items():
-            print(f"   Loading {db_name}...")
-            with open(db_path, 'r', encoding='utf-8') as f:
-                vcards = list(vobject.readComponents(f.read()))
-            
-            for vcard in vcards:
-                all_contacts.append((db_name, vcard))
+        if streaming:
+            print("\n1. Indexing databases (pass 1)...")
+            all_contacts, profiles = self.index_databases(database_paths)
+        else:
+            print("\n1. Loading databases...")
+            all_contacts = []
+            profiles = None
             
-            print(f"   Loaded {len(vcards)} contacts from {db_name}")
-            self.stats['total_input'] += len(vcards)
+            for db_name, db_path in database_paths.items():
+                print(f"   Loading {db_name}...")
+                with open(db_path, 'r', encoding='utf-8') as f:
+                    vcards = list(vobject.readComponents(f.read()))
+                
+                for vcard in vcards:
+                    all_contacts.append((db_name, vcard))
+                
+                print(f"   Loaded {len(vcards)} contacts from {db_name}")
+                self.stats['total_input'] += len(vcards)
         
         # Step 2: Find matches
         print("\n2. Finding matches...")
-        match_groups = self.find_matches(all_contacts)
+        match_groups = self.find_matches(all_contacts, profiles)
         print(f"   Found {len(match_groups)} potential match groups")
         
         # Step 3: Separate by confidence
         auto_merge = []
         manual_review = []
         
+        auto_threshold = round(self.match_engine.auto_merge_threshold * 100)
+        review_threshold = round(self.match_engine.review_threshold * 100)
         for group in match_groups:
-            if group['confidence'] >= 95:
+            if group['confidence'] >= auto_threshold:
                 auto_merge.append(group)
-            elif group['confidence'] >= 70:
+            elif group['confidence'] >= review_threshold:
                 manual_review.append(group)
-            # else: keep separate (confidence < 70)
+            # else: keep separate (below review threshold)
         
         print(f"\n3. Match distribution:")
-        print(f"   Auto-merge (95%+): {len(auto_merge)} groups")
-        print(f"   Manual review (70-94%): {len(manual_review)} groups")
+        print(f"   Auto-merge ({auto_threshold}%+): {len(auto_merge)} groups")
+        print(f"   Manual review ({review_threshold}-{auto_threshold - 1}%): {len(manual_review)} groups")
         
-        # Step 4: Process auto-merge
-        print("\n4. Processing auto-merge groups...")
-        merged_contacts = []
-        merged_indices = set()
-        
-        for group in auto_merge:
-            merged = self.merge_contact_group(group)
-            merged_contacts.append(merged)
+        # Steps 4-6 write the output as it is produced (pass 2 when streaming)
+        reader = VCardRecordReader() if streaming else None
+        load = reader.load if streaming else (lambda vcard: vcard)
+        try:
+            unique_contacts = 0
+            merged_indices = set()
+            with open(output_path, 'w', encoding='utf-8') as f:
+                # Step 4: Process auto-merge
+                print("\n4. Processing auto-merge groups...")
+                for group in auto_merge:
+                    merged = self.merge_contact_group(self.load_group(group, load))
+                    f.write(merged.serialize())
+                    unique_contacts += 1
+                    
+                    # Track which contacts were merged
+                    for idx, _, _ in group['contacts']:
+                        merged_indices.add(idx)
+                    
+                    self.stats['auto_merged'] += len(group['contacts']) - 1
+                
+                # Step 5: Add unmatched contacts
+                print("\n5. Processing unmatched contacts...")
+                for i, (source, contact) in enumerate(all_contacts):
+                    if i not in merged_indices:
+                        f.write(reader.read(contact) if streaming else contact.serialize())
+                        unique_contacts += 1
             
-            # Track which contacts were merged
-            for idx, _, _ in group['contacts']:
-                merged_indices.add(idx)
+            print(f"   Total unique contacts: {unique_contacts}")
+            print(f"   Written to: {output_path}")
             
-            self.stats['auto_merged'] += len(group['contacts']) - 1
-        
-        # Step 5: Add unmatched contacts
-        print("\n5. Processing unmatched contacts...")
-        for i, (source, vcard) in enumerate(all_contacts):
-            if i not in merged_indices:
-                merged_contacts.append(vcard)
-        
-        print(f"   Total unique contacts: {len(merged_contacts)}")
-        
-        # Step 6: Generate review file
-        if manual_review:
-            review_path = output_path.replace('.vcf', '_review.html')
-            self.generate_review_file(manual_review, review_path)
-            print(f"\n6. Manual review needed: {len(manual_review)} groups")
-            print(f"   Review file: {review_path}")
-            self.stats['manual_review'] = len(manual_review)
-        
-        # Step 7: Write output
-        print(f"\n7. Writing merged database...")
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for vcard in merged_contacts:
-                f.write(vcard.serialize())
-        
-        # Step 8: Generate report
+            # Step 6: Generate review file
+            if manual_review:
+                review_path = output_path.replace('.vcf', '_review.html')
+                self.generate_review_file((self.load_group(group, load) for group in manual_review), review_path)
+                print(f"\n6. Manual review needed: {len(manual_review)} groups")
+                print(f"   Review file: {review_path}")
+                self.stats['manual_review'] = len(manual_review)
+        finally:
+            if reader:
+                reader.close()
+        
+        # Step 7: Generate report
         self.generate_merge_report(output_path)
         
         return self.stats
@@ -599,12 +705,19 @@ class IntelligentContactMerger:
         print(f"Auto-merged: {self.stats['auto_merged']}")
         print(f"Manual review needed: {self.stats['manual_review']}")
         print(f"Photos processed: {self.stats['photos_processed']}")
+        print(f"Duplicate photos skipped: {self.stats['photos_deduplicated']}")
         print(f"\nOutput: {output_path}")
         print(f"Report: {report_path}")
 
 
 def main():
     """Run the intelligent merge"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Intelligent merge of validated contact databases")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Two-pass merge keeping only an offset/profile index in memory")
+    args = parser.parse_args()
     
     # Create backup
     backup_dir = f"backup/intelligent_merge_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -629,7 +742,7 @@ def main():
     merger = IntelligentContactMerger()
     output_path = f"data/INTELLIGENTLY_MERGED_{datetime.now().strftime('%Y%m%d_%H%M%S')}.vcf"
     
-    stats = merger.merge_databases(databases, output_path)
+    stats = merger.merge_databases(databases, output_path, streaming=args.streaming)
     
     print(f"\n💾 Backups saved to: {backup_dir}")
 
@@ -10,7 +10,7 @@ import vobject
 import json
 from datetime import datetime
 from collections import defaultdict
-import re
+import contact_normalization
 
 try:
     import Contacts
@@ -223,31 +223,11 @@ class MacOSContactsBridge:
     
     def normalize_phone(self, phone):
         """Normalize phone number for comparison"""
-        if not phone:
-            return None
-        
-        # Remove all non-digits except +
-        cleaned = re.sub(r'[^\d+]', '', phone.strip())
-        
-        # Austrian number normalization
-        if cleaned.startswith('0043'):
-            cleaned = '+43' + cleaned[4:]
-        elif cleaned.startswith('043'):
-            cleaned = '+43' + cleaned[3:]
-        elif cleaned.startswith('0') and len(cleaned) > 1:
-            cleaned = '+43' + cleaned[1:]
-        elif cleaned.startswith('43') and not cleaned.startswith('+'):
-            cleaned = '+' + cleaned
-        elif cleaned.startswith('1') and len(cleaned) == 11:
-            cleaned = '+' + cleaned
-        
-        return cleaned
+        return contact_normalization.normalize_phone(phone) or None
     
     def normalize_name(self, name):
         """Normalize name for comparison"""
-        if not name:
-            return ''
-        return re.sub(r'[^\w\s]', '', name.lower().strip())
+        return contact_normalization.normalize_name(name)
     
     def compare_contacts(self):
         """Compare macOS Contacts with phonebook contacts"""
@@ -275,7 +255,7 @@ class MacOSContactsBridge:
         for contact in self.macos_contacts:
             # Index by email
             for email_info in contact['emails']:
-                macos_by_email[email_info['value']].append(contact)
+                macos_by_email[contact_normalization.normalize_email(email_info['value'])].append(contact)
             
             # Index by phone
             for phone_info in contact['phones']:
@@ -296,6 +276,7 @@ class MacOSContactsBridge:
             
             # Try to match by email
             for email in pb_contact['emails']:
+                email = contact_normalization.normalize_email(email)
                 if email in macos_by_email:
                     for macos_contact in macos_by_email[email]:
                         matches.append(('email', email, macos_contact))
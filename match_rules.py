@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Match Rules - One declarative duplicate-matching rule set for all detectors
+
+DuplicateAnalyzer, IntelligentContactMerger and CrossDatabaseDuplicateDetector
+score contact pairs with the rules and thresholds defined here (or in
+UserPreferences.match_rules / match_thresholds), so tuning happens in one
+place instead of in every script.
+
+A rule is a dict:
+
+    {
+        'name': 'phone_and_name',
+        'all': ['phone_overlap', ['name_similarity > similar_name', 'sounds_alike']],
+        'match_type': 'exact',
+        'confidence': 0.95,
+        'fields': ['phone', 'name']
+    }
+
+'all' lists conditions that must all hold; a nested list is an OR group.
+A condition is a feature name (truthy), 'not <feature>' or
+'<feature> <op> <value>' where value is a number or a threshold name.
+Rules are tried in order and the first matching rule wins.
+
+Compilation turns the rules into predicates once:
+- contact data is normalized up front into a MatchProfile per contact
+- conditions inside a rule run cheapest feature first and short-circuit
+- pair features are computed lazily and at most once per pair
+- name_similarity thresholds are first checked against SequenceMatcher's
+  cheap upper bounds, so the full ratio only runs for plausible pairs
+"""
+
+import operator
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from contact_normalization import email_key_set, normalize_name, phone_key_set
+from name_phonetics import name_phonetic_signature, phonetic_name_match
+from user_preferences import DEFAULT_PREFERENCES, UserPreferences
+
+DEFAULT_THRESHOLDS = {
+    'related_name': 0.5,      # names still the same person when an email is shared
+    'similar_name': 0.8,      # names considered the same person when contact info overlaps
+    'fuzzy_name': 0.85,       # names similar enough to need only supporting data
+    'identical_name': 0.95,   # names alone are a (conflicting) duplicate candidate
+    'similar_org': 0.8        # organizations treated as the same company
+}
+
+DEFAULT_RULES = [
+    {
+        'name': 'email_and_name',
+        'all': ['email_overlap', ['sounds_alike', 'name_similarity > similar_name']],
+        'match_type': 'exact',
+        'confidence': 0.95,
+        'fields': ['email', 'name']
+    },
+    {
+        'name': 'email_and_related_name',
+        'all': ['email_overlap', 'name_similarity >= related_name'],
+        'match_type': 'exact',
+        'confidence': 0.95,
+        'fields': ['email', 'name']
+    },
+    {
+        'name': 'phone_and_name',
+        'all': ['phone_overlap', ['sounds_alike', 'name_similarity > similar_name']],
+        'match_type': 'exact',
+        'confidence': 0.95,
+        'fields': ['phone', 'name']
+    },
+    {
+        'name': 'photo_and_name',
+        'all': ['same_photo', ['sounds_alike', 'name_similarity > similar_name']],
+        'match_type': 'fuzzy',
+        'confidence': 0.90,
+        'fields': ['photo', 'name']
+    },
+    {
+        'name': 'name_and_common_data',
+        'all': [['sounds_alike', 'name_similarity > fuzzy_name'], 'common_data'],
+        'match_type': 'fuzzy',
+        'confidence': 0.85,
+        'fields': ['name', 'common_data']
+    },
+    {
+        'name': 'shared_email',
+        'all': ['email_overlap'],
+        'match_type': 'fuzzy',
+        'confidence': 0.85,
+        'fields': ['email']
+    },
+    {
+        'name': 'shared_phone',
+        'all': ['phone_overlap'],
+        'match_type': 'fuzzy',
+        'confidence': 0.90,
+        'fields': ['phone']
+    },
+    {
+        'name': 'identical_name',
+        'all': ['name_similarity > identical_name'],
+        'match_type': 'conflict',
+        'confidence': 0.75,
+        'fields': ['name']
+    }
+]
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq
+}
+
+
+@dataclass(frozen=True)
+class MatchProfile:
+    """Normalized, precomputed matching data of one contact (picklable)"""
+    name: str
+    emails: FrozenSet[str]
+    phones: FrozenSet[str]
+    org: str
+    phonetic_signature: Tuple[str, ...]
+    email_domains: FrozenSet[str]
+    phone_tails: FrozenSet[str]
+    photo: Any = None  # photo_hashing.PhotoFingerprint
+
+
+def match_profile(name: str, emails: Iterable[str] = (), phones: Iterable[str] = (),
+                  org: Optional[str] = None, photo: Any = None) -> MatchProfile:
+    """Build the MatchProfile of a contact from raw field values"""
+    email_keys = frozenset(email_key_set(emails))
+    phone_keys = frozenset(phone_key_set(phones))
+    return MatchProfile(
+        name=normalize_name(name or ''),
+        emails=email_keys,
+        phones=phone_keys,
+        org=normalize_name(org or ''),
+        phonetic_signature=name_phonetic_signature(name or ''),
+        email_domains=frozenset(e.split('@')[1] for e in email_keys if '@' in e),
+        phone_tails=frozenset(p[-7:] for p in phone_keys if len(p) >= 7),
+        photo=photo
+    )
+
+
+def _same_photo(a: MatchProfile, b: MatchProfile, thresholds: Dict[str, float]) -> bool:
+    if a.photo is None or b.photo is None:
+        return False
+    # Imported here so text-only matching does not need numpy/Pillow
+    from photo_hashing import photos_match
+    return photos_match(a.photo, b.photo)
+
+
+def _common_data(a: MatchProfile, b: MatchProfile, thresholds: Dict[str, float]) -> bool:
+    if a.email_domains & b.email_domains or a.phone_tails & b.phone_tails:
+        return True
+    return bool(a.org and b.org and
+                SequenceMatcher(None, a.org, b.org).ratio() > thresholds['similar_org'])
+
+
+def _name_similarity(a: MatchProfile, b: MatchProfile, thresholds: Dict[str, float]) -> float:
+    if not a.name or not b.name:
+        return 0.0
+    return SequenceMatcher(None, a.name, b.name).ratio()
+
+
+# Pair features: name -> (relative cost, extractor)
+FEATURES: Dict[str, Tuple[int, Callable[[MatchProfile, MatchProfile, Dict[str, float]], Any]]] = {
+    'email_overlap': (1, lambda a, b, t: len(a.emails & b.emails)),
+    'phone_overlap': (1, lambda a, b, t: len(a.phones & b.phones)),
+    'exact_name': (1, lambda a, b, t: bool(a.name) and a.name == b.name),
+    'sounds_alike': (2, lambda a, b, t: phonetic_name_match(a.phonetic_signature, b.phonetic_signature)),
+    'same_photo': (3, _same_photo),
+    'common_data': (4, _common_data),
+    'name_similarity': (5, _name_similarity)
+}
+
+
+class PairFeatures:
+    """Lazily computed, memoized features of one contact pair"""
+
+    def __init__(self, a: MatchProfile, b: MatchProfile, thresholds: Dict[str, float]):
+        self.a = a
+        self.b = b
+        self.thresholds = thresholds
+        self.values: Dict[str, Any] = {}
+        # Upper bound of name_similarity, tightened step by step (length, then characters)
+        self._similarity_bound = None
+        self._matcher = None
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self.values:
+            self.values[name] = FEATURES[name][1](self.a, self.b, self.thresholds)
+        return self.values[name]
+
+    def name_similarity_exceeds(self, threshold: float) -> bool:
+        """name_similarity > threshold, skipping the full ratio when an upper bound fails"""
+        if 'name_similarity' in self.values:
+            return self.values['name_similarity'] > threshold
+        if not self.a.name or not self.b.name:
+            return 0.0 > threshold
+
+        if self._similarity_bound is None:
+            # SequenceMatcher.real_quick_ratio() without building the matcher
+            len_a, len_b = len(self.a.name), len(self.b.name)
+            self._similarity_bound = 2.0 * min(len_a, len_b) / (len_a + len_b)
+        if self._similarity_bound <= threshold:
+            return False
+
+        if self._matcher is None:
+            self._matcher = SequenceMatcher(None, self.a.name, self.b.name)
+            self._similarity_bound = self._matcher.quick_ratio()
+            if self._similarity_bound <= threshold:
+                return False
+
+        self.values['name_similarity'] = self._matcher.ratio()
+        return self.values['name_similarity'] > threshold
+
+
+@dataclass
+class RuleMatch:
+    """Result of scoring a pair: the first rule that matched"""
+    rule: str
+    match_type: str
+    confidence: float
+    fields: List[str]
+    features: PairFeatures = field(repr=False, default=None)
+
+
+Predicate = Callable[[PairFeatures], bool]
+
+
+class MatchRuleEngine:
+    """
+    Compiled match rules with the decision thresholds from UserPreferences.
+
+    Pickles as its rule definitions and recompiles on load, so it can be
+    sent to process pool workers.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]] = None, thresholds: Dict[str, float] = None,
+                 auto_merge_threshold: float = 0.95, review_threshold: float = 0.70):
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        if thresholds:
+            self.thresholds.update(thresholds)
+        self.auto_merge_threshold = auto_merge_threshold
+        self.review_threshold = review_threshold
+        self._compiled = [self._compile_rule(rule) for rule in self.rules]
+
+    def __reduce__(self):
+        return (MatchRuleEngine, (self.rules, self.thresholds, self.auto_merge_threshold, self.review_threshold))
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    def _resolve_value(self, token: str, rule_name: str) -> float:
+        if token in self.thresholds:
+            return self.thresholds[token]
+        try:
+            return float(token)
+        except ValueError:
+            raise ValueError(f"Rule '{rule_name}': unknown threshold '{token}'")
+
+    def _compile_condition(self, condition: Any, rule_name: str) -> Tuple[int, Predicate]:
+        """Compile one condition (or OR group) into (cost, predicate)"""
+        if isinstance(condition, (list, tuple)):
+            alternatives = sorted((self._compile_condition(c, rule_name) for c in condition),
+                                  key=lambda item: item[0])
+            predicates = [predicate for _, predicate in alternatives]
+            return alternatives[0][0], lambda f: any(p(f) for p in predicates)
+
+        tokens = condition.split()
+        negate = tokens[0] == 'not'
+        if negate:
+            tokens = tokens[1:]
+        feature = tokens[0] if tokens else ''
+        if feature not in FEATURES:
+            raise ValueError(f"Rule '{rule_name}': unknown feature in '{condition}'")
+        cost = FEATURES[feature][0]
+
+        if len(tokens) == 1:
+            predicate = lambda f: bool(f[feature])
+        elif len(tokens) == 3 and tokens[1] in OPERATORS:
+            compare = OPERATORS[tokens[1]]
+            value = self._resolve_value(tokens[2], rule_name)
+            if feature == 'name_similarity' and tokens[1] == '>':
+                predicate = lambda f: f.name_similarity_exceeds(value)
+            else:
+                predicate = lambda f: compare(f[feature], value)
+        else:
+            raise ValueError(f"Rule '{rule_name}': cannot parse condition '{condition}'")
+
+        if negate:
+            return cost, lambda f: not predicate(f)
+        return cost, predicate
+
+    def _compile_rule(self, rule: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Predicate]]:
+        name = rule.get('name', '<unnamed>')
+        for key in ('all', 'match_type', 'confidence'):
+            if key not in rule:
+                raise ValueError(f"Rule '{name}' is missing '{key}'")
+        conditions = sorted((self._compile_condition(c, name) for c in rule['all']),
+                            key=lambda item: item[0])
+        return rule, [predicate for _, predicate in conditions]
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def score(self, a: MatchProfile, b: MatchProfile) -> Optional[RuleMatch]:
+        """First matching rule for the pair, or None"""
+        features = PairFeatures(a, b, self.thresholds)
+        for rule, predicates in self._compiled:
+            for predicate in predicates:
+                if not predicate(features):
+                    break
+            else:
+                return RuleMatch(
+                    rule=rule.get('name', ''),
+                    match_type=rule['match_type'],
+                    confidence=rule['confidence'],
+                    fields=list(rule.get('fields', [])),
+                    features=features
+                )
+        return None
+
+    def action(self, match: Optional[RuleMatch]) -> str:
+        """'auto_merge', 'review_merge' or 'manual_review'/'keep_separate' for a match"""
+        if match is None or match.confidence < self.review_threshold:
+            return 'keep_separate'
+        if match.match_type == 'conflict':
+            return 'manual_review'
+        if match.confidence >= self.auto_merge_threshold:
+            return 'auto_merge'
+        return 'review_merge'
+
+
+def compile_match_rules(preferences: UserPreferences = None) -> MatchRuleEngine:
+    """Compile the match rules and thresholds of UserPreferences (defaults if None)"""
+    preferences = preferences or DEFAULT_PREFERENCES
+    return MatchRuleEngine(
+        rules=preferences.match_rules,
+        thresholds=preferences.match_thresholds,
+        auto_merge_threshold=preferences.auto_merge_confidence_threshold,
+        review_threshold=preferences.review_confidence_threshold
+    )
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Merge Accumulator - Merge any number of duplicate vCards into one base card
+
+VCardMerger.merge_vcards and AdvancedDeduplicator._merge_into_base used to
+rebuild the normalized email/phone/URL/address sets of the base card on
+every call, so merging a cluster of n cards cost O(n^2). The accumulator:
+
+1. Normalizes the base card's multi-value properties once
+2. absorb(): adds unseen values from each source in time linear in the source
+3. result(): returns the merged base card
+
+Both merge implementations share it, so their dedup rules stay identical.
+"""
+
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional
+
+import vobject
+
+import contact_normalization
+
+
+def _lower(value) -> str:
+    return str(value).lower()
+
+
+# Multi-value properties merged by unique normalized key
+PROPERTY_KEYS: Dict[str, Callable] = {
+    'email': contact_normalization.normalize_email,
+    'tel': contact_normalization.normalize_phone,
+    'url': _lower,
+    'adr': _lower
+}
+
+# Single-value properties copied only when the base has no value
+FILL_MISSING = ('org', 'title')
+
+
+class MergeAccumulator:
+    """Holds a base vCard with precomputed merge keys and absorbs duplicates"""
+
+    def __init__(self, base: vobject.base.Component,
+                 properties: Iterable[str] = ('email', 'tel', 'url', 'adr'),
+                 fill_missing: Iterable[str] = FILL_MISSING,
+                 merge_names: bool = False, merge_photo: bool = False):
+        self.base = base
+        self.fill_missing = tuple(fill_missing)
+        self.merge_names = merge_names
+        self.merge_photo = merge_photo
+        self.added = Counter()  # property name -> values added from sources
+        self.sources = 0
+        self.keys: Dict[str, set] = {}
+        for name in properties:
+            key_fn = PROPERTY_KEYS[name]
+            self.keys[name] = {key_fn(field.value) for field in base.contents.get(name, []) if field.value}
+
+    def absorb(self, source: vobject.base.Component) -> 'MergeAccumulator':
+        """Merge unique data from source into the base card"""
+        self.sources += 1
+        if self.merge_names:
+            self._absorb_name(source)
+        for name, existing in self.keys.items():
+            self._absorb_values(source, name, existing)
+        for name in self.fill_missing:
+            self._absorb_missing(source, name)
+        self._absorb_note(source)
+        if self.merge_photo:
+            self._absorb_photo(source)
+        return self
+
+    def absorb_all(self, sources: Iterable[vobject.base.Component]) -> 'MergeAccumulator':
+        for source in sources:
+            self.absorb(source)
+        return self
+
+    def result(self) -> vobject.base.Component:
+        """The merged vCard"""
+        return self.base
+
+    def _absorb_values(self, source, name, existing):
+        key_fn = PROPERTY_KEYS[name]
+        for field in source.contents.get(name, []):
+            if not field.value:
+                continue
+            key = key_fn(field.value)
+            if not key or key in existing:
+                continue
+            new_field = self.base.add(name)
+            new_field.value = field.value
+            if hasattr(field, 'type_param'):
+                new_field.type_param = field.type_param
+            existing.add(key)
+            self.added[name] += 1
+
+    def _absorb_missing(self, source, name):
+        field = _first(source, name)
+        if field is None or not field.value:
+            return
+        current = _first(self.base, name)
+        if current is None:
+            current = self.base.add(name)
+        elif current.value:
+            return
+        current.value = field.value
+        self.added[name] += 1
+
+    def _absorb_name(self, source):
+        field = _first(source, 'n')
+        if field is None or not field.value:
+            return
+        current = _first(self.base, 'n')
+        if current is None or not current.value:
+            if current is None:
+                current = self.base.add('n')
+            current.value = field.value
+            return
+        for part in ('given', 'family', 'additional'):
+            if not getattr(current.value, part) and getattr(field.value, part):
+                setattr(current.value, part, getattr(field.value, part))
+
+    def _absorb_note(self, source):
+        field = _first(source, 'note')
+        if field is None or not field.value:
+            return
+        note = field.value.strip()
+        if not note:
+            return
+        current = _first(self.base, 'note')
+        if current is not None and current.value:
+            if note in current.value:
+                return
+            current.value += f"\n{note}"
+        else:
+            if current is None:
+                current = self.base.add('note')
+            current.value = note
+        self.added['note'] += 1
+
+    def _absorb_photo(self, source):
+        field = _first(source, 'photo')
+        if field is None or 'photo' in self.base.contents:
+            return
+        photo = self.base.add('photo')
+        photo.value = field.value
+        for param in ('encoding_param', 'type_param'):
+            if hasattr(field, param):
+                setattr(photo, param, getattr(field, param))
+        self.added['photo'] += 1
+
+
+def _first(vcard, name) -> Optional[vobject.base.ContentLine]:
+    fields = vcard.contents.get(name)
+    return fields[0] if fields else None
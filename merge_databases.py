@@ -19,7 +19,9 @@ from collections import defaultdict
 import vobject
 from vcard_validator import VCardStandardsValidator
 from vcard_soft_compliance import SoftComplianceChecker
-import phonenumbers
+from vcard_stream import VCardRecordReader, iter_vcard_records, strip_properties
+from merge_accumulator import MergeAccumulator
+import contact_normalization
 import re
 
 class VCardMerger:
@@ -36,20 +38,12 @@ class VCardMerger:
         }
     
     def normalize_phone(self, phone_str):
-        """Normalize phone number for comparison"""
-        try:
-            # Try to parse the phone number
-            parsed = phonenumbers.parse(phone_str, 'US')
-            if phonenumbers.is_valid_number(parsed):
-                return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
-        except:
-            pass
-        # Fallback: just keep digits
-        return re.sub(r'\D', '', phone_str)
+        """Normalize phone number for comparison (E.164 or digits)"""
+        return contact_normalization.normalize_phone(phone_str)
     
     def normalize_email(self, email):
-        """Normalize email for comparison"""
-        return email.lower().strip()
+        """Normalize email for comparison (Gmail dots/tags removed)"""
+        return contact_normalization.normalize_email(email)
     
     def get_contact_key(self, vcard):
         """Generate a key for identifying potential duplicates"""
@@ -77,97 +71,16 @@ class VCardMerger:
         
         return keys
     
+    def merge_accumulator(self, primary):
+        """Accumulator that merges any number of duplicates into primary"""
+        return MergeAccumulator(primary, properties=('email', 'tel', 'url'), fill_missing=('org',))
+    
     def merge_vcards(self, primary, secondary):
         """Merge two vCards, keeping primary as base and adding unique data from secondary"""
-        
-        # Merge emails (avoid duplicates)
-        if hasattr(secondary, 'email_list'):
-            existing_emails = set()
-            if hasattr(primary, 'email_list'):
-                existing_emails = {self.normalize_email(e.value) for e in primary.email_list}
-            
-            for email in secondary.email_list:
-                normalized = self.normalize_email(email.value)
-                if normalized not in existing_emails:
-                    new_email = primary.add('email')
-                    new_email.value = email.value
-                    if hasattr(email, 'type_param'):
-                        new_email.type_param = email.type_param
-                    existing_emails.add(normalized)
-        
-        # Merge phones (avoid duplicates)
-        if hasattr(secondary, 'tel_list'):
-            existing_phones = set()
-            if hasattr(primary, 'tel_list'):
-                existing_phones = {self.normalize_phone(t.value) for t in primary.tel_list}
-            
-            for tel in secondary.tel_list:
-                normalized = self.normalize_phone(tel.value)
-                if normalized not in existing_phones:
-                    new_tel = primary.add('tel')
-                    new_tel.value = tel.value
-                    if hasattr(tel, 'type_param'):
-                        new_tel.type_param = tel.type_param
-                    existing_phones.add(normalized)
-        
-        # Merge organizations
-        if hasattr(secondary, 'org') and not hasattr(primary, 'org'):
-            primary.add('org')
-            primary.org.value = secondary.org.value
-        
-        # Merge URLs
-        if hasattr(secondary, 'url_list'):
-            existing_urls = set()
-            if hasattr(primary, 'url_list'):
-                existing_urls = {u.value.lower() for u in primary.url_list}
-            
-            for url in secondary.url_list:
-                if url.value.lower() not in existing_urls:
-                    new_url = primary.add('url')
-                    new_url.value = url.value
-                    existing_urls.add(url.value.lower())
-        
-        # Merge notes (append if different)
-        if hasattr(secondary, 'note'):
-            secondary_note = secondary.note.value.strip()
-            if secondary_note:
-                if hasattr(primary, 'note'):
-                    if secondary_note not in primary.note.value:
-                        primary.note.value += f"\n{secondary_note}"
-                else:
-                    primary.add('note')
-                    primary.note.value = secondary_note
-        
-        return primary
+        return self.merge_accumulator(primary).absorb(secondary).result()
     
-    def merge_databases(self, main_db_path, additional_db_paths, output_path):
-        """Merge multiple vCard databases into one"""
-        
-        print("vCard Database Merger")
-        print("=" * 80)
-        
-        # Step 1: Create backup
-        backup_dir = f"backup/merge_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        os.makedirs(backup_dir, exist_ok=True)
-        
-        all_paths = [main_db_path] + additional_db_paths
-        for path in all_paths:
-            if os.path.exists(path):
-                backup_name = os.path.basename(path)
-                shutil.copy2(path, os.path.join(backup_dir, backup_name))
-                print(f"✓ Backed up: {backup_name}")
-        
-        # Step 2: Validate all input files
-        print("\n1. Validating input files...")
-        for path in all_paths:
-            is_valid, errors, warnings = self.validator.validate_file(path)
-            basename = os.path.basename(path)
-            if is_valid:
-                print(f"  ✓ {basename}: Valid")
-            else:
-                print(f"  ⚠️  {basename}: {len(errors)} errors (will proceed anyway)")
-        
-        # Step 3: Load all vCards
+    def merge_in_memory(self, main_db_path, additional_db_paths, output_path):
+        """Load every source, merge and write; returns the merged contact count"""
         print("\n2. Loading vCards...")
         contact_map = defaultdict(list)  # key -> list of vcards
         all_vcards = []
@@ -197,10 +110,11 @@ class VCardMerger:
             for vcard in vcards:
                 all_vcards.append(('additional', vcard))
         
-        # Step 4: Merge contacts
+        # Merge contacts
         print("\n3. Merging contacts...")
         merged_vcards = []
         processed_vcards = set()  # Track which vCards we've already processed
+        accumulators = {}  # id(vcard) -> MergeAccumulator, built on first merge
         
         # First, add all main database contacts
         for source, vcard in all_vcards:
@@ -221,7 +135,10 @@ class VCardMerger:
                         for existing_vcard in contact_map[key_value]:
                             if id(existing_vcard) in processed_vcards:
                                 # Merge into existing contact
-                                self.merge_vcards(existing_vcard, vcard)
+                                accumulator = accumulators.get(id(existing_vcard))
+                                if accumulator is None:
+                                    accumulator = accumulators[id(existing_vcard)] = self.merge_accumulator(existing_vcard)
+                                accumulator.absorb(vcard)
                                 self.merge_stats['duplicates_found'] += 1
                                 self.merge_stats['contacts_merged'] += 1
                                 merged = True
@@ -237,15 +154,106 @@ class VCardMerger:
                     for key_type, key_value in keys:
                         contact_map[key_value].append(vcard)
         
-        self.merge_stats['final_contact_count'] = len(merged_vcards)
-        
-        # Step 5: Write merged file
+        # Write merged file
         print(f"\n4. Writing merged file...")
-        temp_output = output_path.replace('.vcf', '_temp.vcf')
-        with open(temp_output, 'w', encoding='utf-8') as f:
+        with open(output_path, 'w', encoding='utf-8') as f:
             for vcard in merged_vcards:
                 f.write(vcard.serialize())
         
+        return len(merged_vcards)
+    
+    def merge_streaming(self, main_db_path, additional_db_paths, output_path):
+        """
+        Two-pass merge with the same matching as merge_in_memory.
+        
+        Pass 1 streams every record once (photos stripped before parsing) and
+        keeps only its file offset and matching keys, assigning it to a
+        cluster: main contacts start clusters, additional contacts join the
+        cluster owning their first known key or start a new one.
+        Pass 2 re-reads each cluster's records by offset, merges them and
+        writes the result immediately. Returns the merged contact count.
+        """
+        print("\n2. Indexing vCards (pass 1)...")
+        refs = []          # record position -> RecordRef
+        clusters = []      # cluster -> record positions, base first
+        key_owner = {}     # matching key -> cluster that introduced it
+        
+        for db_index, db_path in enumerate([main_db_path] + additional_db_paths):
+            is_main = db_index == 0
+            count = 0
+            for ref, record in iter_vcard_records(db_path):
+                count += 1
+                vcard = vobject.readOne(strip_properties(record, ['PHOTO']))
+                keys = [key_value for _, key_value in self.get_contact_key(vcard)]
+                position = len(refs)
+                refs.append(ref)
+                
+                target = None if is_main else next((key_owner[k] for k in keys if k in key_owner), None)
+                if target is None:
+                    target = len(clusters)
+                    clusters.append([position])
+                    for key in keys:
+                        key_owner.setdefault(key, target)
+                else:
+                    clusters[target].append(position)
+                    self.merge_stats['duplicates_found'] += 1
+                    self.merge_stats['contacts_merged'] += 1
+            
+            print(f"  Indexed {count} contacts from {os.path.basename(db_path)}")
+            self.merge_stats['total_input_contacts'] += count
+        
+        del key_owner
+        
+        print("\n3. Merging and writing contacts (pass 2)...")
+        with VCardRecordReader() as reader, open(output_path, 'w', encoding='utf-8') as f:
+            for members in clusters:
+                accumulator = self.merge_accumulator(reader.load(refs[members[0]]))
+                for position in members[1:]:
+                    accumulator.absorb(reader.load(refs[position]))
+                f.write(accumulator.result().serialize())
+        
+        return len(clusters)
+    
+    def merge_databases(self, main_db_path, additional_db_paths, output_path, streaming=False):
+        """
+        Merge multiple vCard databases into one.
+        
+        streaming=True uses the two-pass merge (see merge_streaming), which
+        keeps only a key index in memory instead of every parsed vCard.
+        """
+        
+        print("vCard Database Merger")
+        print("=" * 80)
+        
+        # Step 1: Create backup
+        backup_dir = f"backup/merge_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        os.makedirs(backup_dir, exist_ok=True)
+        
+        all_paths = [main_db_path] + additional_db_paths
+        for path in all_paths:
+            if os.path.exists(path):
+                backup_name = os.path.basename(path)
+                shutil.copy2(path, os.path.join(backup_dir, backup_name))
+                print(f"✓ Backed up: {backup_name}")
+        
+        # Step 2: Validate all input files
+        print("\n1. Validating input files...")
+        for path in all_paths:
+            is_valid, errors, warnings = self.validator.validate_file(path)
+            basename = os.path.basename(path)
+            if is_valid:
+                print(f"  ✓ {basename}: Valid")
+            else:
+                print(f"  ⚠️  {basename}: {len(errors)} errors (will proceed anyway)")
+        
+        # Steps 3-5: Load, merge and write the merged contacts
+        temp_output = output_path.replace('.vcf', '_temp.vcf')
+        if streaming:
+            merged_count = self.merge_streaming(main_db_path, additional_db_paths, temp_output)
+        else:
+            merged_count = self.merge_in_memory(main_db_path, additional_db_paths, temp_output)
+        self.merge_stats['final_contact_count'] = merged_count
+        
         # Step 6: Apply soft compliance
         print("\n5. Applying soft compliance fixes...")
         soft_output = output_path.replace('.vcf', '_soft.vcf')
@@ -292,6 +300,12 @@ class VCardMerger:
 
 def main():
     """Merge all validated databases"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Merge validated vCard databases")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Two-pass merge keeping only a key index in memory")
+    args = parser.parse_args()
     
     # Define paths
     sara_db = "data/Sara_Export_VALIDATED_20250606.vcf"
@@ -314,7 +328,8 @@ def main():
     stats = merger.merge_databases(
         main_db_path=sara_db,
         additional_db_paths=[iphone_contacts_db, iphone_suggested_db],
-        output_path=output_path
+        output_path=output_path,
+        streaming=args.streaming
     )
     
     # Save merge report
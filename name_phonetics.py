@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+"""
+Name Phonetics - Phonetic keys for German/Austrian contact names
+
+Exact name keys never bring "Meier", "Mayer" and "Maier" together. This
+module computes phonetic keys so duplicate detectors can block and score on
+how a name sounds:
+
+- Cologne phonetics (Kölner Phonetik): designed for German names
+- Double Metaphone: catches anglicised and international spellings
+
+Keys are computed once per contact and stored in a PhoneticIndex, which
+maps every key to the contacts carrying it and yields candidate pairs that
+share at least one key (blocking).
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Set, Tuple
+
+from contact_normalization import CACHE_SIZE, normalize_name
+
+# Particles that would put half the phonebook into one block
+NAME_PARTICLES = {
+    'von', 'van', 'de', 'der', 'den', 'del', 'della', 'di', 'da', 'du',
+    'la', 'le', 'zu', 'zum', 'zur', 'vom', 'ten', 'ter', 'y'
+}
+
+_NON_LETTER = re.compile(r'[^A-Z ]')
+
+
+def _prepare(word: str, keep_spaces: bool = False) -> str:
+    """Uppercase ASCII letters; ß becomes SS, Ç becomes S, accents dropped"""
+    word = word.upper().replace('ß', 'SS').replace('ẞ', 'SS').replace('Ç', 'S')
+    decomposed = unicodedata.normalize('NFKD', word)
+    word = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    word = _NON_LETTER.sub('', word)
+    return word if keep_spaces else word.replace(' ', '')
+
+
+# ---------------------------------------------------------------------------
+# Cologne phonetics
+# ---------------------------------------------------------------------------
+
+_COLOGNE_SIMPLE = {
+    'A': '0', 'E': '0', 'I': '0', 'J': '0', 'O': '0', 'U': '0', 'Y': '0',
+    'B': '1', 'F': '3', 'V': '3', 'W': '3',
+    'G': '4', 'K': '4', 'Q': '4',
+    'L': '5', 'M': '6', 'N': '6', 'R': '7', 'S': '8', 'Z': '8'
+}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def cologne_phonetic(word: str) -> str:
+    """Kölner Phonetik code for a single word (e.g. Meier/Mayer -> '67')"""
+    word = _prepare(word)
+    if not word:
+        return ''
+
+    codes = []
+    for i, char in enumerate(word):
+        prev = word[i - 1] if i > 0 else ''
+        nxt = word[i + 1] if i + 1 < len(word) else ''
+
+        if char == 'H':
+            code = ''
+        elif char == 'P':
+            code = '3' if nxt == 'H' else '1'
+        elif char in 'DT':
+            code = '8' if nxt in ('C', 'S', 'Z') else '2'
+        elif char == 'C':
+            if i == 0:
+                code = '4' if nxt and nxt in 'AHKLOQRUX' else '8'
+            elif prev in 'SZ':
+                code = '8'
+            else:
+                code = '4' if nxt and nxt in 'AHKOQUX' else '8'
+        elif char == 'X':
+            code = '8' if prev in ('C', 'K', 'Q') else '48'
+        else:
+            code = _COLOGNE_SIMPLE.get(char, '')
+        codes.append(code)
+
+    # Collapse repeated codes, then drop vowels except at the start
+    collapsed = []
+    for code in ''.join(codes):
+        if not collapsed or collapsed[-1] != code:
+            collapsed.append(code)
+    if not collapsed:
+        # Only silent letters (e.g. 'HH')
+        return ''
+    return collapsed[0] + ''.join(c for c in collapsed[1:] if c != '0')
+
+
+# ---------------------------------------------------------------------------
+# Double Metaphone (Lawrence Philips, 2000)
+# ---------------------------------------------------------------------------
+
+_DM_VOWELS = set('AEIOUY')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def double_metaphone(word: str, max_length: int = 4) -> Tuple[str, str]:
+    """Primary and alternate Double Metaphone codes for a single word"""
+    w = _prepare(word, keep_spaces=True).strip()
+    length = len(w)
+    if not length:
+        return '', ''
+    last = length - 1
+    primary: List[str] = []
+    secondary: List[str] = []
+
+    def at(i: int) -> str:
+        return w[i] if 0 <= i < length else ''
+
+    def string_at(start: int, size: int, *options: str) -> bool:
+        return start >= 0 and w[start:start + size] in options
+
+    def is_vowel(i: int) -> bool:
+        return at(i) in _DM_VOWELS
+
+    def add(main: str, alt: str = None):
+        primary.append(main)
+        secondary.append(main if alt is None else alt)
+
+    slavo_germanic = any(s in w for s in ('W', 'K', 'CZ', 'WITZ'))
+
+    current = 0
+    if string_at(0, 2, 'GN', 'KN', 'PN', 'WR', 'PS'):
+        current += 1
+    if at(0) == 'X':
+        add('S')
+        current += 1
+
+    while current < length and (len(''.join(primary)) < max_length or
+                                len(''.join(secondary)) < max_length):
+        c = at(current)
+
+        if c in _DM_VOWELS:
+            if current == 0:
+                add('A')
+            current += 1
+
+        elif c == 'B':
+            add('P')
+            current += 2 if at(current + 1) == 'B' else 1
+
+        elif c == 'C':
+            if (current > 1 and not is_vowel(current - 2) and string_at(current - 1, 3, 'ACH')
+                    and at(current + 2) != 'I'
+                    and (at(current + 2) != 'E' or string_at(current - 2, 6, 'BACHER', 'MACHER'))):
+                add('K')
+                current += 2
+            elif current == 0 and string_at(current, 6, 'CAESAR'):
+                add('S')
+                current += 2
+            elif string_at(current, 4, 'CHIA'):
+                add('K')
+                current += 2
+            elif string_at(current, 2, 'CH'):
+                if current > 0 and string_at(current, 4, 'CHAE'):
+                    add('K', 'X')
+                elif (current == 0
+                      and (string_at(current + 1, 5, 'HARAC', 'HARIS')
+                           or string_at(current + 1, 3, 'HOR', 'HYM', 'HIA', 'HEM'))
+                      and not string_at(0, 5, 'CHORE')):
+                    add('K')
+                elif (string_at(0, 4, 'VAN ', 'VON ') or string_at(0, 3, 'SCH')
+                      or string_at(current - 2, 6, 'ORCHES', 'ARCHIT', 'ORCHID')
+                      or string_at(current + 2, 1, 'T', 'S')
+                      or ((string_at(current - 1, 1, 'A', 'O', 'U', 'E') or current == 0)
+                          and string_at(current + 2, 1, 'L', 'R', 'N', 'M', 'B', 'H', 'F', 'V', 'W', ' '))):
+                    add('K')
+                elif current > 0:
+                    if string_at(0, 2, 'MC'):
+                        add('K')
+                    else:
+                        add('X', 'K')
+                else:
+                    add('X')
+                current += 2
+            elif string_at(current, 2, 'CZ') and not string_at(current - 2, 4, 'WICZ'):
+                add('S', 'X')
+                current += 2
+            elif string_at(current + 1, 3, 'CIA'):
+                add('X')
+                current += 3
+            elif string_at(current, 2, 'CC') and not (current == 1 and at(0) == 'M'):
+                if string_at(current + 2, 1, 'I', 'E', 'H') and not string_at(current + 2, 2, 'HU'):
+                    if (current == 1 and at(0) == 'A') or string_at(current - 1, 5, 'UCCEE', 'UCCES'):
+                        add('KS')
+                    else:
+                        add('X')
+                    current += 3
+                else:
+                    add('K')
+                    current += 2
+            elif string_at(current, 2, 'CK', 'CG', 'CQ'):
+                add('K')
+                current += 2
+            elif string_at(current, 2, 'CI', 'CE', 'CY'):
+                if string_at(current, 3, 'CIO', 'CIE', 'CIA'):
+                    add('S', 'X')
+                else:
+                    add('S')
+                current += 2
+            else:
+                add('K')
+                if string_at(current + 1, 2, ' C', ' Q', ' G'):
+                    current += 3
+                elif string_at(current + 1, 1, 'C', 'K', 'Q') and not string_at(current + 1, 2, 'CE', 'CI'):
+                    current += 2
+                else:
+                    current += 1
+
+        elif c == 'D':
+            if string_at(current, 2, 'DG'):
+                if string_at(current + 2, 1, 'I', 'E', 'Y'):
+                    add('J')
+                    current += 3
+                else:
+                    add('TK')
+                    current += 2
+            elif string_at(current, 2, 'DT', 'DD'):
+                add('T')
+                current += 2
+            else:
+                add('T')
+                current += 1
+
+        elif c == 'F':
+            add('F')
+            current += 2 if at(current + 1) == 'F' else 1
+
+        elif c == 'G':
+            if at(current + 1) == 'H':
+                if current > 0 and not is_vowel(current - 1):
+                    add('K')
+                    current += 2
+                    continue
+                if current == 0:
+                    add('J' if at(current + 2) == 'I' else 'K')
+                    current += 2
+                    continue
+                if ((current > 1 and string_at(current - 2, 1, 'B', 'H', 'D'))
+                        or (current > 2 and string_at(current - 3, 1, 'B', 'H', 'D'))
+                        or (current > 3 and string_at(current - 4, 1, 'B', 'H'))):
+                    current += 2
+                    continue
+                if current > 2 and at(current - 1) == 'U' and string_at(current - 3, 1, 'C', 'G', 'L', 'R', 'T'):
+                    add('F')
+                elif current > 0 and at(current - 1) != 'I':
+                    add('K')
+                current += 2
+            elif at(current + 1) == 'N':
+                if current == 1 and is_vowel(0) and not slavo_germanic:
+                    add('KN', 'N')
+                elif not string_at(current + 2, 2, 'EY') and at(current + 1) != 'Y' and not slavo_germanic:
+                    add('N', 'KN')
+                else:
+                    add('KN')
+                current += 2
+            elif string_at(current + 1, 2, 'LI') and not slavo_germanic:
+                add('KL', 'L')
+                current += 2
+            elif current == 0 and (at(current + 1) == 'Y' or string_at(
+                    current + 1, 2, 'ES', 'EP', 'EB', 'EL', 'EY', 'IB', 'IL', 'IN', 'IE', 'EI', 'ER')):
+                add('K', 'J')
+                current += 2
+            elif ((string_at(current + 1, 2, 'ER') or at(current + 1) == 'Y')
+                  and not string_at(0, 6, 'DANGER', 'RANGER', 'MANGER')
+                  and not string_at(current - 1, 1, 'E', 'I')
+                  and not string_at(current - 1, 3, 'RGY', 'OGY')):
+                add('K', 'J')
+                current += 2
+            elif string_at(current + 1, 1, 'E', 'I', 'Y') or string_at(current - 1, 4, 'AGGI', 'OGGI'):
+                if string_at(0, 4, 'VAN ', 'VON ') or string_at(0, 3, 'SCH') or string_at(current + 1, 2, 'ET'):
+                    add('K')
+                elif string_at(current + 1, 4, 'IER '):
+                    add('J')
+                else:
+                    add('J', 'K')
+                current += 2
+            else:
+                add('K')
+                current += 2 if at(current + 1) == 'G' else 1
+
+        elif c == 'H':
+            if (current == 0 or is_vowel(current - 1)) and is_vowel(current + 1):
+                add('H')
+                current += 2
+            else:
+                current += 1
+
+        elif c == 'J':
+            if string_at(current, 4, 'JOSE') or string_at(0, 4, 'SAN '):
+                if (current == 0 and at(current + 4) == ' ') or string_at(0, 4, 'SAN '):
+                    add('H')
+                else:
+                    add('J', 'H')
+                current += 1
+                continue
+            if current == 0:
+                add('J', 'A')
+            elif is_vowel(current - 1) and not slavo_germanic and at(current + 1) in ('A', 'O'):
+                add('J', 'H')
+            elif current == last:
+                add('J', '')
+            elif (not string_at(current + 1, 1, 'L', 'T', 'K', 'S', 'N', 'M', 'B', 'Z')
+                  and not string_at(current - 1, 1, 'S', 'K', 'L')):
+                add('J')
+            current += 2 if at(current + 1) == 'J' else 1
+
+        elif c == 'K':
+            add('K')
+            current += 2 if at(current + 1) == 'K' else 1
+
+        elif c == 'L':
+            if at(current + 1) == 'L':
+                if ((current == length - 3 and string_at(current - 1, 4, 'ILLO', 'ILLA', 'ALLE'))
+                        or ((string_at(last - 1, 2, 'AS', 'OS') or string_at(last, 1, 'A', 'O'))
+                            and string_at(current - 1, 4, 'ALLE'))):
+                    add('L', '')
+                else:
+                    add('L')
+                current += 2
+            else:
+                add('L')
+                current += 1
+
+        elif c == 'M':
+            add('M')
+            if ((string_at(current - 1, 3, 'UMB') and (current + 1 == last or string_at(current + 2, 2, 'ER')))
+                    or at(current + 1) == 'M'):
+                current += 2
+            else:
+                current += 1
+
+        elif c == 'N':
+            add('N')
+            current += 2 if at(current + 1) == 'N' else 1
+
+        elif c == 'P':
+            if at(current + 1) == 'H':
+                add('F')
+                current += 2
+            else:
+                add('P')
+                current += 2 if string_at(current + 1, 1, 'P', 'B') else 1
+
+        elif c == 'Q':
+            add('K')
+            current += 2 if at(current + 1) == 'Q' else 1
+
+        elif c == 'R':
+            if (current == last and not slavo_germanic and string_at(current - 2, 2, 'IE')
+                    and not string_at(current - 4, 2, 'ME', 'MA')):
+                add('', 'R')
+            else:
+                add('R')
+            current += 2 if at(current + 1) == 'R' else 1
+
+        elif c == 'S':
+            if string_at(current - 1, 3, 'ISL', 'YSL'):
+                current += 1
+            elif current == 0 and string_at(current, 5, 'SUGAR'):
+                add('X', 'S')
+                current += 1
+            elif string_at(current, 2, 'SH'):
+                if string_at(current + 1, 4, 'HEIM', 'HOEK', 'HOLM', 'HOLZ'):
+                    add('S')
+                else:
+                    add('X')
+                current += 2
+            elif string_at(current, 3, 'SIO', 'SIA') or string_at(current, 4, 'SIAN'):
+                if not slavo_germanic:
+                    add('S', 'X')
+                else:
+                    add('S')
+                current += 3
+            elif (current == 0 and string_at(current + 1, 1, 'M', 'N', 'L', 'W')) or string_at(current + 1, 1, 'Z'):
+                add('S', 'X')
+                current += 2 if string_at(current + 1, 1, 'Z') else 1
+            elif string_at(current, 2, 'SC'):
+                if at(current + 2) == 'H':
+                    if string_at(current + 3, 2, 'OO', 'ER', 'EN', 'UY', 'ED', 'EM'):
+                        if string_at(current + 3, 2, 'ER', 'EN'):
+                            add('X', 'SK')
+                        else:
+                            add('SK')
+                    elif current == 0 and not is_vowel(3) and at(3) != 'W':
+                        add('X', 'S')
+                    else:
+                        add('X')
+                elif string_at(current + 2, 1, 'I', 'E', 'Y'):
+                    add('S')
+                else:
+                    add('SK')
+                current += 3
+            else:
+                if current == last and string_at(current - 2, 2, 'AI', 'OI'):
+                    add('', 'S')
+                else:
+                    add('S')
+                current += 2 if string_at(current + 1, 1, 'S', 'Z') else 1
+
+        elif c == 'T':
+            if string_at(current, 4, 'TION'):
+                add('X')
+                current += 3
+            elif string_at(current, 3, 'TIA', 'TCH'):
+                add('X')
+                current += 3
+            elif string_at(current, 2, 'TH') or string_at(current, 3, 'TTH'):
+                if (string_at(current + 2, 2, 'OM', 'AM') or string_at(0, 4, 'VAN ', 'VON ')
+                        or string_at(0, 3, 'SCH')):
+                    add('T')
+                else:
+                    add('0', 'T')
+                current += 2
+            else:
+                add('T')
+                current += 2 if string_at(current + 1, 1, 'T', 'D') else 1
+
+        elif c == 'V':
+            add('F')
+            current += 2 if at(current + 1) == 'V' else 1
+
+        elif c == 'W':
+            if string_at(current, 2, 'WR'):
+                add('R')
+                current += 2
+                continue
+            if current == 0 and (is_vowel(current + 1) or string_at(current, 2, 'WH')):
+                if is_vowel(current + 1):
+                    add('A', 'F')
+                else:
+                    add('A')
+            if ((current == last and is_vowel(current - 1))
+                    or string_at(current - 1, 5, 'EWSKI', 'EWSKY', 'OWSKI', 'OWSKY')
+                    or string_at(0, 3, 'SCH')):
+                add('', 'F')
+                current += 1
+            elif string_at(current, 4, 'WICZ', 'WITZ'):
+                add('TS', 'FX')
+                current += 4
+            else:
+                current += 1
+
+        elif c == 'X':
+            if not (current == last and (string_at(current - 3, 3, 'IAU', 'EAU')
+                                         or string_at(current - 2, 2, 'AU', 'OU'))):
+                add('KS')
+            current += 2 if string_at(current + 1, 1, 'C', 'X') else 1
+
+        elif c == 'Z':
+            if at(current + 1) == 'H':
+                add('J')
+                current += 2
+                continue
+            if string_at(current + 1, 2, 'ZO', 'ZI', 'ZA') or (slavo_germanic and current > 0 and at(current - 1) != 'T'):
+                add('S', 'TS')
+            else:
+                add('S')
+            current += 2 if at(current + 1) == 'Z' else 1
+
+        else:
+            current += 1
+
+    return ''.join(primary)[:max_length], ''.join(secondary)[:max_length]
+
+
+# ---------------------------------------------------------------------------
+# Name level keys
+# ---------------------------------------------------------------------------
+
+def name_tokens(name: str) -> List[str]:
+    """Normalized name tokens without titles and nobility particles"""
+    return [t for t in normalize_name(name).split() if t not in NAME_PARTICLES and len(t) > 1]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def token_keys(token: str) -> Tuple[str, ...]:
+    """Blocking keys for one token: Cologne code plus both metaphone codes"""
+    keys = []
+    cologne = cologne_phonetic(token)
+    if cologne:
+        keys.append('CP:' + cologne)
+    for code in double_metaphone(token):
+        if code and 'DM:' + code not in keys:
+            keys.append('DM:' + code)
+    return tuple(keys)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def name_phonetic_keys(name: str) -> FrozenSet[str]:
+    """All phonetic blocking keys of a name (one set per contact)"""
+    keys: Set[str] = set()
+    for token in name_tokens(name):
+        keys.update(token_keys(token))
+    return frozenset(keys)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def name_phonetic_signature(name: str) -> Tuple[str, ...]:
+    """
+    Order-insensitive Cologne signature of the whole name.
+
+    Two names with equal non-empty signatures sound the same token by token,
+    e.g. "Hans Meier" and "Mayer Hans".
+    """
+    return tuple(sorted(code for code in map(cologne_phonetic, name_tokens(name)) if code))
+
+
+def phonetic_name_match(signature1: Tuple[str, ...], signature2: Tuple[str, ...]) -> bool:
+    """True if two precomputed signatures identify the same sounding name"""
+    return bool(signature1) and signature1 == signature2
+
+
+class PhoneticIndex:
+    """
+    Inverted index from phonetic keys to contact ids.
+
+    Keys are computed once per contact (add()); candidates() and
+    candidate_pairs() only return contacts sharing at least one key.
+    Blocks larger than max_block_size (very common names) are skipped
+    for pair generation to keep the candidate set bounded.
+    """
+
+    def __init__(self, max_block_size: int = None):
+        self.max_block_size = max_block_size
+        self.blocks: Dict[str, List[Hashable]] = defaultdict(list)
+        self.keys_by_contact: Dict[Hashable, FrozenSet[str]] = {}
+
+    def add(self, contact_id: Hashable, name: str = None, keys: Iterable[str] = None) -> FrozenSet[str]:
+        """Register a contact by name (or precomputed keys)"""
+        contact_keys = frozenset(keys) if keys is not None else name_phonetic_keys(name or '')
+        self.keys_by_contact[contact_id] = contact_keys
+        for key in contact_keys:
+            self.blocks[key].append(contact_id)
+        return contact_keys
+
+    def _usable(self, block: List[Hashable]) -> bool:
+        return self.max_block_size is None or len(block) <= self.max_block_size
+
+    def candidates(self, contact_id: Hashable) -> Set[Hashable]:
+        """Other contacts sharing at least one phonetic key"""
+        found: Set[Hashable] = set()
+        for key in self.keys_by_contact.get(contact_id, ()):
+            block = self.blocks[key]
+            if self._usable(block):
+                found.update(block)
+        found.discard(contact_id)
+        return found
+
+    def candidate_pairs(self) -> Set[Tuple[Hashable, Hashable]]:
+        """All distinct (a, b) pairs sharing a block, ordered a < b"""
+        pairs: Set[Tuple[Hashable, Hashable]] = set()
+        for block in self.blocks.values():
+            if len(block) < 2 or not self._usable(block):
+                continue
+            ordered = sorted(set(block))
+            for i, first in enumerate(ordered):
+                for second in ordered[i + 1:]:
+                    pairs.add((first, second))
+        return pairs
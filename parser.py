@@ -8,6 +8,9 @@ RULE: Always use vcard library for validation, vobject for manipulation
 
 The parser now includes validation reports to ensure data integrity
 throughout the processing pipeline.
+
+VCardParser(filepath, tokenizer=True) reads the cards with the lightweight
+vcard_tokenizer instead of vobject (read-only, values decoded on access).
 """
 
 import vobject  # For manipulation ONLY
@@ -17,6 +20,7 @@ from typing import List, Dict, Any, Tuple
 import re
 import logging
 from vcard_validator import VCardStandardsValidator  # For validation ONLY
+from vcard_tokenizer import iter_cards
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,8 +37,9 @@ class VCardParser:
     This ensures all parsed data meets standards before processing.
     """
     
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: str, tokenizer: bool = False):
         self.filepath = filepath
+        self.tokenizer = tokenizer
         self.contacts = []
         self.validator = VCardStandardsValidator(strict=False)  # Allow some real-world issues
         self.validation_report = None
@@ -68,13 +73,19 @@ class VCardParser:
             raise ValueError(f"vCard file has {len(errors)} validation errors. Please fix before parsing.")
         
         # STEP 2: Parse with vobject for manipulation
-        logger.info("Step 2: Parsing with vobject for manipulation...")
-        
-        with open(self.filepath, 'r', encoding='utf-8') as f:
-            vcard_data = f.read()
+        if self.tokenizer:
+            logger.info("Step 2: Reading with vcard_tokenizer...")
+            vcards = iter_cards(self.filepath)
+        else:
+            logger.info("Step 2: Parsing with vobject for manipulation...")
             
-        # Parse all vCards in the file using vobject (manipulation only)
-        for vcard in vobject.readComponents(vcard_data):
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                vcard_data = f.read()
+            
+            # Parse all vCards in the file using vobject (manipulation only)
+            vcards = vobject.readComponents(vcard_data)
+        
+        for vcard in vcards:
             try:
                 contact = self._parse_single_vcard(vcard)
                 self.contacts.append(contact)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Photo Hashing - Perceptual fingerprints for contact photos
+
+The same portrait often exists in several sources: re-encoded by iCloud,
+resized by the iPhone, or byte-identical. This module gives each photo a
+fingerprint with
+
+- digest: SHA-256 of the photo bytes (exact identity, cache key)
+- ahash:  64-bit average hash (8x8 grayscale, above/below mean)
+- dhash:  64-bit difference hash (9x8 grayscale, horizontal gradient)
+- the decoded width, height and format (so quality scoring needs no decode)
+
+Fingerprints are cached by digest, so every distinct image is decoded once
+per process no matter how many contacts or merge groups it appears in.
+Two photos are considered the same picture when both hashes are within a
+small Hamming distance (re-compression and resizing flip only a few bits).
+"""
+
+import base64
+import hashlib
+import io
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8
+MAX_HAMMING_DISTANCE = 6
+CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class PhotoFingerprint:
+    """Identity and perceptual hashes of one photo"""
+    digest: str
+    ahash: int
+    dhash: int
+    width: int
+    height: int
+    format: Optional[str]
+    size: int
+
+
+def photo_bytes(photo_data: Union[str, bytes]) -> bytes:
+    """Raw image bytes from a vCard PHOTO value (bytes or base64 text)"""
+    if isinstance(photo_data, str):
+        return base64.b64decode(photo_data)
+    return photo_data
+
+
+def photo_digest(data: bytes) -> str:
+    """SHA-256 hex digest of the photo bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    """Pack a boolean array into an integer (row-major, first bit highest)"""
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def average_hash(img: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """aHash: pixels brighter than the mean of a hash_size x hash_size thumbnail"""
+    pixels = np.asarray(img.convert('L').resize((hash_size, hash_size), Image.LANCZOS), dtype=np.float32)
+    return _bits_to_int(pixels > pixels.mean())
+
+
+def difference_hash(img: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """dHash: whether each pixel is brighter than its right neighbour"""
+    pixels = np.asarray(img.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS), dtype=np.float32)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def hamming_distance(hash1: int, hash2: int) -> int:
+    """Number of differing bits"""
+    return bin(hash1 ^ hash2).count('1')
+
+
+def photos_match(fp1: PhotoFingerprint, fp2: PhotoFingerprint,
+                 max_distance: int = MAX_HAMMING_DISTANCE) -> bool:
+    """True if both fingerprints describe the same picture"""
+    if fp1.digest == fp2.digest:
+        return True
+    return (hamming_distance(fp1.ahash, fp2.ahash) <= max_distance
+            and hamming_distance(fp1.dhash, fp2.dhash) <= max_distance)
+
+
+class PhotoHashCache:
+    """
+    Fingerprints keyed by photo byte digest (LRU, max_entries).
+
+    Undecodable photos are cached as None so they are not retried.
+    """
+
+    def __init__(self, max_entries: int = CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Optional[PhotoFingerprint]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, photo_data: Union[str, bytes]) -> Optional[PhotoFingerprint]:
+        """Fingerprint of a photo, decoding it only on the first sighting"""
+        try:
+            data = photo_bytes(photo_data)
+        except (ValueError, TypeError):
+            return None
+        digest = photo_digest(data)
+
+        if digest in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(digest)
+            return self._entries[digest]
+
+        self.misses += 1
+        try:
+            img = Image.open(io.BytesIO(data))
+            img.load()
+            fingerprint = PhotoFingerprint(
+                digest=digest,
+                ahash=average_hash(img),
+                dhash=difference_hash(img),
+                width=img.width,
+                height=img.height,
+                format=img.format,
+                size=len(data)
+            )
+        except Exception:
+            fingerprint = None
+
+        self._entries[digest] = fingerprint
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return fingerprint
+
+    def info(self) -> Dict[str, int]:
+        """Cache statistics"""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def clear(self):
+        """Drop all cached fingerprints"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared by all callers in the process
+default_cache = PhotoHashCache()
+
+
+def photo_fingerprint(photo_data: Union[str, bytes]) -> Optional[PhotoFingerprint]:
+    """Fingerprint via the shared cache (None if the photo cannot be decoded)"""
+    return default_cache.fingerprint(photo_data)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Photo Probe - Dimensions and format of a photo without decoding it
+
+Scoring photos only needs width, height, format and byte size, not the
+pixels. probe_photo() reads them from the file header:
+
+- PNG:  IHDR chunk (first 24 bytes)
+- GIF:  logical screen descriptor (first 10 bytes)
+- WEBP: VP8 / VP8L / VP8X chunk header (first 30 bytes)
+- BMP:  BITMAPINFOHEADER (first 26 bytes)
+- JPEG: walks the marker segments to the SOFn frame header, skipping
+        APPn segments (EXIF, ICC profiles) by their length
+
+Base64 text is decoded only around the bytes that are read (every 3
+bytes are 4 characters, so any offset can be decoded on its own); the
+byte size follows from the text length. A JPEG with a 60 KB EXIF block
+costs a few dozen decoded characters instead of a full decode. Anything
+the header parsers do not recognize falls back to Pillow, which also
+only parses the header.
+"""
+
+import base64
+import binascii
+import io
+import struct
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from PIL import Image
+
+# SOFn markers that carry the frame size (C4 = DHT, C8 = JPG, CC = DAC are not frames)
+JPEG_FRAME_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+@dataclass(frozen=True)
+class PhotoInfo:
+    """Header facts about one photo"""
+    format: str
+    width: int
+    height: int
+    size: int
+
+
+class _PhotoSource:
+    """Random access to photo bytes, decoding base64 only where it is read"""
+
+    def __init__(self, photo_data: Union[str, bytes]):
+        if isinstance(photo_data, str):
+            text = photo_data.strip()
+            if any(c in text for c in ' \t\r\n'):
+                text = ''.join(text.split())
+            self.text = text
+            self.data = None
+            self.size = len(text) // 4 * 3 - (len(text) - len(text.rstrip('=')))
+        else:
+            self.text = None
+            self.data = photo_data
+            self.size = len(photo_data)
+
+    def read(self, offset: int, length: int) -> bytes:
+        if self.data is not None:
+            return self.data[offset:offset + length]
+        start = offset // 3 * 4
+        end = -(-(offset + length) // 3) * 4
+        chunk = base64.b64decode(self.text[start:end], validate=True)
+        return chunk[offset % 3:offset % 3 + length]
+
+    def all(self) -> bytes:
+        if self.data is None:
+            self.data = base64.b64decode(self.text)
+        return self.data
+
+
+def _probe_png(source: _PhotoSource) -> Optional[tuple]:
+    header = source.read(0, 24)
+    if len(header) == 24 and header[12:16] == b'IHDR':
+        return struct.unpack('>II', header[16:24])
+    return None
+
+
+def _probe_gif(source: _PhotoSource) -> Optional[tuple]:
+    header = source.read(0, 10)
+    return struct.unpack('<HH', header[6:10]) if len(header) == 10 else None
+
+
+def _probe_bmp(source: _PhotoSource) -> Optional[tuple]:
+    header = source.read(0, 26)
+    if len(header) < 26 or struct.unpack('<I', header[14:18])[0] < 40:
+        return None  # OS/2 headers: let Pillow handle them
+    width, height = struct.unpack('<ii', header[18:26])
+    return width, abs(height)
+
+
+def _probe_webp(source: _PhotoSource) -> Optional[tuple]:
+    header = source.read(0, 30)
+    if len(header) < 30:
+        return None
+    chunk = header[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L':
+        b0, b1, b2, b3 = header[21:25]
+        return 1 + (((b1 & 0x3F) << 8) | b0), 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+    if chunk == b'VP8X':
+        return 1 + int.from_bytes(header[24:27], 'little'), 1 + int.from_bytes(header[27:30], 'little')
+    return None
+
+
+def _probe_jpeg(source: _PhotoSource) -> Optional[tuple]:
+    offset = 2
+    while offset + 4 <= source.size:
+        segment = source.read(offset, 9)
+        if len(segment) < 4 or segment[0] != 0xFF:
+            return None
+        marker = segment[1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            offset += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Markers without a length
+            offset += 2
+            continue
+        if marker in JPEG_FRAME_MARKERS:
+            if len(segment) < 9:
+                return None
+            height, width = struct.unpack('>HH', segment[5:9])
+            return width, height
+        if marker in (0xD9, 0xDA):
+            # End of image or start of scan before any frame header
+            return None
+        offset += 2 + struct.unpack('>H', segment[2:4])[0]
+    return None
+
+
+# format -> (signature check on the first 12 bytes, header parser)
+_PARSERS: Dict[str, Tuple[Callable[[bytes], bool], Callable[[_PhotoSource], Optional[tuple]]]] = {
+    'JPEG': (lambda head: head[:3] == b'\xff\xd8\xff', _probe_jpeg),
+    'PNG': (lambda head: head[:8] == b'\x89PNG\r\n\x1a\n', _probe_png),
+    'GIF': (lambda head: head[:6] in (b'GIF87a', b'GIF89a'), _probe_gif),
+    'WEBP': (lambda head: head[:4] == b'RIFF' and head[8:12] == b'WEBP', _probe_webp),
+    'BMP': (lambda head: head[:2] == b'BM', _probe_bmp),
+}
+
+
+def _probe_pillow(source: _PhotoSource) -> Optional[PhotoInfo]:
+    """Fallback: Image.open() parses the header but does not decode pixels"""
+    try:
+        data = source.all()
+        with Image.open(io.BytesIO(data)) as img:
+            return PhotoInfo(img.format, img.width, img.height, len(data))
+    except Exception:
+        return None
+
+
+def probe_photo(photo_data: Union[str, bytes]) -> Optional[PhotoInfo]:
+    """
+    Format, dimensions and byte size of a photo (bytes or base64 text).
+
+    None if neither the header parsers nor Pillow recognize the photo. Only
+    the header is read, so a photo truncated after its header still probes.
+    """
+    if not photo_data:
+        return None
+    source = _PhotoSource(photo_data)
+    try:
+        head = source.read(0, 12)
+        for fmt, (matches, parse) in _PARSERS.items():
+            if matches(head):
+                dimensions = parse(source)
+                if dimensions and dimensions[0] > 0 and dimensions[1] > 0:
+                    return PhotoInfo(fmt, dimensions[0], dimensions[1], source.size)
+                break
+    except (binascii.Error, ValueError, struct.error):
+        pass
+    return _probe_pillow(source)
@@ -3,12 +3,11 @@
 import vobject
 import json
 import os
-from PIL import Image
-from io import BytesIO
-import base64
+from photo_optimizer import fit_vcard_photos
 
 class VCardProcessor:
-    def __init__(self):
+    def __init__(self, workers=1):
+        self.workers = workers
         self.stats = {
             'total': 0,
             'processed': 0,
@@ -75,52 +74,14 @@ class VCardProcessor:
     
     def resize_photo_if_needed(self, vcard):
         """Resize photo if vCard exceeds size limit"""
-        try:
-            # Check if vCard is oversized
-            serialized = vcard.serialize()
-            if len(serialized.encode('utf-8')) <= 256 * 1024:
-                return  # Within limits
-            
-            # Check if has photo
-            if not hasattr(vcard, 'photo'):
-                return
-            
-            # Get photo data
-            photo_data = vcard.photo.value
-            if isinstance(photo_data, str):
-                # It's base64 encoded
-                photo_bytes = base64.b64decode(photo_data)
-            else:
-                photo_bytes = photo_data
-            
-            # Open image
-            img = Image.open(BytesIO(photo_bytes))
-            
-            # Calculate target size (aim for 200KB photo max)
-            quality = 85
-            max_dimension = 800
-            
-            # Resize if too large
-            if img.width > max_dimension or img.height > max_dimension:
-                img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
-            
-            # Save with compression
-            output = BytesIO()
-            img.save(output, format='JPEG', quality=quality, optimize=True)
-            
-            # Update vCard photo
-            vcard.photo.value = output.getvalue()
-            vcard.photo.encoding_param = 'b'
-            vcard.photo.type_param = 'JPEG'
-            
-            self.stats['photos_resized'] += 1
-            self.stats['oversized'] += 1
-            
-        except Exception as e:
-            # If photo processing fails, remove it
-            if hasattr(vcard, 'photo'):
-                del vcard.photo
+        self.resize_photos([vcard])
+    
+    def resize_photos(self, vcards):
+        """Resize the photos of all oversized vCards (removed if they cannot be made to fit)"""
+        for resized in fit_vcard_photos(vcards, workers=self.workers):
+            if resized is not None:
                 self.stats['oversized'] += 1
+                self.stats['photos_resized'] += int(resized)
     
     def apply_review_decision(self, vcard, decision):
         """Apply review decision to vCard"""
@@ -179,9 +140,6 @@ class VCardProcessor:
                 if hasattr(vcard, 'email') and vcard.email.value in decisions:
                     self.apply_review_decision(vcard, decisions[vcard.email.value])
                 
-                # Check and resize photo if needed
-                self.resize_photo_if_needed(vcard)
-                
                 # Add to output
                 output_vcards.append(vcard)
                 self.stats['processed'] += 1
@@ -192,6 +150,9 @@ class VCardProcessor:
                 # Still include the vCard even if there was an error
                 output_vcards.append(vcard)
         
+        # Check and resize photos if needed (together, in parallel)
+        self.resize_photos(output_vcards)
+        
         # Write output file
         with open(output_path, 'w', encoding='utf-8') as f:
             for vcard in output_vcards:
@@ -246,7 +207,7 @@ class VCardProcessor:
             print("\n⚠️  File has issues that need to be fixed")
 
 def main():
-    processor = VCardProcessor()
+    processor = VCardProcessor(workers=os.cpu_count() or 1)
     
     # Use the backup file as source
     input_file = "backup/Sara_Export_BACKUP_2025-06-05_22-40-40.vcf"
@@ -1,32 +1,25 @@
 #!/usr/bin/env python3
 """Split vCard file into smaller chunks for iCloud.com"""
-import re
+from vcard_chunker import chunk_vcards
 
 def split_for_icloud():
     """Split into smaller files for easier import"""
     print("Splitting vCard file for iCloud.com import...")
     
-    with open("data/Sara_Export_READY_FOR_ICLOUD.vcf", 'r', encoding='utf-8') as f:
-        content = f.read()
+    # Stream the vCards into files of at most 500 contacts and 4 MB
+    manifest = chunk_vcards("data/Sara_Export_READY_FOR_ICLOUD.vcf",
+                            "data/icloud_import_part{index:02d}.vcf",
+                            max_cards=500,
+                            manifest_path="data/icloud_import_manifest.json")
     
-    # Find all vCards
-    vcards = re.findall(r'BEGIN:VCARD.*?END:VCARD', content, re.DOTALL)
+    for chunk in manifest['chunks']:
+        print(f"  Created {chunk['file']} ({chunk['cards']} contacts, {chunk['bytes'] // 1024} KB)")
     
-    # Split into chunks of 500 contacts
-    chunk_size = 500
+    if manifest['oversized']:
+        print(f"\n⚠️  {len(manifest['oversized'])} contacts are over iCloud's 256KB limit "
+              f"and were moved to {manifest['oversized_file']}")
     
-    for i in range(0, len(vcards), chunk_size):
-        chunk = vcards[i:i+chunk_size]
-        chunk_num = (i // chunk_size) + 1
-        
-        filename = f"data/icloud_import_part{chunk_num:02d}.vcf"
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write('\n\n'.join(chunk))
-        
-        print(f"  Created {filename} ({len(chunk)} contacts)")
-    
-    total_files = (len(vcards) + chunk_size - 1) // chunk_size
-    print(f"\n✅ Split into {total_files} files")
+    print(f"\n✅ Split into {len(manifest['chunks'])} files")
     print("\nImport instructions:")
     print("1. Go to icloud.com → Contacts")
     print("2. Import each file one by one, starting with part01")
@@ -1,36 +1,28 @@
 #!/usr/bin/env python3
 """Split vCard file into smaller chunks for iCloud.com import"""
 
-import re
+import os
+from vcard_chunker import chunk_vcards
 
 def split_vcf_file(input_file, chunk_size=100):
     """Split vCard file into smaller chunks"""
     
     print(f"Splitting {input_file} into chunks of {chunk_size} contacts...")
     
-    with open(input_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+    # Cards are streamed; a chunk also ends before it would exceed 4 MB
+    stem = os.path.splitext(input_file)[0]
+    manifest = chunk_vcards(input_file, stem.replace('{', '{{').replace('}', '}}') + '_chunk{index:02d}.vcf',
+                            max_cards=chunk_size)
     
-    # Find all vCards
-    vcards = re.findall(r'BEGIN:VCARD.*?END:VCARD', content, re.DOTALL)
+    print(f"Found {manifest['total_cards']} contacts")
     
-    print(f"Found {len(vcards)} contacts")
+    for chunk in manifest['chunks']:
+        print(f"Created: {chunk['file']} ({chunk['cards']} contacts)")
     
-    # Create chunks
-    total_chunks = (len(vcards) + chunk_size - 1) // chunk_size
-    
-    for i in range(total_chunks):
-        start = i * chunk_size
-        end = min((i + 1) * chunk_size, len(vcards))
-        
-        chunk_filename = input_file.replace('.vcf', f'_chunk{i+1:02d}.vcf')
-        
-        with open(chunk_filename, 'w', encoding='utf-8') as f:
-            for vcard in vcards[start:end]:
-                f.write(vcard + '\n')
-        
-        print(f"Created: {chunk_filename} ({end - start} contacts)")
+    if manifest['oversized']:
+        print(f"\nSkipped {len(manifest['oversized'])} contacts over 256KB, see {manifest['oversized_file']}")
     
+    total_chunks = len(manifest['chunks'])
     print(f"\nCreated {total_chunks} files.")
     print("\nTo import to iCloud.com:")
     print("1. Go to icloud.com and sign in")
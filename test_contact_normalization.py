@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared contact normalization module
+
+Ensures every dedup/merge tool gets the same matching keys:
+- Phone numbers in Austrian, international and US formats
+- Gmail-style email canonicalization
+- Name folding (umlauts, diacritics, titles)
+- Memoization and batch API
+"""
+
+import unittest
+import contact_normalization as cn
+
+
+class TestPhoneNormalization(unittest.TestCase):
+    """Phone numbers collapse to one E.164 key regardless of formatting"""
+
+    def test_austrian_formats_match(self):
+        variants = ['0664 123 4567', '+43 664 1234567', '0043 664 123 45 67', '+43 (0)664 1234567']
+        keys = set(cn.normalize_phones(variants))
+        self.assertEqual(keys, {'+436641234567'})
+
+    def test_us_fallback(self):
+        self.assertEqual(cn.normalize_phone('(212) 555-1234'), '+12125551234')
+        self.assertEqual(cn.normalize_phone('+1 212 555 1234'), '+12125551234')
+
+    def test_invalid_number_falls_back_to_digits(self):
+        self.assertEqual(cn.normalize_phone('12-34'), '1234')
+        self.assertEqual(cn.normalize_phone(''), '')
+        self.assertIsNone(cn.phone_to_e164('not a number', 'US'))
+
+    def test_phone_key_set_drops_short_keys(self):
+        keys = cn.phone_key_set(['0664 1234567', '123'])
+        self.assertEqual(keys, {'+436641234567'})
+
+
+class TestEmailNormalization(unittest.TestCase):
+    """Emails are lowercased, Gmail dots and +tags removed"""
+
+    def test_gmail_canonicalization(self):
+        self.assertEqual(cn.normalize_email('John.Doe+news@GoogleMail.com'), 'johndoe@gmail.com')
+        self.assertEqual(cn.normalize_email(' j.o.h.n.doe@gmail.com '), 'johndoe@gmail.com')
+
+    def test_other_domains_keep_dots_and_tags(self):
+        self.assertEqual(cn.normalize_email('John.Doe+x@Example.COM'), 'john.doe+x@example.com')
+
+    def test_email_key_set(self):
+        keys = cn.email_key_set(['a.b@gmail.com', 'ab@gmail.com', ''])
+        self.assertEqual(keys, {'ab@gmail.com'})
+
+
+class TestNameNormalization(unittest.TestCase):
+    """Names fold umlauts and drop titles"""
+
+    def test_umlauts_and_eszett(self):
+        self.assertEqual(cn.normalize_name('Jürgen Meißner'), 'juergen meissner')
+        self.assertEqual(cn.normalize_name('Juergen Meissner'), 'juergen meissner')
+
+    def test_titles_removed(self):
+        self.assertEqual(cn.normalize_name('Dipl.-Ing. Dr. Anna Huber, MBA'), 'anna huber')
+        self.assertEqual(cn.normalize_name('Prof. Zoë Müller'), 'zoe mueller')
+
+    def test_particles_kept(self):
+        self.assertEqual(cn.normalize_name('Ursula von der Leyen'), 'ursula von der leyen')
+
+
+class TestCaching(unittest.TestCase):
+    """Repeated values are served from the LRU cache"""
+
+    def test_repeated_parse_is_cached(self):
+        cn.clear_caches()
+        cn.normalize_phones(['0664 7654321'] * 5)
+        hits, misses, _, _ = cn.cache_info()['normalize_phone']
+        self.assertEqual(misses, 1)
+        self.assertEqual(hits, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
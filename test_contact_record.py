@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the compact ContactRecord
+
+Ensures:
+- Timestamps pack to integers and read back as the identical ISO string
+- Contacts of one import share a single interned source descriptor
+- to_dict() gives the metadata.json shape of the old dataclasses
+- Records have no per-instance __dict__, compare by value and pickle
+"""
+
+import pickle
+import unittest
+from datetime import datetime
+
+from benchmark_record_memory import benchmark, synthetic_metadata
+from vcard_database import ContactRecord, SourceInfo, pack_timestamp, unpack_timestamp
+
+
+def make_record(index, session="import_test_20250101_093000"):
+    return ContactRecord(
+        contact_id=f"test_{index:06d}",
+        vcard_data="BEGIN:VCARD\nVERSION:3.0\nFN:Test\nEND:VCARD\n",
+        source_info=SourceInfo("test", "Imports/test.vcf", index, "2025-01-01T09:30:00.123456", session),
+        created_at="2025-01-01T09:30:00.123456",
+        updated_at="2025-01-02T10:00:00",
+        version=1,
+        is_active=True
+    )
+
+
+class TestTimestamps(unittest.TestCase):
+    """pack_timestamp / unpack_timestamp"""
+
+    def test_round_trip(self):
+        for value in ("2025-01-01T09:30:00.123456", "2025-01-01T09:30:00", datetime.now().isoformat()):
+            packed = pack_timestamp(value)
+            self.assertIsInstance(packed, int)
+            self.assertEqual(unpack_timestamp(packed), value)
+
+    def test_unusual_values_are_kept(self):
+        for value in ("2025-01-01T09:30:00+02:00", "2025-01-01T09:30:00.000000", "yesterday", None):
+            self.assertEqual(pack_timestamp(value), value)
+            self.assertEqual(unpack_timestamp(pack_timestamp(value)), value)
+
+
+class TestCompactRecord(unittest.TestCase):
+    """ContactRecord / SourceInfo"""
+
+    def test_shared_source(self):
+        first, second = make_record(0), make_record(1)
+        self.assertEqual(first.source_info.source_id, second.source_info.source_id)
+        self.assertIs(first.source_info.descriptor, second.source_info.descriptor)
+        self.assertNotEqual(make_record(2, session="other").source_info.source_id,
+                            first.source_info.source_id)
+        self.assertEqual(second.source_info.original_index, 1)
+
+    def test_dict_shape(self):
+        record = make_record(3)
+        self.assertEqual(record.to_dict(), {
+            'contact_id': 'test_000003',
+            'vcard_data': "BEGIN:VCARD\nVERSION:3.0\nFN:Test\nEND:VCARD\n",
+            'source_info': {
+                'database_name': 'test',
+                'source_file': 'Imports/test.vcf',
+                'original_index': 3,
+                'import_timestamp': '2025-01-01T09:30:00.123456',
+                'import_session_id': 'import_test_20250101_093000',
+            },
+            'created_at': '2025-01-01T09:30:00.123456',
+            'updated_at': '2025-01-02T10:00:00',
+            'version': 1,
+            'is_active': True,
+        })
+        self.assertNotIn('vcard_data', record.to_dict(vcard_data=False))
+
+    def test_slots_equality_and_pickle(self):
+        record = make_record(4)
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertEqual(record, make_record(4))
+        record.updated_at = "2025-02-01T08:00:00"
+        self.assertNotEqual(record, make_record(4))
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+
+    def test_benchmark(self):
+        result = benchmark(synthetic_metadata(200))
+        self.assertEqual(result['records'], 200)
+        self.assertEqual(result['mismatches'], 0)
+        self.assertLess(result['compact_bytes_per_record'], result['dataclass_bytes_per_record'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the export cache
+
+Ensures:
+- An export is rendered once per database sequence and then served from disk
+- A new sequence removes the artifacts of older ones, invalidate() all of them
+- Compressed artifacts are gzip of the plain export, with stable bytes
+- A render that fails leaves no partial file behind
+- The gzip and plain exports of the same state have different ETags
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# The cache lives in contactplus-core's database package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'contactplus-core'))
+
+from database.export_cache import ExportCache, export_etag
+
+CARDS = [f"BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Person {i}\r\nEND:VCARD\r\n" for i in range(50)]
+
+
+class TestExportCache(unittest.TestCase):
+    """ExportCache.get / invalidate"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = ExportCache(os.path.join(self.tmpdir, 'exports'))
+        self.renders = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def render(self):
+        self.renders += 1
+        return iter(CARDS)
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_rendered_once_per_sequence(self):
+        path = self.cache.get('op_1', None, True, self.render)
+        self.assertEqual(self.read(path), ''.join(CARDS).encode('utf-8'))
+        self.assertEqual(self.cache.get('op_1', None, True, self.render), path)
+        self.assertEqual(self.renders, 1)
+        # Profile and scope are separate artifacts
+        self.cache.get('op_1', 'icloud_web', True, self.render)
+        self.cache.get('op_1', None, False, self.render)
+        self.assertEqual(self.renders, 3)
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_new_sequence_invalidates(self):
+        old = self.cache.get('op_1', None, True, self.render)
+        self.cache.get('op_1', 'minimal', True, self.render, compressed=True)
+        new = self.cache.get('op_12', None, True, self.render)
+        self.assertFalse(os.path.exists(old))
+        self.assertEqual(os.listdir(self.cache.directory), [os.path.basename(new)])
+        self.assertEqual(self.renders, 3)
+
+        unrelated = os.path.join(self.cache.directory, 'notes.txt')
+        with open(unrelated, 'w') as f:
+            f.write('kept')
+        self.assertEqual(self.cache.invalidate(), 1)
+        self.assertEqual(os.listdir(self.cache.directory), ['notes.txt'])
+
+    def test_compressed(self):
+        path = self.cache.get('op_3', 'google', False, self.render, compressed=True)
+        self.assertTrue(path.endswith('.vcf.gz'))
+        plain = self.cache.path('op_3', 'google', False)
+        self.assertEqual(gzip.decompress(self.read(path)), self.read(plain))
+        self.assertEqual(self.cache.get('op_3', 'google', False, self.render), plain)
+        self.assertEqual(self.renders, 1)
+
+        first = self.read(path)
+        self.cache.invalidate()
+        self.assertEqual(self.read(self.cache.get('op_3', 'google', False, self.render, compressed=True)), first)
+
+    def test_failed_render(self):
+        def broken():
+            yield CARDS[0]
+            raise RuntimeError('database closed')
+
+        with self.assertRaises(RuntimeError):
+            self.cache.get('op_4', None, True, broken)
+        self.assertEqual(os.listdir(self.cache.directory), [])
+        self.assertEqual(self.read(self.cache.get('op_4', None, True, self.render)), ''.join(CARDS).encode('utf-8'))
+
+
+class TestExportEtag(unittest.TestCase):
+    """export_etag"""
+
+    def test_encoding_in_tag(self):
+        plain = export_etag('op_5', None, True)
+        self.assertEqual(plain, '"op_5-full-active"')
+        self.assertEqual(export_etag('op_5', None, True, compressed=True), '"op_5-full-active-gz"')
+        # A client holding one encoding must not revalidate the other
+        tags = {export_etag('op_5', profile, active_only, compressed)
+                for profile in (None, 'minimal') for active_only in (True, False) for compressed in (True, False)}
+        self.assertEqual(len(tags), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
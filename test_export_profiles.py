@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for export profiles
+
+Ensures:
+- The icloud_web profile strips groups, X- fields and extra properties,
+  names every card and fills empty N fields
+- Profiles can leave cards out; cards that fail are exported unchanged
+- Parallel export gives the same cards in the same order as a serial one
+- export_file streams a whole file and reports transform statistics
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+
+import vobject
+
+from export_profiles import PROFILES, export_card, export_file, get_profile, iter_export
+from photo_optimizer import ICLOUD_CARD_LIMIT
+from test_photo_optimizer import noise_photo
+
+APPLE_CARD = (
+    "BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Anna Berger\r\nN:;;;;\r\n"
+    "item1.EMAIL;type=INTERNET:anna@example.com\r\nitem1.X-ABLabel:_$!<Other>!$_\r\n"
+    "TEL;type=CELL:+43 664 1234567\r\nX-SOCIALPROFILE:twitter\r\nNICKNAME:Anni\r\n"
+    + "".join(f"URL:https://example.com/{i}\r\n" for i in range(5)) +
+    "END:VCARD\r\n"
+)
+NAMELESS_CARD = "BEGIN:VCARD\r\nVERSION:3.0\r\nORG:Tyrolit;\r\nTEL:+43 1 234\r\nEND:VCARD\r\n"
+
+
+def make_card(index):
+    return f"BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Person {index}\r\nN:{index};Person;;;\r\nX-ID:{index}\r\nEND:VCARD\r\n"
+
+
+class TestProfiles(unittest.TestCase):
+    """export_card"""
+
+    def test_icloud_web(self):
+        stats = Counter()
+        card = vobject.readOne(export_card(APPLE_CARD, 'icloud_web', stats))
+        self.assertEqual(card.prodid.value, '-//Apple Inc.//macOS 15.5//EN')
+        self.assertEqual((card.n.value.given, card.n.value.family), ('Anna', 'Berger'))
+        self.assertEqual(card.email.value, 'anna@example.com')
+        self.assertFalse(any(child.group for child in card.getChildren()))
+        self.assertFalse(any(child.name.startswith('X-') for child in card.getChildren()))
+        self.assertFalse(hasattr(card, 'nickname'))
+        self.assertEqual(len(card.contents['url']), 3)
+        self.assertEqual(stats['x_fields_removed'], 2)
+        self.assertEqual(stats['item_prefixes_removed'], 1)
+        self.assertEqual(stats['empty_n_fixed'], 1)
+
+    def test_fn_rules(self):
+        stats = Counter()
+        self.assertIn('FN:Tyrolit', export_card(NAMELESS_CARD, 'icloud', stats))
+        self.assertIsNone(export_card(NAMELESS_CARD, 'minimal', stats))
+        self.assertEqual((stats['missing_fn'], stats['missing_fn_dropped']), (1, 1))
+
+    def test_broken_card_is_kept(self):
+        broken = "BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Broken\r\nBDAY;VALUE=date:\x00\r\nthis is not a property\r\nEND:VCARD\r\n"
+        stats = Counter()
+        self.assertEqual(export_card(broken, 'google', stats), broken)
+        self.assertEqual(stats['errors'], 1)
+
+    def test_photo_is_fitted(self):
+        card = vobject.vCard()
+        card.add('fn').value = 'Large Photo'
+        card.add('photo').value = noise_photo()
+        card.photo.encoding_param = 'b'
+        stats = Counter()
+        exported = export_card(card.serialize(), 'icloud_web', stats)
+        self.assertLessEqual(len(exported.encode('utf-8')), ICLOUD_CARD_LIMIT)
+        self.assertEqual(stats['photos_resized'], 1)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            get_profile('outlook')
+        self.assertIs(get_profile(PROFILES['google']), PROFILES['google'])
+
+
+class TestStreamingExport(unittest.TestCase):
+    """iter_export / export_file"""
+
+    def test_parallel_matches_serial(self):
+        cards = [make_card(i) for i in range(250)] + [NAMELESS_CARD]
+        serial_stats, parallel_stats = Counter(), Counter()
+        serial = list(iter_export(iter(cards), 'minimal', stats=serial_stats))
+        parallel = list(iter_export(iter(cards), 'minimal', workers=2, chunk_size=16, stats=parallel_stats))
+        self.assertEqual(parallel, serial)
+        self.assertEqual(parallel_stats, serial_stats)
+        self.assertEqual((serial_stats['cards_in'], serial_stats['cards_out']), (251, 250))
+        self.assertIn('FN:Person 249', serial[-1])
+
+    def test_export_file(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            source = os.path.join(tmpdir, 'master.vcf')
+            with open(source, 'w', encoding='utf-8', newline='') as f:
+                f.write(APPLE_CARD + make_card(1) + NAMELESS_CARD)
+            output = os.path.join(tmpdir, 'web.vcf')
+            stats = export_file(source, output, 'icloud_web')
+            with open(output, encoding='utf-8') as f:
+                exported = list(vobject.readComponents(f.read()))
+            self.assertEqual([card.fn.value for card in exported], ['Anna Berger', 'Person 1', 'Tyrolit'])
+            self.assertEqual(stats['x_fields_removed'], 3)
+            self.assertEqual(stats['cards_out'], 3)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared match-rule engine
+
+Ensures every detector gets the same decisions:
+- Default rules classify typical duplicate pairs
+- The analyzer's fuzzy stage labels only name-based matches
+- Rules and thresholds come from UserPreferences
+- Expensive features only run when cheap conditions pass
+- Invalid rules fail at compile time
+- Compiled engines survive pickling (process pool workers)
+- The merger keeps its previous email/phone confidence scores
+"""
+
+import pickle
+import unittest
+from dataclasses import replace
+from difflib import SequenceMatcher
+from itertools import combinations
+
+import vobject
+
+import benchmark_dedup
+import match_rules as mr
+from analyze_duplicates import score_fuzzy_pair
+from intelligent_merge import IntelligentContactMerger
+from name_phonetics import phonetic_name_match
+from user_preferences import DEFAULT_PREFERENCES
+
+
+def baseline_confidence(name1, name2, match_type):
+    """IntelligentContactMerger.calculate_match_confidence before the match rules"""
+    similarity = SequenceMatcher(None, name1.lower().strip(), name2.lower().strip()).ratio() if name1 and name2 else 0
+    if match_type == 'email':
+        return 95 - 10 if similarity < 0.5 else 95
+    return 90 + 5 if similarity > 0.8 else 90
+
+
+def make_vcard(name, email=None, phone=None):
+    card = vobject.vCard()
+    card.add('fn').value = name
+    if email:
+        card.add('email').value = email
+    if phone:
+        card.add('tel').value = phone
+    return card
+
+
+class TestDefaultRules(unittest.TestCase):
+    """Default rule set"""
+
+    def setUp(self):
+        self.engine = mr.compile_match_rules()
+
+    def test_email_and_sound_alike_name_is_exact(self):
+        a = mr.match_profile('Anna Meier', ['A.Meier@gmail.com'])
+        b = mr.match_profile('Anna Mayer', ['ameier@googlemail.com'])
+        match = self.engine.score(a, b)
+        self.assertEqual(match.rule, 'email_and_name')
+        self.assertEqual(self.engine.action(match), 'auto_merge')
+
+    def test_reformatted_phone_matches(self):
+        a = mr.match_profile('Stefan Huber', phones=['0664 1234567'])
+        b = mr.match_profile('Stephan Huber', phones=['+43 664 123 45 67'])
+        self.assertEqual(self.engine.score(a, b).rule, 'phone_and_name')
+
+    def test_shared_email_with_different_names_needs_review(self):
+        a = mr.match_profile('Anna Meier', ['family@gmx.at'])
+        b = mr.match_profile('Thomas Gruber', ['family@gmx.at'])
+        match = self.engine.score(a, b)
+        self.assertEqual(match.rule, 'shared_email')
+        self.assertEqual(self.engine.action(match), 'review_merge')
+
+    def test_similar_name_with_common_domain(self):
+        a = mr.match_profile('Katharina Steiner', ['k.steiner@anyline.com'])
+        b = mr.match_profile('Katarina Steiner', ['office@anyline.com'])
+        self.assertEqual(self.engine.score(a, b).rule, 'name_and_common_data')
+
+    def test_identical_name_without_data_is_conflict(self):
+        match = self.engine.score(mr.match_profile('Christian Pichler'), mr.match_profile('Christian Pichler'))
+        self.assertEqual(match.match_type, 'conflict')
+        self.assertEqual(self.engine.action(match), 'manual_review')
+
+    def test_different_people(self):
+        self.assertIsNone(self.engine.score(mr.match_profile('Anna Meier', ['a@x.at']),
+                                            mr.match_profile('Thomas Gruber', ['t@y.at'])))
+
+
+class TestFuzzyLabels(unittest.TestCase):
+    """score_fuzzy_pair labels"""
+
+    def label(self, a, b):
+        return score_fuzzy_pair((0, a), (1, b))
+
+    def test_name_labels(self):
+        self.assertEqual(self.label(mr.match_profile('Katharina Steiner', ['k.steiner@anyline.com']),
+                                    mr.match_profile('Katarina Steiner', ['office@anyline.com'])), 'fuzzy')
+        self.assertEqual(self.label(mr.match_profile('Stefan Maier', ['s.maier@anyline.com']),
+                                    mr.match_profile('Stephan Meyer', ['office@anyline.com'])), 'phonetic')
+
+    def test_data_only_rules_not_labelled(self):
+        self.assertIsNone(self.label(mr.match_profile('Anna Meier', phones=['0664 1234567']),
+                                     mr.match_profile('Thomas Gruber', phones=['+43 664 1234567'])))
+
+
+class TestCompilation(unittest.TestCase):
+    """Preferences, short-circuiting and validation"""
+
+    def test_preferences_drive_thresholds(self):
+        prefs = replace(DEFAULT_PREFERENCES, auto_merge_confidence_threshold=0.99,
+                        match_thresholds={'identical_name': 0.5})
+        engine = mr.compile_match_rules(prefs)
+        match = engine.score(mr.match_profile('Anna Meier', ['a@x.at']), mr.match_profile('Anna Meier', ['a@x.at']))
+        self.assertEqual(engine.action(match), 'review_merge')
+        match = engine.score(mr.match_profile('Anna Meier'), mr.match_profile('Anna Maurer'))
+        self.assertEqual(match.rule, 'identical_name')
+
+    def test_custom_rules(self):
+        rules = [{'name': 'same_org_name', 'all': ['exact_name', 'common_data'],
+                  'match_type': 'exact', 'confidence': 0.97}]
+        engine = mr.compile_match_rules(replace(DEFAULT_PREFERENCES, match_rules=rules))
+        a = mr.match_profile('Eva Huber', org='Tyrolit')
+        self.assertEqual(engine.score(a, mr.match_profile('Eva Huber', org='Tyrolit AG')).rule, 'same_org_name')
+        self.assertIsNone(engine.score(a, mr.match_profile('Eva Huber')))
+
+    def test_expensive_features_skipped(self):
+        engine = mr.MatchRuleEngine(rules=[{
+            'name': 'r', 'all': ['name_similarity > 0.5', 'email_overlap'], 'match_type': 'exact', 'confidence': 1
+        }])
+        match = engine.score(mr.match_profile('Anna Meier', ['a@x.at']), mr.match_profile('Anna Meier', ['b@x.at']))
+        self.assertIsNone(match)
+        features = mr.PairFeatures(mr.match_profile('Anna Meier'), mr.match_profile('Bo Li'), engine.thresholds)
+        self.assertFalse(features.name_similarity_exceeds(0.9))
+        self.assertNotIn('name_similarity', features.values)
+
+    def test_invalid_rules_rejected(self):
+        for rule in ({'name': 'x', 'all': ['shoe_size'], 'match_type': 'exact', 'confidence': 1},
+                     {'name': 'x', 'all': ['name_similarity > tall'], 'match_type': 'exact', 'confidence': 1},
+                     {'name': 'x', 'all': ['email_overlap']}):
+            with self.assertRaises(ValueError):
+                mr.MatchRuleEngine(rules=[rule])
+
+    def test_engine_pickles(self):
+        engine = mr.MatchRuleEngine(thresholds={'fuzzy_name': 0.9}, auto_merge_threshold=0.9)
+        copy = pickle.loads(pickle.dumps(engine))
+        self.assertEqual(copy.thresholds['fuzzy_name'], 0.9)
+        self.assertEqual(copy.auto_merge_threshold, 0.9)
+        a, b = mr.match_profile('Anna Meier', ['a@x.at']), mr.match_profile('Anna Mayer', ['a@x.at'])
+        self.assertEqual(copy.score(a, b).rule, engine.score(a, b).rule)
+
+
+class TestMergerBaseline(unittest.TestCase):
+    """IntelligentContactMerger scores email and phone matches as before"""
+
+    def setUp(self):
+        self.merger = IntelligentContactMerger()
+
+    def confidence(self, name1, name2, match_type):
+        value = {'email': ('email', 'anna@example.com'), 'phone': ('phone', '+43 664 1234567')}[match_type]
+        return self.merger.calculate_match_confidence(make_vcard(name1, **dict([value])),
+                                                      make_vcard(name2, **dict([value])), match_type)
+
+    def test_typical_pairs(self):
+        cases = [
+            ('Anna Huber', 'Anna Huber-Maier', 'email', 95),
+            ('Anna Huber', 'Office Tyrolit', 'email', 85),
+            ('Anna Huber', 'Anna Huber', 'phone', 95),
+            ('Anna Huber', 'Anna Huber-Maier', 'phone', 90),
+            ('Anna Huber', 'Office Tyrolit', 'phone', 90),
+        ]
+        for name1, name2, match_type, expected in cases:
+            with self.subTest(name1=name1, name2=name2, match_type=match_type):
+                self.assertEqual(baseline_confidence(name1, name2, match_type), expected)
+                self.assertEqual(self.confidence(name1, name2, match_type), expected)
+
+    def test_synthetic_pairs(self):
+        """Same scores as before, except same-sounding names, which now always score 95"""
+        records = benchmark_dedup.generate_records(400, duplicate_rate=0.6, seed=3)
+        vcards = benchmark_dedup.records_to_vcards(records)
+        profiles = [self.merger.contact_match_profile(vcard) for vcard in vcards]
+        compared = 0
+        for i, j in combinations(range(len(vcards)), 2):
+            a, b = profiles[i], profiles[j]
+            if a.emails & b.emails:
+                match_type = 'email'
+            elif a.phones & b.phones:
+                match_type = 'phone'
+            else:
+                continue
+            compared += 1
+            expected = baseline_confidence(vcards[i].fn.value, vcards[j].fn.value, match_type)
+            if phonetic_name_match(a.phonetic_signature, b.phonetic_signature):
+                expected = 95
+            self.assertEqual(self.merger.profile_confidence(a, b), expected, (vcards[i].fn.value, vcards[j].fn.value))
+        self.assertGreater(compared, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
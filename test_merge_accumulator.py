@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared merge accumulator
+
+Ensures:
+- Values are deduplicated by normalized key across any number of sources
+- Missing names, organizations, notes and photos are filled from sources
+- VCardMerger and AdvancedDeduplicator use the same merge rules
+- Base keys are normalized once per cluster, not once per source
+"""
+
+import unittest
+from unittest import mock
+
+import vobject
+
+import merge_accumulator
+from merge_accumulator import MergeAccumulator
+from merge_databases import VCardMerger
+
+
+def make_vcard(name, emails=(), tels=(), urls=(), note=None, org=None, photo=None):
+    vcard = vobject.vCard()
+    vcard.add('fn').value = name
+    for email in emails:
+        vcard.add('email').value = email
+    for tel in tels:
+        field = vcard.add('tel')
+        field.value = tel
+        field.type_param = 'CELL'
+    for url in urls:
+        vcard.add('url').value = url
+    if note:
+        vcard.add('note').value = note
+    if org:
+        vcard.add('org').value = [org]
+    if photo:
+        field = vcard.add('photo')
+        field.value = photo
+        field.encoding_param = 'b'
+    return vcard
+
+
+def values(vcard, name):
+    return [field.value for field in vcard.contents.get(name, [])]
+
+
+class TestMergeAccumulator(unittest.TestCase):
+    """Unique values and filled fields"""
+
+    def test_unique_values_across_sources(self):
+        base = make_vcard('Anna Meier', ['anna.meier@gmail.com'], ['0664 1234567'], ['https://anna.at'])
+        accumulator = MergeAccumulator(base)
+        accumulator.absorb_all([
+            make_vcard('Anna Meier', ['annameier@gmail.com', 'anna@work.at'], ['+43 664 1234567']),
+            make_vcard('Anna Meier', ['ANNA@work.at'], ['+43 1 5055555'], ['HTTPS://ANNA.AT', 'https://blog.at'])
+        ])
+        merged = accumulator.result()
+        self.assertIs(merged, base)
+        self.assertEqual(values(merged, 'email'), ['anna.meier@gmail.com', 'anna@work.at'])
+        self.assertEqual(values(merged, 'tel'), ['0664 1234567', '+43 1 5055555'])
+        self.assertEqual(merged.contents['tel'][1].type_param, 'CELL')
+        self.assertEqual(values(merged, 'url'), ['https://anna.at', 'https://blog.at'])
+        self.assertEqual(accumulator.added['email'], 1)
+        self.assertEqual(accumulator.sources, 2)
+
+    def test_fills_missing_fields(self):
+        base = make_vcard('Anna Meier', note='Met at conference')
+        accumulator = MergeAccumulator(base, merge_photo=True)
+        accumulator.absorb(make_vcard('Anna Meier', org='Anyline', note='Met at conference', photo=b'abc'))
+        accumulator.absorb(make_vcard('Anna Meier', org='Other', note='Prefers email', photo=b'def'))
+        self.assertEqual(base.org.value, ['Anyline'])
+        self.assertEqual(base.note.value, 'Met at conference\nPrefers email')
+        self.assertEqual(base.photo.value, b'abc')
+
+    def test_merge_names(self):
+        base = make_vcard('Anna Meier')
+        base.add('n').value = vobject.vcard.Name(given='Anna')
+        source = make_vcard('Anna Meier')
+        source.add('n').value = vobject.vcard.Name(family='Meier', given='Anne')
+        MergeAccumulator(base, merge_names=True).absorb(source)
+        self.assertEqual((base.n.value.given, base.n.value.family), ('Anna', 'Meier'))
+
+    def test_base_keys_normalized_once(self):
+        base = make_vcard('Anna Meier', [f'anna{i}@x.at' for i in range(10)])
+        calls = mock.Mock(side_effect=str.lower)
+        with mock.patch.dict(merge_accumulator.PROPERTY_KEYS, {'email': calls}):
+            accumulator = MergeAccumulator(base, properties=('email',))
+            for i in range(20):
+                accumulator.absorb(make_vcard('Anna Meier', [f'anna{i}@x.at']))
+        self.assertEqual(calls.call_count, 10 + 20)
+        self.assertEqual(len(values(base, 'email')), 20)
+
+
+class TestMergerIntegration(unittest.TestCase):
+    """Both merge implementations delegate to the accumulator"""
+
+    def test_vcard_merger_keeps_its_rules(self):
+        primary = make_vcard('Anna Meier', ['anna@x.at'])
+        secondary = make_vcard('Anna Meier', ['anna@y.at'], note='VIP')
+        secondary.add('title').value = 'CEO'
+        merged = VCardMerger().merge_vcards(primary, secondary)
+        self.assertEqual(values(merged, 'email'), ['anna@x.at', 'anna@y.at'])
+        self.assertEqual(merged.note.value, 'VIP')
+        self.assertNotIn('title', merged.contents)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the lazy merge preview service
+
+Ensures:
+- Groups are found by shared email, phone or name and get stable ids
+- Previews are computed on demand and cached per group
+- Editing a contact invalidates only what changed
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# The service lives in contactplus-core's database package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'contactplus-core'))
+
+from database.merge_preview import MergePreviewService, group_id_for
+from database.vcard_database import VCardConnector
+
+CARDS = """BEGIN:VCARD
+VERSION:3.0
+FN:Anna Meier
+N:Meier;Anna;;;
+EMAIL;TYPE=INTERNET:anna.meier@gmail.com
+TEL;TYPE=CELL:0664 1234567
+END:VCARD
+BEGIN:VCARD
+VERSION:3.0
+FN:Anna Meier
+N:Meier;Anna;;;
+EMAIL;TYPE=INTERNET:annameier@gmail.com
+ORG:Anyline
+END:VCARD
+BEGIN:VCARD
+VERSION:3.0
+FN:Tom Gruber
+N:Gruber;Tom;;;
+TEL;TYPE=CELL:+43 664 7654321
+END:VCARD
+BEGIN:VCARD
+VERSION:3.0
+FN:Thomas Gruber
+N:Gruber;Thomas;;;
+TEL;TYPE=WORK:0664 765 43 21
+END:VCARD
+BEGIN:VCARD
+VERSION:3.0
+FN:Eva Huber
+N:Huber;Eva;;;
+EMAIL;TYPE=INTERNET:eva@a1.net
+END:VCARD
+"""
+
+
+class TestMergePreview(unittest.TestCase):
+    """Groups, previews and caching"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        source = os.path.join(self.tmpdir, 'cards.vcf')
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write(CARDS)
+        self.connector = VCardConnector(os.path.join(self.tmpdir, 'db'))
+        self.connector.import_database(source, 'sara_export')
+        self.service = MergePreviewService(self.connector)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _group(self, name):
+        return next(g for g in self.service.list_groups() if name in g['names'])
+
+    def test_groups(self):
+        groups = self.service.list_groups()
+        self.assertEqual(len(groups), 2)
+        anna = self._group('Anna Meier')
+        self.assertEqual(anna['match_on'], ['email', 'name'])
+        self.assertEqual(self._group('Tom Gruber')['match_on'], ['phone'])
+        self.assertEqual(anna['group_id'], group_id_for(reversed(anna['contact_ids'])))
+        self.service.list_groups()
+        self.assertEqual(self.service.stats['group_scans'], 1)
+
+    def test_preview_diff_and_merge(self):
+        preview = self.service.preview(self._group('Tom Gruber')['group_id'])
+        fields = {diff['field']: diff for diff in preview['fields']}
+        self.assertEqual(fields['tel']['status'], 'identical')
+        self.assertEqual(fields['fn']['status'], 'different')
+        self.assertEqual(preview['merged']['tel'], [fields['tel']['values'][preview['base_contact_id']][0]])
+
+        preview = self.service.preview(self._group('Anna Meier')['group_id'])
+        fields = {diff['field']: diff for diff in preview['fields']}
+        self.assertEqual(fields['email']['status'], 'identical')
+        self.assertEqual(fields['org']['status'], 'missing')
+        self.assertEqual(preview['merged']['org'], ['Anyline'])
+        self.assertEqual(preview['merged']['tel'], ['0664 1234567'])
+
+    def test_preview_cached_until_contact_changes(self):
+        anna, tom = self._group('Anna Meier'), self._group('Tom Gruber')
+        self.service.preview(anna['group_id'])
+        self.service.preview(tom['group_id'])
+        self.assertEqual(self.service.stats['previews_computed'], 2)
+        self.assertIsNone(self.service.preview('unknown'))
+
+        record = self.connector.get_contact(anna['contact_ids'][1])
+        self.connector.update_contact(record.contact_id, record.vcard_data.replace('Anyline', 'Anyline GmbH'))
+        self.assertEqual(self.service.preview(tom['group_id'])['contacts'][0]['version'], 1)
+        preview = self.service.preview(anna['group_id'])
+        self.assertEqual(preview['merged']['org'], ['Anyline GmbH'])
+        self.assertEqual(self.service.stats, {'group_scans': 2, 'previews_computed': 3, 'preview_cache_hits': 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
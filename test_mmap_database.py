@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped database mode
+
+Ensures:
+- CRUD through VCardConnector(mmap_mode=True) gives the same contacts as the default mode
+- metadata.json stores card offsets instead of vCard text for active contacts
+- Deleted contacts keep their text and can be restored
+- Databases saved in either mode load in the other one
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from vcard_database import VCardConnector, MappedContactRecord
+
+CONTACTS = """BEGIN:VCARD
+VERSION:3.0
+FN:Jürgen Müller
+N:Müller;Jürgen;;;
+EMAIL:juergen@example.com
+END:VCARD
+BEGIN:VCARD
+VERSION:3.0
+FN:Jane Doe
+N:Doe;Jane;;;
+TEL:+1234567890
+END:VCARD
+BEGIN:VCARD
+VERSION:3.0
+FN:Max Mustermann
+N:Mustermann;Max;;;
+EMAIL:max@example.com
+END:VCARD
+"""
+
+
+def strip_import_lines(text):
+    """Drop the X- source lines, they carry import timestamps"""
+    return ''.join(line for line in text.splitlines(True) if not line.startswith('X-'))
+
+
+class TestMappedDatabase(unittest.TestCase):
+    """VCardConnector(mmap_mode=True)"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmpdir, 'source.vcf')
+        with open(self.source, 'w', encoding='utf-8') as f:
+            f.write(CONTACTS)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _connector(self, name, mmap_mode):
+        return VCardConnector(os.path.join(self.tmpdir, name), mmap_mode=mmap_mode)
+
+    def _exercise(self, connector):
+        """Import, update, delete; returns the contact ids"""
+        ids = connector.import_database(self.source, 'test')['contact_ids']
+        updated = connector.get_contact(ids[1]).vcard_data.replace('Jane Doe', 'Jane Smith')
+        self.assertTrue(connector.update_contact(ids[1], updated))
+        self.assertTrue(connector.delete_contact(ids[2]))
+        return ids
+
+    def _snapshot(self, connector):
+        return sorted((strip_import_lines(c.vcard_data), c.version, c.is_active)
+                      for c in connector.get_all_contacts(active_only=False))
+
+    def test_same_contacts_as_default_mode(self):
+        plain = self._connector('plain', False)
+        mapped = self._connector('mapped', True)
+        self._exercise(plain)
+        self._exercise(mapped)
+
+        self.assertEqual(self._snapshot(mapped), self._snapshot(plain))
+        with open(plain.database.contacts_file, encoding='utf-8') as f:
+            expected = strip_import_lines(f.read())
+        with open(mapped.database.contacts_file, encoding='utf-8') as f:
+            self.assertEqual(strip_import_lines(f.read()), expected)
+        mapped.database.close()
+
+    def test_metadata_holds_offsets(self):
+        connector = self._connector('mapped', True)
+        ids = self._exercise(connector)
+        with open(connector.database.metadata_file) as f:
+            metadata = json.load(f)
+
+        active = metadata['contacts'][ids[0]]
+        self.assertNotIn('vcard_data', active)
+        self.assertIn('vcard_offset', active)
+        # Deleted contacts are not in contacts.vcf
+        self.assertIn('Max Mustermann', metadata['contacts'][ids[2]]['vcard_data'])
+        self.assertEqual(metadata['contacts_file_size'], os.path.getsize(connector.database.contacts_file))
+
+        record = connector.get_contact(ids[0])
+        self.assertIsInstance(record, MappedContactRecord)
+        self.assertTrue(record.is_mapped)
+        self.assertIn('FN:Jürgen Müller', record.vcard_data)
+        connector.database.close()
+
+    def test_reload_and_restore(self):
+        connector = self._connector('mapped', True)
+        ids = self._exercise(connector)
+        expected = self._snapshot(connector)
+        connector.database.close()
+
+        reloaded = self._connector('mapped', True)
+        self.assertEqual(self._snapshot(reloaded), expected)
+        self.assertTrue(reloaded.restore_contact(ids[2]))
+        self.assertTrue(reloaded.get_contact(ids[2]).is_mapped)
+        self.assertIn('FN:Max Mustermann', reloaded.get_contact(ids[2]).vcard_data)
+
+        # The default mode reads a database saved in mmap mode
+        reloaded.database.close()
+        plain = self._connector('mapped', False)
+        self.assertEqual(len(plain.get_all_contacts()), 3)
+        self.assertNotIsInstance(plain.get_contact(ids[0]), MappedContactRecord)
+
+    def test_migrates_default_database(self):
+        plain = self._connector('db', False)
+        self._exercise(plain)
+        expected = self._snapshot(plain)
+
+        mapped = self._connector('db', True)
+        self.assertEqual(self._snapshot(mapped), expected)
+        with open(mapped.database.metadata_file) as f:
+            metadata = json.load(f)
+        self.assertTrue(all('vcard_offset' in c for c in metadata['contacts'].values() if c['is_active']))
+        mapped.database.close()
+
+    def test_mismatched_contacts_file(self):
+        connector = self._connector('mapped', True)
+        self._exercise(connector)
+        connector.database.close()
+        with open(connector.database.contacts_file, 'a', encoding='utf-8') as f:
+            f.write('BEGIN:VCARD\nEND:VCARD\n')
+        with self.assertRaises(ValueError):
+            self._connector('mapped', True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for phonetic name keys (Cologne phonetics, Double Metaphone)
+
+Verifies that common German/Austrian spelling variants share keys and that
+the PhoneticIndex only pairs contacts within the same block.
+"""
+
+import unittest
+from name_phonetics import (
+    cologne_phonetic, double_metaphone, name_phonetic_keys,
+    name_phonetic_signature, phonetic_name_match, PhoneticIndex
+)
+
+
+class TestPhoneticCodes(unittest.TestCase):
+    """Single word codes"""
+
+    def test_cologne_meier_variants(self):
+        codes = {cologne_phonetic(n) for n in ['Meier', 'Mayer', 'Maier', 'Meyer']}
+        self.assertEqual(codes, {'67'})
+
+    def test_cologne_umlauts(self):
+        self.assertEqual(cologne_phonetic('Müller'), cologne_phonetic('Mueller'))
+        self.assertEqual(cologne_phonetic('Wagner'), '3467')
+
+    def test_double_metaphone(self):
+        self.assertEqual(double_metaphone('Schmidt'), ('XMT', 'SMT'))
+        self.assertEqual(double_metaphone('Smith'), ('SM0', 'XMT'))
+        self.assertEqual(double_metaphone('Catharina')[0], double_metaphone('Katharina')[0])
+        self.assertEqual(double_metaphone(''), ('', ''))
+
+    def test_silent_letters_only(self):
+        self.assertEqual(cologne_phonetic('HH'), '')
+        self.assertEqual(cologne_phonetic('Hh'), '')
+
+
+class TestNameKeys(unittest.TestCase):
+    """Whole-name keys and signatures"""
+
+    def test_titles_and_particles_ignored(self):
+        keys = name_phonetic_keys('Dr. Hans von Meier')
+        self.assertIn('CP:67', keys)
+        self.assertNotIn('CP:36', keys)  # 'von'
+
+    def test_signature_is_order_insensitive(self):
+        self.assertTrue(phonetic_name_match(name_phonetic_signature('Hans Meier'),
+                                            name_phonetic_signature('Mayer, Hans')))
+        self.assertFalse(phonetic_name_match(name_phonetic_signature('Hans Meier'),
+                                             name_phonetic_signature('Hans Huber')))
+        self.assertFalse(phonetic_name_match((), ()))
+
+    def test_tokens_without_code(self):
+        self.assertEqual(name_phonetic_keys('Dr. Hh Huber'), name_phonetic_keys('Huber'))
+        self.assertEqual(name_phonetic_signature('HH Group'), name_phonetic_signature('Group'))
+        self.assertFalse(phonetic_name_match(name_phonetic_signature('Hh'), name_phonetic_signature('HHH')))
+
+
+class TestPhoneticIndex(unittest.TestCase):
+    """Blocking"""
+
+    def test_candidates_share_a_key(self):
+        index = PhoneticIndex()
+        index.add(0, 'Anna Maier')
+        index.add(1, 'Anna Meyer')
+        index.add(2, 'Zoe Quast')
+        self.assertEqual(index.candidates(0), {1})
+        self.assertEqual(index.candidate_pairs(), {(0, 1)})
+
+    def test_max_block_size_skips_large_blocks(self):
+        index = PhoneticIndex(max_block_size=2)
+        for i in range(3):
+            index.add(i, 'Meier')
+        self.assertEqual(index.candidate_pairs(), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
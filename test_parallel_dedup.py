@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for parallel block scoring
+
+Ensures the process pool path gives the same result as the sequential one:
+- Blocks are built from shared keys only
+- A pair sharing several blocks is scored exactly once
+- Edges from all workers are merged in pair order
+- DuplicateAnalyzer finds the same groups for any number of workers
+"""
+
+import unittest
+
+import benchmark_dedup
+from analyze_duplicates import DuplicateAnalyzer
+from parallel_dedup import build_blocks, partition_blocks, score_blocks_parallel
+
+
+def same_label(a, b):
+    """Toy score function: contacts match when their labels are equal"""
+    return 'label' if a[1] == b[1] else None
+
+
+class TestBlocks(unittest.TestCase):
+    """Blocks and work units"""
+
+    def setUp(self):
+        self.compact = [(0, 'x'), (1, 'x'), (2, 'y'), (3, 'x'), (4, 'z')]
+        self.keys = [{'k1', 'k2'}, {'k1', 'k2'}, {'k2'}, {'k3'}, {'k3'}]
+
+    def test_singleton_keys_form_no_block(self):
+        blocks = build_blocks(self.compact, [{'a'}, {'b'}, {'c'}, {'d'}, {'e'}])
+        self.assertEqual(blocks, [])
+
+    def test_pairs_scored_once(self):
+        blocks = build_blocks(self.compact, self.keys)
+        # (0, 1) shares k1 and k2 but must only be compared once
+        _, compared = score_blocks_parallel(blocks, same_label)
+        self.assertEqual(compared, 4)
+
+    def test_partition_keeps_all_blocks(self):
+        blocks = build_blocks(self.compact, self.keys)
+        units = partition_blocks(blocks, 8)
+        self.assertEqual(sum(len(unit) for unit in units), len(blocks))
+
+
+class TestParallelScoring(unittest.TestCase):
+    """Worker processes return the same edges as the calling process"""
+
+    def test_workers_match_sequential(self):
+        compact = [(i, i % 3) for i in range(30)]
+        keys = [{f"k{i % 5}", f"m{i % 7}"} for i in range(30)]
+        blocks = build_blocks(compact, keys)
+        sequential = score_blocks_parallel(blocks, same_label, workers=1)
+        parallel = score_blocks_parallel(blocks, same_label, workers=2)
+        self.assertEqual(sequential, parallel)
+
+
+class TestAnalyzerWorkers(unittest.TestCase):
+    """DuplicateAnalyzer.find_duplicates with and without a process pool"""
+
+    def groups(self, vcards, workers):
+        analyzer = DuplicateAnalyzer()
+        groups = analyzer.find_duplicates(vcards, workers=workers)
+        return [[contact['index'] for contact in group] for group in groups], analyzer.stats
+
+    def test_same_groups_for_any_worker_count(self):
+        records = benchmark_dedup.generate_records(600, duplicate_rate=0.5, seed=11)
+        vcards = benchmark_dedup.records_to_vcards(records)
+        sequential, sequential_stats = self.groups(vcards, workers=1)
+        parallel, parallel_stats = self.groups(vcards, workers=4)
+        self.assertEqual(parallel, sequential)
+        self.assertGreater(sequential_stats['fuzzy_matches'], 0)
+        for stat in ('email_matches', 'phone_matches', 'exact_name_matches', 'fuzzy_matches', 'phonetic_matches'):
+            self.assertEqual(parallel_stats[stat], sequential_stats[stat], stat)
+
+
+if __name__ == "__main__":
+    unittest.main()
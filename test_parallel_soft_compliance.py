@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for parallel soft compliance
+
+Ensures:
+- Parallel mode writes the same cards in the same order as a serial run
+- Issue indexes, changed cards and fix_stats match the serial run
+- Chunks smaller than the file and larger than the file both work
+"""
+
+import functools
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import vcard_soft_compliance
+from vcard_soft_compliance import SoftComplianceChecker
+
+# No DNS lookups in tests (workers are forked, so the patch carries over)
+OFFLINE_EMAIL = functools.partial(vcard_soft_compliance.validate_email, check_deliverability=False)
+
+TEMPLATES = [
+    "BEGIN:VCARD\nVERSION:3.0\nFN:{name}\nN:{family};{given};;;\nTEL:(415) 555-01{n:02d}\nEND:VCARD\n",
+    "BEGIN:VCARD\nVERSION:3.0\nFN:{Given} {Family}\nN:{Family};{Given};;;\nTEL:+14155550{n:03d}\nEND:VCARD\n",
+    "BEGIN:VCARD\nVERSION:3.0\nFN:{Given} {Family}\nNOTE:mail {given}@example.com\n"
+    "EMAIL:{given}@example.com\nEMAIL:{GIVEN}@EXAMPLE.COM\nORG:acme corp\nEND:VCARD\n",
+]
+
+
+def make_cards(count):
+    cards = []
+    for n in range(count):
+        given, family = f"anna{chr(97 + n % 26)}", f"meier{n}"
+        cards.append(TEMPLATES[n % len(TEMPLATES)].format(
+            n=n, name=f"{given} {family}".upper(), given=given, family=family,
+            Given=given.title(), Family=family.title(), GIVEN=given.upper()))
+    return ''.join(cards)
+
+
+class TestParallelSoftCompliance(unittest.TestCase):
+    """check_and_fix_file(workers=N) matches the serial run"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.input = os.path.join(self.tmpdir, 'contacts.vcf')
+        with open(self.input, 'w', encoding='utf-8') as f:
+            f.write(make_cards(11))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _run(self, name, **options):
+        output = os.path.join(self.tmpdir, name)
+        with mock.patch.object(vcard_soft_compliance, 'validate_email', OFFLINE_EMAIL):
+            report = SoftComplianceChecker().check_and_fix_file(self.input, output, **options)
+        with open(output, encoding='utf-8') as f:
+            return report, f.read()
+
+    def test_same_result_as_serial(self):
+        serial, expected = self._run('serial.vcf')
+        self.assertEqual(serial['total_vcards'], 11)
+
+        for chunk_size in (2, 100):
+            parallel, output = self._run(f'parallel_{chunk_size}.vcf', workers=2, chunk_size=chunk_size)
+            self.assertEqual(output, expected)
+            for key in ('total_vcards', 'issues_found', 'sample_issues', 'fixes_applied'):
+                self.assertEqual(parallel[key], serial[key], key)
+            self.assertEqual(sorted(parallel['changed_cards']), sorted(serial['changed_cards']))
+
+    def test_chunk_indexes_are_global(self):
+        records = make_cards(11).split('END:VCARD\n')[9:10]
+        with mock.patch.object(vcard_soft_compliance, 'validate_email', OFFLINE_EMAIL):
+            cards, issues, stats, changed = vcard_soft_compliance._check_and_fix_chunk(
+                (9, [records[0] + 'END:VCARD\n'], 'US'))
+        self.assertEqual(issues[0], "vCard 9: Name not properly capitalized: ANNAJ MEIER9")
+        self.assertEqual(list(changed), [9])
+        self.assertEqual(stats['total_improved'], 1)
+        self.assertTrue(cards[0].startswith('BEGIN:VCARD'))
+
+
+if __name__ == "__main__":
+    unittest.main()
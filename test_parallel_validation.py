@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for parallel chunked validation
+
+Ensures:
+- Byte ranges start at BEGIN:VCARD lines and cover the whole file
+- Parallel validation reports the same errors and warnings as a serial run
+- Messages carry global card indexes in the usual "vCard N: ..." format
+"""
+
+import base64
+import os
+import shutil
+import tempfile
+import unittest
+
+from vcard_validator import VCardStandardsValidator, card_byte_ranges
+
+PHOTO = base64.b64encode(bytes(range(256)) * 40).decode('ascii')
+
+
+def make_file(path, count):
+    cards = []
+    for n in range(count):
+        lines = ['BEGIN:VCARD', 'VERSION:3.0']
+        if n % 7 != 3:
+            lines.append(f'FN:Contact {n}')
+        if n % 5 != 0:
+            lines.append(f'N:{n};Contact;;;')
+        if n % 4 == 1:
+            lines.append(f'item1.EMAIL:c{n}@example.com')
+        if n % 3 == 0:
+            photo = f'PHOTO;ENCODING=b;TYPE=JPEG:{PHOTO}'
+            lines.extend([photo[:75]] + [' ' + photo[i:i + 74] for i in range(75, len(photo), 74)])
+        if n == 12:
+            lines.remove('VERSION:3.0')
+        lines.append('END:VCARD')
+        cards.append('\r\n'.join(lines) + '\r\n')
+    # An unterminated card is dropped by the splitter in both modes
+    cards.insert(20, 'BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Broken\r\n')
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(''.join(cards))
+
+
+class TestParallelValidation(unittest.TestCase):
+    """validate_file(workers=N) matches the serial run"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'contacts.vcf')
+        make_file(self.path, 40)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_byte_ranges(self):
+        ranges = card_byte_ranges(self.path, 20000)
+        self.assertGreater(len(ranges), 3)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], os.path.getsize(self.path))
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, next_start)
+            self.assertTrue(data[next_start:].startswith(b'BEGIN:VCARD\r\n'))
+
+    def test_same_result_as_serial(self):
+        expected = VCardStandardsValidator().validate_file(self.path)
+        self.assertFalse(expected[0])
+        for chunk_bytes in (1, 20000, None):
+            result = VCardStandardsValidator().validate_file(self.path, workers=2, chunk_bytes=chunk_bytes)
+            self.assertEqual(result, expected)
+
+        errors = expected[1]
+        self.assertIn('vCard 31: Missing required FN (Formatted Name)', errors)
+        self.assertIn('vCard 12: Missing required VERSION', errors)
+
+    def test_read_failure(self):
+        with open(self.path, 'ab') as f:
+            f.write(b'BEGIN:VCARD\r\nFN:\xff\r\nEND:VCARD\r\n')
+        is_valid, errors, _ = VCardStandardsValidator().validate_file(self.path, workers=2)
+        self.assertFalse(is_valid)
+        self.assertEqual(len(errors), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
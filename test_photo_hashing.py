@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for perceptual photo hashing
+
+Ensures photos are recognized across sources:
+- Re-encoded and resized copies match, different pictures do not
+- Fingerprints are cached by byte digest (one decode per image)
+- The merger uses photos as a duplicate signal and skips identical copies
+  before scoring them (a single photo is never hashed)
+"""
+
+import base64
+import io
+import unittest
+from unittest import mock
+
+import numpy as np
+import vobject
+from PIL import Image
+
+import intelligent_merge
+import photo_hashing as ph
+from intelligent_merge import IntelligentContactMerger
+
+
+def make_photo(seed, size=(300, 300), fmt='JPEG', quality=90):
+    """Encoded test image with a seed-specific pattern"""
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, 255, (6, 6, 3), dtype=np.uint8)
+    img = Image.fromarray(blocks).resize(size, Image.NEAREST)
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt, quality=quality)
+    return buffer.getvalue()
+
+
+def make_vcard(name, photo=None, tel=None):
+    vcard = vobject.vCard()
+    vcard.add('fn').value = name
+    if tel:
+        vcard.add('tel').value = tel
+    if photo:
+        field = vcard.add('photo')
+        field.value = photo
+        field.encoding_param = 'b'
+    return vcard
+
+
+class TestFingerprints(unittest.TestCase):
+    """Hashes survive re-encoding but separate different pictures"""
+
+    def test_reencoded_copy_matches(self):
+        original = ph.photo_fingerprint(make_photo(1))
+        resized = ph.photo_fingerprint(make_photo(1, size=(120, 120), quality=40))
+        self.assertNotEqual(original.digest, resized.digest)
+        self.assertTrue(ph.photos_match(original, resized))
+
+    def test_different_pictures_do_not_match(self):
+        self.assertFalse(ph.photos_match(ph.photo_fingerprint(make_photo(1)),
+                                         ph.photo_fingerprint(make_photo(2))))
+
+    def test_base64_and_bytes_share_cache_entry(self):
+        cache = ph.PhotoHashCache()
+        photo = make_photo(3, fmt='PNG')
+        first = cache.fingerprint(photo)
+        second = cache.fingerprint(base64.b64encode(photo).decode('ascii'))
+        self.assertEqual(first, second)
+        self.assertEqual(cache.info(), {'hits': 1, 'misses': 1, 'entries': 1})
+        self.assertEqual((first.width, first.height, first.format), (300, 300, 'PNG'))
+
+    def test_undecodable_photo(self):
+        cache = ph.PhotoHashCache()
+        self.assertIsNone(cache.fingerprint(b'not an image'))
+        self.assertIsNone(cache.fingerprint(b'not an image'))
+        self.assertEqual(cache.info()['misses'], 1)
+
+    def test_cache_is_bounded(self):
+        cache = ph.PhotoHashCache(max_entries=2)
+        for seed in range(3):
+            cache.fingerprint(make_photo(seed))
+        self.assertEqual(cache.info()['entries'], 2)
+
+
+class TestMergerPhotos(unittest.TestCase):
+    """IntelligentContactMerger photo signal and photo dedup"""
+
+    def test_same_photo_and_name_is_a_match(self):
+        merger = IntelligentContactMerger()
+        contacts = [
+            ('sara', make_vcard('Anna Meier', make_photo(5))),
+            ('iphone_contacts', make_vcard('Anna Mayer', make_photo(5, size=(150, 150), quality=50))),
+            ('iphone_suggested', make_vcard('Someone Else', make_photo(6)))
+        ]
+        groups = merger.find_matches(contacts)
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(groups[0]['match_type'], 'photo')
+        self.assertEqual([idx for idx, _, _ in groups[0]['contacts']], [0, 1])
+        self.assertEqual(groups[0]['confidence'], 90)
+
+    def test_shared_photo_with_different_names_is_not_merged(self):
+        merger = IntelligentContactMerger()
+        logo = make_photo(7)
+        contacts = [('sara', make_vcard('Anyline Office', logo)), ('iphone_contacts', make_vcard('Lukas Kerner', logo))]
+        groups = merger.find_matches(contacts)
+        self.assertLess(groups[0]['confidence'], 70)
+
+    def test_identical_photo_scored_once(self):
+        merger = IntelligentContactMerger()
+        photo = make_photo(8)
+        with mock.patch.object(merger, 'assess_photo_quality', wraps=merger.assess_photo_quality) as assess:
+            best, source, _ = merger.select_best_photo([('iphone_suggested', photo), ('sara', photo)])
+        self.assertEqual(assess.call_count, 1)
+        self.assertEqual(best, photo)
+        self.assertEqual(source, 'sara')
+        best, source, _ = merger.select_best_photo([('sara', photo), ('iphone_suggested', photo)])
+        self.assertEqual(source, 'sara')
+        self.assertEqual(merger.stats['photos_deduplicated'], 2)
+
+    def test_single_photo_not_hashed(self):
+        merger = IntelligentContactMerger()
+        photo = make_photo(9)
+        with mock.patch.object(intelligent_merge, 'photo_digest', side_effect=AssertionError('hashed')):
+            best, source, _ = merger.select_best_photo([('sara', photo)])
+        self.assertEqual((best, source), (photo, 'sara'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the photo optimizer
+
+Ensures:
+- Photos are fitted to the byte budget with the highest quality that fits
+- Scale is only reduced when even the lowest quality is too large
+- Both searches need far fewer encodes than stepping through qualities
+- Results are cached by photo digest and budget, also from the process pool
+- Oversized vobject cards end up within the iCloud card limit
+"""
+
+import io
+import unittest
+
+import numpy as np
+import vobject
+from PIL import Image
+
+from photo_optimizer import (ICLOUD_CARD_LIMIT, MIN_QUALITY, PhotoOptimizer, encoded_size,
+                             fit_vcard_photos, optimize_base64, optimize_photo, photo_budget)
+
+BUDGET = 100 * 1024
+
+
+def encode(image, quality=95):
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def smooth_photo():
+    """Compresses well: fits the budget by lowering the quality"""
+    rng = np.random.default_rng(0)
+    ramp = np.linspace(0, 255, 1200)
+    pixels = np.stack([np.add.outer(ramp[:900], ramp) / 2] * 3, axis=-1)
+    pixels += rng.normal(0, 12, pixels.shape)
+    return encode(Image.fromarray(np.clip(pixels, 0, 255).astype('uint8')))
+
+
+def noise_photo():
+    """Too large even at MIN_QUALITY: fits the budget only by scaling down"""
+    rng = np.random.default_rng(1)
+    return encode(Image.fromarray(rng.integers(0, 256, (900, 1200, 3), dtype='uint8')))
+
+
+class TestOptimizePhoto(unittest.TestCase):
+    """optimize_photo"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.smooth = smooth_photo()
+        cls.noise = noise_photo()
+
+    def test_quality_search(self):
+        result = optimize_photo(self.smooth, BUDGET)
+        self.assertLessEqual(len(result.data), BUDGET)
+        self.assertEqual(result.scale, 1.0)
+        self.assertGreater(result.quality, MIN_QUALITY)
+        # The highest quality that fits
+        image = Image.open(io.BytesIO(self.smooth))
+        self.assertGreater(len(encode(image, result.quality + 1)), BUDGET)
+        self.assertLessEqual(result.encodes, 8)
+
+    def test_scale_search(self):
+        result = optimize_photo(self.noise, BUDGET)
+        self.assertLessEqual(len(result.data), BUDGET)
+        self.assertLess(result.scale, 1.0)
+        self.assertLessEqual(result.encodes, 9)
+        width, _ = Image.open(io.BytesIO(result.data)).size
+        self.assertEqual(width, int(1200 * result.scale))
+
+    def test_unchanged_and_impossible(self):
+        result = optimize_photo(self.smooth, len(self.smooth))
+        self.assertEqual((result.data, result.quality, result.encodes), (self.smooth, None, 0))
+        self.assertIsNone(optimize_photo(b'not an image', 4))
+        self.assertIsNone(optimize_photo(self.noise, 100))
+        self.assertIsNone(optimize_base64('%%%', BUDGET))
+
+
+class TestPhotoOptimizer(unittest.TestCase):
+    """PhotoOptimizer cache and process pool"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.smooth = smooth_photo()
+        cls.noise = noise_photo()
+
+    def test_cache(self):
+        optimizer = PhotoOptimizer()
+        first = optimizer.optimize(self.smooth, BUDGET)
+        self.assertIs(optimizer.optimize(self.smooth, BUDGET), first)
+        optimizer.optimize(self.smooth, BUDGET // 2)
+        self.assertEqual(optimizer.info(), {'hits': 1, 'misses': 2, 'entries': 2})
+
+    def test_pool_matches_serial(self):
+        jobs = [(self.smooth, BUDGET), (self.noise, BUDGET), (self.smooth, BUDGET), (b'junk', BUDGET)]
+        optimizer = PhotoOptimizer()
+        pooled = optimizer.optimize_many(jobs, workers=2)
+        self.assertEqual(optimizer.info()['misses'], 3)
+        self.assertEqual(pooled, [optimize_photo(*job) for job in jobs])
+        self.assertEqual(optimizer.optimize_many(jobs[:2]), pooled[:2])
+        self.assertEqual(optimizer.info()['hits'], 2)
+
+
+class TestVCardPhotos(unittest.TestCase):
+    """photo_budget / fit_vcard_photos"""
+
+    def make_card(self, name, photo):
+        card = vobject.vCard()
+        card.add('fn').value = name
+        card.add('n').value = vobject.vcard.Name(family=name)
+        card.add('photo').value = photo
+        card.photo.encoding_param = 'b'
+        card.photo.type_param = 'JPEG'
+        return card
+
+    def test_budget_matches_serialized_size(self):
+        photo = noise_photo()
+        card = self.make_card('Anna', photo)
+        card_bytes = len(card.serialize().encode('utf-8'))
+        other_bytes = card_bytes - encoded_size(len(photo), folded=False)
+        self.assertLess(other_bytes, 200)
+        budget = photo_budget(card_bytes, len(photo))
+        self.assertLessEqual(other_bytes + encoded_size(budget), ICLOUD_CARD_LIMIT)
+        self.assertGreater(other_bytes + encoded_size(budget + 256), ICLOUD_CARD_LIMIT)
+        self.assertEqual(photo_budget(ICLOUD_CARD_LIMIT * 2, 0), 0)
+
+    def test_fit_cards(self):
+        small = self.make_card('Small', encode(Image.new('RGB', (64, 64))))
+        large = self.make_card('Large', noise_photo())
+        outcome = fit_vcard_photos([small, large], optimizer=PhotoOptimizer())
+        self.assertEqual(outcome, [None, True])
+        self.assertLessEqual(len(large.serialize().encode('utf-8')), ICLOUD_CARD_LIMIT)
+        self.assertEqual(large.photo.type_param, 'JPEG')
+
+        broken = self.make_card('Broken', b'\xff\xd8\xff' + b'\x00' * ICLOUD_CARD_LIMIT)
+        self.assertEqual(fit_vcard_photos([broken]), [False])
+        self.assertFalse(hasattr(broken, 'photo'))
+
+
+if __name__ == "__main__":
+    unittest.main()
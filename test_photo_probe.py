@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for header-only photo probing
+
+Ensures:
+- Format, width, height and byte size match what Pillow reports
+- Base64 photos are probed from a few dozen decoded characters, even
+  behind a large EXIF segment
+- Unknown formats fall back to Pillow, garbage gives None
+- Photo quality scoring uses the probe instead of a full decode
+"""
+
+import base64
+import io
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import photo_probe
+from intelligent_merge import IntelligentContactMerger
+from photo_probe import PhotoInfo, probe_photo
+
+
+def encode(image, fmt, **params):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def folded_base64(data):
+    text = base64.b64encode(data).decode('ascii')
+    return '\r\n '.join(text[i:i + 74] for i in range(0, len(text), 74))
+
+
+class TestProbePhoto(unittest.TestCase):
+    """probe_photo"""
+
+    def setUp(self):
+        rgb = Image.new('RGB', (321, 123), (10, 120, 200))
+        rgba = Image.new('RGBA', (77, 55), (10, 120, 200, 100))
+        exif = Image.Exif()
+        exif[0x010E] = 'x' * 60000  # ImageDescription: pushes the frame header 60 KB back
+        self.photos = {
+            'jpeg': encode(rgb, 'JPEG'),
+            'progressive': encode(rgb, 'JPEG', progressive=True),
+            'exif': encode(rgb, 'JPEG', exif=exif.tobytes()),
+            'png': encode(rgb, 'PNG'),
+            'gif': encode(rgb, 'GIF'),
+            'webp': encode(rgb, 'WEBP'),
+            'webp_lossless': encode(rgb, 'WEBP', lossless=True),
+            'webp_alpha': encode(rgba, 'WEBP'),
+            'bmp': encode(rgb, 'BMP'),
+            'tiff': encode(rgb, 'TIFF'),
+        }
+
+    def test_matches_pillow(self):
+        for name, data in self.photos.items():
+            with self.subTest(name), Image.open(io.BytesIO(data)) as img:
+                expected = PhotoInfo(img.format, img.width, img.height, len(data))
+                self.assertEqual(probe_photo(data), expected)
+                self.assertEqual(probe_photo(base64.b64encode(data).decode('ascii')), expected)
+                self.assertEqual(probe_photo(folded_base64(data)), expected)
+
+    def test_decodes_only_the_header(self):
+        text = base64.b64encode(self.photos['exif']).decode('ascii')
+        self.assertGreater(len(text), 80000)
+        with mock.patch.object(photo_probe.base64, 'b64decode', wraps=base64.b64decode) as decode:
+            info = probe_photo(text)
+        self.assertEqual((info.width, info.height), (321, 123))
+        decoded = sum(len(call.args[0]) for call in decode.call_args_list)
+        self.assertLess(decoded, 200)
+
+    def test_truncated_and_invalid(self):
+        truncated = self.photos['jpeg'][:len(self.photos['jpeg']) // 2]
+        self.assertEqual(probe_photo(truncated).width, 321)
+        self.assertIsNone(probe_photo(b'not an image at all'))
+        self.assertIsNone(probe_photo('bm90IGFuIGltYWdl'))
+        self.assertIsNone(probe_photo('%%% no base64 %%%'))
+        self.assertIsNone(probe_photo(b''))
+
+
+class TestPhotoQuality(unittest.TestCase):
+    """IntelligentContactMerger.assess_photo_quality"""
+
+    def test_scored_without_decoding(self):
+        data = encode(Image.new('RGB', (600, 500)), 'JPEG')
+        with mock.patch.object(Image.Image, 'load', side_effect=AssertionError('decoded')):
+            quality = IntelligentContactMerger().assess_photo_quality(base64.b64encode(data).decode('ascii'))
+        self.assertEqual((quality['width'], quality['height'], quality['format'], quality['size']),
+                         (600, 500, 'JPEG', len(data)))
+        self.assertEqual(quality['score'], 40 + 5 + 20 + 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
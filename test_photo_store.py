@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed photo store
+
+Ensures:
+- Inline photos (ENCODING=b and data: URIs) become urn:sha256 references and back
+- Identical photos from different sources are stored once
+- metadata.json and audit rollback data carry references, not base64
+- Exports inline the photos again and existing databases are migrated
+"""
+
+import base64
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from photo_store import PHOTO_URI_PREFIX, PhotoStore, externalize_photos, inline_photos, read_photo
+from vcard_database import VCardConnector
+
+JPEG = b'\xff\xd8\xff\xe0' + bytes(range(256)) * 8
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+def photo_lines(prefix, data):
+    line = prefix + base64.b64encode(data).decode('ascii')
+    return line[:75] + ''.join('\r\n ' + line[i:i + 74] for i in range(75, len(line), 74)) + '\r\n'
+
+
+def make_card(name, photo=JPEG):
+    return ("BEGIN:VCARD\r\nVERSION:3.0\r\n"
+            f"FN:{name}\r\nN:{name};;;;\r\n"
+            + photo_lines('PHOTO;ENCODING=b;TYPE=JPEG:', photo) +
+            "END:VCARD\r\n")
+
+
+class TestPhotoReferences(unittest.TestCase):
+    """externalize_photos / inline_photos / read_photo"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = PhotoStore(self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_round_trip(self):
+        card = make_card('Anna').replace(
+            'END:VCARD', photo_lines('item1.PHOTO:data:image/png;base64,', PNG) + 'END:VCARD')
+        stored = externalize_photos(card, self.store)
+        self.assertNotIn('ENCODING=b', stored)
+        self.assertEqual(stored.count(PHOTO_URI_PREFIX), 2)
+        self.assertIn('MEDIATYPE=image/png', stored)
+        self.assertEqual(inline_photos(stored, self.store), card)
+
+        data, media_type, digest = read_photo(stored, self.store)
+        self.assertEqual((data, media_type), (JPEG, 'image/jpeg'))
+        self.assertEqual(read_photo(card, self.store)[2], digest)
+
+    def test_cards_without_inline_photos_are_unchanged(self):
+        card = "BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Url\r\nPHOTO;VALUE=uri:https://example.com/a.jpg\r\nEND:VCARD\r\n"
+        self.assertIs(externalize_photos(card, self.store), card)
+        self.assertIsNone(read_photo(card, self.store))
+
+    def test_missing_photo_keeps_reference(self):
+        stored = externalize_photos(make_card('Anna'), self.store)
+        shutil.rmtree(self.tmpdir)
+        self.assertEqual(inline_photos(stored, self.store), stored)
+        self.assertIsNone(read_photo(stored, self.store))
+
+
+class TestDatabasePhotoStore(unittest.TestCase):
+    """VCardConnector(external_photos=True)"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'db')
+        self.sources = []
+        for name in ('first', 'second'):
+            path = os.path.join(self.tmpdir, f'{name}.vcf')
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(make_card(f'{name.title()} Person') + make_card('No Photo').replace(
+                    photo_lines('PHOTO;ENCODING=b;TYPE=JPEG:', JPEG), ''))
+            self.sources.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _photo_files(self):
+        photos = os.path.join(self.db_path, 'photos')
+        return [name for _, _, files in os.walk(photos) for name in files]
+
+    def test_shared_photo_stored_once(self):
+        connector = VCardConnector(self.db_path, external_photos=True)
+        ids = [connector.import_database(path, name)['contact_ids'][0]
+               for path, name in zip(self.sources, ('first', 'second'))]
+        self.assertEqual(len(self._photo_files()), 1)
+
+        data, media_type, _ = connector.database.get_photo(ids[0])
+        self.assertEqual((data, media_type), (JPEG, 'image/jpeg'))
+        exported = connector.database.export_vcard_data(connector.get_contact(ids[1]).vcard_data)
+        self.assertIn('ENCODING=b', exported)
+        self.assertEqual(read_photo(exported, connector.database.photos)[0], JPEG)
+
+        updated = make_card('Second Person', photo=PNG).replace('TYPE=JPEG', 'TYPE=PNG')
+        self.assertTrue(connector.update_contact(ids[1], updated))
+        with open(connector.database.metadata_file) as f:
+            metadata = f.read()
+        with open(connector.database.audit_log_file) as f:
+            audit = json.load(f)
+        self.assertNotIn('ENCODING=b', metadata)
+        rollback = [op['rollback_data'] for op in audit['operations'] if op['rollback_data']]
+        self.assertTrue(rollback and all(PHOTO_URI_PREFIX in data for data in rollback))
+        self.assertEqual(len(self._photo_files()), 2)
+
+    def test_migrates_existing_database(self):
+        plain = VCardConnector(self.db_path)
+        contact_id = plain.import_database(self.sources[0], 'first')['contact_ids'][0]
+        self.assertIn('ENCODING=b', plain.get_contact(contact_id).vcard_data)
+
+        connector = VCardConnector(self.db_path, external_photos=True)
+        self.assertIn(PHOTO_URI_PREFIX, connector.get_contact(contact_id).vcard_data)
+        with open(connector.database.contacts_file, encoding='utf-8') as f:
+            self.assertNotIn('ENCODING=b', f.read())
+        self.assertEqual(connector.database.get_photo(contact_id)[0], JPEG)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for photo thumbnails
+
+Ensures:
+- Every size and format is rendered from a single decode and cached on disk
+- Thumbnails keep the aspect ratio and are never upscaled
+- Transparent photos get a white background in JPEG and keep alpha in WebP
+- Unsupported sizes, formats and undecodable data raise ValueError
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+# Thumbnails live in contactplus-core's database package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'contactplus-core'))
+
+from database import photo_thumbnails
+from database.photo_thumbnails import THUMBNAIL_SIZES, ThumbnailCache
+
+
+def encode(image, fmt):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+class TestThumbnailCache(unittest.TestCase):
+    """ThumbnailCache.get"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = ThumbnailCache(self.tmpdir)
+        self.photo = encode(Image.new('RGB', (600, 400), (200, 30, 30)), 'JPEG')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_single_decode_for_all_renditions(self):
+        digest = 'ab' * 32
+        with mock.patch.object(photo_thumbnails.Image, 'open', wraps=Image.open) as opened:
+            renditions = {(fmt, size): self.cache.get(digest, self.photo, size, fmt)
+                          for fmt in ('jpeg', 'webp') for size in THUMBNAIL_SIZES}
+        self.assertEqual(opened.call_count, 1)
+        for (fmt, size), (data, media_type) in renditions.items():
+            self.assertEqual(max(Image.open(io.BytesIO(data)).size), size)
+            self.assertEqual(media_type, f'image/{fmt}')
+        self.assertEqual(len(os.listdir(os.path.join(self.tmpdir, 'ab'))), 2 * len(THUMBNAIL_SIZES))
+
+        # Cached renditions do not need the photo any more
+        data, _ = self.cache.get(digest, b'', 64)
+        self.assertEqual(Image.open(io.BytesIO(data)).size, (64, 43))
+
+    def test_small_photo_is_not_upscaled(self):
+        small = encode(Image.new('RGB', (40, 30)), 'PNG')
+        data, _ = self.cache.get('cd' * 32, small, 256)
+        self.assertEqual(Image.open(io.BytesIO(data)).size, (40, 30))
+
+    def test_transparency(self):
+        transparent = encode(Image.new('RGBA', (100, 100), (0, 0, 0, 0)), 'PNG')
+        jpeg, _ = self.cache.get('ef' * 32, transparent, 64, 'jpeg')
+        self.assertEqual(Image.open(io.BytesIO(jpeg)).convert('RGB').getpixel((10, 10)), (255, 255, 255))
+        webp, _ = self.cache.get('ef' * 32, transparent, 64, 'webp')
+        self.assertEqual(Image.open(io.BytesIO(webp)).mode, 'RGBA')
+
+    def test_invalid_requests(self):
+        with self.assertRaises(ValueError):
+            self.cache.get('ab' * 32, self.photo, 100)
+        with self.assertRaises(ValueError):
+            self.cache.get('ab' * 32, self.photo, 64, 'gif')
+        with self.assertRaises(ValueError):
+            self.cache.get('12' * 32, b'not an image', 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for version-aware three-way merging of contact edits
+
+Ensures:
+- Edits to disjoint properties merge automatically
+- Edits to the same property are reported as conflicts
+- The base version is recovered from the audit log
+- update_contact(base_version=...) merges or raises MergeConflictError
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from three_way_merge import split_properties, three_way_merge
+from vcard_database import MergeConflictError, VCardConnector
+
+BASE = (
+    "BEGIN:VCARD\r\n"
+    "VERSION:3.0\r\n"
+    "FN:Anna Meier\r\n"
+    "N:Meier;Anna;;;\r\n"
+    "EMAIL;TYPE=INTERNET:anna@x.at\r\n"
+    "TEL;TYPE=CELL:+43 664 1234567\r\n"
+    "item1.URL:https://anna.at\r\n"
+    "item1.X-ABLABEL:Blog\r\n"
+    "NOTE:Met at a conference in Linz and talked about contact deduplicati\r\n"
+    " on\r\n"
+    "END:VCARD\r\n"
+)
+
+
+def edit(card, old, new):
+    assert old in card
+    return card.replace(old, new)
+
+
+class TestThreeWayMerge(unittest.TestCase):
+    """Property-level merge"""
+
+    def test_disjoint_edits_merge(self):
+        ours = edit(BASE, "TEL;TYPE=CELL:+43 664 1234567", "TEL;TYPE=CELL:+43 664 7654321")
+        theirs = edit(BASE, "FN:Anna Meier", "FN:Anna Meier-Huber")
+        theirs = edit(theirs, "END:VCARD", "ORG:Anyline\r\nEND:VCARD")
+        result = three_way_merge(BASE, ours, theirs)
+        self.assertTrue(result.clean)
+        self.assertEqual(result.merged_properties, ['TEL'])
+        self.assertIn("FN:Anna Meier-Huber\r\n", result.vcard_data)
+        self.assertIn("TEL;TYPE=CELL:+43 664 7654321\r\n", result.vcard_data)
+        self.assertIn("ORG:Anyline\r\n", result.vcard_data)
+        self.assertTrue(result.vcard_data.startswith("BEGIN:VCARD\r\nVERSION:3.0\r\n"))
+
+    def test_removal_and_refolding(self):
+        ours = edit(BASE, "item1.URL:https://anna.at\r\nitem1.X-ABLABEL:Blog\r\n", "")
+        theirs = edit(BASE, "deduplicati\r\n on", "deduplication")
+        result = three_way_merge(BASE, ours, theirs)
+        self.assertTrue(result.clean)
+        self.assertNotIn("ITEM1", split_properties(result.vcard_data))
+        self.assertEqual(result.merged_properties, ['ITEM1'])
+
+    def test_same_property_conflicts(self):
+        ours = edit(BASE, "anna@x.at", "anna@y.at")
+        theirs = edit(BASE, "anna@x.at", "anna@z.at")
+        result = three_way_merge(BASE, ours, theirs)
+        self.assertEqual([c.name for c in result.conflicts], ['EMAIL'])
+        self.assertEqual(result.conflicts[0].ours, ["EMAIL;TYPE=INTERNET:anna@y.at"])
+        self.assertEqual(three_way_merge(BASE, ours, ours).conflicts, [])
+
+
+class TestVersionedUpdates(unittest.TestCase):
+    """VCardConnector.update_contact with a base version"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        source = os.path.join(self.tmpdir, 'cards.vcf')
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write(BASE.replace('\r\n', '\n'))
+        self.connector = VCardConnector(os.path.join(self.tmpdir, 'db'))
+        self.contact_id = self.connector.import_database(source, 'sara_export')['contact_ids'][0]
+        self.base = self.connector.get_contact(self.contact_id).vcard_data
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_version_history(self):
+        self.connector.update_contact(self.contact_id, edit(self.base, "FN:Anna Meier", "FN:Anna M."))
+        self.assertEqual(self.connector.database.get_version_data(self.contact_id, 1), self.base)
+        self.assertIn("FN:Anna M.", self.connector.database.get_version_data(self.contact_id, 2))
+        self.assertIsNone(self.connector.database.get_version_data(self.contact_id, 3))
+
+    def test_concurrent_sessions(self):
+        self.assertTrue(self.connector.update_contact(
+            self.contact_id, edit(self.base, "anna@x.at", "anna@y.at"), base_version=1))
+        self.assertTrue(self.connector.update_contact(
+            self.contact_id, edit(self.base, "FN:Anna Meier", "FN:Anna Huber"), base_version=1))
+        record = self.connector.get_contact(self.contact_id)
+        self.assertEqual(record.version, 3)
+        self.assertIn("anna@y.at", record.vcard_data)
+        self.assertIn("FN:Anna Huber", record.vcard_data)
+        self.assertEqual(self.connector.database.audit_log[-1].changes['merged_properties'], ['FN'])
+
+        with self.assertRaises(MergeConflictError) as ctx:
+            self.connector.update_contact(self.contact_id, edit(self.base, "anna@x.at", "anna@z.at"), base_version=1)
+        self.assertEqual([c.name for c in ctx.exception.conflicts], ['EMAIL'])
+        self.assertEqual(self.connector.get_contact(self.contact_id).version, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the byte-budget vCard chunker
+
+Ensures:
+- Every file stays within the byte and card budgets
+- Greedy keeps file order (the parts concatenate to the original)
+- First-fit decreasing needs no more files and keeps every card once
+- Cards over the per-card limit go to a separate file and the manifest
+- The manifest describes the files as written
+"""
+
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from vcard_chunker import chunk_vcards, first_fit_decreasing
+from vcard_stream import iter_vcard_blocks
+
+KB = 1024
+
+
+def make_card(index, size):
+    note = 'x' * max(0, size - 80)
+    lines = [f"NOTE:{note[i:i + 70]}" if i == 0 else f" {note[i:i + 70]}" for i in range(0, len(note), 70)]
+    return "\r\n".join(["BEGIN:VCARD", "VERSION:3.0", f"FN:Person {index}", *lines, "END:VCARD"]) + "\r\n"
+
+
+class TestChunkVCards(unittest.TestCase):
+    """chunk_vcards"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.input = os.path.join(self.tmpdir, 'master.vcf')
+        rng = random.Random(7)
+        self.sizes = [rng.choice([300, 600, 2 * KB, 40 * KB, 120 * KB]) for _ in range(120)]
+        self.sizes[17] = 300 * KB
+        with open(self.input, 'w', encoding='utf-8', newline='') as f:
+            f.write(''.join(make_card(i, size) for i, size in enumerate(self.sizes)))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def chunk(self, strategy):
+        template = os.path.join(self.tmpdir, strategy + '{index:02d}.vcf')
+        return chunk_vcards(self.input, template, max_bytes=512 * KB, max_cards=20, strategy=strategy)
+
+    def names(self, path):
+        return [block.lines[2] for block in iter_vcard_blocks(path)]
+
+    def check_budgets(self, manifest):
+        for chunk in manifest['chunks']:
+            with open(chunk['file'], 'rb') as f:
+                data = f.read()
+            self.assertLessEqual(len(data), 512 * KB)
+            self.assertLessEqual(chunk['cards'], 20)
+            self.assertEqual(chunk['bytes'], len(data))
+            self.assertEqual(chunk['sha256'], hashlib.sha256(data).hexdigest())
+            self.assertEqual(self.names(chunk['file']), [f"FN:Person {i}" for i in chunk['indexes']])
+
+    def test_greedy(self):
+        manifest = self.chunk('greedy')
+        self.check_budgets(manifest)
+        with open(self.input, 'rb') as f:
+            original = f.read().replace(make_card(17, 300 * KB).encode('utf-8'), b'')
+        parts = b''
+        for chunk in manifest['chunks']:
+            with open(chunk['file'], 'rb') as f:
+                parts += f.read()
+        self.assertEqual(parts, original)
+
+    def test_first_fit_decreasing(self):
+        greedy = self.chunk('greedy')
+        manifest = self.chunk('ffd')
+        self.check_budgets(manifest)
+        self.assertLessEqual(len(manifest['chunks']), len(greedy['chunks']))
+        indexes = sorted(i for chunk in manifest['chunks'] for i in chunk['indexes'])
+        self.assertEqual(indexes, [i for i in range(len(self.sizes)) if i != 17])
+
+    def test_oversized_and_manifest(self):
+        manifest = self.chunk('greedy')
+        self.assertEqual([(card['index'], card['name']) for card in manifest['oversized']], [(17, 'Person 17')])
+        self.assertEqual(self.names(manifest['oversized_file']), ["FN:Person 17"])
+        with open(os.path.join(self.tmpdir, 'master_chunks.json')) as f:
+            self.assertEqual(json.load(f)['chunks'], manifest['chunks'])
+        self.assertEqual(manifest['total_cards'], len(self.sizes))
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            chunk_vcards(self.input, os.path.join(self.tmpdir, 'x{index}.vcf'), strategy='random')
+        with self.assertRaises(ValueError):
+            chunk_vcards(self.input, os.path.join(self.tmpdir, 'x.vcf'))
+
+
+class TestFirstFitDecreasing(unittest.TestCase):
+    """first_fit_decreasing"""
+
+    def test_packing(self):
+        bins = first_fit_decreasing([(0, 5), (1, 6), (2, 4), (3, 5), (4, 2)], max_bytes=11, max_cards=3)
+        self.assertEqual(bins, [[0, 1], [2, 3, 4]])
+        self.assertEqual(first_fit_decreasing([(0, 1), (1, 1), (2, 1)], 100, 2), [[0, 1], [2]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming vCard access and the two-pass merges
+
+Ensures:
+- Records are found with exact byte offsets (CRLF, multi-byte UTF-8)
+- PHOTO data can be stripped before parsing
+- iter_vcard_blocks handles mixed line endings, folding and loose markers
+  the same way for paths, file objects and mmaps
+- Streaming merges produce the same contacts as the in-memory merges
+- The review file of a streaming merge loads one group at a time
+"""
+
+import contextlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import unittest
+
+import vobject
+
+from vcard_stream import VCardRecordReader, iter_vcard_blocks, iter_vcard_records, strip_properties
+from vcard_validator import VCardStandardsValidator
+from merge_databases import VCardMerger
+from intelligent_merge import IntelligentContactMerger
+
+CARD = "BEGIN:VCARD\r\nVERSION:3.0\r\nFN:{name}\r\n{extra}END:VCARD\r\n"
+
+
+def card(name, email=None, tel=None, photo=False):
+    extra = ""
+    if email:
+        extra += f"EMAIL;TYPE=INTERNET:{email}\r\n"
+    if tel:
+        extra += f"TEL;TYPE=CELL:{tel}\r\n"
+    if photo:
+        extra += "PHOTO;ENCODING=b;TYPE=JPEG:QUJDRE\r\n VGR0g=\r\n"
+    return CARD.format(name=name, extra=extra)
+
+
+class TestRecordStream(unittest.TestCase):
+    """Offsets and record reading"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cards.vcf')
+        with open(self.path, 'w', encoding='utf-8', newline='') as f:
+            f.write(card('Jürgen Müller', 'j@x.at') + "\r\n" + card('Anna Meier', photo=True))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_offsets_round_trip(self):
+        records = list(iter_vcard_records(self.path))
+        self.assertEqual(len(records), 2)
+        with VCardRecordReader() as reader:
+            for ref, text in records:
+                self.assertEqual(reader.read(ref), text)
+            self.assertEqual(reader.load(records[0][0]).fn.value, 'Jürgen Müller')
+
+    def test_strip_photo(self):
+        _, text = list(iter_vcard_records(self.path))[1]
+        stripped = strip_properties(text, ['PHOTO'])
+        self.assertNotIn('PHOTO', stripped)
+        self.assertNotIn('VGR0g', stripped)
+        self.assertEqual(vobject.readOne(stripped).fn.value, 'Anna Meier')
+
+
+MIXED = (b"junk before the first card\r\n"
+         b"BEGIN:VCARD\r\nVERSION:3.0\r\nFN:J\xc3\xbcrgen\r\nNOTE:folded across\r\n  two lines\r\nEND:VCARD  \n"
+         b"begin:vcard\rVERSION:3.0\rFN:Lone CR\rEND:VCARD\r"
+         b"BEGIN:VCARD\nFN:Unterminated\n"
+         b"BEGIN:VCARD\nVERSION:3.0\nFN:Anna\nEND:VCARD")
+
+
+class TestBlockSplitter(unittest.TestCase):
+    """One splitter for every source type"""
+
+    def test_mixed_line_endings(self):
+        blocks = list(iter_vcard_blocks(io.BytesIO(MIXED)))
+        self.assertEqual([b.lines[2] for b in blocks], ['FN:Jürgen', 'FN:Lone CR', 'FN:Anna'])
+        for block in blocks:
+            self.assertEqual(MIXED[block.offset:block.offset + block.length].decode('utf-8'), block.raw)
+        self.assertEqual(blocks[0].lines[-1], 'END:VCARD  ')
+        self.assertEqual(blocks[0].unfolded()[3], 'NOTE:folded across two lines')
+        self.assertEqual(blocks[1].text('\r\n'), 'begin:vcard\r\nVERSION:3.0\r\nFN:Lone CR\r\nEND:VCARD')
+
+    def test_sources_agree(self):
+        expected = list(iter_vcard_blocks(io.BytesIO(MIXED)))
+        with tempfile.NamedTemporaryFile(suffix='.vcf') as f:
+            f.write(MIXED)
+            f.flush()
+            self.assertEqual(list(iter_vcard_blocks(f.name)), expected)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                self.assertEqual(list(iter_vcard_blocks(mapped)), expected)
+        text_blocks = list(iter_vcard_blocks(io.StringIO(MIXED.decode('utf-8'))))
+        self.assertEqual([b.lines for b in text_blocks], [b.lines for b in expected])
+
+    def test_validator_uses_splitter(self):
+        texts = VCardStandardsValidator()._split_vcards(MIXED.decode('utf-8'))
+        self.assertEqual(texts, [b.text() for b in iter_vcard_blocks(io.BytesIO(MIXED))])
+
+
+class TestStreamingMerges(unittest.TestCase):
+    """Streaming and in-memory merges agree"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.main = self._write('main.vcf', [
+            card('Anna Meier', 'anna@gmail.com', '0664 1234567'),
+            card('Thomas Gruber', 'thomas@gmx.at')
+        ])
+        self.extra = self._write('extra.vcf', [
+            card('Anna Meier', 'a.n.n.a@gmail.com', photo=True),
+            card('Tom Gruber', tel='+43 664 7654321'),
+            card('Eva Huber', 'eva@a1.net')
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, name, cards):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(''.join(cards))
+        return path
+
+    def _cards(self, path):
+        with open(path, encoding='utf-8') as f:
+            return sorted(vcard.serialize() for vcard in vobject.readComponents(f.read()))
+
+    def test_vcard_merger(self):
+        outputs = {}
+        for mode in ('in_memory', 'streaming'):
+            merger = VCardMerger()
+            outputs[mode] = os.path.join(self.tmpdir, f'{mode}.vcf')
+            with contextlib.redirect_stdout(io.StringIO()):
+                count = getattr(merger, f'merge_{mode}')(self.main, [self.extra], outputs[mode])
+            self.assertEqual(count, 4)
+            self.assertEqual(merger.merge_stats['duplicates_found'], 1)
+        self.assertEqual(self._cards(outputs['in_memory']), self._cards(outputs['streaming']))
+
+    def test_intelligent_merger(self):
+        databases = {'sara': self.main, 'iphone_contacts': self.extra}
+        outputs = {}
+        for streaming in (False, True):
+            merger = IntelligentContactMerger()
+            outputs[streaming] = os.path.join(self.tmpdir, f'intelligent_{streaming}.vcf')
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = merger.merge_databases(databases, outputs[streaming], streaming=streaming)
+            self.assertEqual(stats['auto_merged'], 1)
+        self.assertEqual(self._cards(outputs[False]), self._cards(outputs[True]))
+
+    def test_review_groups_loaded_one_at_a_time(self):
+        databases = {
+            'sara': self._write('office.vcf', [card('Office Huber', 'office@huber.at'),
+                                               card('Office Maier', tel='+43 1 5550000')]),
+            'iphone_contacts': self._write('people.vcf', [card('Karl Gruber', 'office@huber.at'),
+                                                          card('Lisa Berger', tel='01 5550000')])
+        }
+        merger = IntelligentContactMerger()
+        events = []
+        load_group, group_html = merger.load_group, merger._review_group_html
+        merger.load_group = lambda *args: events.append('load') or load_group(*args)
+        merger._review_group_html = lambda *args: events.append('write') or group_html(*args)
+        output = os.path.join(self.tmpdir, 'review.vcf')
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = merger.merge_databases(databases, output, streaming=True)
+        self.assertEqual(stats['manual_review'], 2)
+        self.assertEqual(events, ['load', 'write', 'load', 'write'])
+        with open(output.replace('.vcf', '_review.html')) as f:
+            html = f.read()
+        self.assertIn('Karl Gruber', html)
+        self.assertTrue(html.rstrip().endswith('</html>'))
+
+
+if __name__ == "__main__":
+    unittest.main()
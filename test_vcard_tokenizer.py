@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the lightweight vCard tokenizer
+
+Ensures:
+- Decoded values match vobject (text escapes, N/ADR/ORG, base64 PHOTO)
+- Params, groups and byte spans are reported per property
+- vCard 2.1 input falls back to vobject for that card only
+- Records can be pickled and used in place of vobject by the parser
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import vobject
+
+from parser import VCardParser
+from vcard_tokenizer import iter_cards, read_cards
+
+CARDS = (
+    "BEGIN:VCARD\r\n"
+    "VERSION:3.0\r\n"
+    "FN:Jürgen Müller\r\n"
+    "N:Müller;Jürgen;;Dr.;\r\n"
+    "item1.EMAIL;TYPE=INTERNET,pref:j@x.at\r\n"
+    "item1.X-ABLabel:_$!<Other>!$_\r\n"
+    "TEL;TYPE=CELL;TYPE=\"VOICE\":+43 664 1234567\r\n"
+    "ORG:Acme\\, Inc;Sales\r\n"
+    "ADR;TYPE=HOME:;;Hauptstraße 1;Linz;;4020;Austria\r\n"
+    "NOTE:first line\\nsecond line\\; with a long text that was folded across\r\n"
+    "  two lines\r\n"
+    "PHOTO;ENCODING=b;TYPE=JPEG:QUJDRE\r\n"
+    " VGR0g=\r\n"
+    "END:VCARD\r\n"
+    "BEGIN:VCARD\n"
+    "VERSION:2.1\n"
+    "FN:Old Phone\n"
+    "TEL;CELL:0664 7654321\n"
+    "END:VCARD\n"
+)
+
+
+class TestTokenizer(unittest.TestCase):
+    """Records against vobject"""
+
+    def setUp(self):
+        self.cards = read_cards(CARDS)
+        self.reference = list(vobject.readComponents(CARDS))
+
+    def test_values_match_vobject(self):
+        self.assertEqual(len(self.cards), 2)
+        for card, reference in zip(self.cards, self.reference):
+            self.assertEqual(sorted(card.contents), sorted(reference.contents))
+            for name, props in reference.contents.items():
+                self.assertEqual([str(p.value) for p in card.contents[name]],
+                                 [str(p.value) for p in props], name)
+        card = self.cards[0]
+        self.assertEqual(card.photo.value, b'ABCDEFGH')
+        self.assertEqual(card.n.value.family, 'Müller')
+        self.assertEqual(card.org.value, ['Acme, Inc', 'Sales'])
+        self.assertEqual(card.adr.value.city, 'Linz')
+
+    def test_params_groups_and_spans(self):
+        card = self.cards[0]
+        self.assertEqual(card.tel.type_paramlist, ['CELL', 'VOICE'])
+        self.assertEqual(card.email.type_param, 'INTERNET')
+        self.assertEqual(card.email.group, 'item1')
+        self.assertFalse(hasattr(card, 'url'))
+        self.assertEqual(card.values('email'), ['j@x.at'])
+
+        data = CARDS.encode('utf-8')
+        start, end = card.note.span
+        self.assertTrue(data[card.offset + start:card.offset + end].startswith(b'NOTE:first line'))
+        self.assertTrue(data[card.offset + start:card.offset + end].endswith(b'  two lines\r\n'))
+        start, end = card.photo.span
+        self.assertEqual(data[start:end], b'PHOTO;ENCODING=b;TYPE=JPEG:QUJDRE\r\n VGR0g=\r\n')
+
+    def test_lazy_decoding(self):
+        photo = self.cards[0].photo
+        self.assertIsNone(photo._value)
+        self.assertEqual(photo.value, b'ABCDEFGH')
+        self.assertIsNotNone(photo._value)
+
+    def test_fallback(self):
+        self.assertFalse(self.cards[0].fallback)
+        old = self.cards[1]
+        self.assertTrue(old.fallback)
+        self.assertEqual(old.tel.type_param, 'CELL')
+        self.assertEqual(old.to_vobject().fn.value, 'Old Phone')
+
+    def test_pickle(self):
+        card = pickle.loads(pickle.dumps(self.cards[0]))
+        self.assertEqual(card.fn.value, 'Jürgen Müller')
+        self.assertEqual(card.serialize(), self.cards[0].raw)
+
+
+class TestParserOptIn(unittest.TestCase):
+    """VCardParser(tokenizer=True) gives the same contacts"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'contacts.vcf')
+        with open(self.path, 'w', encoding='utf-8', newline='') as f:
+            f.write(CARDS.split('BEGIN:VCARD\nVERSION:2.1')[0])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_same_contacts(self):
+        def strip(contacts):
+            return [{k: v for k, v in c.items() if k not in ('id', 'original_vcard')} for c in contacts]
+
+        expected = VCardParser(self.path).parse()
+        contacts = VCardParser(self.path, tokenizer=True).parse()
+        self.assertEqual(strip(contacts), strip(expected))
+        self.assertEqual([c.fn.value for c in iter_cards(self.path)], ['Jürgen Müller'])
+
+
+if __name__ == "__main__":
+    unittest.main()
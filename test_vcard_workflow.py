@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory VCardWorkflow mode
+
+Ensures:
+- In-memory and file mode produce the same output and reports
+- Only the final file is written unless intermediates are requested
+- Every stage reports its duration
+- Fix stages report changed cards and only those are re-validated
+- Cards rewritten by serialization alone are re-validated too
+"""
+
+import functools
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import vobject
+
+import vcard_soft_compliance
+from vcard_fixer import VCardFixer
+from vcard_validator import VCardStandardsValidator
+from vcard_workflow import VCardWorkflow
+
+CARDS = """BEGIN:VCARD
+VERSION:3.0
+N:SMITH;JOHN;;;
+NOTE:Call me at 555-1234 or email john@example.com
+END:VCARD
+BEGIN:VCARD
+VERSION:3.0
+FN:jane doe
+N:doe;jane;;;
+EMAIL:JANE@EXAMPLE.COM
+TEL:(415) 555-1234
+END:VCARD
+BEGIN:VCARD
+VERSION:3.0
+FN:Acme Office
+EMAIL:test@example.com
+EMAIL:TEST@EXAMPLE.COM
+ORG:acme corp
+END:VCARD
+"""
+
+# Lowercase BEGIN/END: invalid as read, valid once vobject writes it back
+LOWERCASE_CARDS = """begin:vcard
+VERSION:3.0
+FN:Anna Meier
+N:Meier;Anna;;;
+end:vcard
+BEGIN:VCARD
+VERSION:3.0
+N:Gruber;Thomas;;;
+END:VCARD
+"""
+
+# No DNS lookups in tests
+OFFLINE_EMAIL = functools.partial(vcard_soft_compliance.validate_email, check_deliverability=False)
+
+
+class TestInMemoryWorkflow(unittest.TestCase):
+    """Single-pass mode matches the file-based workflow"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _run(self, name, content=CARDS, **options):
+        directory = os.path.join(self.tmpdir, name)
+        os.makedirs(directory)
+        path = os.path.join(directory, 'contacts.vcf')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        with mock.patch.object(vcard_soft_compliance, 'validate_email', OFFLINE_EMAIL):
+            result = VCardWorkflow(backup=False, **options).process_file(path)
+        return result, sorted(os.listdir(directory))
+
+    def test_same_output_as_file_mode(self):
+        file_result, file_outputs = self._run('file')
+        memory_result, memory_outputs = self._run('memory', in_memory=True)
+
+        self.assertEqual(file_outputs, ['contacts.vcf', 'contacts_FIXED.vcf', 'contacts_FIXED_SOFT.vcf'])
+        self.assertEqual(memory_outputs, ['contacts.vcf', 'contacts_FIXED_SOFT.vcf'])
+        with open(file_result['working_file'], encoding='utf-8') as f:
+            expected = f.read()
+        with open(memory_result['output_file'], encoding='utf-8') as f:
+            self.assertEqual(f.read(), expected)
+
+        for key in ('initial_validation', 'post_fix_validation', 'post_soft_validation',
+                    'soft_compliance_report', 'final_valid', 'vcards_parsed', 'sample_vcards'):
+            self.assertEqual(memory_result[key], file_result[key], key)
+        self.assertEqual(memory_result['fix_report']['improvement'], file_result['fix_report']['improvement'])
+        self.assertTrue(memory_result['final_valid'])
+
+    def test_stage_timings(self):
+        result, _ = self._run('memory', in_memory=True)
+        self.assertEqual(list(result['stage_timings']), [
+            'read', 'initial_validation', 'parse', 'hard_fix', 'post_fix_validation',
+            'soft_fix', 'post_soft_validation', 'write'])
+        file_result, _ = self._run('file')
+        self.assertIn('soft_fix', file_result['stage_timings'])
+
+    def test_serialization_only_changes(self):
+        for mode, options in (('file', {}), ('memory', {'in_memory': True})):
+            result, _ = self._run(mode, LOWERCASE_CARDS, **options)
+            self.assertEqual(result['initial_validation']['error_count'], 3, mode)
+            self.assertEqual(result['post_fix_validation']['error_count'], 0, mode)
+            self.assertEqual(result['post_fix_validation']['cards_revalidated'], 2, mode)
+            self.assertTrue(result['final_valid'], mode)
+            self.assertEqual(VCardStandardsValidator().validate_file(result['working_file'])[:2], (True, []))
+
+    def test_keep_intermediate(self):
+        _, outputs = self._run('memory', in_memory=True, keep_intermediate=True)
+        self.assertEqual(outputs, ['contacts.vcf', 'contacts_FIXED.vcf', 'contacts_FIXED_SOFT.vcf'])
+
+
+class TestIncrementalValidation(unittest.TestCase):
+    """Dirty sets and the validation cache"""
+
+    def test_fixer_reports_changed_cards(self):
+        vcards = list(vobject.readComponents(CARDS))
+        fixer = VCardFixer()
+        fixer.fix_vcards(vcards)
+        self.assertEqual(list(fixer.changed_cards), [0, 2])
+
+        checker = vcard_soft_compliance.SoftComplianceChecker()
+        with mock.patch.object(vcard_soft_compliance, 'validate_email', OFFLINE_EMAIL):
+            fixed, _ = checker.check_and_fix_vcards(vcards)
+            self.assertEqual(sorted(checker.changed_cards), [0, 1, 2])
+            # Already compliant cards are not reported again
+            checker.check_and_fix_vcards(fixed)
+        self.assertEqual(checker.changed_cards, {})
+
+    def test_revalidate_only_changed(self):
+        validator = VCardStandardsValidator()
+        vcards = list(vobject.readComponents(CARDS))
+        validation = validator.validate_content_cards(CARDS)
+        self.assertEqual(len(validation.errors), 1)
+
+        fixer = VCardFixer()
+        fixer.fix_vcards(vcards)
+        with mock.patch.object(validator, '_validate_single_vcard', wraps=validator._validate_single_vcard) as check:
+            revalidated = validator.revalidate(validation, {i: vcards[i].serialize() for i in fixer.changed_cards})
+            self.assertEqual(check.call_count, 2)
+        self.assertEqual(revalidated.summary(), validator.validate_cards([v.serialize() for v in vcards]).summary())
+        self.assertEqual(revalidated.revalidated, 2)
+
+    def test_results_cached_by_card_hash(self):
+        validator = VCardStandardsValidator()
+        validator.validate_content(CARDS)
+        self.assertEqual(validator.cache_stats, {'hits': 0, 'misses': 3})
+        first_card = CARDS.split('END:VCARD')[0] + 'END:VCARD\n'
+        is_valid, errors, _ = validator.validate_content(CARDS.replace(first_card, '') + first_card)
+        self.assertEqual(validator.cache_stats, {'hits': 3, 'misses': 3})
+        self.assertEqual(errors, ['vCard 2: Missing required FN (Formatted Name)'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Three-Way Merge - Property-level merge of concurrent vCard edits
+
+Two review sessions that read the same contact version used to overwrite
+each other on save. Given the version both sessions started from (base),
+the stored version (theirs) and the incoming edit (ours), a property is
+taken from whichever side changed it:
+
+- unchanged on both sides, or changed identically: kept
+- changed on one side only: that side wins
+- changed differently on both sides: conflict
+
+Properties are compared on their unfolded text, so re-folding a long line is
+not an edit. Grouped properties (item1.URL + item1.X-ABLabel) are merged as
+one unit, and the raw (folded) lines are copied to the result unchanged.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+
+@dataclass
+class PropertyConflict:
+    """A property both sides changed differently"""
+    name: str
+    base: List[str]
+    ours: List[str]
+    theirs: List[str]
+
+
+@dataclass
+class ThreeWayResult:
+    """Outcome of a three-way merge"""
+    vcard_data: str
+    conflicts: List[PropertyConflict] = field(default_factory=list)
+    merged_properties: List[str] = field(default_factory=list)  # taken from ours
+
+    @property
+    def clean(self) -> bool:
+        return not self.conflicts
+
+
+def property_key(line: str) -> str:
+    """Merge unit of an unfolded content line: its group, else its name"""
+    name = line.split(':', 1)[0].split(';', 1)[0].upper()
+    group, dot, _ = name.partition('.')
+    return group if dot else name
+
+
+def split_properties(vcard_data: str) -> "OrderedDict[str, List[Tuple[str, str]]]":
+    """
+    Property key -> [(unfolded line, raw folded text)] in card order.
+
+    BEGIN and END are dropped; they are added back when the card is written.
+    """
+    logical = []
+    for raw in vcard_data.splitlines(keepends=True):
+        if raw[:1] in (' ', '\t') and logical:
+            logical[-1][0].append(raw[1:].rstrip('\r\n'))
+            logical[-1][1].append(raw)
+        elif raw.strip():
+            logical.append(([raw.rstrip('\r\n')], [raw]))
+
+    properties = OrderedDict()
+    for parts, raw_lines in logical:
+        unfolded = ''.join(parts)
+        key = property_key(unfolded)
+        if key in ('BEGIN', 'END'):
+            continue
+        raw = ''.join(raw_lines)
+        if not raw.endswith('\n'):
+            raw += '\r\n'
+        properties.setdefault(key, []).append((unfolded, raw))
+    return properties
+
+
+def _values(entries) -> List[str]:
+    return [unfolded for unfolded, _ in entries]
+
+
+def three_way_merge(base: str, ours: str, theirs: str) -> ThreeWayResult:
+    """Merge ours and theirs, both derived from base"""
+    base_props = split_properties(base)
+    our_props = split_properties(ours)
+    their_props = split_properties(theirs)
+    newline = '\r\n' if '\r\n' in theirs else '\n'
+
+    merged: Dict[str, list] = {}
+    result = ThreeWayResult(vcard_data='')
+    for key in list(their_props) + [k for k in our_props if k not in their_props]:
+        base_values = _values(base_props.get(key, []))
+        our_values = _values(our_props.get(key, []))
+        their_values = _values(their_props.get(key, []))
+
+        if our_values == their_values or our_values == base_values:
+            merged[key] = their_props.get(key, [])
+        elif their_values == base_values:
+            merged[key] = our_props.get(key, [])
+            result.merged_properties.append(key)
+        else:
+            merged[key] = their_props.get(key, [])
+            result.conflicts.append(PropertyConflict(key, base_values, our_values, their_values))
+
+    lines = ['BEGIN:VCARD' + newline]
+    for entries in merged.values():
+        lines.extend(raw for _, raw in entries)
+    lines.append('END:VCARD' + newline)
+    result.vcard_data = ''.join(lines)
+    return result
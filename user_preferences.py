@@ -35,6 +35,9 @@ class UserPreferences:
     
     # Duplicate merge strategy
     auto_merge_confidence_threshold: float = 0.95
+    review_confidence_threshold: float = 0.70  # below: keep contacts separate
+    match_rules: List[Dict[str, Any]] = None  # None = match_rules.DEFAULT_RULES
+    match_thresholds: Dict[str, float] = None  # overrides match_rules.DEFAULT_THRESHOLDS
     photo_selection_strategy: str = "highest_resolution"  # or "most_recent" or "reliable_source"
     note_combination_strategy: str = "preserve_all"  # or "keep_longest" or "reliable_source"
     
@@ -217,6 +220,7 @@ DEFAULT_PREFERENCES = UserPreferences(
     phone_priority="prefer_mobile",
     international_format="include_country_code",
     auto_merge_confidence_threshold=0.95,
+    review_confidence_threshold=0.70,
     photo_selection_strategy="highest_resolution",
     note_combination_strategy="preserve_all",
     auto_detect_business_contacts=True,
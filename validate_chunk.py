@@ -3,22 +3,22 @@
 
 import re
 
+from vcard_stream import iter_vcard_blocks
+
 def validate_chunk(filename):
     """Check each vCard in the chunk for potential issues"""
     
     print(f"Validating {filename}...")
     
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Find all vCards
-    vcards = re.findall(r'BEGIN:VCARD.*?END:VCARD', content, re.DOTALL)
-    
-    print(f"\nFound {len(vcards)} vCards in file")
-    
     problematic = []
+    photo_count = 0
+    special_chars = []
+    count = 0
     
-    for i, vcard in enumerate(vcards):
+    # Stream the vCards, one card in memory at a time
+    for i, block in enumerate(iter_vcard_blocks(filename)):
+        vcard = block.text()
+        count += 1
         issues = []
         
         # Check for required fields
@@ -34,8 +34,7 @@ def validate_chunk(filename):
             issues.append("Contains control characters")
         
         # Check for extremely long lines
-        lines = vcard.split('\n')
-        for line in lines:
+        for line in block.lines:
             if len(line) > 998:  # vCard line limit
                 issues.append(f"Line too long: {len(line)} chars")
         
@@ -47,6 +46,10 @@ def validate_chunk(filename):
         fn_match = re.search(r'FN:(.+)', vcard)
         name = fn_match.group(1).strip() if fn_match else "Unknown"
         
+        # Patterns checked across the whole file
+        photo_count += len(re.findall(r'PHOTO;ENCODING=b', vcard))
+        special_chars.extend(re.findall(r'FN:.*[<>"\'/\\|].*', vcard))
+        
         if issues:
             problematic.append({
                 'index': i + 1,
@@ -55,6 +58,8 @@ def validate_chunk(filename):
                 'vcard': vcard[:200] + '...' if len(vcard) > 200 else vcard
             })
     
+    print(f"\nFound {count} vCards in file")
+    
     # Report findings
     if problematic:
         print(f"\n⚠️  Found {len(problematic)} problematic vCards:")
@@ -70,12 +75,10 @@ def validate_chunk(filename):
     print("\n\nChecking for specific patterns...")
     
     # Check for base64 encoded photos
-    photo_count = len(re.findall(r'PHOTO;ENCODING=b', content))
     if photo_count > 0:
         print(f"  - Found {photo_count} contacts with embedded photos")
     
     # Check for special characters in names
-    special_chars = re.findall(r'FN:.*[<>"\'/\\|].*', content)
     if special_chars:
         print(f"  - Found {len(special_chars)} contacts with special characters in names")
         for sc in special_chars[:5]:
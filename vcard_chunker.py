@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+vCard Chunker - Split a master file into import-sized files by bytes
+
+Splitting every N cards ignores that a card is 300 bytes without a photo
+and up to 250 KB with one, so some parts of a "500 contacts" split are
+far larger than others and iCloud.com imports fail unpredictably.
+chunk_vcards() packs cards into files under a byte budget and a card
+count budget:
+
+- greedy: cards stay in file order, a new file starts when the next card
+  would exceed either budget. The master is read once and written as it
+  is read.
+- ffd: first-fit decreasing. Fewer, fuller files; card order inside a
+  file is kept but cards move between files. The master is streamed once
+  to size the cards (only offsets and sizes are kept), then the cards
+  are copied by offset.
+
+Cards over the per-card limit (iCloud: 256 KB) cannot be imported at all;
+they go to a separate file instead of breaking a chunk. A JSON manifest
+lists every file with its card count, size, SHA-256 and the indexes of
+the cards in it, plus the oversized cards by name.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from photo_optimizer import ICLOUD_CARD_LIMIT
+from vcard_stream import RecordRef, VCardBlock, VCardRecordReader, iter_vcard_blocks
+
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+DEFAULT_MAX_CARDS = 500
+STRATEGIES = ('greedy', 'ffd')
+
+
+def card_bytes(raw: str) -> bytes:
+    """A card as written to a chunk (original line endings, always newline-terminated)"""
+    if not raw.endswith(('\n', '\r')):
+        raw += '\r\n' if '\r\n' in raw else '\n'
+    return raw.encode('utf-8')
+
+
+def card_name(block: VCardBlock) -> str:
+    """FN of the card (for the manifest)"""
+    for line in block.unfolded():
+        name, _, value = line.partition(':')
+        if name.split(';')[0].split('.')[-1].upper() == 'FN':
+            return value.strip()
+    return ''
+
+
+class _ChunkFile:
+    """One output file, hashed as it is written"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.indexes: List[int] = []
+
+    def write(self, index: int, data: bytes):
+        self.file.write(data)
+        self.digest.update(data)
+        self.size += len(data)
+        self.indexes.append(index)
+
+    def close(self) -> Dict:
+        self.file.close()
+        return {
+            'file': self.path,
+            'cards': len(self.indexes),
+            'bytes': self.size,
+            'sha256': self.digest.hexdigest(),
+            'indexes': self.indexes,
+        }
+
+
+def first_fit_decreasing(sizes: List[Tuple[int, int]], max_bytes: int, max_cards: int) -> List[List[int]]:
+    """Pack (index, size) items into bins; returns the item indexes of each bin in original order"""
+    bins: List[List] = []  # [bytes, indexes]
+    for index, size in sorted(sizes, key=lambda item: (-item[1], item[0])):
+        for packed in bins:
+            if packed[0] + size <= max_bytes and len(packed[1]) < max_cards:
+                packed[0] += size
+                packed[1].append(index)
+                break
+        else:
+            bins.append([size, [index]])
+    return [sorted(indexes) for _, indexes in bins]
+
+
+def chunk_vcards(input_path: str, output_template: str,
+                 max_bytes: int = DEFAULT_MAX_BYTES, max_cards: int = DEFAULT_MAX_CARDS,
+                 card_limit: int = ICLOUD_CARD_LIMIT, strategy: str = 'greedy',
+                 manifest_path: Optional[str] = None, oversized_path: Optional[str] = None) -> Dict:
+    """
+    Split input_path into files named output_template.format(index=1, 2, ...).
+
+    Args:
+        max_bytes / max_cards: Budget per output file
+        card_limit: Cards larger than this (or than max_bytes) go to
+            oversized_path instead (default: <input>_oversized.vcf)
+        strategy: 'greedy' (file order) or 'ffd' (first-fit decreasing)
+        manifest_path: Default <input>_chunks.json
+
+    Returns:
+        The manifest (also written to manifest_path)
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}, use one of {STRATEGIES}")
+    if '{index' not in output_template:
+        raise ValueError("output_template needs an {index} field")
+    stem = os.path.splitext(input_path)[0]
+    manifest_path = manifest_path or f"{stem}_chunks.json"
+    oversized_path = oversized_path or f"{stem}_oversized.vcf"
+    limit = min(card_limit, max_bytes)
+
+    chunks: List[Dict] = []
+    oversized: List[Dict] = []
+    oversized_file: Optional[_ChunkFile] = None
+    sizes: List[Tuple[int, int]] = []
+    refs: Dict[int, RecordRef] = {}
+    current: Optional[_ChunkFile] = None
+    total_cards = total_bytes = 0
+
+    for index, block in enumerate(iter_vcard_blocks(input_path)):
+        data = card_bytes(block.raw)
+        total_cards += 1
+        total_bytes += len(data)
+        if len(data) > limit:
+            if oversized_file is None:
+                oversized_file = _ChunkFile(oversized_path)
+            oversized_file.write(index, data)
+            oversized.append({'index': index, 'name': card_name(block), 'bytes': len(data)})
+            continue
+        if strategy == 'ffd':
+            sizes.append((index, len(data)))
+            refs[index] = RecordRef(input_path, block.offset, block.length)
+            continue
+        if current is None or current.size + len(data) > max_bytes or len(current.indexes) >= max_cards:
+            if current is not None:
+                chunks.append(current.close())
+            current = _ChunkFile(output_template.format(index=len(chunks) + 1))
+        current.write(index, data)
+    if current is not None:
+        chunks.append(current.close())
+
+    if strategy == 'ffd':
+        with VCardRecordReader() as reader:
+            for number, indexes in enumerate(first_fit_decreasing(sizes, max_bytes, max_cards), 1):
+                chunk = _ChunkFile(output_template.format(index=number))
+                for index in indexes:
+                    chunk.write(index, card_bytes(reader.read(refs[index])))
+                chunks.append(chunk.close())
+
+    manifest = {
+        'source': input_path,
+        'created_at': datetime.now().isoformat(),
+        'strategy': strategy,
+        'max_bytes': max_bytes,
+        'max_cards': max_cards,
+        'card_limit': card_limit,
+        'total_cards': total_cards,
+        'total_bytes': total_bytes,
+        'chunks': chunks,
+        'oversized': oversized,
+        'oversized_file': oversized_file.close()['file'] if oversized_file else None,
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    """Split a vCard file from the command line"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Split a vCard file into files under a byte budget")
+    parser.add_argument("input", help="vCard file to split")
+    parser.add_argument("--output", help="Output name with an {index} field (default: <input>_part{index:02d}.vcf)")
+    parser.add_argument("--max-kb", type=int, default=DEFAULT_MAX_BYTES // 1024, help="Maximum size per file in KB")
+    parser.add_argument("--max-cards", type=int, default=DEFAULT_MAX_CARDS, help="Maximum cards per file")
+    parser.add_argument("--card-limit-kb", type=int, default=ICLOUD_CARD_LIMIT // 1024,
+                        help="Cards above this size go to a separate file")
+    parser.add_argument("--strategy", choices=STRATEGIES, default='greedy',
+                        help="greedy keeps file order, ffd packs fewer and fuller files")
+    parser.add_argument("--manifest", help="Manifest path (default: <input>_chunks.json)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ File not found: {args.input}")
+        return
+    stem = os.path.splitext(args.input)[0]
+    output = args.output or stem + '_part{index:02d}.vcf'
+    manifest_path = args.manifest or stem + '_chunks.json'
+    manifest = chunk_vcards(args.input, output, max_bytes=args.max_kb * 1024, max_cards=args.max_cards,
+                            card_limit=args.card_limit_kb * 1024, strategy=args.strategy,
+                            manifest_path=manifest_path)
+
+    print(f"Split {manifest['total_cards']:,} cards ({manifest['total_bytes'] / 1024 / 1024:.1f} MB)")
+    print("=" * 60)
+    for chunk in manifest['chunks']:
+        print(f"  {chunk['file']}: {chunk['cards']} cards, {chunk['bytes'] / 1024:.0f} KB")
+    if manifest['oversized']:
+        print(f"\n⚠️  {len(manifest['oversized'])} cards over {args.card_limit_kb} KB "
+              f"moved to {manifest['oversized_file']}:")
+        for card in manifest['oversized']:
+            print(f"  #{card['index'] + 1} {card['name'] or '(no name)'}: {card['bytes'] / 1024:.0f} KB")
+        print("   Shrink their photos (fix_oversized_photos.py) before importing them")
+    print(f"\n✅ {len(manifest['chunks'])} files, manifest: {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
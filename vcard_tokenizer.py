@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+vCard Tokenizer - Lightweight read-only vCard records
+
+vobject.readComponents builds a full component tree for every card and
+decodes every value (base64 PHOTO data included), even when a tool only
+reads FN, EMAIL and TEL. This tokenizer splits vCard 3.0/4.0 cards into
+compact records instead:
+
+1. Card: properties in card order plus a name index, and the card's offset
+   and length in the source
+2. Property: name, group, params, raw value and byte span (relative to the
+   card start); the value is only decoded when it is read
+
+Records answer the read-only subset of the vobject API the tools use
+(hasattr(card, 'fn'), card.email_list, card.contents, tel.type_param,
+n.value.family, ...), so callers can opt in by swapping the parse call.
+
+Input the tokenizer does not handle (vCard 2.1, QUOTED-PRINTABLE, lines
+without a value) is parsed with vobject for that card only (Card.fallback).
+"""
+
+import base64
+import io
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import vobject
+
+from vcard_stream import VCardBlock, iter_vcard_blocks
+
+# Values split into components on unescaped ';' (vobject value classes)
+STRUCTURED = {
+    'N': ('family', 'given', 'additional', 'prefix', 'suffix'),
+    'ADR': ('box', 'extended', 'street', 'city', 'region', 'code', 'country'),
+}
+# Values split into a list on unescaped ';' or ','
+LIST_VALUES = {'ORG': ';', 'CATEGORIES': ','}
+
+_UNESCAPE = re.compile(r'\\(.)')
+_ESCAPES = {'n': '\n', 'N': '\n'}
+
+
+class FallbackRequired(Exception):
+    """The card needs the full vobject parser"""
+
+
+def unescape(text: str) -> str:
+    """Undo vCard text escaping (\\n, \\, \\; \\\\)"""
+    if '\\' not in text:
+        return text
+    return _UNESCAPE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), text)
+
+
+def split_unescaped(text: str, separator: str) -> List[str]:
+    """Split on separators that are not escaped with a backslash"""
+    if '\\' not in text:
+        return text.split(separator)
+    parts = []
+    current = []
+    escaped = False
+    for ch in text:
+        if escaped:
+            current.append('\\' + ch)
+            escaped = False
+        elif ch == '\\':
+            escaped = True
+        elif ch == separator:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append(''.join(current))
+    return parts
+
+
+def _split_outside_quotes(text: str, separator: str) -> List[str]:
+    if '"' not in text:
+        return text.split(separator)
+    parts = ['']
+    quoted = False
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif ch == separator and not quoted:
+            parts.append('')
+            continue
+        parts[-1] += ch
+    return parts
+
+
+class Property:
+    """One content line; the value is decoded on first access"""
+
+    __slots__ = ('name', 'group', 'params', 'raw_value', 'span', '_value')
+
+    def __init__(self, name: str, group: Optional[str], params: Dict[str, List[str]],
+                 raw_value: Optional[str], span: Optional[Tuple[int, int]] = None):
+        self.name = name  # upper case, like vobject
+        self.group = group
+        self.params = params  # upper-case key -> values
+        self.raw_value = raw_value
+        self.span = span  # (start, end) bytes from the start of the card
+        self._value = None
+
+    @property
+    def value(self):
+        if self._value is None:
+            self._value = self._decode()
+        return self._value
+
+    def _decode(self):
+        raw = self.raw_value
+        encoding = self.params.get('ENCODING', [''])[0].upper()
+        if encoding in ('B', 'BASE64'):
+            return base64.b64decode(''.join(raw.split()))
+        if self.name in STRUCTURED:
+            parts = [unescape(p) for p in split_unescaped(raw, ';')]
+            fields = STRUCTURED[self.name]
+            parts += [''] * (len(fields) - len(parts))
+            value_class = vobject.vcard.Name if self.name == 'N' else vobject.vcard.Address
+            return value_class(**dict(zip(fields, parts)))
+        if self.name in LIST_VALUES:
+            return [unescape(p) for p in split_unescaped(raw, LIST_VALUES[self.name])]
+        return unescape(raw)
+
+    def __getattr__(self, attr):
+        # vobject style parameter access: type_param, type_paramlist
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        if attr.endswith('_paramlist'):
+            key = attr[:-len('_paramlist')].upper()
+            if key in self.params:
+                return self.params[key]
+        elif attr.endswith('_param'):
+            key = attr[:-len('_param')].upper()
+            if key in self.params:
+                return self.params[key][0]
+        raise AttributeError(attr)
+
+    @classmethod
+    def from_vobject(cls, child) -> 'Property':
+        params = {k.upper(): list(v) for k, v in child.params.items()}
+        if child.singletonparams:
+            # vCard 2.1 bare parameters (TEL;CELL) are types
+            params.setdefault('TYPE', []).extend(child.singletonparams)
+        prop = cls(child.name.upper(), child.group, params, None)
+        prop._value = child.value
+        return prop
+
+    def __repr__(self):
+        return f"<Property {self.name}{self.params or ''}: {self.raw_value!r}>"
+
+
+class Card:
+    """
+    One tokenized vCard.
+
+    card.fn / card.email_list / card.contents work as with vobject; raw is
+    the card text as read, and to_vobject() parses it fully when needed.
+    """
+
+    __slots__ = ('offset', 'length', 'raw', 'properties', 'contents', 'fallback')
+
+    def __init__(self, offset: int, length: int, raw: str, properties: List[Property],
+                 fallback: bool = False):
+        self.offset = offset
+        self.length = length
+        self.raw = raw
+        self.properties = properties
+        self.fallback = fallback
+        self.contents: Dict[str, List[Property]] = {}
+        for prop in properties:
+            self.contents.setdefault(prop.name.lower(), []).append(prop)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        if attr.endswith('_list'):
+            props = self.contents.get(attr[:-len('_list')])
+            if props:
+                return props
+        else:
+            props = self.contents.get(attr)
+            if props:
+                return props[0]
+        raise AttributeError(attr)
+
+    def get(self, name: str, default=None):
+        """Decoded value of the first property called name"""
+        props = self.contents.get(name.lower())
+        return props[0].value if props else default
+
+    def values(self, name: str) -> list:
+        """Decoded values of every property called name"""
+        return [prop.value for prop in self.contents.get(name.lower(), [])]
+
+    def getChildren(self) -> List[Property]:
+        return self.properties
+
+    def serialize(self) -> str:
+        """The card as read (records are read-only)"""
+        return self.raw
+
+    def to_vobject(self):
+        return vobject.readOne(self.raw)
+
+    def __repr__(self):
+        return f"<Card {self.get('fn', '?')!r} ({len(self.properties)} properties)>"
+
+
+def tokenize_line(line: str) -> Tuple[Optional[str], str, Dict[str, List[str]], str]:
+    """(group, NAME, params, raw value) of one unfolded content line"""
+    colon = line.find(':')
+    if colon < 0:
+        raise FallbackRequired(f"no value: {line[:40]!r}")
+    if '"' in line[:colon]:
+        quoted = False
+        for colon, ch in enumerate(line):
+            if ch == '"':
+                quoted = not quoted
+            elif ch == ':' and not quoted:
+                break
+    head = line[:colon]
+    value = line[colon + 1:]
+
+    parts = _split_outside_quotes(head, ';') if ';' in head else [head]
+    group, _, name = parts[0].rpartition('.')
+    params: Dict[str, List[str]] = {}
+    for part in parts[1:]:
+        key, eq, param_value = part.partition('=')
+        if not eq:
+            # vCard 2.1 bare parameter (TEL;CELL:...)
+            raise FallbackRequired(f"bare parameter {part!r}")
+        key = key.strip().upper()
+        if key == 'ENCODING' and param_value.upper() == 'QUOTED-PRINTABLE':
+            raise FallbackRequired("quoted-printable value")
+        params.setdefault(key, []).extend(v.strip('"') for v in _split_outside_quotes(param_value, ','))
+    return group or None, name.strip().upper(), params, value
+
+
+def tokenize_block(block: VCardBlock) -> Card:
+    """Tokenize one card, falling back to vobject for input it does not handle"""
+    try:
+        return Card(block.offset, block.length, block.raw, _tokenize_lines(block))
+    except FallbackRequired:
+        component = vobject.readOne(block.raw)
+        properties = [Property.from_vobject(child) for child in component.getChildren()]
+        return Card(block.offset, block.length, block.raw, properties, fallback=True)
+
+
+def _tokenize_lines(block: VCardBlock) -> List[Property]:
+    ascii_only = block.raw.isascii()
+    properties = []
+    position = 0
+    line_start = 0
+    logical = None
+    endings = iter(_line_lengths(block, ascii_only))
+
+    def finish(end):
+        group, name, params, value = tokenize_line(logical)
+        if name == 'VERSION' and value.strip() == '2.1':
+            raise FallbackRequired("vCard 2.1")
+        if name not in ('BEGIN', 'END'):
+            properties.append(Property(name, group, params, value, (line_start, end)))
+
+    for line in block.lines:
+        size = next(endings)
+        if line[:1] in (' ', '\t') and logical is not None:
+            logical += line[1:]
+        else:
+            if logical is not None:
+                finish(position)
+            logical = line
+            line_start = position
+        position += size
+    if logical is not None:
+        finish(position)
+    return properties
+
+
+def _line_lengths(block: VCardBlock, ascii_only: bool) -> Iterator[int]:
+    """Byte length of every physical line, line ending included"""
+    raw = block.raw
+    start = 0
+    for line in block.lines:
+        end = start + len(line)
+        # Step over the line ending (CRLF, LF or CR)
+        if raw.startswith('\r\n', end):
+            end += 2
+        elif end < len(raw):
+            end += 1
+        yield end - start if ascii_only else len(raw[start:end].encode('utf-8'))
+        start = end
+
+
+def iter_cards(source, errors: str = 'replace') -> Iterator[Card]:
+    """Tokenize every card of a path, file object or mmap (see iter_vcard_blocks)"""
+    for block in iter_vcard_blocks(source, errors):
+        yield tokenize_block(block)
+
+
+def read_cards(content: str) -> List[Card]:
+    """Tokenize vCard text already in memory (drop-in for vobject.readComponents)"""
+    return list(iter_cards(io.StringIO(content)))
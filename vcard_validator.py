@@ -1,17 +1,126 @@
 """
 VCard Standards Validator using vcard library
 RULE: Always use vcard library for validation, vobject for manipulation
+
+Incremental re-validation: results are kept per card (CardValidation) with
+the card_hash() of the text they were computed on, fix stages report which
+cards they changed (card_fingerprint), and revalidate() re-checks only cards
+whose written text differs from the validated text. Results are also cached
+by card_hash().
+
+Parallel validation: validate_file(workers=N) cuts the file into byte ranges
+that start at a BEGIN:VCARD line (card_byte_ranges), validates every range
+in a worker process and renumbers the messages with global card indexes,
+so errors read exactly as in a serial run.
 """
 
+import io
 import os
+import hashlib
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from typing import List, Dict, Tuple, Optional
 import vcard  # For validation only
 import vobject  # For manipulation only
+from vcard_stream import iter_vcard_blocks
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Smallest byte range handed to a validation worker
+MIN_CHUNK_BYTES = 64 * 1024
+
+
+def card_hash(vcard_text: str) -> str:
+    """Content hash of a card's text (line endings normalized)"""
+    return hashlib.sha1('\n'.join(vcard_text.splitlines()).encode('utf-8')).hexdigest()
+
+
+def card_fingerprint(vcard: vobject.vCard) -> str:
+    """
+    Content hash of a parsed card, much cheaper than serializing it.
+    
+    Covers names, groups, parameters and values in serialization order
+    (vobject writes properties sorted by name), so any change a fix stage
+    makes to the written card changes its fingerprint.
+    """
+    digest = hashlib.sha1()
+    for child in (c for name in sorted(vcard.contents) for c in vcard.contents[name]):
+        params = sorted((k, tuple(v)) for k, v in child.params.items())
+        digest.update(f"{child.group}.{child.name};{params}:".encode('utf-8'))
+        value = child.value
+        digest.update(value if isinstance(value, bytes) else str(value).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def card_byte_ranges(filepath: str, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """
+    Split a file into (start, end) byte ranges of about chunk_bytes.
+    
+    Ranges only start at a BEGIN:VCARD line, so no card is cut in two and
+    each range splits into the same cards as the whole file does.
+    """
+    ranges = []
+    start = offset = 0
+    with open(filepath, 'rb') as f:
+        for line in f:
+            if offset - start >= chunk_bytes and line.strip().upper() == b'BEGIN:VCARD':
+                ranges.append((start, offset))
+                start = offset
+            offset += len(line)
+    if offset > start or not ranges:
+        ranges.append((start, offset))
+    return ranges
+
+
+def _validate_byte_range(task: Tuple[str, int, int]) -> List[Tuple[List[str], List[str]]]:
+    """
+    Worker: validate the cards in one byte range of a file.
+    
+    Module level so it can be sent to worker processes. Messages are
+    returned without their "vCard N: " prefix; the caller adds the global
+    card index.
+    """
+    filepath, start, end = task
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    
+    validator = VCardStandardsValidator()
+    results = []
+    for index, block in enumerate(iter_vcard_blocks(io.BytesIO(data), errors='strict')):
+        prefix = f"vCard {index}: "
+        errors, warnings = validator._validate_single_vcard(block.text(), index)
+        results.append(([m[len(prefix):] if m.startswith(prefix) else m for m in errors],
+                         [m[len(prefix):] if m.startswith(prefix) else m for m in warnings]))
+    return results
+
+
+@dataclass
+class CardValidation:
+    """Per-card (errors, warnings) of one card list, in card order"""
+    results: List[Tuple[List[str], List[str]]]
+    strict: bool = True
+    revalidated: int = 0
+    # card_hash of the text each result was computed on (empty: unknown)
+    hashes: List[str] = field(default_factory=list)
+    
+    @property
+    def errors(self) -> List[str]:
+        return [e for errors, _ in self.results for e in errors]
+    
+    @property
+    def warnings(self) -> List[str]:
+        return [w for _, warnings in self.results for w in warnings]
+    
+    def summary(self) -> Tuple[bool, List[str], List[str]]:
+        """(is_valid, errors, warnings) as returned by validate_file"""
+        errors = self.errors
+        is_valid = len(errors) == 0 if self.strict else len(errors) < len(self.results) * 0.1
+        return is_valid, errors, self.warnings
+
 
 class VCardStandardsValidator:
     """
@@ -19,65 +128,151 @@ class VCardStandardsValidator:
     This class ONLY validates - it does not manipulate data.
     """
     
-    def __init__(self, strict=True):
+    def __init__(self, strict=True, cache_size=100000):
         self.strict = strict
         self.errors = []
         self.warnings = []
+        self.cache_size = cache_size
+        self.result_cache = {}  # card_hash -> (errors, warnings) without the card index
+        self.cache_stats = {'hits': 0, 'misses': 0}
         
-    def validate_file(self, filepath: str) -> Tuple[bool, List[str], List[str]]:
+    def validate_file(self, filepath: str, workers: int = 1,
+                      chunk_bytes: Optional[int] = None) -> Tuple[bool, List[str], List[str]]:
         """
         Validate an entire vCard file using vcard library.
         
+        Args:
+            filepath: vCard file
+            workers: Worker processes (1 = validate in this process)
+            chunk_bytes: Bytes per work unit when workers > 1 (default:
+                about four ranges per worker)
+        
         Returns:
             Tuple of (is_valid, errors, warnings)
         """
+        return self.validate_file_cards(filepath, workers, chunk_bytes).summary()
+    
+    def validate_file_cards(self, filepath: str, workers: int = 1,
+                            chunk_bytes: Optional[int] = None) -> CardValidation:
+        """validate_file with per-card results (a read failure is one error)"""
         logger.info(f"Validating file with vcard library: {filepath}")
         
         try:
-            # Use vcard library for validation
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Split into individual vCards
-            vcards = self._split_vcards(content)
-            
-            all_errors = []
-            all_warnings = []
-            
-            for i, vcard_text in enumerate(vcards):
-                errors, warnings = self._validate_single_vcard(vcard_text, i)
-                all_errors.extend(errors)
-                all_warnings.extend(warnings)
+            if workers > 1:
+                return self._validate_file_parallel(filepath, workers, chunk_bytes)
             
-            is_valid = len(all_errors) == 0 if self.strict else len(all_errors) < len(vcards) * 0.1
-            
-            return is_valid, all_errors, all_warnings
+            # Stream the cards; only per-card results and hashes are kept
+            results, hashes = [], []
+            for i, block in enumerate(iter_vcard_blocks(filepath, errors='strict')):
+                text = block.text()
+                results.append(self._validate_cached(text, i))
+                hashes.append(card_hash(text))
+            return CardValidation(results, strict=self.strict, revalidated=len(results), hashes=hashes)
             
         except Exception as e:
             logger.error(f"Validation error: {e}")
-            return False, [str(e)], []
+            return CardValidation([([str(e)], [])], strict=True)
+    
+    def _validate_file_parallel(self, filepath: str, workers: int,
+                                chunk_bytes: Optional[int]) -> CardValidation:
+        """Validate byte ranges in a process pool and renumber the messages"""
+        if chunk_bytes is None:
+            chunk_bytes = max(MIN_CHUNK_BYTES, os.path.getsize(filepath) // (workers * 4))
+        ranges = card_byte_ranges(filepath, chunk_bytes)
+        logger.info(f"Validating {len(ranges)} byte ranges on {workers} workers")
+        
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() yields ranges in file order, so indexes continue across ranges
+            tasks = [(filepath, start, end) for start, end in ranges]
+            for range_results in pool.map(_validate_byte_range, tasks):
+                for errors, warnings in range_results:
+                    prefix = f"vCard {len(results)}: "
+                    results.append(([prefix + m for m in errors], [prefix + m for m in warnings]))
+        return CardValidation(results, strict=self.strict, revalidated=len(results))
+    
+    def revalidate_file(self, filepath: str, previous: CardValidation) -> CardValidation:
+        """
+        Validate a file written by a fix stage, re-checking only changed cards.
+        
+        Every card is compared with the text it was validated on, not only
+        the cards the stage reports: writing re-serializes all of them.
+        Falls back to a full validation when the card count differs from
+        the previous results.
+        """
+        try:
+            texts = [block.text() for block in iter_vcard_blocks(filepath, errors='strict')]
+        except Exception as e:
+            logger.error(f"Validation error: {e}")
+            return CardValidation([([str(e)], [])], strict=True)
+        
+        if len(texts) != len(previous.results):
+            return self.validate_cards(texts)
+        return self.revalidate(previous, dict(enumerate(texts)))
+    
+    def validate_content(self, content: str) -> Tuple[bool, List[str], List[str]]:
+        """Validate vCard file content that is already in memory"""
+        return self.validate_content_cards(content).summary()
+    
+    def validate_content_cards(self, content: str) -> CardValidation:
+        """validate_content with per-card results"""
+        return self.validate_cards(self._split_vcards(content))
+    
+    def validate_cards(self, vcard_texts: List[str]) -> CardValidation:
+        """Validate every card, keeping per-card results for revalidate()"""
+        return CardValidation(
+            [self._validate_cached(text, i) for i, text in enumerate(vcard_texts)],
+            strict=self.strict, revalidated=len(vcard_texts),
+            hashes=[card_hash(text) for text in vcard_texts]
+        )
+    
+    def revalidate(self, previous: CardValidation, changed_texts: Dict[int, str]) -> CardValidation:
+        """
+        Re-check only the cards a fix stage changed.
+        
+        A card is re-checked when its text differs from the text its
+        previous result was computed on (or that text is unknown).
+        
+        Args:
+            previous: Results before the stage (same cards, same order)
+            changed_texts: Card index -> current text of every card that
+                may have changed
+        """
+        results = list(previous.results)
+        hashes = list(previous.hashes) if len(previous.hashes) == len(results) else [None] * len(results)
+        revalidated = 0
+        for index, text in changed_texts.items():
+            key = card_hash(text)
+            if key != hashes[index]:
+                results[index] = self._validate_cached(text, index)
+                hashes[index] = key
+                revalidated += 1
+        return CardValidation(results, strict=self.strict, revalidated=revalidated, hashes=hashes)
+    
+    def _validate_cached(self, vcard_text: str, index: int) -> Tuple[List[str], List[str]]:
+        """_validate_single_vcard with results cached by card content"""
+        # Same form as _split_vcards output (serialized cards end with CRLF)
+        vcard_text = '\n'.join(vcard_text.splitlines())
+        prefix = f"vCard {index}: "
+        key = card_hash(vcard_text)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            self.cache_stats['hits'] += 1
+            return [prefix + m for m in cached[0]], [prefix + m for m in cached[1]]
+        
+        self.cache_stats['misses'] += 1
+        errors, warnings = self._validate_single_vcard(vcard_text, index)
+        if len(self.result_cache) >= self.cache_size:
+            self.result_cache.pop(next(iter(self.result_cache)))
+        self.result_cache[key] = (
+            [m[len(prefix):] if m.startswith(prefix) else m for m in errors],
+            [m[len(prefix):] if m.startswith(prefix) else m for m in warnings]
+        )
+        return errors, warnings
     
     def _split_vcards(self, content: str) -> List[str]:
         """Split file content into individual vCard blocks"""
-        vcards = []
-        current_vcard = []
-        in_vcard = False
-        
-        for line in content.split('\n'):
-            line = line.rstrip('\r\n')
-            
-            if line == 'BEGIN:VCARD':
-                in_vcard = True
-                current_vcard = [line]
-            elif line == 'END:VCARD' and in_vcard:
-                current_vcard.append(line)
-                vcards.append('\n'.join(current_vcard))
-                current_vcard = []
-                in_vcard = False
-            elif in_vcard:
-                current_vcard.append(line)
-        
-        return vcards
+        return [block.text() for block in iter_vcard_blocks(io.StringIO(content))]
     
     def _validate_single_vcard(self, vcard_text: str, index: int) -> Tuple[List[str], List[str]]:
         """
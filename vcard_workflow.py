@@ -8,12 +8,30 @@ This module provides the standard workflow for processing vCard files:
 3. Re-validate
 4. Process with vobject
 
+Two modes share the same stages and report:
+- File mode (default): every stage writes its output file (_FIXED.vcf,
+  _SOFT.vcf) and the next stage reads it back
+- In-memory mode (in_memory=True): cards are parsed once and passed through
+  validate -> hard fix -> validate -> soft fix -> validate as objects; only
+  the final output is written (intermediate files with keep_intermediate=True)
+
+Both modes report per-stage durations in result['stage_timings']. The fix
+stages report which cards they changed, and re-validation after a stage only
+re-checks cards whose written text differs from the validated text
+(cards_revalidated in the validation reports). The first write re-serializes
+every card, so all cards are compared once after the first fix stage.
+
+In file mode, soft_workers > 1 runs soft compliance in a process pool
+(see SoftComplianceChecker.check_and_fix_file).
+
 RULE: Always use vcard library for validation, vobject for manipulation
 """
 
 import os
 import logging
 import shutil
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 from vcard_validator import VCardStandardsValidator
@@ -33,10 +51,14 @@ class VCardWorkflow:
     This ensures all vCards are compliant before processing.
     """
     
-    def __init__(self, auto_fix=True, backup=True, soft_compliance=True):
+    def __init__(self, auto_fix=True, backup=True, soft_compliance=True,
+                 in_memory=False, keep_intermediate=False, soft_workers=1):
         self.auto_fix = auto_fix
         self.backup = backup
         self.soft_compliance = soft_compliance
+        self.in_memory = in_memory
+        self.keep_intermediate = keep_intermediate
+        self.soft_workers = soft_workers
         self.validator = VCardStandardsValidator()
         self.fixer = VCardFixer()
         self.soft_checker = SoftComplianceChecker()
@@ -62,22 +84,30 @@ class VCardWorkflow:
         result = {
             'input_file': filepath,
             'timestamp': datetime.now().isoformat(),
+            'mode': 'in_memory' if self.in_memory else 'file',
             'backup_created': False,
             'fixes_applied': False,
             'final_valid': False,
-            'vcards_parsed': 0
+            'vcards_parsed': 0,
+            'stage_timings': {}
         }
         
         # Step 1: Create backup if requested
         if self.backup:
-            backup_path = self._create_backup(filepath)
+            with self._stage(result, 'backup'):
+                backup_path = self._create_backup(filepath)
             result['backup_created'] = True
             result['backup_path'] = backup_path
             logger.info(f"Backup created: {backup_path}")
         
+        if self.in_memory:
+            return self._process_in_memory(filepath, result)
+        
         # Step 2: Initial validation
         logger.info("Validating vCard file...")
-        is_valid, errors, warnings = self.validator.validate_file(filepath)
+        with self._stage(result, 'initial_validation'):
+            validation = self.validator.validate_file_cards(filepath)
+            is_valid, errors, warnings = validation.summary()
         
         result['initial_validation'] = {
             'valid': is_valid,
@@ -94,7 +124,8 @@ class VCardWorkflow:
             
             # Create fixed version
             fixed_file = filepath.replace('.vcf', '_FIXED.vcf')
-            fix_report = self.fixer.fix_file(filepath, fixed_file)
+            with self._stage(result, 'hard_fix'):
+                fix_report = self.fixer.fix_file(filepath, fixed_file)
             
             result['fixes_applied'] = True
             result['fix_report'] = fix_report
@@ -102,13 +133,16 @@ class VCardWorkflow:
             
             # Re-validate fixed file
             logger.info("Re-validating fixed file...")
-            is_valid, errors, warnings = self.validator.validate_file(fixed_file)
+            with self._stage(result, 'post_fix_validation'):
+                validation = self.validator.revalidate_file(fixed_file, validation)
+                is_valid, errors, warnings = validation.summary()
             
             result['post_fix_validation'] = {
                 'valid': is_valid,
                 'error_count': len(errors),
                 'warning_count': len(warnings),
-                'remaining_errors': errors[:5]
+                'remaining_errors': errors[:5],
+                'cards_revalidated': validation.revalidated
             }
         
         result['final_valid'] = is_valid
@@ -118,11 +152,13 @@ class VCardWorkflow:
             logger.info("Applying soft compliance checks...")
             
             soft_compliant_file = working_file.replace('.vcf', '_SOFT.vcf')
-            soft_result = self.soft_checker.check_and_fix_file(
-                working_file, 
-                soft_compliant_file,
-                default_country='US'
-            )
+            with self._stage(result, 'soft_fix'):
+                soft_result = self.soft_checker.check_and_fix_file(
+                    working_file, 
+                    soft_compliant_file,
+                    default_country='US',
+                    workers=self.soft_workers
+                )
             
             result['soft_compliance_applied'] = True
             result['soft_compliance_report'] = {
@@ -133,13 +169,16 @@ class VCardWorkflow:
             
             # Step 5: Final validation after soft compliance
             logger.info("Final validation after soft compliance...")
-            final_is_valid, final_errors, final_warnings = self.validator.validate_file(working_file)
+            with self._stage(result, 'post_soft_validation'):
+                validation = self.validator.revalidate_file(working_file, validation)
+                final_is_valid, final_errors, final_warnings = validation.summary()
             
             result['post_soft_validation'] = {
                 'valid': final_is_valid,
                 'error_count': len(final_errors),
                 'warning_count': len(final_warnings),
-                'sample_errors': final_errors[:5]
+                'sample_errors': final_errors[:5],
+                'cards_revalidated': validation.revalidated
             }
             
             if not final_is_valid:
@@ -158,27 +197,12 @@ class VCardWorkflow:
             logger.info("Parsing vCards with vobject...")
             
             try:
-                with open(working_file, 'r', encoding='utf-8') as f:
-                    vcard_data = f.read()
-                
-                vcards = list(vobject.readComponents(vcard_data))
-                result['vcards_parsed'] = len(vcards)
-                result['parse_success'] = True
-                result['working_file'] = working_file
-                
-                # Sample data from parsed vCards
-                sample_data = []
-                for vcard in vcards[:5]:  # First 5 as sample
-                    sample = {
-                        'has_fn': hasattr(vcard, 'fn'),
-                        'has_n': hasattr(vcard, 'n'),
-                        'has_version': hasattr(vcard, 'version')
-                    }
-                    if hasattr(vcard, 'fn'):
-                        sample['fn'] = vcard.fn.value
-                    sample_data.append(sample)
-                
-                result['sample_vcards'] = sample_data
+                with self._stage(result, 'parse'):
+                    with open(working_file, 'r', encoding='utf-8') as f:
+                        vcard_data = f.read()
+                    
+                    vcards = list(vobject.readComponents(vcard_data))
+                self._record_parsed(result, vcards, working_file)
                 
             except Exception as e:
                 logger.error(f"Error parsing vCards: {e}")
@@ -190,6 +214,186 @@ class VCardWorkflow:
         
         return result
     
+    def _process_in_memory(self, filepath: str, result: Dict[str, any]) -> Dict[str, any]:
+        """
+        Steps 2-6 of process_file on parsed objects.
+        
+        The file is read and parsed once. After each fix stage only the cards
+        it changed are serialized and re-validated; only the final output is
+        written to disk.
+        """
+        with self._stage(result, 'read'):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                content = f.read()
+        
+        # Step 2: Initial validation (on the original text)
+        logger.info("Validating vCard content...")
+        with self._stage(result, 'initial_validation'):
+            validation = self.validator.validate_content_cards(content)
+            is_valid, errors, warnings = validation.summary()
+        
+        result['initial_validation'] = {
+            'valid': is_valid,
+            'error_count': len(errors),
+            'warning_count': len(warnings),
+            'sample_errors': errors[:5]
+        }
+        
+        try:
+            with self._stage(result, 'parse'):
+                vcards = list(vobject.readComponents(content))
+        except Exception as e:
+            logger.error(f"Error parsing vCards: {e}")
+            result['final_valid'] = is_valid
+            result['parse_success'] = False
+            result['parse_error'] = str(e)
+            return result
+        del content
+        
+        working_file = filepath
+        output_file = None
+        # Results are of the original text until every card has been compared
+        # with its serialized form once
+        serialized = False
+        
+        # Step 3: Hard fixes
+        if not is_valid and self.auto_fix:
+            logger.info(f"{len(errors)} errors. Applying fixes in memory...")
+            initial_report = {
+                'initial_valid': is_valid,
+                'initial_errors': len(errors),
+                'initial_warnings': len(warnings),
+                'sample_errors': errors[:5]
+            }
+            
+            with self._stage(result, 'hard_fix'):
+                vcards = self.fixer.fix_vcards(vcards)
+            output_file = working_file = filepath.replace('.vcf', '_FIXED.vcf')
+            
+            with self._stage(result, 'post_fix_validation'):
+                validation = self._revalidate(validation, vcards, self.fixer.changed_cards, serialized)
+                is_valid, errors, warnings = validation.summary()
+            serialized = True
+            if self.keep_intermediate:
+                self._write(self._serialize(vcards), working_file)
+            
+            result['fixes_applied'] = True
+            result['fix_report'] = {
+                'status': 'fixed',
+                'initial_report': initial_report,
+                'final_report': {
+                    'final_valid': is_valid,
+                    'final_errors': len(errors),
+                    'final_warnings': len(warnings),
+                    'remaining_errors': errors[:5]
+                },
+                'fixes_applied': self.fixer.fix_stats,
+                'changed_cards': dict(self.fixer.changed_cards),
+                'improvement': {
+                    'errors_fixed': initial_report['initial_errors'] - len(errors),
+                    'warnings_reduced': initial_report['initial_warnings'] - len(warnings)
+                }
+            }
+            result['post_fix_validation'] = {
+                'valid': is_valid,
+                'error_count': len(errors),
+                'warning_count': len(warnings),
+                'remaining_errors': errors[:5],
+                'cards_revalidated': validation.revalidated
+            }
+        
+        result['final_valid'] = is_valid
+        
+        # Step 4: Soft compliance
+        if self.soft_compliance and (is_valid or len(errors) < 100):
+            logger.info("Applying soft compliance checks in memory...")
+            with self._stage(result, 'soft_fix'):
+                vcards, issues_found = self.soft_checker.check_and_fix_vcards(vcards, default_country='US')
+            output_file = working_file = working_file.replace('.vcf', '_SOFT.vcf')
+            
+            result['soft_compliance_applied'] = True
+            result['soft_compliance_report'] = {
+                'issues_found': len(issues_found),
+                'fixes_applied': self.soft_checker.fix_stats
+            }
+            
+            # Step 5: Final validation after soft compliance
+            with self._stage(result, 'post_soft_validation'):
+                validation = self._revalidate(validation, vcards, self.soft_checker.changed_cards, serialized)
+                is_valid, errors, warnings = validation.summary()
+            
+            result['post_soft_validation'] = {
+                'valid': is_valid,
+                'error_count': len(errors),
+                'warning_count': len(warnings),
+                'sample_errors': errors[:5],
+                'cards_revalidated': validation.revalidated
+            }
+            if not is_valid:
+                logger.warning(f"Soft compliance introduced {len(errors)} validation errors!")
+            result['final_valid'] = is_valid
+        
+        # Step 6: Write the final output once
+        if output_file:
+            with self._stage(result, 'write'):
+                self._write(self._serialize(vcards), output_file)
+            result['output_file'] = output_file
+        
+        if is_valid or len(errors) < 100:
+            self._record_parsed(result, vcards, working_file)
+        else:
+            logger.error(f"File still has too many errors ({len(errors)}), cannot proceed")
+            result['skip_reason'] = f"Too many validation errors: {len(errors)}"
+        
+        return result
+    
+    @contextmanager
+    def _stage(self, result: Dict[str, any], name: str):
+        """Record the duration of a workflow stage in result['stage_timings']"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            result['stage_timings'][name] = round(time.perf_counter() - start, 4)
+    
+    def _record_parsed(self, result: Dict[str, any], vcards: List, working_file: str):
+        result['vcards_parsed'] = len(vcards)
+        result['parse_success'] = True
+        result['working_file'] = working_file
+        
+        # Sample data from parsed vCards
+        sample_data = []
+        for vcard in vcards[:5]:  # First 5 as sample
+            sample = {
+                'has_fn': hasattr(vcard, 'fn'),
+                'has_n': hasattr(vcard, 'n'),
+                'has_version': hasattr(vcard, 'version')
+            }
+            if hasattr(vcard, 'fn'):
+                sample['fn'] = vcard.fn.value
+            sample_data.append(sample)
+        
+        result['sample_vcards'] = sample_data
+    
+    def _revalidate(self, validation, vcards: List, changed_cards: Dict[int, str], serialized: bool):
+        """
+        Re-check the changed cards (everything if the card count differs).
+        
+        Until the results are of serialized text, every card is serialized
+        and compared, since serializing can change cards no stage touched.
+        """
+        if len(validation.results) != len(vcards):
+            return self.validator.validate_cards([vcard.serialize() for vcard in vcards])
+        indexes = changed_cards if serialized else range(len(vcards))
+        return self.validator.revalidate(validation, {i: vcards[i].serialize() for i in indexes})
+    
+    def _serialize(self, vcards: List) -> str:
+        return ''.join(vcard.serialize() for vcard in vcards)
+    
+    def _write(self, content: str, output_path: str):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    
     def _create_backup(self, filepath: str) -> str:
         """Create timestamped backup of vCard file"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
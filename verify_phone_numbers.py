@@ -5,21 +5,12 @@ Verify all phone numbers from original databases are in the master phonebook
 
 import vobject
 import os
-import re
 from collections import defaultdict
+import contact_normalization
 
 def normalize_phone(phone):
-    """Normalize phone number for comparison"""
-    # Remove all non-digits
-    digits = re.sub(r'\D', '', phone)
-    # Remove leading zeros
-    digits = digits.lstrip('0')
-    # Handle Austrian numbers
-    if digits.startswith('43'):
-        return '+' + digits
-    elif len(digits) == 10 and digits[0] in '6789':  # Austrian mobile
-        return '+43' + digits
-    return digits
+    """Normalize phone number for comparison (Austrian default region)"""
+    return contact_normalization.normalize_phone(phone)
 
 def extract_phones_from_vcf(filepath):
     """Extract all phone numbers from a VCF file"""